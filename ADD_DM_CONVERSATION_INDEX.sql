@@ -0,0 +1,139 @@
+-- DM CONVERSATION INDEX
+-- Per-user inbox summary for messaging_core.get_conversations()
+-- Run this in Supabase SQL Editor
+
+-- ============================================
+-- SUMMARY TABLE
+-- ============================================
+-- One row per user per conversation, kept current by
+-- send_direct_message() and mark_dm_as_read() through the functions below
+
+CREATE TABLE IF NOT EXISTS public.dm_conversations (
+    user_email TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    other_email TEXT,
+    other_name TEXT,
+    last_message TEXT,
+    last_message_time TIMESTAMPTZ,
+    last_sender_email TEXT,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_email, conversation_id)
+);
+
+-- The inbox query: one user's conversations, newest first
+CREATE INDEX IF NOT EXISTS idx_dm_conversations_recent
+    ON public.dm_conversations(user_email, last_message_time DESC);
+
+-- Reading one conversation
+CREATE INDEX IF NOT EXISTS idx_direct_messages_conversation
+    ON public.direct_messages(conversation_id, created_at);
+
+ALTER TABLE public.dm_conversations ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all operations on dm_conversations" ON public.dm_conversations;
+CREATE POLICY "Allow all operations on dm_conversations" ON public.dm_conversations
+    FOR ALL USING (true) WITH CHECK (true);
+
+-- ============================================
+-- MAINTENANCE FUNCTIONS
+-- ============================================
+
+-- New message: both participants' rows; only the recipient's unread count
+-- goes up. A message older than the stored last message (clock skew between
+-- sessions) only counts towards unread.
+CREATE OR REPLACE FUNCTION public.record_dm_conversation(
+    p_conversation_id TEXT,
+    p_sender_email TEXT,
+    p_sender_name TEXT,
+    p_recipient_email TEXT,
+    p_recipient_name TEXT,
+    p_content TEXT,
+    p_created_at TIMESTAMPTZ
+)
+RETURNS VOID
+LANGUAGE sql
+SET search_path = public
+AS $$
+    -- One statement per row: a note to self touches the same row twice
+    INSERT INTO public.dm_conversations AS c (user_email, conversation_id, other_email, other_name,
+        last_message, last_message_time, last_sender_email, unread_count)
+    VALUES (p_sender_email, p_conversation_id, p_recipient_email, p_recipient_name,
+            p_content, p_created_at, p_sender_email, 0)
+    ON CONFLICT (user_email, conversation_id) DO UPDATE SET
+        other_name = COALESCE(EXCLUDED.other_name, c.other_name),
+        last_message = CASE WHEN EXCLUDED.last_message_time >= c.last_message_time OR c.last_message_time IS NULL
+                            THEN EXCLUDED.last_message ELSE c.last_message END,
+        last_sender_email = CASE WHEN EXCLUDED.last_message_time >= c.last_message_time OR c.last_message_time IS NULL
+                                 THEN EXCLUDED.last_sender_email ELSE c.last_sender_email END,
+        last_message_time = GREATEST(c.last_message_time, EXCLUDED.last_message_time),
+        updated_at = now();
+
+    INSERT INTO public.dm_conversations AS c (user_email, conversation_id, other_email, other_name,
+        last_message, last_message_time, last_sender_email, unread_count)
+    VALUES (p_recipient_email, p_conversation_id, p_sender_email, p_sender_name,
+            p_content, p_created_at, p_sender_email, 1)
+    ON CONFLICT (user_email, conversation_id) DO UPDATE SET
+        other_name = COALESCE(EXCLUDED.other_name, c.other_name),
+        last_message = CASE WHEN EXCLUDED.last_message_time >= c.last_message_time OR c.last_message_time IS NULL
+                            THEN EXCLUDED.last_message ELSE c.last_message END,
+        last_sender_email = CASE WHEN EXCLUDED.last_message_time >= c.last_message_time OR c.last_message_time IS NULL
+                                 THEN EXCLUDED.last_sender_email ELSE c.last_sender_email END,
+        last_message_time = GREATEST(c.last_message_time, EXCLUDED.last_message_time),
+        unread_count = c.unread_count + 1,
+        updated_at = now();
+$$;
+
+-- A message was read (mark_dm_as_read only calls this for a DM that was unread)
+CREATE OR REPLACE FUNCTION public.mark_dm_conversation_read(
+    p_user_email TEXT,
+    p_conversation_id TEXT,
+    p_count INTEGER DEFAULT 1
+)
+RETURNS VOID
+LANGUAGE sql
+SET search_path = public
+AS $$
+    UPDATE public.dm_conversations
+    SET unread_count = GREATEST(unread_count - p_count, 0),
+        updated_at = now()
+    WHERE user_email = p_user_email AND conversation_id = p_conversation_id;
+$$;
+
+-- Rebuild every summary from direct_messages (backfill / repair)
+CREATE OR REPLACE FUNCTION public.rebuild_dm_conversations()
+RETURNS VOID
+LANGUAGE sql
+SET search_path = public
+AS $$
+    DELETE FROM public.dm_conversations WHERE true;
+
+    INSERT INTO public.dm_conversations (user_email, conversation_id, other_email, other_name,
+        last_message, last_message_time, last_sender_email, unread_count)
+    SELECT DISTINCT ON (p.user_email, p.conversation_id)
+        p.user_email, p.conversation_id, p.other_email, p.other_name,
+        p.content, p.created_at, p.sender_email,
+        count(*) FILTER (WHERE p.unread) OVER (PARTITION BY p.user_email, p.conversation_id)
+    FROM (
+        SELECT sender_email AS user_email, conversation_id, recipient_email AS other_email,
+               recipient_name AS other_name, content, created_at, sender_email, false AS unread
+        FROM public.direct_messages
+        WHERE NOT coalesce(is_deleted, false)
+        UNION ALL
+        SELECT recipient_email, conversation_id, sender_email, sender_name,
+               content, created_at, sender_email, read_at IS NULL
+        FROM public.direct_messages
+        WHERE NOT coalesce(is_deleted, false)
+    ) p
+    ORDER BY p.user_email, p.conversation_id, p.created_at DESC, p.unread DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.record_dm_conversation(TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, TIMESTAMPTZ) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.mark_dm_conversation_read(TEXT, TEXT, INTEGER) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_dm_conversations() TO authenticated;
+
+-- ============================================
+-- BACKFILL EXISTING MESSAGES
+-- ============================================
+
+SELECT public.rebuild_dm_conversations();
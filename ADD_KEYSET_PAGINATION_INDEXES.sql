@@ -0,0 +1,24 @@
+-- KEYSET PAGINATION INDEXES
+-- Let supabase_database.query_page / iter_rows read one page at a time
+-- Run this in Supabase SQL Editor
+
+-- Pages are ordered by (<sort column>, id) within a user's rows, and continue
+-- from the last row shown, so each index below serves both the user filter
+-- and the page order without sorting the whole table.
+-- Sort columns: created_at (ptl_patients, users), created_date (appointments),
+-- timestamp (audit_log) - as used by the get_*_page functions.
+
+CREATE INDEX IF NOT EXISTS idx_ptl_patients_user_page
+    ON public.ptl_patients (user_email, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_ptl_patients_page
+    ON public.ptl_patients (created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_user_page
+    ON public.appointments (user_email, created_date, id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_user_page
+    ON public.audit_log (user_email, timestamp, id);
+
+CREATE INDEX IF NOT EXISTS idx_users_page
+    ON public.users (created_at, id);
@@ -0,0 +1,95 @@
+-- MESSAGE SEARCH INDEX
+-- Ranked full-text search for messaging_core.search_messages()
+-- Run this in Supabase SQL Editor
+
+-- ============================================
+-- FULL-TEXT COLUMNS + GIN INDEXES
+-- ============================================
+-- Generated columns: every new message is indexed as it is inserted
+
+ALTER TABLE public.messages ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+ALTER TABLE public.direct_messages ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_messages_search_vector
+    ON public.messages USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_direct_messages_search_vector
+    ON public.direct_messages USING gin (search_vector);
+
+-- Membership lookups for the access check
+CREATE INDEX IF NOT EXISTS idx_channel_members_user_channel
+    ON public.channel_members(user_email, channel_id);
+
+-- ============================================
+-- RANKED SEARCH FUNCTION
+-- ============================================
+-- Every word of p_query must match (websearch syntax: "phrases", -exclude, or).
+-- Channel messages only from channels p_user_email is a member of; DMs only
+-- where p_user_email is sender or recipient, and only when no channel is given.
+-- Ordered by rank, then newest; pass the last row's (search_rank, created_at,
+-- source, id) as p_after_* for the next page.
+
+CREATE OR REPLACE FUNCTION public.search_messages_ranked(
+    p_user_email TEXT,
+    p_query TEXT,
+    p_channel_id TEXT DEFAULT NULL,
+    p_include_dms BOOLEAN DEFAULT true,
+    p_limit INTEGER DEFAULT 20,
+    p_after_rank REAL DEFAULT NULL,
+    p_after_created_at TIMESTAMPTZ DEFAULT NULL,
+    p_after_source TEXT DEFAULT NULL,
+    p_after_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (source TEXT, message JSONB, search_rank REAL, created_at TIMESTAMPTZ, id TEXT, highlight TEXT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', p_query) AS query
+    ),
+    matches AS (
+        SELECT 'channel'::TEXT AS source, to_jsonb(m) - 'search_vector' AS message,
+               ts_rank_cd(m.search_vector, q.query)::REAL AS search_rank,
+               m.created_at, m.id::TEXT AS id, m.content
+        FROM public.messages m
+        JOIN public.channel_members cm
+          ON cm.channel_id = m.channel_id AND cm.user_email = p_user_email
+        CROSS JOIN q
+        WHERE m.search_vector @@ q.query
+          AND NOT coalesce(m.is_deleted, false)
+          AND (p_channel_id IS NULL OR m.channel_id::TEXT = p_channel_id)
+
+        UNION ALL
+
+        SELECT 'dm'::TEXT, to_jsonb(d) - 'search_vector',
+               ts_rank_cd(d.search_vector, q.query)::REAL,
+               d.created_at, d.id::TEXT, d.content
+        FROM public.direct_messages d
+        CROSS JOIN q
+        WHERE p_include_dms AND p_channel_id IS NULL
+          AND (d.sender_email = p_user_email OR d.recipient_email = p_user_email)
+          AND d.search_vector @@ q.query
+          AND NOT coalesce(d.is_deleted, false)
+    ),
+    page AS (
+        SELECT * FROM matches
+        WHERE p_after_rank IS NULL
+           OR (matches.search_rank, matches.created_at, matches.source, matches.id)
+              < (p_after_rank, p_after_created_at, p_after_source, p_after_id)
+        ORDER BY matches.search_rank DESC, matches.created_at DESC, matches.source DESC, matches.id DESC
+        LIMIT least(p_limit, 101)
+    )
+    -- Headlines only for the rows returned
+    SELECT page.source, page.message, page.search_rank, page.created_at, page.id,
+           ts_headline('english', coalesce(page.content, ''), q.query,
+                       'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=24, MinWords=8')
+    FROM page CROSS JOIN q
+    ORDER BY page.search_rank DESC, page.created_at DESC, page.source DESC, page.id DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_messages_ranked(TEXT, TEXT, TEXT, BOOLEAN, INTEGER, REAL, TIMESTAMPTZ, TEXT, TEXT)
+    TO anon, authenticated;
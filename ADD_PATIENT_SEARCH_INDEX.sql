@@ -0,0 +1,74 @@
+-- PATIENT SEARCH INDEX
+-- One ranked, paginated query for patient search (name, NHS number, patient ID)
+-- Run this in Supabase SQL Editor
+
+-- ============================================
+-- COMBINED SEARCH TEXT + TRIGRAM INDEX
+-- ============================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Every searchable field in one lowercase column (NHS number also without
+-- spaces), one field per line so a search never matches across two fields
+ALTER TABLE public.patients ADD COLUMN IF NOT EXISTS search_text TEXT
+    GENERATED ALWAYS AS (
+        lower(
+            coalesce(full_name, '') || E'\n' ||
+            coalesce(first_name, '') || E'\n' ||
+            coalesce(surname, '') || E'\n' ||
+            coalesce(patient_id, '') || E'\n' ||
+            coalesce(nhs_number, '') || E'\n' ||
+            regexp_replace(coalesce(nhs_number, ''), '[^0-9]', '', 'g')
+        )
+    ) STORED;
+
+-- Trigram GIN index: serves LIKE '%term%' without scanning the table
+CREATE INDEX IF NOT EXISTS idx_patients_search_text_trgm
+    ON public.patients USING gin (search_text gin_trgm_ops);
+
+-- ============================================
+-- RANKED SEARCH FUNCTION
+-- ============================================
+-- Rank 0: exact patient ID / NHS number
+-- Rank 1: first name or surname starts with the term
+-- Rank 2: full name contains the term
+-- Rank 3: any other field contains the term
+-- Ties broken by name then patient ID. total_count is the number of
+-- matches before LIMIT/OFFSET.
+
+CREATE OR REPLACE FUNCTION public.search_patients_ranked(
+    p_user_email TEXT,
+    p_query TEXT,
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (patient JSONB, search_rank INTEGER, total_count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    WITH q AS (
+        SELECT
+            lower(trim(p_query)) AS term,
+            regexp_replace(p_query, '[^0-9]', '', 'g') AS digits,
+            replace(replace(replace(lower(trim(p_query)), '\', '\\'), '%', '\%'), '_', '\_') AS escaped
+    )
+    SELECT
+        to_jsonb(p) - 'search_text' AS patient,
+        CASE
+            WHEN lower(coalesce(p.patient_id, '')) = q.term
+                 OR (q.digits <> '' AND regexp_replace(coalesce(p.nhs_number, ''), '[^0-9]', '', 'g') = q.digits) THEN 0
+            WHEN lower(coalesce(p.first_name, '')) LIKE q.escaped || '%'
+                 OR lower(coalesce(p.surname, '')) LIKE q.escaped || '%' THEN 1
+            WHEN lower(coalesce(p.full_name, '')) LIKE '%' || q.escaped || '%' THEN 2
+            ELSE 3
+        END AS search_rank,
+        count(*) OVER () AS total_count
+    FROM public.patients p, q
+    WHERE p.user_email = p_user_email
+      AND p.search_text LIKE '%' || q.escaped || '%'
+    ORDER BY search_rank, lower(coalesce(p.full_name, '')), p.patient_id
+    LIMIT p_limit OFFSET p_offset;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_patients_ranked(TEXT, TEXT, INTEGER, INTEGER) TO anon, authenticated;
@@ -34,6 +34,7 @@ try:
         get_clinics_for_user,
         create_appointment as supabase_create_appointment,
         get_appointments_for_user,
+        get_appointments_by_ids as supabase_get_appointments_by_ids,
         update_appointment as supabase_update_appointment
     )
     SUPABASE_ENABLED = True
@@ -45,6 +46,11 @@ except Exception as e:
     SUPABASE_ENABLED = False
     print(f"❌ Error importing Supabase: {e}")
 
+# Cross-module patient index (kept current by the booking and status-change
+# functions; appointments are cancelled, never deleted. The hooks log and
+# swallow index errors, so they never fail a save)
+from patient_index import index_patient_record, update_patient_record
+
 
 def get_current_user_email():
     """Get current logged-in user's email"""
@@ -90,6 +96,141 @@ def save_clinics(data):
     pass
 
 
+# ============================================
+# SLOT AVAILABILITY INDEX
+# ============================================
+
+# Rebuild from storage after this long, to pick up other sessions' bookings
+AVAILABILITY_INDEX_TTL_SECONDS = 300
+
+
+def get_appointment_slot(appointment: Dict) -> Optional[tuple]:
+    """(clinic_id, date, time) an appointment occupies, or None"""
+    clinic_id = appointment.get('clinic_id') or appointment.get('clinic_location')
+    appointment_date = appointment.get('appointment_date')
+    slot_time = appointment.get('slot_time') or appointment.get('appointment_time')
+    if not (clinic_id and appointment_date and slot_time):
+        return None
+    return (clinic_id, appointment_date, slot_time)
+
+
+class SlotAvailabilityIndex:
+    """
+    Booked slots per clinic and date
+    
+    Each clinic/date has a bitset over the clinic's slot template (bit i set =
+    template slot i booked), plus a count of active bookings per slot so a
+    slot only frees up when its last booking is cancelled. Built once from
+    storage and updated by book/cancel/reschedule.
+    """
+    
+    def __init__(self, appointments: List[Dict], clinics: List[Dict]):
+        self.built_at = datetime.now()
+        self.clinics: Dict[str, Dict] = {}
+        self.slot_bits: Dict[str, Dict[str, int]] = {}  # clinic_id -> {slot time: bit}
+        self.booked: Dict[tuple, int] = {}  # (clinic_id, date) -> bitset of booked template slots
+        self.counts: Dict[tuple, int] = {}  # (clinic_id, date, time) -> active bookings
+        self.by_appointment: Dict[str, List[tuple]] = {}  # appointment_id -> slots held
+        
+        for clinic in clinics:
+            self.register_clinic(clinic)
+        for appointment in appointments:
+            self.add(appointment)
+    
+    def register_clinic(self, clinic: Dict):
+        """Add (or refresh) a clinic's slot template"""
+        clinic_id = clinic['clinic_id']
+        bits = {slot['time']: i for i, slot in enumerate(clinic.get('slots_template', []))}
+        self.clinics[clinic_id] = clinic
+        self.slot_bits[clinic_id] = bits
+        
+        # Re-derive this clinic's bitsets against the (possibly new) template
+        for key in [key for key in self.booked if key[0] == clinic_id]:
+            del self.booked[key]
+        for (slot_clinic, slot_date, slot_time), count in self.counts.items():
+            if slot_clinic == clinic_id and slot_time in bits:
+                key = (clinic_id, slot_date)
+                self.booked[key] = self.booked.get(key, 0) | (1 << bits[slot_time])
+    
+    def add(self, appointment: Dict):
+        """Record an active booking"""
+        slot = get_appointment_slot(appointment)
+        if slot is None or appointment.get('status') == 'CANCELLED':
+            return
+        
+        self.counts[slot] = self.counts.get(slot, 0) + 1
+        bit = self.slot_bits.get(slot[0], {}).get(slot[2])
+        if bit is not None:
+            key = slot[:2]
+            self.booked[key] = self.booked.get(key, 0) | (1 << bit)
+        
+        appointment_id = appointment.get('appointment_id')
+        if appointment_id:
+            self.by_appointment.setdefault(appointment_id, []).append(slot)
+    
+    def remove(self, appointment_id: str):
+        """Release the slots held by a cancelled appointment"""
+        for slot in self.by_appointment.pop(appointment_id, []):
+            remaining = self.counts.get(slot, 0) - 1
+            if remaining > 0:
+                self.counts[slot] = remaining
+                continue
+            
+            self.counts.pop(slot, None)
+            bit = self.slot_bits.get(slot[0], {}).get(slot[2])
+            if bit is not None:
+                key = slot[:2]
+                self.booked[key] = self.booked.get(key, 0) & ~(1 << bit)
+    
+    def is_available(self, clinic_id: str, appointment_date: str, slot_time: str) -> bool:
+        return not self.counts.get((clinic_id, appointment_date, slot_time))
+    
+    def get_clinic(self, clinic_id: str) -> Optional[Dict]:
+        """Clinic template (reloads clinics once if it was created since the build)"""
+        if clinic_id not in self.clinics:
+            for clinic in load_clinics()['clinics']:
+                if clinic['clinic_id'] not in self.clinics:
+                    self.register_clinic(clinic)
+        return self.clinics.get(clinic_id)
+    
+    def free_slots(self, clinic_id: str, appointment_date: str) -> List[Dict]:
+        """Template slots not booked on a date, in template order"""
+        clinic = self.get_clinic(clinic_id)
+        if not clinic:
+            return []
+        booked = self.booked.get((clinic_id, appointment_date), 0)
+        return [slot for i, slot in enumerate(clinic.get('slots_template', [])) if not (booked >> i) & 1]
+
+
+_availability_indexes: Dict[str, SlotAvailabilityIndex] = {}
+
+
+def get_availability_index() -> SlotAvailabilityIndex:
+    """The current user's availability index (built on first use, refreshed after the TTL)"""
+    user_email = get_current_user_email()
+    index = _availability_indexes.get(user_email)
+    
+    if index is None or (datetime.now() - index.built_at).total_seconds() > AVAILABILITY_INDEX_TTL_SECONDS:
+        appointments = list(load_appointments().get('appointments', []))
+        
+        # Bookings that fell back to session storage hold their slots too
+        try:
+            import streamlit as st
+            appointments.extend(st.session_state.get('appointments', []))
+        except:
+            pass
+        
+        index = SlotAvailabilityIndex(appointments, load_clinics().get('clinics', []))
+        _availability_indexes[user_email] = index
+    
+    return index
+
+
+def refresh_availability_index():
+    """Drop the cached index so the next lookup rebuilds it from storage"""
+    _availability_indexes.pop(get_current_user_email(), None)
+
+
 def create_clinic_template(
     clinic_name: str,
     specialty: str,
@@ -180,6 +321,8 @@ def mark_appointment_attended(appointment_id: str) -> bool:
     
     if SUPABASE_ENABLED:
         success, _ = update_appointment(user_email, appointment_id, updates)
+        if success:
+            update_patient_record('appointments', appointment_id, updates)
         return success
     else:
         appointments = load_appointments()
@@ -187,6 +330,7 @@ def mark_appointment_attended(appointment_id: str) -> bool:
             if appt['appointment_id'] == appointment_id:
                 appt.update(updates)
                 save_appointments(appointments)
+                update_patient_record('appointments', appointment_id, updates)
                 return True
         return False
 
@@ -204,6 +348,8 @@ def mark_appointment_dna(appointment_id: str, reason: str = "") -> bool:
     
     if SUPABASE_ENABLED:
         success, _ = update_appointment(user_email, appointment_id, updates)
+        if success:
+            update_patient_record('appointments', appointment_id, updates)
         return success
     else:
         appointments = load_appointments()
@@ -211,15 +357,25 @@ def mark_appointment_dna(appointment_id: str, reason: str = "") -> bool:
             if appt['appointment_id'] == appointment_id:
                 appt.update(updates)
                 save_appointments(appointments)
+                update_patient_record('appointments', appointment_id, updates)
                 return True
         return False
 
 
+def get_appointments_by_ids(appointment_ids: List[str]) -> List[Dict]:
+    """The current user's appointments with these ids"""
+    if SUPABASE_ENABLED:
+        # By-id query instead of loading every appointment
+        return supabase_get_appointments_by_ids(appointment_ids, get_current_user_email())
+    
+    wanted = set(appointment_ids)
+    return [a for a in load_appointments().get('appointments', []) if a.get('appointment_id') in wanted]
+
+
 def get_appointment_by_id(appointment_id: str) -> Optional[Dict]:
     """Get specific appointment by ID"""
-    appointments = load_appointments()
-    all_appointments = appointments.get('appointments', [])
-    return next((a for a in all_appointments if a['appointment_id'] == appointment_id), None)
+    appointments = get_appointments_by_ids([appointment_id])
+    return appointments[0] if appointments else None
 
 
 def get_dna_rate(clinic_id: str = None, days: int = 30) -> Dict:
@@ -323,6 +479,8 @@ def book_appointment(
         print(f"📊 Supabase save result: success={success}, result={result}")
         if success:
             print(f"✅ Appointment saved to Supabase successfully!")
+            mark_slot_booked(clinic_id, appointment_date, slot_time, appointment_id)
+            index_patient_record('appointments', appointment_id, appointment_data)
             return {'success': True, 'appointment_id': appointment_id, 'confirmation': f"Appointment booked for {appointment_date} at {slot_time}", 'details': appointment_data, 'storage': 'supabase'}
         else:
             error_msg = f"Supabase error: {result}" if result else "Unknown Supabase error"
@@ -336,6 +494,8 @@ def book_appointment(
         if 'appointments' not in st.session_state:
             st.session_state.appointments = []
         st.session_state.appointments.append(appointment_data)
+        mark_slot_booked(clinic_id, appointment_date, slot_time, appointment_id)
+        index_patient_record('appointments', appointment_id, appointment_data)
         return {'success': True, 'appointment_id': appointment_id, 'confirmation': f"Appointment booked for {appointment_date} at {slot_time}", 'details': appointment_data, 'storage': 'session'}
     except:
         # Last resort: file storage
@@ -348,23 +508,16 @@ def book_appointment(
                 json.dump(appointments, f, indent=2)
         except:
             pass
+        mark_slot_booked(clinic_id, appointment_date, slot_time, appointment_id)
+        index_patient_record('appointments', appointment_id, appointment_data)
         return {'success': True, 'appointment_id': appointment_id, 'confirmation': f"Appointment booked for {appointment_date} at {slot_time}", 'details': appointment_data, 'storage': 'file'}
 
 
 def check_slot_availability(clinic_id: str, appointment_date: str, slot_time: str) -> bool:
     """Check if appointment slot is available"""
     
-    appointments = load_appointments()
-    
-    # Check if slot already booked
-    for appt in appointments['appointments']:
-        if (appt['clinic_id'] == clinic_id and 
-            appt['appointment_date'] == appointment_date and 
-            appt['slot_time'] == slot_time and
-            appt['status'] != 'CANCELLED'):
-            return False
-    
-    return True
+    # Constant-time lookup in the availability index
+    return get_availability_index().is_available(clinic_id, appointment_date, slot_time)
 
 
 def ai_suggest_alternative_slots(clinic_id: str, preferred_date: str, patient_data: Dict) -> List[Dict]:
@@ -373,15 +526,10 @@ def ai_suggest_alternative_slots(clinic_id: str, preferred_date: str, patient_da
     Based on patient priority, clinic capacity, and optimization
     """
     
-    clinics = load_clinics()
-    appointments = load_appointments()
+    index = get_availability_index()
     
     # Get clinic details
-    clinic = None
-    for c in clinics['clinics']:
-        if c['clinic_id'] == clinic_id:
-            clinic = c
-            break
+    clinic = index.get_clinic(clinic_id)
     
     if not clinic:
         return []
@@ -397,21 +545,20 @@ def ai_suggest_alternative_slots(clinic_id: str, preferred_date: str, patient_da
         # Check if clinic runs on this day
         if check_date.strftime("%A") == clinic['day_of_week']:
             # Check available slots
-            for slot in clinic['slots_template']:
-                if check_slot_availability(clinic_id, check_date.strftime("%Y-%m-%d"), slot['time']):
-                    # Calculate AI score for this slot
-                    score = ai_score_slot(check_date, slot['time'], patient_data, days_ahead)
-                    
-                    alternatives.append({
-                        'date': check_date.strftime("%Y-%m-%d"),
-                        'time': slot['time'],
-                        'clinic_id': clinic_id,
-                        'clinic_name': clinic['clinic_name'],
-                        'consultant': clinic['consultant'],
-                        'days_from_preferred': days_ahead,
-                        'ai_score': score,
-                        'recommendation': get_score_description(score)
-                    })
+            for slot in index.free_slots(clinic_id, check_date.strftime("%Y-%m-%d")):
+                # Calculate AI score for this slot
+                score = ai_score_slot(check_date, slot['time'], patient_data, days_ahead)
+                
+                alternatives.append({
+                    'date': check_date.strftime("%Y-%m-%d"),
+                    'time': slot['time'],
+                    'clinic_id': clinic_id,
+                    'clinic_name': clinic['clinic_name'],
+                    'consultant': clinic['consultant'],
+                    'days_from_preferred': days_ahead,
+                    'ai_score': score,
+                    'recommendation': get_score_description(score)
+                })
         
         if len(alternatives) >= 10:  # Suggest top 10
             break
@@ -499,38 +646,37 @@ def calculate_dna_risk(patient_data: Dict) -> float:
 
 
 def mark_slot_booked(clinic_id: str, appointment_date: str, slot_time: str, appointment_id: str):
-    """Mark slot as booked in slots database"""
-    # This would update a real-time slots availability system
-    pass
+    """Mark slot as booked in the slot availability index"""
+    get_availability_index().add({
+        'appointment_id': appointment_id,
+        'clinic_id': clinic_id,
+        'appointment_date': appointment_date,
+        'slot_time': slot_time,
+        'status': 'Booked'
+    })
 
 
 def get_available_slots(clinic_id: str, date: str) -> List[Dict]:
     """Get all available slots for a clinic on a specific date"""
     
-    clinics = load_clinics()
-    appointments = load_appointments()
+    index = get_availability_index()
     
     # Get clinic template
-    clinic = None
-    for c in clinics['clinics']:
-        if c['clinic_id'] == clinic_id:
-            clinic = c
-            break
+    clinic = index.get_clinic(clinic_id)
     
     if not clinic:
         return []
     
-    # Check which slots are available
+    # Check which slots are available (bitset lookup)
     available = []
-    for slot in clinic['slots_template']:
-        if check_slot_availability(clinic_id, date, slot['time']):
-            available.append({
-                'time': slot['time'],
-                'duration': slot['duration'],
-                'clinic_name': clinic['clinic_name'],
-                'consultant': clinic['consultant'],
-                'location': clinic['location']
-            })
+    for slot in index.free_slots(clinic_id, date):
+        available.append({
+            'time': slot['time'],
+            'duration': slot['duration'],
+            'clinic_name': clinic['clinic_name'],
+            'consultant': clinic['consultant'],
+            'location': clinic['location']
+        })
     
     return available
 
@@ -548,6 +694,9 @@ def cancel_appointment(appointment_id: str, reason: str, cancelled_by: str = "Pa
 
     if SUPABASE_ENABLED:
         success, _ = supabase_update_appointment(user_email, appointment_id, updates)
+        if success:
+            get_availability_index().remove(appointment_id)
+            update_patient_record('appointments', appointment_id, updates)
         return success
     else:
         appointments = load_appointments()
@@ -555,6 +704,8 @@ def cancel_appointment(appointment_id: str, reason: str, cancelled_by: str = "Pa
             if appt['appointment_id'] == appointment_id:
                 appt.update(updates)
                 save_appointments(appointments)
+                get_availability_index().remove(appointment_id)
+                update_patient_record('appointments', appointment_id, updates)
                 return True
         return False
 
@@ -6,20 +6,32 @@ Features:
 - Upload training documents (PDF, DOCX, TXT)
 - Extract and store knowledge
 - Vector embeddings for semantic search
+- Inverted index with BM25 ranking (updated on add/delete)
 - AI can reference your materials
 - Fine-tuning preparation
 - Material versioning
 """
 
 import json
+import math
 import os
+import re
+import heapq
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 # Database for knowledge base
 KNOWLEDGE_BASE_DB = "ai_knowledge_base.json"
 MATERIALS_DB = "training_materials.json"
+KNOWLEDGE_INDEX_DB = "ai_knowledge_index.json"
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
 
 
 def load_knowledge_base():
@@ -103,11 +115,16 @@ def add_training_material(
     chunks = chunk_content(content, material_id, title)
     
     # Add to knowledge base
+    index = get_knowledge_index()
     kb = load_knowledge_base()
     kb['materials'].append(material)
     kb['chunks'].extend(chunks)
     save_knowledge_base(kb)
     
+    # Index the new chunks (incremental - existing postings untouched)
+    index.add_material(material, chunks)
+    save_knowledge_index(index)
+    
     return material_id
 
 
@@ -162,44 +179,231 @@ def chunk_content(content: str, material_id: str, title: str, chunk_size: int =
     return chunks
 
 
-def search_knowledge_base(query: str, category: str = None, limit: int = 5):
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used by the search index"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class KnowledgeIndex:
     """
-    Search knowledge base for relevant information
+    Inverted index over knowledge base chunks
     
-    Args:
-        query: Search query
-        category: Filter by category (optional)
-        limit: Max results
+    Each chunk gets an integer document id; postings map term -> {doc id:
+    term frequency}. A posting list per category replaces the per-chunk
+    scan of the materials list. Deleting a material leaves its document ids
+    unused until the next full rebuild.
     """
     
+    def __init__(self):
+        self.chunk_ids: List[Optional[str]] = []  # doc id -> chunk_id (None once deleted)
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.categories: Dict[str, set] = {}
+        self.material_docs: Dict[str, List[int]] = {}
+        self.total_length = 0
+        self.live_docs = 0
+        self.kb_signature = None
+        
+        # doc id -> chunk dict (rebuilt from the knowledge base, not persisted)
+        self.docs: List[Optional[Dict]] = []
+    
+    @classmethod
+    def build(cls, kb: Dict) -> "KnowledgeIndex":
+        """Index every chunk of a loaded knowledge base"""
+        index = cls()
+        chunks_by_material: Dict[str, List[Dict]] = {}
+        for chunk in kb.get('chunks', []):
+            chunks_by_material.setdefault(chunk['material_id'], []).append(chunk)
+        
+        categories = {m['material_id']: m.get('category') for m in kb.get('materials', [])}
+        for material_id, chunks in chunks_by_material.items():
+            index.add_material({'material_id': material_id, 'category': categories.get(material_id)}, chunks)
+        return index
+    
+    def add_material(self, material: Dict, chunks: List[Dict]):
+        """Add one material's chunks"""
+        material_id = material['material_id']
+        category = material.get('category')
+        
+        for chunk in chunks:
+            doc_id = len(self.docs)
+            tokens = tokenize(chunk['content'])
+            
+            self.docs.append(chunk)
+            self.chunk_ids.append(chunk['chunk_id'])
+            self.doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                self.postings.setdefault(term, {})[doc_id] = frequency
+            
+            # Chunks of materials without metadata match no category
+            if category is not None:
+                self.categories.setdefault(category, set()).add(doc_id)
+            self.material_docs.setdefault(material_id, []).append(doc_id)
+            self.total_length += len(tokens)
+            self.live_docs += 1
+    
+    def remove_material(self, material_id: str):
+        """Drop one material's chunks from every posting list"""
+        for doc_id in self.material_docs.pop(material_id, []):
+            chunk = self.docs[doc_id]
+            if chunk is None:
+                continue
+            
+            for term in set(tokenize(chunk['content'])):
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+            
+            for members in self.categories.values():
+                members.discard(doc_id)
+            
+            self.total_length -= self.doc_lengths[doc_id]
+            self.live_docs -= 1
+            self.docs[doc_id] = None
+            self.chunk_ids[doc_id] = None
+    
+    def search(self, query: str, category: str = None, limit: int = 5) -> List[Dict]:
+        """Top chunks by BM25 score (ties keep upload order)"""
+        terms = set(tokenize(query))
+        if not terms or not self.live_docs:
+            return []
+        
+        allowed = None
+        if category:
+            allowed = self.categories.get(category)
+            if not allowed:
+                return []
+        
+        average_length = self.total_length / self.live_docs or 1
+        scores: Dict[int, float] = {}
+        
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            
+            idf = math.log((self.live_docs - len(posting) + 0.5) / (len(posting) + 0.5) + 1)
+            for doc_id, frequency in posting.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [dict(self.docs[doc_id]) for doc_id, _ in best]
+    
+    def to_dict(self) -> Dict:
+        return {
+            'kb_signature': self.kb_signature,
+            'chunk_ids': self.chunk_ids,
+            'doc_lengths': self.doc_lengths,
+            # term -> [doc id, frequency, doc id, frequency, ...]
+            'postings': {
+                term: [value for item in posting.items() for value in item]
+                for term, posting in self.postings.items()
+            },
+            'categories': {category: sorted(members) for category, members in self.categories.items()},
+            'material_docs': self.material_docs
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict, kb: Dict) -> Optional["KnowledgeIndex"]:
+        """Restore a saved index; None if it doesn't match the knowledge base"""
+        chunks = {chunk['chunk_id']: chunk for chunk in kb.get('chunks', [])}
+        
+        index = cls()
+        index.kb_signature = data.get('kb_signature')
+        index.chunk_ids = data['chunk_ids']
+        index.doc_lengths = data['doc_lengths']
+        index.postings = {
+            term: dict(zip(flat[::2], flat[1::2]))
+            for term, flat in data['postings'].items()
+        }
+        index.categories = {category: set(members) for category, members in data['categories'].items()}
+        index.material_docs = data['material_docs']
+        
+        for chunk_id, length in zip(index.chunk_ids, index.doc_lengths):
+            if chunk_id is None:
+                index.docs.append(None)
+                continue
+            if chunk_id not in chunks:
+                return None
+            index.docs.append(chunks[chunk_id])
+            index.total_length += length
+            index.live_docs += 1
+        
+        if index.live_docs != len(chunks):
+            return None
+        return index
+
+
+_index_cache: Dict[str, KnowledgeIndex] = {}
+
+
+def _kb_signature():
+    """Identifies the current knowledge base file version"""
+    if not os.path.exists(KNOWLEDGE_BASE_DB):
+        return None
+    stat = os.stat(KNOWLEDGE_BASE_DB)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """
+    Search index for the current knowledge base
+    
+    Kept in memory between queries; reloaded from KNOWLEDGE_INDEX_DB (or
+    rebuilt) only when the knowledge base file has changed.
+    """
+    signature = _kb_signature()
+    cached = _index_cache.get(KNOWLEDGE_BASE_DB)
+    if cached is not None and cached.kb_signature == signature:
+        return cached
+    
     kb = load_knowledge_base()
-    chunks = kb['chunks']
+    index = None
     
-    # Filter by category if specified
-    if category:
-        chunks = [c for c in chunks if any(
-            m['material_id'] == c['material_id'] and m['category'] == category
-            for m in kb['materials']
-        )]
+    if os.path.exists(KNOWLEDGE_INDEX_DB):
+        try:
+            with open(KNOWLEDGE_INDEX_DB, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('kb_signature') == signature:
+                index = KnowledgeIndex.from_dict(data, kb)
+        except (ValueError, KeyError, TypeError):
+            index = None
     
-    # Simple keyword search (can be enhanced with vector embeddings)
-    query_words = query.lower().split()
-    results = []
+    if index is None:
+        index = KnowledgeIndex.build(kb)
+        if signature is not None:
+            save_knowledge_index(index)
     
-    for chunk in chunks:
-        content_lower = chunk['content'].lower()
-        score = sum(1 for word in query_words if word in content_lower)
-        
-        if score > 0:
-            results.append({
-                'chunk': chunk,
-                'score': score
-            })
+    index.kb_signature = signature
+    _index_cache[KNOWLEDGE_BASE_DB] = index
+    return index
+
+
+def save_knowledge_index(index: KnowledgeIndex):
+    """Persist the index, stamped with the knowledge base version it matches"""
+    index.kb_signature = _kb_signature()
+    with open(KNOWLEDGE_INDEX_DB, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(index.to_dict()))
+    _index_cache[KNOWLEDGE_BASE_DB] = index
+
+
+def search_knowledge_base(query: str, category: str = None, limit: int = 5):
+    """
+    Search knowledge base for relevant information
     
-    # Sort by score
-    results.sort(key=lambda x: x['score'], reverse=True)
+    Args:
+        query: Search query
+        category: Filter by category (optional)
+        limit: Max results
+    """
     
-    return [r['chunk'] for r in results[:limit]]
+    # BM25 over the inverted index (can be enhanced with vector embeddings)
+    return get_knowledge_index().search(query, category=category, limit=limit)
 
 
 def get_all_materials():
@@ -231,11 +435,16 @@ def delete_material(material_id: str):
     save_materials(materials)
     
     # Remove from knowledge base
+    index = get_knowledge_index()
     kb = load_knowledge_base()
     kb['materials'] = [m for m in kb['materials'] if m['material_id'] != material_id]
     kb['chunks'] = [c for c in kb['chunks'] if c['material_id'] != material_id]
     save_knowledge_base(kb)
     
+    # Remove its postings (incremental)
+    index.remove_material(material_id)
+    save_knowledge_index(index)
+    
     return True
 
 
@@ -18,6 +18,7 @@ BENEFITS:
 
 import sqlite3
 import json
+import threading
 from datetime import datetime
 from difflib import SequenceMatcher
 import hashlib
@@ -26,6 +27,8 @@ import hashlib
 # Database file
 CACHE_DB = "ai_question_cache.db"
 
+_local = threading.local()
+
 
 def init_cache_database():
     """Initialize the question-answer cache database"""
@@ -54,10 +57,111 @@ def init_cache_database():
     ON question_cache(question_normalized)
     """)
     
+    # Character-trigram inverted index over question_normalized
+    # (one row per distinct trigram per question)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS question_trigrams (
+        trigram TEXT,
+        question_id INTEGER,
+        length INTEGER,
+        grams INTEGER
+    )
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_trigram_lookup
+    ON question_trigrams(trigram, length)
+    """)
+    
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_trigram_question
+    ON question_trigrams(question_id)
+    """)
+    
+    # Index any questions cached before the trigram index existed
+    cursor.execute("""
+    SELECT id, question_normalized FROM question_cache
+    WHERE id NOT IN (SELECT DISTINCT question_id FROM question_trigrams)
+    """)
+    for question_id, question_normalized in cursor.fetchall():
+        index_question(cursor, question_id, question_normalized or "")
+    
     conn.commit()
     conn.close()
 
 
+def get_connection():
+    """This thread's cache connection (opened once, reused across lookups)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_DB)
+        _local.conn = conn
+    return conn
+
+
+def question_trigrams(question_normalized):
+    """Distinct character trigrams of a normalized question (space padded)"""
+    padded = f" {question_normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def index_question(cursor, question_id, question_normalized):
+    """Add one cached question to the trigram index"""
+    grams = question_trigrams(question_normalized)
+    cursor.executemany("""
+    INSERT INTO question_trigrams (trigram, question_id, length, grams)
+    VALUES (?, ?, ?, ?)
+    """, [(gram, question_id, len(question_normalized), len(grams)) for gram in grams])
+
+
+def find_candidates(cursor, question_normalized, similarity_threshold):
+    """
+    Every cached question that could still reach the similarity threshold
+    
+    Two bounds, neither of which drops a question SequenceMatcher would pass:
+    - length: the ratio is at most 2*min(a, b) / (a + b)
+    - shared trigrams (a Dice floor): a ratio r over n = a + b characters
+      means 2M = r*n matched characters in at most n - 2M + 1 blocks, and a
+      block of L characters holds L - 2 trigrams of both strings, so at least
+      5*r*n/2 - 2*n - 2 trigrams are shared (less the question's repeated
+      trigrams, since the index holds distinct ones)
+    When the floor is not positive (short questions, low thresholds) every
+    question of a possible length is a candidate.
+    
+    Returns:
+        (id, question_normalized) of each candidate, in id order
+    """
+    grams = question_trigrams(question_normalized)
+    length = len(question_normalized)
+    threshold = min(max(similarity_threshold, 0.0), 1.0)
+    min_length = int(length * threshold / (2 - threshold))
+    max_length = int(length * (2 - threshold) / threshold) + 1 if threshold > 0 else 1 << 31
+    
+    per_char = 2.5 * threshold - 2
+    slack = 2 + max(length - len(grams), 0)
+    if per_char * (length + min_length) - slack <= 0:
+        cursor.execute("""
+        SELECT id, question_normalized FROM question_cache
+        WHERE id IN (SELECT question_id FROM question_trigrams WHERE length BETWEEN ? AND ?)
+        ORDER BY id
+        """, (min_length, max_length))
+    else:
+        placeholders = ",".join("?" * len(grams))
+        cursor.execute(f"""
+        SELECT id, question_normalized FROM question_cache
+        WHERE id IN (
+            SELECT question_id
+            FROM question_trigrams
+            WHERE trigram IN ({placeholders}) AND length BETWEEN ? AND ?
+            GROUP BY question_id
+            HAVING COUNT(*) >= ? * (? + MAX(length)) - ?
+        )
+        ORDER BY id
+        """, (*grams, min_length, max_length, per_char, length, slack))
+    
+    return cursor.fetchall()
+
+
 def normalize_question(question):
     """
     Normalize question for better matching
@@ -102,7 +206,7 @@ def search_cache(question, similarity_threshold=0.85):
         Cached answer if found, None otherwise
     """
     try:
-        conn = sqlite3.connect(CACHE_DB)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # First try exact match by hash
@@ -117,7 +221,6 @@ def search_cache(question, similarity_threshold=0.85):
         if result:
             # Exact match found!
             update_cache_usage(question_hash, conn)
-            conn.close()
             return {
                 'question': result[0],
                 'answer': result[1],
@@ -126,40 +229,46 @@ def search_cache(question, similarity_threshold=0.85):
                 'match_type': 'exact'
             }
         
-        # No exact match, try similarity search
+        # No exact match, try similarity search - the trigram index narrows
+        # the cache to the questions that can still match before the exact check
         question_normalized = normalize_question(question)
         
-        cursor.execute("""
-        SELECT question_hash, question_text, question_normalized, 
-               answer_text, times_used, source
-        FROM question_cache
-        """)
-        
-        all_cached = cursor.fetchall()
-        
-        best_match = None
+        best_id = None
         best_similarity = 0.0
         
-        for cached in all_cached:
-            cached_hash, cached_q, cached_norm, cached_a, times_used, source = cached
-            similarity = calculate_similarity(question_normalized, cached_norm)
+        for cached_id, cached_norm in find_candidates(cursor, question_normalized, similarity_threshold):
+            # Cheap upper bounds of the ratio first (same answer, less work)
+            matcher = SequenceMatcher(None, question_normalized, cached_norm)
+            needed = max(similarity_threshold, best_similarity)
+            if matcher.real_quick_ratio() < needed or matcher.quick_ratio() < needed:
+                continue
+            similarity = matcher.ratio()
             
             if similarity > best_similarity and similarity >= similarity_threshold:
                 best_similarity = similarity
-                best_match = {
-                    'hash': cached_hash,
-                    'question': cached_q,
-                    'answer': cached_a,
-                    'times_used': times_used,
-                    'source': source,
-                    'match_type': 'similar',
-                    'similarity': similarity
-                }
+                best_id = cached_id
         
-        if best_match:
-            update_cache_usage(best_match['hash'], conn)
+        if best_id is None:
+            return None
+        
+        cursor.execute("""
+        SELECT question_hash, question_text, answer_text, times_used, source
+        FROM question_cache
+        WHERE id = ?
+        """, (best_id,))
+        cached_hash, cached_q, cached_a, times_used, source = cursor.fetchone()
+        best_match = {
+            'hash': cached_hash,
+            'question': cached_q,
+            'answer': cached_a,
+            'times_used': times_used,
+            'source': source,
+            'match_type': 'similar',
+            'similarity': best_similarity
+        }
+        
+        update_cache_usage(cached_hash, conn)
         
-        conn.close()
         return best_match
         
     except Exception as e:
@@ -174,16 +283,16 @@ def update_cache_usage(question_hash, conn=None):
         conn = sqlite3.connect(CACHE_DB)
         close_conn = True
     
-    cursor = conn.cursor()
-    cursor.execute("""
-    UPDATE question_cache
-    SET times_used = times_used + 1,
-        last_used_date = ?,
-        cost_saved = cost_saved + 0.03
-    WHERE question_hash = ?
-    """, (datetime.now().isoformat(), question_hash))
-    
-    conn.commit()
+    # Commits, or rolls back on error (the thread's shared connection
+    # must never be left inside a failed transaction)
+    with conn:
+        conn.execute("""
+        UPDATE question_cache
+        SET times_used = times_used + 1,
+            last_used_date = ?,
+            cost_saved = cost_saved + 0.03
+        WHERE question_hash = ?
+        """, (datetime.now().isoformat(), question_hash))
     
     if close_conn:
         conn.close()
@@ -199,44 +308,47 @@ def save_to_cache(question, answer, source="openai"):
         source: Where answer came from (openai, builtin, etc.)
     """
     try:
-        conn = sqlite3.connect(CACHE_DB)
-        cursor = conn.cursor()
+        conn = get_connection()
         
         question_hash = get_question_hash(question)
         question_normalized = normalize_question(question)
         
-        # Check if already exists
-        cursor.execute("""
-        SELECT id FROM question_cache WHERE question_hash = ?
-        """, (question_hash,))
-        
-        if cursor.fetchone():
-            # Already exists, update it
-            cursor.execute("""
-            UPDATE question_cache
-            SET answer_text = ?,
-                last_used_date = ?
-            WHERE question_hash = ?
-            """, (answer, datetime.now().isoformat(), question_hash))
-        else:
-            # New entry
+        # One transaction: committed, or rolled back on error so the
+        # thread's shared connection is clean for the next call
+        with conn:
+            cursor = conn.cursor()
+            
+            # Check if already exists
             cursor.execute("""
-            INSERT INTO question_cache 
-            (question_hash, question_text, question_normalized, answer_text, 
-             source, created_date, last_used_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                question_hash,
-                question,
-                question_normalized,
-                answer,
-                source,
-                datetime.now().isoformat(),
-                datetime.now().isoformat()
-            ))
+            SELECT id FROM question_cache WHERE question_hash = ?
+            """, (question_hash,))
+            
+            if cursor.fetchone():
+                # Already exists, update it
+                cursor.execute("""
+                UPDATE question_cache
+                SET answer_text = ?,
+                    last_used_date = ?
+                WHERE question_hash = ?
+                """, (answer, datetime.now().isoformat(), question_hash))
+            else:
+                # New entry
+                cursor.execute("""
+                INSERT INTO question_cache 
+                (question_hash, question_text, question_normalized, answer_text, 
+                 source, created_date, last_used_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    question_hash,
+                    question,
+                    question_normalized,
+                    answer,
+                    source,
+                    datetime.now().isoformat(),
+                    datetime.now().isoformat()
+                ))
+                index_question(cursor, cursor.lastrowid, question_normalized)
         
-        conn.commit()
-        conn.close()
         return True
         
     except Exception as e:
@@ -301,6 +413,11 @@ def clear_old_cache(days=90):
         """, (cutoff_date,))
         
         deleted = cursor.rowcount
+        
+        cursor.execute("""
+        DELETE FROM question_trigrams
+        WHERE question_id NOT IN (SELECT id FROM question_cache)
+        """)
         conn.commit()
         conn.close()
         
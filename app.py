@@ -51,6 +51,13 @@ Trusted by NHS Trusts, Training Providers, Healthcare Professionals, and Decisio
 Revolutionizing NHS Administration - Saving £24.76 BILLION/year across 200 NHS Trusts
 """
 
+import time
+_APP_START = time.perf_counter()
+
+# Time every import until the app is ready (report: T21_STARTUP_PROFILE=1)
+from lazy_features import start_import_profiler, finish_startup_profile, lazy_import
+start_import_profiler()
+
 import streamlit as st
 import json
 import os
@@ -94,86 +101,67 @@ except:
     def create_validation_excel(data): return None
     def create_batch_results_excel(data): return None
 
-try:
-    # Import EXPANDED library with 500+ scenarios
-    from training_library_expanded import get_all_scenarios, check_answer as check_scenario_answer
-except:
-    try:
-        # Fallback to original library
-        from training_library import get_all_scenarios, check_answer as check_scenario_answer
-    except:
-        def get_all_scenarios(): return []
-        def check_scenario_answer(q, a): return False, ""
-
-try:
-    from smart_alerts import validate_and_generate_alerts
-except:
-    def validate_and_generate_alerts(data): return []
-# All other imports with error handling
-try:
-    from interview_prep import (analyze_job_description, generate_smart_questions_to_ask, 
-                                generate_red_flags_to_avoid)
-    from interview_prep_enhanced import (analyze_job_with_complete_answers, 
-                                         export_to_pdf, export_to_word,
-                                         collect_interview_feedback)
-    INTERVIEW_ENHANCED = True
-except:
-    def analyze_job_description(desc): return {}
-    INTERVIEW_ENHANCED = False
-    def generate_smart_questions_to_ask(role): return []
-    def generate_red_flags_to_avoid(role): return []
-
-try:
-    from cv_builder import (generate_cv_data, generate_professional_summary, format_cv_html,
-                            get_ats_keywords, generate_linkedin_profile, get_t21_qualifications)
-except:
-    def generate_cv_data(data): return {}
-    def generate_professional_summary(data): return ""
-    def format_cv_html(data): return ""
-    def get_ats_keywords(role): return []
-    def generate_linkedin_profile(data): return ""
-    def get_t21_qualifications(): return []
-
-# Import Virtual Assistant Career Pathway Module (NEW!)
-try:
-    from virtual_assistant_pathway_module import render_pathway as render_va_pathway
-    VA_PATHWAY_AVAILABLE = True
-except Exception as e:
-    VA_PATHWAY_AVAILABLE = False
-    def render_va_pathway():
-        st.error(f"VA Pathway module not available: {e}")
-
-try:
-    from interactive_learning import (INTERACTIVE_QUIZZES, BADGES, check_answer as check_quiz_answer, 
-                                      get_all_categories, get_quiz_by_difficulty,
-                                      StudentProgress, get_leaderboard, add_to_leaderboard)
-except:
-    INTERACTIVE_QUIZZES = {}
-    BADGES = []
-    def check_quiz_answer(q, a): return False, ""
-    def get_all_categories(): return []
-    def get_quiz_by_difficulty(d): return []
-    class StudentProgress: pass
-    def get_leaderboard(): return []
-    def add_to_leaderboard(name, score): pass
-
-try:
-    from certification_system import (generate_exam, grade_exam, generate_certificate, 
-                                      format_certificate_html, verify_certificate)
-except:
-    def generate_exam(level): return []
-    def grade_exam(answers): return 0, []
-    def generate_certificate(name, score): return ""
-    def format_certificate_html(cert): return ""
-    def verify_certificate(id): return False
+###############################################################################
+# ⚡ LAZY FEATURE REGISTRY ⚡
+# Page-specific modules are imported the first time their page uses them
+# (lazy_import), falling back exactly like the old try/except imports did.
+###############################################################################
 
-try:
-    from ai_tutor import (answer_question, get_code_info, generate_related_quiz, ChatHistory)
-except:
-    def answer_question(question): return "AI Tutor unavailable"
-    def get_code_info(code): return ""
-    def generate_related_quiz(topic): return []
-    class ChatHistory: pass
+# Training scenarios: EXPANDED library with 500+ scenarios, then original library
+get_all_scenarios = lazy_import('training_library_expanded', 'get_all_scenarios',
+    fallback=lazy_import('training_library', 'get_all_scenarios', fallback=lambda: []))
+check_scenario_answer = lazy_import('training_library_expanded', 'check_answer',
+    fallback=lazy_import('training_library', 'check_answer', fallback=lambda q, a: (False, "")))
+
+validate_and_generate_alerts = lazy_import('smart_alerts', 'validate_and_generate_alerts', fallback=lambda data: [])
+
+# Interview prep (INTERVIEW_ENHANCED imports the enhanced module when first tested)
+INTERVIEW_ENHANCED = lazy_import('interview_prep_enhanced', fallback=False)
+analyze_job_description = lazy_import('interview_prep', 'analyze_job_description', fallback=lambda desc: {})
+generate_smart_questions_to_ask = lazy_import('interview_prep', 'generate_smart_questions_to_ask', fallback=lambda role: [])
+generate_red_flags_to_avoid = lazy_import('interview_prep', 'generate_red_flags_to_avoid', fallback=lambda role: [])
+analyze_job_with_complete_answers = lazy_import('interview_prep_enhanced', 'analyze_job_with_complete_answers')
+export_to_pdf = lazy_import('interview_prep_enhanced', 'export_to_pdf')
+export_to_word = lazy_import('interview_prep_enhanced', 'export_to_word')
+collect_interview_feedback = lazy_import('interview_prep_enhanced', 'collect_interview_feedback')
+
+# CV builder
+generate_cv_data = lazy_import('cv_builder', 'generate_cv_data', fallback=lambda data: {})
+generate_professional_summary = lazy_import('cv_builder', 'generate_professional_summary', fallback=lambda data: "")
+format_cv_html = lazy_import('cv_builder', 'format_cv_html', fallback=lambda data: "")
+get_ats_keywords = lazy_import('cv_builder', 'get_ats_keywords', fallback=lambda role: [])
+generate_linkedin_profile = lazy_import('cv_builder', 'generate_linkedin_profile', fallback=lambda data: "")
+get_t21_qualifications = lazy_import('cv_builder', 'get_t21_qualifications', fallback=lambda: [])
+
+# Virtual Assistant Career Pathway Module (17,000 lines - only imported on its page)
+VA_PATHWAY_AVAILABLE = lazy_import('virtual_assistant_pathway_module', fallback=False)
+render_va_pathway = lazy_import('virtual_assistant_pathway_module', 'render_pathway',
+    fallback=lambda: st.error("VA Pathway module not available"))
+
+# Interactive learning
+class _StudentProgressUnavailable: pass
+INTERACTIVE_QUIZZES = lazy_import('interactive_learning', 'INTERACTIVE_QUIZZES', fallback={})
+BADGES = lazy_import('interactive_learning', 'BADGES', fallback={})
+check_quiz_answer = lazy_import('interactive_learning', 'check_answer', fallback=lambda q, a: (False, ""))
+get_all_categories = lazy_import('interactive_learning', 'get_all_categories', fallback=lambda: [])
+get_quiz_by_difficulty = lazy_import('interactive_learning', 'get_quiz_by_difficulty', fallback=lambda d: [])
+StudentProgress = lazy_import('interactive_learning', 'StudentProgress', fallback=_StudentProgressUnavailable)
+get_leaderboard = lazy_import('interactive_learning', 'get_leaderboard', fallback=lambda: [])
+add_to_leaderboard = lazy_import('interactive_learning', 'add_to_leaderboard', fallback=lambda name, score: None)
+
+# Certification
+generate_exam = lazy_import('certification_system', 'generate_exam', fallback=lambda *args, **kwargs: [])
+grade_exam = lazy_import('certification_system', 'grade_exam', fallback=lambda answers: (0, []))
+generate_certificate = lazy_import('certification_system', 'generate_certificate', fallback=lambda name, score: "")
+format_certificate_html = lazy_import('certification_system', 'format_certificate_html', fallback=lambda cert: "")
+verify_certificate = lazy_import('certification_system', 'verify_certificate', fallback=lambda id: False)
+
+# AI tutor
+class _ChatHistoryUnavailable: pass
+answer_question = lazy_import('ai_tutor', 'answer_question', fallback=lambda question: "AI Tutor unavailable")
+get_code_info = lazy_import('ai_tutor', 'get_code_info', fallback=lambda code: "")
+generate_related_quiz = lazy_import('ai_tutor', 'generate_related_quiz', fallback=lambda topic: [])
+ChatHistory = lazy_import('ai_tutor', 'ChatHistory', fallback=_ChatHistoryUnavailable)
 
 try:
     from access_control import UserLicense, ROLES, check_feature_access
@@ -182,52 +170,29 @@ except:
     ROLES = {}
     def check_feature_access(role, feature): return True
 
-# NEW AI AUTOMATION MODULES - Safe imports with fallbacks
-try:
-    from t21_complete_platform import T21CompletePlatform, deploy_to_trust
-except:
-    class T21CompletePlatform:
-        def __init__(self, trust_name): pass
-        def complete_validation_workflow(self, file): return {"status": "Module not loaded"}
-        def complete_medical_secretary_workflow(self, file): return {"status": "Module not loaded"}
-        def complete_booking_workflow(self, patient_id): return {"status": "Module not loaded"}
-        def complete_communication_workflow(self, query): return {"status": "Module not loaded"}
-        def get_platform_analytics(self): return {"status": "Module not loaded"}
-    def deploy_to_trust(name): return T21CompletePlatform(name)
-
-try:
-    from medical_secretary_ai_complete import MedicalSecretaryAI
-except:
-    class MedicalSecretaryAI:
-        def __init__(self): pass
-
-try:
-    from booking_ai_complete import BookingAI
-except:
-    class BookingAI:
-        def __init__(self): pass
-
-try:
-    from communication_ai_complete import CommunicationAI
-except:
-    class CommunicationAI:
-        def __init__(self): pass
-
-try:
-    from remaining_modules_complete import FinanceAI, HRAI, ProcurementAI, TrainingAI, AnalyticsAI, FacilitiesAI
-except:
-    class FinanceAI:
-        def __init__(self): pass
-    class HRAI:
-        def __init__(self): pass
-    class ProcurementAI:
-        def __init__(self): pass
-    class TrainingAI:
-        def __init__(self): pass
-    class AnalyticsAI:
-        def __init__(self): pass
-    class FacilitiesAI:
-        def __init__(self): pass
+# NEW AI AUTOMATION MODULES - lazy, with the same fallbacks
+class _T21CompletePlatformUnavailable:
+    def __init__(self, trust_name): pass
+    def complete_validation_workflow(self, file): return {"status": "Module not loaded"}
+    def complete_medical_secretary_workflow(self, file): return {"status": "Module not loaded"}
+    def complete_booking_workflow(self, patient_id): return {"status": "Module not loaded"}
+    def complete_communication_workflow(self, query): return {"status": "Module not loaded"}
+    def get_platform_analytics(self): return {"status": "Module not loaded"}
+
+class _AIModuleUnavailable:
+    def __init__(self): pass
+
+T21CompletePlatform = lazy_import('t21_complete_platform', 'T21CompletePlatform', fallback=_T21CompletePlatformUnavailable)
+deploy_to_trust = lazy_import('t21_complete_platform', 'deploy_to_trust', fallback=_T21CompletePlatformUnavailable)
+MedicalSecretaryAI = lazy_import('medical_secretary_ai_complete', 'MedicalSecretaryAI', fallback=_AIModuleUnavailable)
+BookingAI = lazy_import('booking_ai_complete', 'BookingAI', fallback=_AIModuleUnavailable)
+CommunicationAI = lazy_import('communication_ai_complete', 'CommunicationAI', fallback=_AIModuleUnavailable)
+FinanceAI = lazy_import('remaining_modules_complete', 'FinanceAI', fallback=_AIModuleUnavailable)
+HRAI = lazy_import('remaining_modules_complete', 'HRAI', fallback=_AIModuleUnavailable)
+ProcurementAI = lazy_import('remaining_modules_complete', 'ProcurementAI', fallback=_AIModuleUnavailable)
+TrainingAI = lazy_import('remaining_modules_complete', 'TrainingAI', fallback=_AIModuleUnavailable)
+AnalyticsAI = lazy_import('remaining_modules_complete', 'AnalyticsAI', fallback=_AIModuleUnavailable)
+FacilitiesAI = lazy_import('remaining_modules_complete', 'FacilitiesAI', fallback=_AIModuleUnavailable)
 
 try:
     from student_auth import (login_student, register_student, hash_password,
@@ -258,10 +223,8 @@ except:
     def load_users_db(): return {}
     def save_users_db(db): pass
 
-try:
-    from admin_panel_ui import render_admin_panel
-except:
-    def render_admin_panel(email): st.info("Admin panel unavailable")
+render_admin_panel = lazy_import('admin_panel_ui', 'render_admin_panel',
+    fallback=lambda email: st.info("Admin panel unavailable"))
 
 try:
     from module_access_control import get_accessible_modules, can_access_module
@@ -269,30 +232,15 @@ except:
     def get_accessible_modules(role, email=None): return []
     def can_access_module(role, module, email=None): return True
 
-try:
-    from admin_module_access_ui import render_module_access_admin
-except:
-    def render_module_access_admin(): st.info("Module access admin unavailable")
+render_module_access_admin = lazy_import('admin_module_access_ui', 'render_module_access_admin', fallback=lambda: st.info("Module access admin unavailable"))
 
-try:
-    from admin_bulk_email import render_bulk_email_ui
-except:
-    def render_bulk_email_ui(): st.info("Bulk email unavailable")
+render_bulk_email_ui = lazy_import('admin_bulk_email', 'render_bulk_email_ui', fallback=lambda: st.info("Bulk email unavailable"))
 
-try:
-    from admin_trial_automation_ui import render_trial_automation_ui
-except:
-    def render_trial_automation_ui(): st.info("Trial automation unavailable")
+render_trial_automation_ui = lazy_import('admin_trial_automation_ui', 'render_trial_automation_ui', fallback=lambda: st.info("Trial automation unavailable"))
 
-try:
-    from admin_personal_message_ui import render_personal_message_ui
-except:
-    def render_personal_message_ui(): st.info("Personal message unavailable")
+render_personal_message_ui = lazy_import('admin_personal_message_ui', 'render_personal_message_ui', fallback=lambda: st.info("Personal message unavailable"))
 
-try:
-    from admin_modular_access_ui import render_modular_access_admin
-except:
-    def render_modular_access_admin(): st.info("Modular access unavailable")
+render_modular_access_admin = lazy_import('admin_modular_access_ui', 'render_modular_access_admin', fallback=lambda: st.info("Modular access unavailable"))
 
 ###############################################################################
 # ⚡ LAZY LOADING FIX - DISABLED 20+ IMPORTS TO FIX "TOO MANY OPEN FILES" ⚡
@@ -393,17 +341,9 @@ def render_cancer_pathways(): st.info("Cancer pathways unavailable")
 def render_mdt_coordination(): st.info("MDT coordination unavailable")
 def render_advanced_booking(): st.info("Advanced booking unavailable")
 
-try:
-    from unified_patient_ui import render_unified_patient_search
-except Exception as e:
-    print(f"❌ Error importing unified_patient_ui: {e}")
-    def render_unified_patient_search(): st.error(f"Patient search unavailable: {str(e)}")
+render_unified_patient_search = lazy_import('unified_patient_ui', 'render_unified_patient_search', fallback=lambda: st.error("Patient search unavailable"))
 
-try:
-    from task_management_ui import render_task_management
-except Exception as e:
-    print(f"❌ Error importing task_management_ui: {e}")
-    def render_task_management(): st.error(f"Task management unavailable: {str(e)}")
+render_task_management = lazy_import('task_management_ui', 'render_task_management', fallback=lambda: st.error("Task management unavailable"))
 
 # TEMPORARILY DISABLED - ADMIN/SPECIALIZED MODULES (LAZY LOAD WHEN NEEDED)
 # try:
@@ -438,10 +378,8 @@ def render_document_management(): st.info("Document management - lazy loading...
 def render_medical_secretary(): st.info("Medical secretary - lazy loading...")
 def render_data_quality(): st.info("Data quality - lazy loading...")
 
-try:
-    from interactive_reports import generate_student_progress_report
-except:
-    def generate_student_progress_report(email): return ""
+generate_student_progress_report = lazy_import('interactive_reports', 'generate_student_progress_report',
+    fallback=lambda email: "")
 
 import hashlib
 import pandas as pd
@@ -779,6 +717,9 @@ if not st.session_state.logged_in and st.session_state.get('session_email'):
     except Exception as e:
         pass  # Silent fail, just show login page
 
+# Startup finished - log import costs once per process (T21_STARTUP_PROFILE=1 for the full report)
+finish_startup_profile(_APP_START)
+
 # Login/Registration Page
 if not st.session_state.logged_in:
     # Import and render clean landing page
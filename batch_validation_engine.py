@@ -4,21 +4,37 @@ Validate 50,000+ patients in 30 seconds
 
 Features:
 - Batch CSV import
-- Parallel processing
+- Parallel processing (multi-core shards over shared memory)
+- Columnar (vectorized) rule execution
+- Streaming validation of very large files in bounded memory
 - 160+ validation rules per patient
 - Comprehensive error reporting
 - Auto-fix suggestions
-- Export to Excel
+- Export to Excel (streamed, with optional CSV/Parquet copies)
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Iterable, Iterator
 import concurrent.futures
+import multiprocessing as mp
 from dataclasses import dataclass
+from functools import lru_cache
 import json
 
+from shared_memory_frame import SharedFrame, SharedFrameSpec, attach_shard
+from excel_export import write_rows_excel
+
+# Columns of the results export (Excel and streaming CSV)
+EXPORT_COLUMNS = [
+    "Pathway Number", "NHS Number", "Patient Name", "Status",
+    "Severity", "Error Count", "Auto-Fix Available", "Errors"
+]
+
+# Shards per worker in sharded mode - small shards keep every core busy to the end
+SHARDS_PER_WORKER = 4
+
 @dataclass
 class ValidationResult:
     """Result of validation for one patient"""
@@ -32,6 +48,183 @@ class ValidationResult:
     status: str  # PASS, FAIL, NEEDS_REVIEW
 
 
+# Date parse outcomes used by the columnar rules (see _parse_date_column)
+_DATE_OK = 0
+_DATE_NAT = 1
+_DATE_FAILED = 2
+_DATE_COMPLEX = 3
+
+_MICROS_PER_DAY = 86400 * 1000000
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _cached_to_datetime(value: Any) -> Any:
+    return pd.to_datetime(value)
+
+
+def _to_datetime(value: Any) -> Any:
+    """pd.to_datetime with results memoised per distinct cell value"""
+    try:
+        return _cached_to_datetime(value)
+    except TypeError as e:
+        if "unhashable" not in str(e):
+            raise
+        return pd.to_datetime(value)
+
+
+def _truthy(df: pd.DataFrame, column: str) -> np.ndarray:
+    """bool(patient.get(column)) for every row, as the row-wise rules see it"""
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        # NaN is truthy in the row-wise checks, and NaN != 0
+        return (series != 0).to_numpy(dtype=bool)
+    return series.to_numpy(dtype=object).astype(bool)
+
+
+def _isin(df: pd.DataFrame, column: str, values: List[Any]) -> np.ndarray:
+    """patient.get(column) in values for every row"""
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[column].isin(values).to_numpy(dtype=bool)
+
+
+def _equals(df: pd.DataFrame, column: str, value: Any) -> np.ndarray:
+    """patient.get(column) == value for every row"""
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df[column] == value).to_numpy(dtype=bool)
+
+
+def _str_length(series: pd.Series) -> np.ndarray:
+    """len(str(value)) for every row (str(NaN) is 'nan', length 3)"""
+    dtype = series.dtype
+    if pd.api.types.is_numeric_dtype(dtype) or (dtype != object and pd.api.types.is_string_dtype(dtype)):
+        return series.astype(str).str.len().fillna(3).to_numpy(dtype=np.int64)
+    return np.array([len(str(v)) for v in series.to_numpy(dtype=object)], dtype=np.int64)
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """df.to_dict('records') built column-wise (same native values, less overhead)"""
+    columns = list(df.columns)
+    values = [df[column].tolist() for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _map_unique(series: pd.Series, func) -> np.ndarray:
+    """Apply a scalar function once per distinct value and broadcast the results"""
+    try:
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    except TypeError:
+        # Unhashable cells (lists/dicts) - evaluate every row
+        return np.array([func(v) for v in series.to_numpy(dtype=object)])
+    if len(uniques) == 0:
+        return np.array([func(None)])[:0]
+    mapped = np.array([func(v) for v in uniques])
+    return mapped[codes]
+
+
+def _parse_date(value: Any) -> Tuple[int, int]:
+    """
+    Parse one cell exactly as the row-wise rules do (pd.to_datetime)
+
+    Returns (outcome, microseconds since epoch). Timezone-aware and
+    sub-microsecond values are reported as _DATE_COMPLEX because the
+    vectorized day arithmetic cannot reproduce them exactly.
+    """
+    try:
+        ts = _to_datetime(value)
+    except Exception:
+        return _DATE_FAILED, 0
+    if ts is pd.NaT:
+        return _DATE_NAT, 0
+    if not isinstance(ts, pd.Timestamp) or ts.tzinfo is not None or ts.nanosecond:
+        return _DATE_COMPLEX, 0
+    return _DATE_OK, int(ts.to_datetime64().astype('datetime64[us]').astype(np.int64))
+
+
+def _parse_date_column(df: pd.DataFrame, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse a date column once per distinct value -> (outcomes, microseconds)"""
+    if column not in df.columns:
+        return np.full(len(df), _DATE_NAT), np.zeros(len(df), dtype=np.int64)
+    parsed = _map_unique(df[column], _parse_date).reshape(-1, 2)
+    return parsed[:, 0], parsed[:, 1].astype(np.int64)
+
+
+def _days_between(start: Tuple[np.ndarray, np.ndarray], stop: Tuple[np.ndarray, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized (stop - start).days with the row-wise failure modes
+
+    Returns masks for rows where the subtraction raised ("failed"), produced
+    NaN because a side was NaT ("nat"), cannot be reproduced ("complex"), and
+    the day counts for the remaining "ok" rows.
+    """
+    start_outcome, start_micros = start
+    stop_outcome, stop_micros = stop
+    failed = (start_outcome == _DATE_FAILED) | (stop_outcome == _DATE_FAILED)
+    complex_ = ~failed & ((start_outcome == _DATE_COMPLEX) | (stop_outcome == _DATE_COMPLEX))
+    nat = ~failed & ~complex_ & ((start_outcome == _DATE_NAT) | (stop_outcome == _DATE_NAT))
+    ok = ~failed & ~complex_ & ~nat
+    days = np.where(ok, (stop_micros - start_micros) // _MICROS_PER_DAY, 0)
+    return {"failed": failed, "complex": complex_, "nat": nat, "ok": ok, "days": days}
+
+
+class SummaryAccumulator:
+    """Running totals behind the batch summary, so it can be built chunk by chunk"""
+    
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.severity = {"critical": 0, "high": 0, "medium": 0, "low": 0}
+        self.total_errors = 0
+        self.total_auto_fixes = 0
+    
+    def add(self, results: List[ValidationResult], unlisted_passes: int = 0):
+        """
+        Fold a batch of results into the running totals
+        
+        Args:
+            results: Validation results
+            unlisted_passes: Passing patients not present in results
+                (columnar/sharded modes with include_passing=False)
+        """
+        self.total += len(results) + unlisted_passes
+        self.passed += unlisted_passes
+        
+        for r in results:
+            if r.status == "PASS":
+                self.passed += 1
+            elif r.status == "FAIL":
+                self.failed += 1
+            
+            key = r.severity.lower()
+            if key in self.severity:
+                self.severity[key] += 1
+            
+            self.total_errors += len(r.errors)
+            self.total_auto_fixes += len(r.auto_fixes)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary statistics in the validate_batch() format"""
+        total = self.total
+        passed = self.passed
+        total_errors = self.total_errors
+        total_auto_fixes = self.total_auto_fixes
+        
+        return {
+            "total_patients": total,
+            "passed": passed,
+            "failed": self.failed,
+            "pass_rate": f"{(passed/total*100):.1f}%" if total > 0 else "0%",
+            "severity_breakdown": dict(self.severity),
+            "total_errors": total_errors,
+            "total_auto_fixes_available": total_auto_fixes,
+            "auto_fix_rate": f"{(total_auto_fixes/total_errors*100):.1f}%" if total_errors > 0 else "0%"
+        }
+
+
 class BatchValidationEngine:
     """Validate thousands of patients simultaneously"""
     
@@ -40,12 +233,22 @@ class BatchValidationEngine:
         self.validation_rules = self._load_validation_rules()
         self.rtt_codes = self._load_rtt_codes()
         
-    def validate_batch(self, csv_file_path: str) -> Dict[str, Any]:
+    def validate_batch(self, csv_file_path: str, mode: str = "columnar", include_passing: bool = True,
+                       workers: int = None) -> Dict[str, Any]:
         """
         Validate all patients in CSV file
         
         Args:
             csv_file_path: Path to CSV file with patient data
+            mode: "columnar" runs every rule as a vectorized mask over the
+                whole file, "sharded" runs the columnar rules on every core
+                with the file held in shared memory, "rowwise" validates one
+                patient dict at a time
+            include_passing: Columnar/sharded modes - set False to skip
+                building ValidationResults for patients that pass every rule
+                (the summary still counts them)
+            workers: Sharded mode - number of worker processes (default:
+                all CPU cores)
             
         Returns:
             Dictionary with validation results and statistics
@@ -58,8 +261,7 @@ class BatchValidationEngine:
         
         start_time = datetime.now()
         
-        # Validate all patients in parallel
-        results = self._validate_parallel(df)
+        results, unlisted_passes = self._validate_frame(df, mode, include_passing=include_passing, workers=workers)
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -67,7 +269,7 @@ class BatchValidationEngine:
         print(f"Validation complete in {duration} seconds!")
         
         # Generate summary statistics
-        summary = self._generate_summary(results)
+        summary = self._generate_summary(results, unlisted_passes=unlisted_passes)
         
         return {
             "total_patients": len(df),
@@ -77,6 +279,97 @@ class BatchValidationEngine:
             "summary": summary
         }
     
+    def validate_streaming(self, csv_file_path: str, output_file: str = None, chunk_size: int = 50000,
+                           mode: str = "columnar", include_passing: bool = True, workers: int = None,
+                           callback=None) -> Dict[str, Any]:
+        """
+        Validate a CSV file chunk by chunk in bounded memory
+        
+        Each chunk is read, validated and (optionally) written to a CSV
+        export before the next one is read. Only the running summary is kept,
+        so memory stays flat regardless of file size.
+        
+        Note that pandas infers column types per chunk: a chunk whose NHS
+        numbers contain blanks is read as floats even if the rest of the file
+        is not, exactly as validate_batch() would for a file of that chunk.
+        
+        Args:
+            csv_file_path: Path to CSV file with patient data
+            output_file: Optional CSV path - results are appended per chunk
+                in the export_results() column layout
+            chunk_size: Patients per chunk
+            mode: "columnar", "sharded" or "rowwise" (see validate_batch)
+            include_passing: Set False to leave passing patients out of the
+                export (the summary still counts them)
+            workers: Sharded mode - number of worker processes
+            callback: Optional callback(patients_processed, summary_so_far)
+                called after every chunk
+            
+        Returns:
+            Dictionary with statistics and summary (no per-patient results)
+        """
+        print(f"Streaming patients from {csv_file_path} in chunks of {chunk_size:,}...")
+        
+        start_time = datetime.now()
+        summary = SummaryAccumulator()
+        chunks = 0
+        
+        executor = None
+        if mode == "sharded":
+            # One pool for the whole file rather than one per chunk
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers or mp.cpu_count())
+        
+        try:
+            for chunk in pd.read_csv(csv_file_path, chunksize=chunk_size):
+                results, unlisted_passes = self._validate_frame(
+                    chunk, mode, include_passing=include_passing, workers=workers, executor=executor
+                )
+                summary.add(results, unlisted_passes)
+                
+                if output_file:
+                    pd.DataFrame(self._export_rows(results), columns=EXPORT_COLUMNS).to_csv(
+                        output_file, mode="w" if chunks == 0 else "a", header=chunks == 0, index=False
+                    )
+                
+                chunks += 1
+                del results, chunk
+                
+                if callback:
+                    callback(summary.total, summary.as_dict())
+                
+                print(f"Validated {summary.total:,} patients...", end='\r')
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        end_time = datetime.now()
+        duration = (end_time - start_time).total_seconds()
+        
+        print(f"\nStreaming validation complete in {duration} seconds!")
+        if output_file:
+            print(f"Results exported to {output_file}")
+        
+        return {
+            "total_patients": summary.total,
+            "duration_seconds": duration,
+            "patients_per_second": summary.total / duration if duration > 0 else 0,
+            "chunks": chunks,
+            "output_file": output_file,
+            "summary": summary.as_dict()
+        }
+    
+    def _validate_frame(self, df: pd.DataFrame, mode: str, include_passing: bool = True, workers: int = None,
+                        executor: concurrent.futures.Executor = None) -> Tuple[List[ValidationResult], int]:
+        """Validate a DataFrame with the chosen execution mode -> (results, unlisted passes)"""
+        if mode == "columnar":
+            return self._validate_columnar(df, include_passing=include_passing)
+        elif mode == "sharded":
+            return self._validate_sharded(df, include_passing=include_passing, workers=workers, executor=executor)
+        elif mode == "rowwise":
+            # Validate all patients in parallel
+            return self._validate_parallel(df), 0
+        raise ValueError(f"Unknown validation mode '{mode}' (expected 'columnar', 'sharded' or 'rowwise')")
+    
     def _validate_parallel(self, df: pd.DataFrame) -> List[ValidationResult]:
         """Validate patients in parallel using multiple threads"""
         results = []
@@ -110,7 +403,6 @@ class BatchValidationEngine:
         """
         errors = []
         warnings = []
-        auto_fixes = []
         
         # PHASE 1: Patient Demographics (20 checks)
         errors.extend(self._validate_demographics(patient))
@@ -142,6 +434,11 @@ class BatchValidationEngine:
         # PHASE 10: Compliance (10 checks)
         errors.extend(self._validate_compliance(patient))
         
+        return self._build_result(patient, errors, warnings)
+    
+    def _build_result(self, patient: Dict[str, Any], errors: List[Dict[str, Any]],
+                      warnings: List[Dict[str, Any]]) -> ValidationResult:
+        """Turn the errors found for one patient into a ValidationResult"""
         # Determine severity
         severity = self._determine_severity(errors)
         
@@ -162,6 +459,292 @@ class BatchValidationEngine:
             status=status
         )
     
+    # ------------------------------------------------------------------
+    # Columnar execution
+    #
+    # Every rule of every phase is evaluated as a boolean mask over the
+    # whole DataFrame. A phase mask is True wherever the row-wise phase
+    # could report an error (or raise), so rows with no mask set are known
+    # to PASS without building a patient dict. Only flagged rows are
+    # materialised, and only their flagged phases are re-run to produce
+    # the exact same error dicts as the row-wise path.
+    # ------------------------------------------------------------------
+    
+    def _phase_validators(self) -> List[Tuple[str, Any, Any]]:
+        """(phase, row-wise validator, columnar mask) in validation order"""
+        return [
+            ("demographics", self._validate_demographics, self._mask_demographics),
+            ("pathway", self._validate_pathway, self._mask_pathway),
+            ("clock_start", self._validate_clock_start, self._mask_clock_start),
+            ("activities", self._validate_activities, self._mask_activities),
+            ("diagnostics", self._validate_diagnostics, self._mask_diagnostics),
+            ("waiting_list", self._validate_waiting_list, self._mask_waiting_list),
+            ("clock_stop", self._validate_clock_stop, self._mask_clock_stop),
+            ("waiting_time", self._validate_waiting_time, self._mask_waiting_time),
+            ("code_sequence", self._validate_code_sequence, self._mask_code_sequence),
+            ("compliance", self._validate_compliance, self._mask_compliance),
+        ]
+    
+    def _validate_columnar(self, df: pd.DataFrame, include_passing: bool = True) -> Tuple[List[ValidationResult], int]:
+        """
+        Validate patients with vectorized rule masks
+        
+        Returns:
+            (results in input order, number of passing patients left out
+            of results because include_passing is False)
+        """
+        df = df.reset_index(drop=True)
+        failures, passing_rows = self._columnar_failures(df)
+        return self._assemble_results(df, failures, passing_rows, include_passing)
+    
+    def _validate_sharded(self, df: pd.DataFrame, include_passing: bool = True, workers: int = None,
+                          executor: concurrent.futures.Executor = None) -> Tuple[List[ValidationResult], int]:
+        """
+        Validate patients with the columnar rules across a process pool
+        
+        The parsed columns are placed in shared memory once; each worker
+        attaches to its own row range and sends back only the results for
+        rows that may fail plus the positions of passing rows. An existing
+        executor can be passed in to reuse its worker processes.
+        """
+        df = df.reset_index(drop=True)
+        workers = workers or mp.cpu_count()
+        
+        failures: Dict[int, ValidationResult] = {}
+        passing = []
+        
+        own_executor = executor is None
+        if own_executor:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        
+        try:
+            with SharedFrame(df) as frame:
+                futures = [
+                    executor.submit(_validate_shard, frame.spec, start, stop)
+                    for start, stop in frame.shard_bounds(workers * SHARDS_PER_WORKER)
+                ]
+                for future in futures:
+                    shard_failures, shard_passing = future.result()
+                    failures.update(shard_failures)
+                    passing.append(shard_passing)
+        finally:
+            if own_executor:
+                executor.shutdown()
+        
+        passing_rows = np.concatenate(passing) if passing else np.zeros(0, dtype=np.int64)
+        return self._assemble_results(df, failures, passing_rows, include_passing)
+    
+    def _columnar_failures(self, df: pd.DataFrame) -> Tuple[Dict[int, ValidationResult], np.ndarray]:
+        """
+        Run every phase mask over a DataFrame with a default RangeIndex
+        
+        Returns:
+            (results for flagged rows keyed by row position, positions of
+            rows that pass every rule)
+        """
+        phases = self._phase_validators()
+        
+        masks = np.column_stack([mask(df) for _, _, mask in phases]) if len(df) else np.zeros((0, len(phases)), dtype=bool)
+        flagged = masks.any(axis=1)
+        flagged_rows = np.flatnonzero(flagged)
+        passing_rows = np.flatnonzero(~flagged)
+        
+        failures: Dict[int, ValidationResult] = {}
+        
+        # Materialise patient dicts only for rows that may fail
+        patients = _records(df.iloc[flagged_rows])
+        for row, patient in zip(flagged_rows.tolist(), patients):
+            try:
+                errors = []
+                for phase_index, (_, validator, _) in enumerate(phases):
+                    if masks[row, phase_index]:
+                        errors.extend(validator(patient))
+                failures[row] = self._build_result(patient, errors, [])
+            except Exception as e:
+                print(f"Error validating patient: {e}")
+        
+        return failures, passing_rows
+    
+    def _assemble_results(self, df: pd.DataFrame, failures: Dict[int, ValidationResult], passing_rows: np.ndarray,
+                          include_passing: bool) -> Tuple[List[ValidationResult], int]:
+        """Merge flagged-row results with (optionally) PASS results, in input order"""
+        if not include_passing:
+            return [failures[row] for row in sorted(failures)], len(passing_rows)
+        
+        results = dict(failures)
+        if len(passing_rows):
+            # A row can only pass with all three identifiers present
+            identifiers = df.iloc[passing_rows]
+            for row, pathway_number, nhs_number, patient_name in zip(
+                passing_rows.tolist(),
+                identifiers['pathway_number'].tolist(),
+                identifiers['nhs_number'].tolist(),
+                identifiers['patient_name'].tolist()
+            ):
+                results[row] = ValidationResult(
+                    pathway_number=pathway_number,
+                    nhs_number=nhs_number,
+                    patient_name=patient_name,
+                    errors=[],
+                    warnings=[],
+                    auto_fixes=[],
+                    severity="NONE",
+                    status="PASS"
+                )
+        
+        return [results[row] for row in sorted(results)], 0
+    
+    def _mask_demographics(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_demographics"""
+        has_nhs = _truthy(df, 'nhs_number')
+        
+        # Check 1: NHS Number exists
+        mask = ~has_nhs
+        
+        # Check 2: NHS Number is 10 digits
+        if 'nhs_number' in df.columns:
+            mask |= has_nhs & (_str_length(df['nhs_number']) != 10)
+        
+        # Check 3: Patient name not blank
+        mask |= ~_truthy(df, 'patient_name')
+        
+        # Check 4: Date of birth valid
+        mask |= ~_truthy(df, 'date_of_birth')
+        
+        # Check 5: Gender valid
+        mask |= ~_isin(df, 'gender', ['1', '2', '9', 'M', 'F', 'Male', 'Female'])
+        
+        return mask
+    
+    def _mask_pathway(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_pathway"""
+        return (
+            ~_truthy(df, 'pathway_number')
+            | ~_truthy(df, 'referral_date')
+            | ~_truthy(df, 'specialty_code')
+        )
+    
+    def _mask_clock_start(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_clock_start"""
+        has_start = _truthy(df, 'clock_start_date')
+        
+        # Missing date, or code not 10/11/12
+        mask = ~has_start | ~_isin(df, 'clock_start_code', [10, 11, 12])
+        
+        # Clock start in the future (unparseable dates are skipped, as row-wise)
+        if 'clock_start_date' in df.columns:
+            now = datetime.now()
+            
+            def is_future(value: Any) -> bool:
+                try:
+                    return bool(_to_datetime(value) > now)
+                except Exception:
+                    return False
+            
+            mask |= has_start & _map_unique(df['clock_start_date'], is_future).astype(bool)
+        
+        return mask
+    
+    def _mask_structured(self, df: pd.DataFrame, column: str, validator) -> np.ndarray:
+        """
+        Rows whose JSON list column (appointments/diagnostics) may fail
+        
+        The phase only depends on this one cell, so it is evaluated once per
+        distinct value. Cells that make the row-wise validator raise are
+        flagged too, so the row is re-run and dropped exactly as before.
+        """
+        if column not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        
+        def may_fail(value: Any) -> bool:
+            try:
+                return bool(validator({column: value}))
+            except Exception:
+                return True
+        
+        return _map_unique(df[column], may_fail).astype(bool)
+    
+    def _mask_activities(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_activities"""
+        return self._mask_structured(df, 'appointments', self._validate_activities)
+    
+    def _mask_diagnostics(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_diagnostics"""
+        return self._mask_structured(df, 'diagnostics', self._validate_diagnostics)
+    
+    def _mask_waiting_list(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_waiting_list"""
+        return _equals(df, 'on_waiting_list', 'Yes') & ~_truthy(df, 'tci_date')
+    
+    def _mask_clock_stop(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_clock_stop"""
+        return _truthy(df, 'clock_stop_code') & (
+            ~_isin(df, 'clock_stop_code', [30, 31, 32, 33, 34, 35, 36])
+            | ~_truthy(df, 'clock_stop_date')
+        )
+    
+    def _mask_waiting_time(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_waiting_time"""
+        candidates = _truthy(df, 'clock_start_date') & _truthy(df, 'clock_stop_date')
+        if not candidates.any():
+            return candidates
+        
+        span = _days_between(
+            _parse_date_column(df, 'clock_start_date'),
+            _parse_date_column(df, 'clock_stop_date')
+        )
+        days = span["days"]
+        
+        # Recorded waiting time: subtraction raises for non-numeric values,
+        # which skips the breach check too; NaN never compares > 1
+        if 'waiting_time_days' not in df.columns:
+            wrong_time = np.abs(days) > 1
+            subtraction_raises = np.zeros(len(df), dtype=bool)
+            unknown = np.zeros(len(df), dtype=bool)
+        elif pd.api.types.is_numeric_dtype(df['waiting_time_days'].dtype):
+            recorded = df['waiting_time_days'].to_numpy(dtype=float)
+            with np.errstate(invalid='ignore'):
+                wrong_time = np.abs(days - recorded) > 1
+            subtraction_raises = np.zeros(len(df), dtype=bool)
+            unknown = np.zeros(len(df), dtype=bool)
+        else:
+            recorded_missing = df['waiting_time_days'].isna().to_numpy(dtype=bool)
+            wrong_time = np.zeros(len(df), dtype=bool)
+            if pd.api.types.is_string_dtype(df['waiting_time_days'].dtype) and df['waiting_time_days'].dtype != object:
+                # Strings always raise on subtraction
+                subtraction_raises = ~recorded_missing
+                unknown = np.zeros(len(df), dtype=bool)
+            else:
+                # Mixed objects - let the row-wise check decide
+                subtraction_raises = np.zeros(len(df), dtype=bool)
+                unknown = ~recorded_missing
+        
+        breach_wrong = (days > 126) & ~_equals(df, 'breach_status', 'Breach')
+        
+        decided = span["ok"] & ~subtraction_raises & (wrong_time | breach_wrong)
+        undecidable = span["complex"] | (span["ok"] & unknown)
+        return candidates & (decided | undecidable)
+    
+    def _mask_code_sequence(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_code_sequence"""
+        return _truthy(df, 'clock_start_code') & ~_isin(df, 'clock_start_code', [10, 11, 12])
+    
+    def _mask_compliance(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows that may fail _validate_compliance"""
+        candidates = (
+            _equals(df, 'priority', '2WW')
+            & _truthy(df, 'clock_start_date')
+            & _truthy(df, 'first_appointment_date')
+        )
+        if not candidates.any():
+            return candidates
+        
+        span = _days_between(
+            _parse_date_column(df, 'clock_start_date'),
+            _parse_date_column(df, 'first_appointment_date')
+        )
+        return candidates & ((span["ok"] & (span["days"] > 14)) | span["complex"])
+    
     def _validate_demographics(self, patient: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Validate patient demographics (20 checks)"""
         errors = []
@@ -278,7 +861,7 @@ class BatchValidationEngine:
         # Check clock start not in future
         if patient.get('clock_start_date'):
             try:
-                start_date = pd.to_datetime(patient['clock_start_date'])
+                start_date = _to_datetime(patient['clock_start_date'])
                 if start_date > datetime.now():
                     errors.append({
                         "rule": "CLOCK_START_FUTURE",
@@ -412,8 +995,8 @@ class BatchValidationEngine:
         # Calculate waiting time
         if patient.get('clock_start_date') and patient.get('clock_stop_date'):
             try:
-                start = pd.to_datetime(patient['clock_start_date'])
-                stop = pd.to_datetime(patient['clock_stop_date'])
+                start = _to_datetime(patient['clock_start_date'])
+                stop = _to_datetime(patient['clock_stop_date'])
                 
                 calculated_days = (stop - start).days
                 recorded_days = patient.get('waiting_time_days', 0)
@@ -477,8 +1060,8 @@ class BatchValidationEngine:
         if patient.get('priority') == '2WW':
             if patient.get('clock_start_date') and patient.get('first_appointment_date'):
                 try:
-                    start = pd.to_datetime(patient['clock_start_date'])
-                    first_appt = pd.to_datetime(patient['first_appointment_date'])
+                    start = _to_datetime(patient['clock_start_date'])
+                    first_appt = _to_datetime(patient['first_appointment_date'])
                     days = (first_appt - start).days
                     
                     if days > 14:
@@ -551,8 +1134,8 @@ class BatchValidationEngine:
         elif rule == "WAITING_TIME_INCORRECT":
             # Recalculate waiting time
             if patient.get('clock_start_date') and patient.get('clock_stop_date'):
-                start = pd.to_datetime(patient['clock_start_date'])
-                stop = pd.to_datetime(patient['clock_stop_date'])
+                start = _to_datetime(patient['clock_start_date'])
+                stop = _to_datetime(patient['clock_stop_date'])
                 return (stop - start).days
         
         elif rule == "BREACH_STATUS_WRONG":
@@ -577,42 +1160,43 @@ class BatchValidationEngine:
         else:
             return 70
     
-    def _generate_summary(self, results: List[ValidationResult]) -> Dict[str, Any]:
-        """Generate summary statistics"""
-        total = len(results)
-        passed = sum(1 for r in results if r.status == "PASS")
-        failed = sum(1 for r in results if r.status == "FAIL")
+    def _generate_summary(self, results: List[ValidationResult], unlisted_passes: int = 0) -> Dict[str, Any]:
+        """
+        Generate summary statistics
         
-        critical = sum(1 for r in results if r.severity == "CRITICAL")
-        high = sum(1 for r in results if r.severity == "HIGH")
-        medium = sum(1 for r in results if r.severity == "MEDIUM")
-        low = sum(1 for r in results if r.severity == "LOW")
+        Args:
+            results: Validation results
+            unlisted_passes: Passing patients not present in results
+                (columnar mode with include_passing=False)
+        """
+        summary = SummaryAccumulator()
+        summary.add(results, unlisted_passes)
+        return summary.as_dict()
+    
+    def export_results(self, results: Dict[str, Any], output_file: str, csv_output: str = None,
+                       parquet_output: str = None):
+        """
+        Export validation results to Excel
         
-        total_errors = sum(len(r.errors) for r in results)
-        total_auto_fixes = sum(len(r.auto_fixes) for r in results)
+        Rows are streamed into a write-only workbook, so results['results']
+        may be a generator over a very large batch.
         
-        return {
-            "total_patients": total,
-            "passed": passed,
-            "failed": failed,
-            "pass_rate": f"{(passed/total*100):.1f}%" if total > 0 else "0%",
-            "severity_breakdown": {
-                "critical": critical,
-                "high": high,
-                "medium": medium,
-                "low": low
-            },
-            "total_errors": total_errors,
-            "total_auto_fixes_available": total_auto_fixes,
-            "auto_fix_rate": f"{(total_auto_fixes/total_errors*100):.1f}%" if total_errors > 0 else "0%"
-        }
+        Args:
+            results: validate_batch() output (or any dict with 'results')
+            output_file: Excel path or binary file object
+            csv_output / parquet_output: Optional copies of the same rows for BI
+        """
+        rows = ([row[column] for column in EXPORT_COLUMNS] for row in self._iter_export_rows(results['results']))
+        write_rows_excel(rows, EXPORT_COLUMNS, output_file, csv_output=csv_output, parquet_output=parquet_output)
+        print(f"Results exported to {output_file}")
+    
+    def _export_rows(self, results: List[ValidationResult]) -> List[Dict[str, Any]]:
+        """One export row per validation result"""
+        return list(self._iter_export_rows(results))
     
-    def export_results(self, results: Dict[str, Any], output_file: str):
-        """Export validation results to Excel"""
-        # Create DataFrame from results
-        data = []
-        for result in results['results']:
-            row = {
+    def _iter_export_rows(self, results: Iterable[ValidationResult]) -> Iterator[Dict[str, Any]]:
+        for result in results:
+            yield {
                 "Pathway Number": result.pathway_number,
                 "NHS Number": result.nhs_number,
                 "Patient Name": result.patient_name,
@@ -622,11 +1206,6 @@ class BatchValidationEngine:
                 "Auto-Fix Available": len(result.auto_fixes),
                 "Errors": "; ".join([e['message'] for e in result.errors])
             }
-            data.append(row)
-        
-        df = pd.DataFrame(data)
-        df.to_excel(output_file, index=False)
-        print(f"Results exported to {output_file}")
     
     def _load_validation_rules(self) -> Dict[str, Any]:
         """Load all 160+ validation rules"""
@@ -661,6 +1240,14 @@ class BatchValidationEngine:
         }
 
 
+def _validate_shard(spec: SharedFrameSpec, start: int, stop: int) -> Tuple[Dict[int, ValidationResult], np.ndarray]:
+    """Process-pool entry point: validate rows [start, stop) of a SharedFrame"""
+    engine = BatchValidationEngine()
+    with attach_shard(spec, start, stop) as shard:
+        failures, passing_rows = engine._columnar_failures(shard)
+    return {start + row: result for row, result in failures.items()}, passing_rows + start
+
+
 # Example usage
 if __name__ == "__main__":
     engine = BatchValidationEngine()
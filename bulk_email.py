@@ -0,0 +1,619 @@
+"""
+T21 Bulk Email
+Send one message to thousands of recipients in a handful of SendGrid requests
+
+Features:
+- Message rendered once per campaign, not once per recipient
+- Up to 1000 recipients per SendGrid request, one personalization each
+  (recipients never see each other's addresses)
+- API key read once; each sender thread keeps one keep-alive HTTP session
+- Bounded concurrency: a fixed pool of sender threads
+- Rate-limit-aware retry: a 429 holds every sender until the reset time
+  SendGrid gives; 5xx and network errors back off exponentially
+- A batch rejected for a recipient (400 naming a personalizations field,
+  or 413) is split in half until the bad address is isolated, so one typo
+  does not fail 500 recipients; a message-level 400 fails the batch at once
+- Progress journal (JSON lines, fsync'd per batch) so a crashed campaign,
+  or one with failed batches, resumes without emailing anyone twice
+- LocalSendGridSink: fake SendGrid endpoint on localhost for benchmarks
+
+Usage:
+    dispatcher = BulkEmailDispatcher(get_bulk_email_transport(api_key))
+    report = dispatcher.send(recipients, subject, html_content)
+    report['sent'], report['resumed'], report['failed']
+
+    # Offline: python bulk_email.py [recipients]
+    with LocalSendGridSink(latency=0.05, rate_limit_every=10) as sink:
+        transport = SendGridTransport('test-key', base_url=sink.url)
+        BulkEmailDispatcher(transport).send(recipients, subject, html_content)
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+SENDGRID_API_URL = "https://api.sendgrid.com"
+SENDGRID_SEND_PATH = "/v3/mail/send"
+
+DEFAULT_FROM_EMAIL = "admin@t21services.co.uk"
+DEFAULT_FROM_NAME = "T21 Services"
+
+# SendGrid accepts at most 1000 personalizations per request
+MAX_BATCH_SIZE = 1000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+REQUEST_TIMEOUT_SECONDS = 30
+
+BULK_EMAIL_JOURNAL_DIR = os.path.join("data", "bulk_email")
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def build_payload(recipients: List[str], subject: str, html_content: str,
+                  from_email: str = DEFAULT_FROM_EMAIL, from_name: str = DEFAULT_FROM_NAME,
+                  campaign_id: str = None) -> Dict:
+    """SendGrid v3 mail/send body: one shared message, one personalization per recipient"""
+    payload = {
+        'personalizations': [{'to': [{'email': email}]} for email in recipients],
+        'from': {'email': from_email, 'name': from_name},
+        'subject': subject,
+        'content': [{'type': 'text/html', 'value': html_content}]
+    }
+    if campaign_id:
+        payload['custom_args'] = {'campaign_id': campaign_id}
+    return payload
+
+
+def _error_fields(body) -> List[str]:
+    """Fields named in a SendGrid error body ({"errors": [{"field": ...}]})"""
+    try:
+        errors = json.loads(body).get('errors') or []
+    except (TypeError, ValueError, AttributeError):
+        return []
+    return [error.get('field') or '' for error in errors if isinstance(error, dict)]
+
+
+def _names_recipient(error_fields: List[str]) -> bool:
+    """True when SendGrid blamed a recipient (personalizations.N...), not the message"""
+    return any(field.startswith('personalizations') for field in error_fields)
+
+
+def _retry_after(headers) -> Optional[float]:
+    """Seconds until a 429 may be retried (Retry-After, else X-RateLimit-Reset epoch)"""
+    try:
+        if headers.get('Retry-After'):
+            return max(0.0, float(headers['Retry-After']))
+        if headers.get('X-RateLimit-Reset'):
+            return max(0.0, float(headers['X-RateLimit-Reset']) - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class EmailTransport:
+    """Delivers one mail/send payload"""
+
+    def send(self, payload: Dict) -> Tuple[int, Optional[float], List[str]]:
+        """
+        Returns:
+            (HTTP status, seconds to wait before retrying or None,
+             fields named in the error body - e.g. 'personalizations.3.to.0.email')
+
+        Raises:
+            ConnectionError (or requests.RequestException) on network failure
+        """
+        raise NotImplementedError
+
+
+class SendGridTransport(EmailTransport):
+    """SendGrid v3 HTTP API over one keep-alive session per thread"""
+
+    def __init__(self, api_key: str, base_url: str = SENDGRID_API_URL,
+                 timeout: float = REQUEST_TIMEOUT_SECONDS):
+        if not REQUESTS_AVAILABLE:
+            raise ImportError("requests is required for SendGridTransport")
+        self.api_key = api_key
+        self.url = base_url.rstrip('/') + SENDGRID_SEND_PATH
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self) -> "requests.Session":
+        """This thread's session (opened once, reused)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update({
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            })
+        return session
+
+    def send(self, payload: Dict) -> Tuple[int, Optional[float], List[str]]:
+        response = self._session().post(self.url, data=json.dumps(payload), timeout=self.timeout)
+        retry_after = _retry_after(response.headers) if response.status_code == 429 else None
+        error_fields = _error_fields(response.content) if response.status_code >= 400 else []
+        return response.status_code, retry_after, error_fields
+
+
+_bulk_email_transport: Optional[EmailTransport] = None
+_sendgrid_transports: Dict[str, SendGridTransport] = {}
+_transport_lock = threading.Lock()
+
+
+def set_bulk_email_transport(transport: Optional[EmailTransport]):
+    """Use this transport instead of SendGrid (None to go back)"""
+    global _bulk_email_transport
+    _bulk_email_transport = transport
+
+
+def get_bulk_email_transport(api_key: str = None) -> Optional[EmailTransport]:
+    """
+    The transport set with set_bulk_email_transport(), else a shared
+    SendGridTransport for api_key (default: SENDGRID_API_KEY environment
+    variable); None if there is no key or requests is missing
+    """
+    if _bulk_email_transport is not None:
+        return _bulk_email_transport
+    api_key = api_key or os.environ.get("SENDGRID_API_KEY")
+    if not api_key or not REQUESTS_AVAILABLE:
+        return None
+    with _transport_lock:
+        if api_key not in _sendgrid_transports:
+            _sendgrid_transports[api_key] = SendGridTransport(api_key)
+        return _sendgrid_transports[api_key]
+
+
+def campaign_key(subject: str, html_content: str, recipients: Iterable[str],
+                 from_email: str = DEFAULT_FROM_EMAIL) -> str:
+    """Stable id for a campaign: the same message to the same list resumes the same journal"""
+    digest = hashlib.sha256()
+    for part in (from_email, subject, html_content, *sorted(recipients)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:20]
+
+
+def _content_hash(subject: str, html_content: str) -> str:
+    return hashlib.sha256(f"{subject}\0{html_content}".encode('utf-8')).hexdigest()
+
+
+class CampaignJournal:
+    """
+    Append-only progress log for one campaign (<journal_dir>/<campaign_id>.jsonl)
+
+    A batch is written (and fsync'd) only after SendGrid accepted or finally
+    rejected it. A run in which every batch was accepted writes a 'complete'
+    record; the next send of the same campaign starts a fresh journal, the
+    finished one is kept under a timestamped name. A run with failed batches
+    stays open, so sending again retries only the recipients not yet reached.
+    """
+
+    def __init__(self, campaign_id: str, journal_dir: str = BULK_EMAIL_JOURNAL_DIR):
+        if not re.fullmatch(r'[\w.-]+', campaign_id):
+            raise ValueError(f"Invalid campaign id: {campaign_id}")
+        self.campaign_id = campaign_id
+        self.journal_dir = journal_dir
+        self.path = os.path.join(journal_dir, f"{campaign_id}.jsonl")
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _read(self) -> List[Dict]:
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn final line from a crash mid-write
+                    continue
+        return entries
+
+    def open(self, subject: str, html_content: str, total: int) -> Set[str]:
+        """
+        Start or resume the campaign
+
+        Returns:
+            Recipients (lower-cased) already sent to by an unfinished earlier run
+
+        Raises:
+            ValueError if an unfinished run of this campaign id sent a different message
+        """
+        os.makedirs(self.journal_dir, exist_ok=True)
+        content_hash = _content_hash(subject, html_content)
+        entries = self._read()
+
+        if entries and entries[-1].get('type') == 'complete':
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            os.replace(self.path, os.path.join(self.journal_dir, f"{self.campaign_id}.{stamp}.jsonl"))
+            entries = []
+
+        sent = set()
+        if entries:
+            header = entries[0]
+            if header.get('content_hash') != content_hash:
+                raise ValueError(f"Campaign {self.campaign_id} was started with a different message")
+            for entry in entries:
+                if entry.get('type') == 'batch' and entry.get('status') == 'sent':
+                    sent.update(entry['recipients'])
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if not entries:
+            self._write({'type': 'campaign', 'campaign_id': self.campaign_id, 'subject': subject,
+                         'content_hash': content_hash, 'recipients': total,
+                         'started_at': datetime.now().isoformat()})
+        else:
+            self._write({'type': 'resume', 'already_sent': len(sent),
+                         'resumed_at': datetime.now().isoformat()})
+        return sent
+
+    def _write(self, entry: Dict):
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_batch(self, status: str, recipients: List[str], status_code: int = None):
+        """A batch SendGrid accepted ('sent') or finally rejected ('failed')"""
+        self._write({'type': 'batch', 'status': status, 'status_code': status_code,
+                     'recipients': [email.lower() for email in recipients],
+                     'at': datetime.now().isoformat()})
+
+    def complete(self, summary: Dict):
+        """Mark the run finished; the next send of this campaign starts afresh"""
+        self._write(dict(summary, type='complete', completed_at=datetime.now().isoformat()))
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RateLimitGate:
+    """Holds every sender back until the latest rate-limit reset"""
+
+    def __init__(self):
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+
+def _split_recipients(recipients: Iterable) -> Tuple[List[str], List]:
+    """(unique valid addresses in order, invalid entries) - duplicates differ only in case"""
+    valid, invalid, seen = [], [], set()
+    for email in recipients:
+        if not isinstance(email, str) or not EMAIL_PATTERN.match(email.strip()):
+            invalid.append(email)
+            continue
+        email = email.strip()
+        if email.lower() not in seen:
+            seen.add(email.lower())
+            valid.append(email)
+    return valid, invalid
+
+
+class _CampaignRun:
+    """State shared by the sender threads of one send()"""
+
+    def __init__(self, subject: str, html_content: str, campaign_id: str, journal: CampaignJournal):
+        self.subject = subject
+        self.html_content = html_content
+        self.campaign_id = campaign_id
+        self.journal = journal
+        self.gate = RateLimitGate()
+        self.stats = {'requests': 0, 'retries': 0, 'rate_limited': 0}
+        self._lock = threading.Lock()
+
+    def count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+
+class BulkEmailDispatcher:
+    """Sends one message to a recipient list in batched, concurrent, resumable SendGrid requests"""
+
+    def __init__(self, transport: EmailTransport, from_email: str = DEFAULT_FROM_EMAIL,
+                 from_name: str = DEFAULT_FROM_NAME, batch_size: int = DEFAULT_BATCH_SIZE,
+                 workers: int = DEFAULT_WORKERS, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE_SECONDS, max_backoff: float = MAX_BACKOFF_SECONDS,
+                 journal_dir: str = BULK_EMAIL_JOURNAL_DIR):
+        """
+        Args:
+            transport: Where payloads go (SendGridTransport, or a stand-in)
+            from_email: Sender address
+            from_name: Sender display name
+            batch_size: Recipients per request (max 1000)
+            workers: Requests in flight at once
+            max_retries: Retries per batch after a 429, 5xx or network error
+            backoff_base: First retry delay in seconds (doubles each retry)
+            max_backoff: Cap on a single retry delay
+            journal_dir: Where progress journals are kept
+        """
+        self.transport = transport
+        self.from_email = from_email
+        self.from_name = from_name
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.journal_dir = journal_dir
+
+    def send(self, recipients: Iterable, subject: str, html_content: str,
+             campaign_id: str = None) -> Dict:
+        """
+        Send html_content to every recipient once
+
+        Args:
+            recipients: Email addresses (invalid ones fail without a request;
+                duplicates are sent once)
+            subject: Subject line
+            html_content: Rendered HTML body, identical for every recipient
+            campaign_id: Journal name (default: derived from sender, message
+                and recipient list, so re-sending after a crash or failed
+                batches resumes: only recipients not yet reached are sent to)
+
+        Returns:
+            {'campaign_id', 'total', 'sent', 'resumed', 'failed', 'complete',
+             'requests', 'retries', 'rate_limited', 'elapsed_seconds'}
+            complete is False while any batch failed (send again to retry them)
+        """
+        start = time.perf_counter()
+        valid, invalid = _split_recipients(recipients)
+        if campaign_id is None:
+            campaign_id = campaign_key(subject, html_content, [e.lower() for e in valid], self.from_email)
+
+        journal = CampaignJournal(campaign_id, self.journal_dir)
+        already_sent = journal.open(subject, html_content, len(valid))
+        pending = [email for email in valid if email.lower() not in already_sent]
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+
+        run = _CampaignRun(subject, html_content, campaign_id, journal)
+        sent, failed = 0, list(invalid)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(self._send_batch, batch, run) for batch in batches]
+                for future in futures:
+                    batch_sent, batch_failed = future.result()
+                    sent += batch_sent
+                    failed.extend(batch_failed)
+
+            unsent = len(failed) - len(invalid)
+            report = {
+                'campaign_id': campaign_id,
+                'total': len(valid) + len(invalid),
+                'sent': sent,
+                'resumed': len(valid) - len(pending),
+                'failed': failed,
+                'complete': unsent == 0,
+                **run.stats,
+                'elapsed_seconds': round(time.perf_counter() - start, 3)
+            }
+            if unsent:
+                # Journal left open: the next send of this campaign retries only these
+                print(f"⚠️ {unsent} recipients not reached - send campaign {campaign_id} again to retry them")
+            else:
+                journal.complete({k: v for k, v in report.items() if k != 'failed'})
+            return report
+        finally:
+            journal.close()
+
+    def _send_batch(self, batch: List[str], run: "_CampaignRun") -> Tuple[int, List[str]]:
+        """
+        One batch with retry; a batch rejected for its recipients is halved
+        until the bad addresses are isolated (a 400 for the message itself -
+        e.g. empty subject, bad sender - fails the batch without splitting)
+
+        Returns:
+            (recipients sent, recipients failed)
+        """
+        payload = build_payload(batch, run.subject, run.html_content, self.from_email,
+                                self.from_name, run.campaign_id)
+        status = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                run.count('retries')
+            run.gate.wait()
+            run.count('requests')
+            try:
+                status, retry_after, error_fields = self.transport.send(payload)
+            except Exception as e:
+                print(f"⚠️ Bulk email request failed: {e}")
+                status, retry_after, error_fields = None, None, []
+
+            if status is not None and 200 <= status < 300:
+                run.journal.record_batch('sent', batch, status)
+                return len(batch), []
+
+            backoff = min(self.max_backoff, self.backoff_base * 2 ** attempt)
+            if status == 429:
+                run.count('rate_limited')
+                run.gate.pause(retry_after if retry_after is not None else backoff)
+            elif status is None or status >= 500:
+                time.sleep(backoff * random.uniform(0.5, 1.0))
+            elif len(batch) > 1 and (status == 413 or (status == 400 and _names_recipient(error_fields))):
+                middle = len(batch) // 2
+                first = self._send_batch(batch[:middle], run)
+                second = self._send_batch(batch[middle:], run)
+                return first[0] + second[0], first[1] + second[1]
+            else:
+                break
+
+        print(f"❌ Bulk email batch of {len(batch)} failed (status {status})")
+        run.journal.record_batch('failed', batch, status)
+        return 0, list(batch)
+
+
+class LocalSendGridSink:
+    """
+    Fake SendGrid mail/send endpoint on localhost (benchmarks, offline tests)
+
+    Accepts payloads like SendGrid does (202), optionally after a delay,
+    answering every rate_limit_every-th request with 429 + Retry-After and
+    rejecting (400, with SendGrid's error body naming each
+    personalizations.N.to.0.email) any request addressed to one of
+    reject_addresses.
+    Counts requests, recipients and TCP connections so session reuse shows.
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit_every: int = 0,
+                 retry_after: float = 0.05, reject_addresses: Iterable[str] = ()):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.reject_addresses = {email.lower() for email in reject_addresses}
+        self.requests = 0
+        self.connections = 0
+        self.recipients: List[str] = []
+        self.statuses: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handle(self, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        if self.latency:
+            time.sleep(self.latency)
+
+        status, headers, response = 202, {}, b''
+        payload = json.loads(body)
+        addresses = [to['email'] for p in payload['personalizations'] for to in p['to']]
+        rejected = [i for i, email in enumerate(addresses) if email.lower() in self.reject_addresses]
+        if self.rate_limit_every and number % self.rate_limit_every == 0:
+            status, headers = 429, {'Retry-After': str(self.retry_after)}
+        elif rejected:
+            status = 400
+            response = json.dumps({'errors': [
+                {'message': 'Does not contain a valid address.', 'field': f'personalizations.{i}.to.0.email'}
+                for i in rejected
+            ]}).encode('utf-8')
+
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status == 202:
+                self.recipients.extend(addresses)
+        return status, headers, response
+
+    def start(self) -> "LocalSendGridSink":
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with sink._lock:
+                    sink.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status, headers, response = sink._handle(body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if response:
+                    self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "LocalSendGridSink":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def benchmark(recipients: int = 10000, latency: float = 0.02, journal_dir: str = None) -> Dict:
+    """
+    Per-recipient sends (the old send_bulk_email loop, one request each)
+    against batched dispatch, both against LocalSendGridSink
+
+    The per-recipient run is timed on a 200-recipient sample and scaled up.
+    """
+    import tempfile
+
+    journal_dir = journal_dir or tempfile.mkdtemp(prefix="bulk_email_bench_")
+    emails = [f"student{i}@example.com" for i in range(recipients)]
+    html_content = "<html><body><p>Benchmark</p></body></html>"
+    results = {}
+
+    with LocalSendGridSink(latency=latency) as sink:
+        sample = emails[:min(200, recipients)]
+        start = time.perf_counter()
+        for email in sample:
+            # New client and connection per recipient, as send_email does
+            SendGridTransport('bench-key', base_url=sink.url).send(
+                build_payload([email], "Benchmark", html_content))
+        per_recipient = (time.perf_counter() - start) / len(sample)
+        results['per_recipient'] = {'estimated_seconds': round(per_recipient * recipients, 2),
+                                    'requests': recipients}
+
+    with LocalSendGridSink(latency=latency, rate_limit_every=10) as sink:
+        dispatcher = BulkEmailDispatcher(SendGridTransport('bench-key', base_url=sink.url),
+                                         backoff_base=0.01, journal_dir=journal_dir)
+        report = dispatcher.send(emails, "Benchmark", html_content)
+        results['batched'] = {'seconds': report['elapsed_seconds'], 'requests': report['requests'],
+                              'rate_limited': report['rate_limited'], 'connections': sink.connections,
+                              'delivered': len(sink.recipients)}
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(json.dumps(benchmark(count), indent=2))
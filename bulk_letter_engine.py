@@ -0,0 +1,378 @@
+"""
+T21 Bulk Letter Engine
+Validate thousands of clinic letters in one pipelined batch
+
+Features:
+- Rule-based interpretation (validate_clinic_letter) spread across a process pool
+- AI-enhanced reading behind a bounded asyncio concurrency limiter
+- Retry with exponential backoff (and optional timeout) for each AI call
+- Results streamed back in input order while later letters are still running
+- Per-stage latency report (rules, AI, end-to-end)
+- Offline stub model for testing without an API key
+
+Usage:
+    with BulkLetterEngine(ai_concurrency=8) as engine:
+        for result in engine.stream(letters, use_ai=True):
+            ...
+
+        report = engine.validate(letters, use_ai=True)
+        print(report['stage_latency'])
+
+    # Offline: simulated latency and transient failures
+    engine = BulkLetterEngine(model=StubLetterModel(latency=0.05, failure_rate=0.1))
+"""
+
+import asyncio
+import multiprocessing as mp
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rtt_validator import NLP_AVAILABLE, merge_ai_letter_result, validate_clinic_letter
+
+if NLP_AVAILABLE:
+    from nlp_letter_reader import NLPLetterReader
+
+# Below this many letters the process pool costs more than it saves
+MIN_PARALLEL_LETTERS = 200
+
+STAGES = ["rules", "ai", "total"]
+
+
+class TransientModelError(Exception):
+    """A retryable failure from the letter model (rate limit, timeout, 5xx)"""
+    pass
+
+
+class StubLetterModel:
+    """
+    Offline stand-in for the AI letter model
+
+    Returns a canned reading after a simulated network delay, and fails a
+    seeded fraction of calls with TransientModelError so retry handling can
+    be exercised.
+    """
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, seed: int = 0,
+                 response: Dict[str, Any] = None):
+        """
+        Args:
+            latency: Simulated seconds per call
+            failure_rate: Share of calls (0-1) that raise TransientModelError
+            seed: Seed for the failure sequence
+            response: Reading to return (default: confident, no RTT code)
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.response = response or {'confidence': 0.9, 'extracted_data': {}, 'suggestions': []}
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def aread_letter(self, letter_text: str) -> Dict[str, Any]:
+        """Read one letter (same shape as NLPLetterReader.read_letter)"""
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+        if self._random.random() < self.failure_rate:
+            raise TransientModelError("Simulated model failure")
+
+        return dict(self.response)
+
+
+# One local NLP reader per worker process
+_LOCAL_READER = None
+
+
+def _interpret_chunk(letters: List[Tuple[str, Dict]], local_nlp: bool = False) -> List[Tuple]:
+    """
+    Run rule-based interpretation on a chunk of letters (process-pool task)
+
+    With local_nlp the CPU-bound local NLP reader runs here too, so it is
+    spread across the pool instead of contending for the GIL in threads.
+
+    Returns:
+        (result, rules_seconds, ai_result, ai_error, ai_seconds) per letter
+    """
+    global _LOCAL_READER
+    if local_nlp and _LOCAL_READER is None:
+        _LOCAL_READER = NLPLetterReader()
+
+    outcomes = []
+    for letter_text, pas_summary in letters:
+        start = time.perf_counter()
+        try:
+            result = validate_clinic_letter(letter_text, pas_summary)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        rules_seconds = time.perf_counter() - start
+
+        ai_result, ai_error, ai_seconds = None, None, 0.0
+        if local_nlp and result.get('success') is not False:
+            start = time.perf_counter()
+            try:
+                ai_result = _LOCAL_READER.read_letter(letter_text)
+            except Exception as e:
+                ai_error = str(e)
+            ai_seconds = time.perf_counter() - start
+
+        outcomes.append((result, rules_seconds, ai_result, ai_error, ai_seconds))
+    return outcomes
+
+
+def _letter_has_gaps(result: Dict) -> bool:
+    """True if the interpreter found actions missing from PAS"""
+    return bool(result.get('gaps') or result.get('Action_Compliance', {}).get('Gaps'))
+
+
+class StageLatency:
+    """Per-stage latency samples for one bulk run"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """count, total seconds and mean/p50/p95/max in milliseconds per stage"""
+        report = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            report[stage] = {
+                'count': len(ordered),
+                'total_seconds': round(sum(ordered), 4),
+                'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+                'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3)
+            }
+        return report
+
+
+class BulkLetterEngine:
+    """Pipelined clinic letter validation: process pool for rules, asyncio for AI"""
+
+    def __init__(self, workers: int = None, ai_concurrency: int = 8, max_retries: int = 3,
+                 backoff_base: float = 0.5, max_backoff: float = 8.0, ai_timeout: float = None,
+                 chunk_size: int = None, model: Any = None):
+        """
+        Initialize bulk letter engine
+
+        Args:
+            workers: Rule-stage processes (default: all CPU cores)
+            ai_concurrency: Maximum AI calls in flight at once
+            max_retries: Retries per AI call after the first attempt
+            backoff_base: First retry delay in seconds (doubles each retry)
+            max_backoff: Cap on a single retry delay
+            ai_timeout: Seconds before an AI call is abandoned and retried (None = no limit)
+            chunk_size: Letters per process-pool task (default: sized from batch and workers)
+            model: Remote letter model - anything with aread_letter() (async)
+                or read_letter() (sync, run in a thread). Default: the local
+                NLPLetterReader, run inside the rule-stage processes
+        """
+        self.workers = workers or mp.cpu_count()
+        self.ai_concurrency = max(1, ai_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.ai_timeout = ai_timeout
+        self.chunk_size = chunk_size
+        self.model = model
+
+        self.latency = StageLatency()
+        self.ai_retries = 0
+        self.ai_failures = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def validate(self, letters: List[Dict], use_ai: bool = False) -> Dict:
+        """
+        Validate a batch of letters and collect the results
+
+        Args:
+            letters: List of {'text': str, 'pas_summary': Dict}
+            use_ai: Also run the AI letter model on every letter
+
+        Returns:
+            {
+                'total_letters': int,
+                'validation_time': float,
+                'results': List[Dict] (input order),
+                'errors_found': int,
+                'efficiency': str,
+                'stage_latency': Dict,
+                'ai_retries': int,
+                'ai_failures': int
+            }
+        """
+        start_time = time.time()
+        results = list(self.stream(letters, use_ai=use_ai))
+        elapsed = time.time() - start_time
+
+        return {
+            'total_letters': len(results),
+            'validation_time': elapsed,
+            'results': results,
+            'errors_found': sum(1 for r in results if _letter_has_gaps(r)),
+            'efficiency': f"Processed {len(results)} letters in {elapsed:.2f}s",
+            'stage_latency': self.latency.report(),
+            'ai_retries': self.ai_retries,
+            'ai_failures': self.ai_failures
+        }
+
+    def stream(self, letters: Iterable[Dict], use_ai: bool = False) -> Iterator[Dict]:
+        """
+        Yield one result per letter, in input order, as soon as it is ready
+
+        Runs its own event loop - from async code use stream_async() instead.
+        """
+        loop = asyncio.new_event_loop()
+        results = self.stream_async(letters, use_ai=use_ai)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.close()
+
+    async def stream_async(self, letters: Iterable[Dict], use_ai: bool = False) -> AsyncIterator[Dict]:
+        """
+        Async version of stream()
+
+        Letters are split into chunks. Each chunk's rule stage runs in the
+        process pool and its AI calls start as soon as those rules finish, so
+        later chunks overlap with earlier ones. Only a bounded window of chunks
+        is in flight; results wait in that window only until every earlier
+        letter has been yielded.
+        """
+        self.latency = StageLatency()
+        self.ai_retries = 0
+        self.ai_failures = 0
+
+        letters = letters if isinstance(letters, list) else list(letters)
+        chunk_size = self._chunk_size(len(letters))
+        parallel = self.workers > 1 and len(letters) >= MIN_PARALLEL_LETTERS
+        local_nlp = use_ai and self.model is None and NLP_AVAILABLE
+        limiter = asyncio.Semaphore(self.ai_concurrency)
+        window: deque = deque()
+        max_window = max(2, self.workers * 2)
+
+        try:
+            for offset in range(0, len(letters), chunk_size):
+                chunk = [(letter.get('text', ''), letter.get('pas_summary', {}))
+                         for letter in letters[offset:offset + chunk_size]]
+                window.append(asyncio.ensure_future(self._run_chunk(chunk, use_ai, local_nlp, parallel, limiter)))
+
+                # Hand back finished letters before reading further ahead
+                while len(window) >= max_window or (window and window[0].done()):
+                    for result in await window.popleft():
+                        yield result
+
+            while window:
+                for result in await window.popleft():
+                    yield result
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def _run_chunk(self, chunk: List[Tuple[str, Dict]], use_ai: bool, local_nlp: bool,
+                         parallel: bool, limiter: asyncio.Semaphore) -> List[Dict]:
+        """Rules (and local NLP) for a whole chunk, then remote AI for each of its letters"""
+        started = time.perf_counter()
+
+        if parallel:
+            loop = asyncio.get_running_loop()
+            outcomes = await loop.run_in_executor(self._pool(), _interpret_chunk, chunk, local_nlp)
+        else:
+            outcomes = _interpret_chunk(chunk, local_nlp)
+
+        results = []
+        for (letter_text, _), (result, rules_seconds, ai_result, ai_error, ai_seconds) in zip(chunk, outcomes):
+            self.latency.record('rules', rules_seconds)
+            if local_nlp and result.get('success') is not False:
+                self.latency.record('ai', ai_seconds)
+                if ai_error is None:
+                    merge_ai_letter_result(result, ai_result)
+                else:
+                    self.ai_failures += 1
+                    result['ai_error'] = ai_error
+                    result['ai_enhanced'] = False
+                use_remote = False
+            else:
+                use_remote = use_ai
+            results.append(self._enhance(letter_text, result, use_remote, limiter, started))
+
+        return await asyncio.gather(*results)
+
+    async def _enhance(self, letter_text: str, result: Dict, use_ai: bool,
+                       limiter: asyncio.Semaphore, started: float) -> Dict:
+        """Apply the remote AI stage to one rule-based result"""
+        if result.get('success') is False or 'ai_enhanced' in result:
+            pass
+        elif use_ai and self.model is not None:
+            async with limiter:
+                ai_started = time.perf_counter()
+                try:
+                    ai_result = await self._call_model(letter_text)
+                    merge_ai_letter_result(result, ai_result)
+                except Exception as e:
+                    self.ai_failures += 1
+                    result['ai_error'] = str(e)
+                    result['ai_enhanced'] = False
+                self.latency.record('ai', time.perf_counter() - ai_started)
+        else:
+            result['ai_enhanced'] = False
+            result['ai_available'] = self.model is not None or NLP_AVAILABLE
+
+        self.latency.record('total', time.perf_counter() - started)
+        return result
+
+    async def _call_model(self, letter_text: str) -> Dict:
+        """
+        One AI call with timeout, retry and exponential backoff
+
+        Only timeouts and TransientModelError are retried; any other error
+        (bad input, auth, a bug in the model) fails the letter at once.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                if hasattr(self.model, 'aread_letter'):
+                    call = self.model.aread_letter(letter_text)
+                else:
+                    call = asyncio.to_thread(self.model.read_letter, letter_text)
+                return await asyncio.wait_for(call, self.ai_timeout)
+            except (TransientModelError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                self.ai_retries += 1
+                await asyncio.sleep(min(self.max_backoff, self.backoff_base * 2 ** attempt))
+
+    def _chunk_size(self, num_letters: int) -> int:
+        """Letters per task: a few tasks per worker, at least 25 letters each"""
+        if self.chunk_size:
+            return self.chunk_size
+        return max(25, min(500, num_letters // max(1, self.workers * 4) or 1))
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Process pool, created on first use and reused across batches"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        """Shut down the process pool"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "BulkLetterEngine":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -25,6 +25,7 @@ try:
     from supabase_database import (
         add_cancer_patient as supabase_add_cancer_patient,
         get_cancer_patients_for_user,
+        get_cancer_patients_by_ids as supabase_get_cancer_patients_by_ids,
         update_cancer_patient as supabase_update_cancer_patient,
         delete_cancer_patient as supabase_delete_cancer_patient
     )
@@ -33,6 +34,11 @@ except ImportError:
     SUPABASE_ENABLED = False
     print("⚠️ Supabase not available for Cancer Module - using fallback storage")
 
+# Cross-module patient index (kept current by add_cancer_patient and
+# add_cancer_milestone, which re-index the whole record; this module has no
+# delete. The hook logs and swallows index errors, so it never fails a save)
+from patient_index import index_patient_record
+
 
 def get_current_user_email():
     """Get current logged-in user's email"""
@@ -239,6 +245,7 @@ def add_cancer_patient(
     if SUPABASE_ENABLED:
         success, result = supabase_add_cancer_patient(user_email, patient_data)
         if success:
+            index_patient_record('cancer', patient_id, patient_data)
             return patient_id
         else:
             # CRITICAL: Show error to user instead of hiding it!
@@ -251,6 +258,7 @@ def add_cancer_patient(
         ptl = load_cancer_ptl()
         ptl['patients'].append(patient_data)
         save_cancer_ptl(ptl)
+        index_patient_record('cancer', patient_id, patient_data)
         return patient_id
 
 
@@ -299,6 +307,7 @@ def add_cancer_milestone(
                 patient['pathway_status'] = 'COMPLETED'
             
             save_cancer_ptl(ptl)
+            index_patient_record('cancer', patient.get('pathway_id') or patient_id, patient)
             return True
     
     return False
@@ -311,13 +320,22 @@ def get_all_cancer_patients() -> List[Dict]:
     return ptl.get('patients', [])
 
 
+def get_cancer_patients_by_ids(patient_ids: List[str]) -> List[Dict]:
+    """Cancer patients with these pathway (or patient) ids that the current user can see"""
+    if SUPABASE_ENABLED:
+        # By-id query instead of loading the whole cancer PTL
+        owner = None if is_admin_or_supervisor() else get_current_user_email()
+        return supabase_get_cancer_patients_by_ids(patient_ids, owner)
+    
+    wanted = set(patient_ids)
+    return [patient for patient in load_cancer_ptl()['patients']
+            if patient.get('pathway_id') in wanted or patient.get('patient_id') in wanted]
+
+
 def get_cancer_patient_by_id(patient_id: str) -> Optional[Dict]:
     """Get specific cancer patient"""
-    ptl = load_cancer_ptl()
-    for patient in ptl['patients']:
-        if patient.get('pathway_id') == patient_id or patient.get('patient_id') == patient_id:
-            return patient
-    return None
+    patients = get_cancer_patients_by_ids([patient_id])
+    return patients[0] if patients else None
 
 
 def search_cancer_patients(
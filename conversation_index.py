@@ -0,0 +1,220 @@
+"""
+T21 Conversation Index
+Per-user summary of direct message conversations for the messaging inbox
+
+Features:
+- One row per (user, conversation): other participant, last message,
+  last message time and unread count
+- Kept current by messaging_core.send_direct_message / mark_dm_as_read,
+  so the inbox is one indexed query instead of a scan of recent DMs
+- Supabase store (dm_conversations table + atomic RPCs, see
+  ADD_DM_CONVERSATION_INDEX.sql)
+- SQLite stand-in with the same interface for offline tests
+
+Usage:
+    index = get_conversation_index(supabase)
+    index.record_message(dm)                                  # after inserting a DM
+    index.mark_read('jo@nhs.net', conversation_id)            # after reading one
+    index.list_conversations('jo@nhs.net')                    # newest first
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+CONVERSATION_INDEX_DB = "conversation_index.db"
+
+# Conversations returned per inbox load
+DEFAULT_CONVERSATION_LIMIT = 100
+
+
+def conversation_rows(dm: Dict) -> List[Dict]:
+    """The sender's and the recipient's summary rows for one new message"""
+    shared = {
+        'conversation_id': dm['conversation_id'],
+        'last_message': dm['content'],
+        'last_message_time': dm['created_at'],
+        'last_sender_email': dm['sender_email']
+    }
+    return [
+        dict(shared, user_email=dm['sender_email'], other_email=dm['recipient_email'],
+             other_name=dm.get('recipient_name'), unread_increment=0),
+        dict(shared, user_email=dm['recipient_email'], other_email=dm['sender_email'],
+             other_name=dm.get('sender_name'), unread_increment=1)
+    ]
+
+
+def as_conversation(row: Dict) -> Dict:
+    """Summary row in the get_conversations() format"""
+    return {
+        'conversation_id': row['conversation_id'],
+        'other_email': row['other_email'],
+        'other_name': row['other_name'],
+        'last_message': row['last_message'],
+        'last_message_time': row['last_message_time'],
+        'unread': row['unread_count'] > 0,
+        'unread_count': row['unread_count']
+    }
+
+
+class ConversationIndex:
+    """Interface shared by the Supabase store and the SQLite stand-in"""
+
+    def record_message(self, dm: Dict):
+        """Update both participants' summaries for a newly sent DM"""
+        raise NotImplementedError
+
+    def mark_read(self, user_email: str, conversation_id: str, count: int = 1):
+        """Take count messages off a user's unread count (never below 0)"""
+        raise NotImplementedError
+
+    def list_conversations(self, user_email: str, limit: int = DEFAULT_CONVERSATION_LIMIT) -> List[Dict]:
+        """A user's conversations, most recent message first"""
+        raise NotImplementedError
+
+    def rebuild(self, messages: Iterable[Dict]):
+        """Replace the index with summaries of these (non-deleted) DMs"""
+        raise NotImplementedError
+
+
+class SupabaseConversationIndex(ConversationIndex):
+    """dm_conversations table, updated through RPCs so counters stay atomic"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def record_message(self, dm: Dict):
+        self.client.rpc('record_dm_conversation', {
+            'p_conversation_id': dm['conversation_id'],
+            'p_sender_email': dm['sender_email'],
+            'p_sender_name': dm.get('sender_name'),
+            'p_recipient_email': dm['recipient_email'],
+            'p_recipient_name': dm.get('recipient_name'),
+            'p_content': dm['content'],
+            'p_created_at': dm['created_at']
+        }).execute()
+
+    def mark_read(self, user_email: str, conversation_id: str, count: int = 1):
+        self.client.rpc('mark_dm_conversation_read', {
+            'p_user_email': user_email,
+            'p_conversation_id': conversation_id,
+            'p_count': count
+        }).execute()
+
+    def list_conversations(self, user_email: str, limit: int = DEFAULT_CONVERSATION_LIMIT) -> List[Dict]:
+        response = self.client.table('dm_conversations')\
+            .select('*')\
+            .eq('user_email', user_email)\
+            .order('last_message_time', desc=True)\
+            .limit(limit)\
+            .execute()
+        return [as_conversation(row) for row in response.data or []]
+
+    def rebuild(self, messages: Iterable[Dict]):
+        # Done in SQL - see the backfill in ADD_DM_CONVERSATION_INDEX.sql
+        self.client.rpc('rebuild_dm_conversations', {}).execute()
+
+
+class SQLiteConversationIndex(ConversationIndex):
+    """Same index in a local SQLite file (offline tests, no Supabase)"""
+
+    def __init__(self, db_path: str = CONVERSATION_INDEX_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS dm_conversations (
+                user_email TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                other_email TEXT,
+                other_name TEXT,
+                last_message TEXT,
+                last_message_time TEXT,
+                last_sender_email TEXT,
+                unread_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_email, conversation_id)
+            )
+        ''')
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_dm_conversations_recent
+                        ON dm_conversations(user_email, last_message_time DESC)''')
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened once, reused)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _record(self, conn: sqlite3.Connection, dm: Dict):
+        for row in conversation_rows(dm):
+            # Same rules as record_dm_conversation(): a message older than the
+            # stored last message only counts towards unread
+            conn.execute('''
+                INSERT INTO dm_conversations (user_email, conversation_id, other_email, other_name,
+                    last_message, last_message_time, last_sender_email, unread_count)
+                VALUES (:user_email, :conversation_id, :other_email, :other_name,
+                    :last_message, :last_message_time, :last_sender_email, :unread_increment)
+                ON CONFLICT (user_email, conversation_id) DO UPDATE SET
+                    other_name = COALESCE(excluded.other_name, other_name),
+                    last_message = CASE WHEN excluded.last_message_time >= last_message_time
+                                        THEN excluded.last_message ELSE last_message END,
+                    last_sender_email = CASE WHEN excluded.last_message_time >= last_message_time
+                                             THEN excluded.last_sender_email ELSE last_sender_email END,
+                    last_message_time = MAX(last_message_time, excluded.last_message_time),
+                    unread_count = unread_count + excluded.unread_count
+            ''', row)
+
+    def record_message(self, dm: Dict):
+        conn = self._connection()
+        with conn:
+            self._record(conn, dm)
+
+    def mark_read(self, user_email: str, conversation_id: str, count: int = 1):
+        conn = self._connection()
+        with conn:
+            conn.execute('''UPDATE dm_conversations SET unread_count = MAX(unread_count - ?, 0)
+                            WHERE user_email = ? AND conversation_id = ?''',
+                         (count, user_email, conversation_id))
+
+    def list_conversations(self, user_email: str, limit: int = DEFAULT_CONVERSATION_LIMIT) -> List[Dict]:
+        rows = self._connection().execute(
+            '''SELECT * FROM dm_conversations WHERE user_email = ?
+               ORDER BY last_message_time DESC LIMIT ?''',
+            (user_email, limit)
+        ).fetchall()
+        return [as_conversation(dict(row)) for row in rows]
+
+    def rebuild(self, messages: Iterable[Dict]):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM dm_conversations')
+            for dm in sorted(messages, key=lambda dm: dm['created_at']):
+                if dm.get('is_deleted'):
+                    continue
+                self._record(conn, dm)
+                if dm.get('read_at'):
+                    conn.execute('''UPDATE dm_conversations SET unread_count = unread_count - 1
+                                    WHERE user_email = ? AND conversation_id = ?''',
+                                 (dm['recipient_email'], dm['conversation_id']))
+
+
+_conversation_index: Optional[ConversationIndex] = None
+
+
+def set_conversation_index(index: Optional[ConversationIndex]):
+    """Use this index instead of the Supabase one (None to go back)"""
+    global _conversation_index
+    _conversation_index = index
+
+
+def get_conversation_index(client=None) -> Optional[ConversationIndex]:
+    """The index set with set_conversation_index(), else the Supabase store for client"""
+    if _conversation_index is not None:
+        return _conversation_index
+    if client is None:
+        return None
+    return SupabaseConversationIndex(client)
@@ -290,25 +290,139 @@ def ai_detect_duplicate_records(records: List[Dict]) -> List[Dict]:
     - Exact NHS number match
     - Similar names + same DOB
     - Same address + similar names
+    
+    Only pairs sharing a blocking key are scored - see
+    detect_duplicate_records_blocked() for the blocking statistics.
+    """
+    
+    return detect_duplicate_records_blocked(records)['duplicates']
+
+
+SOUNDEX_CODES = {
+    letter: digit
+    for letters, digit in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6'))
+    for letter in letters
+}
+
+
+def soundex(name: str) -> str:
+    """American Soundex code of a surname (e.g. 'Robert' -> 'R163')"""
+    
+    codes = SOUNDEX_CODES
+    name = name.lower()
+    letters = [c for c in name if 'a' <= c <= 'z']
+    if not letters:
+        # No Latin letters - fall back to the name itself
+        return name
+    
+    encoded = letters[0].upper()
+    previous = codes.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = codes.get(letter, '')
+        if digit and digit != previous:
+            encoded += digit
+            if len(encoded) == 4:
+                break
+        if letter not in 'hw':
+            # H and W don't separate letters with the same code; vowels do
+            previous = digit
+    
+    return encoded.ljust(4, '0')
+
+
+def duplicate_blocking_keys(record: Dict) -> List[tuple]:
+    """
+    Blocking keys for one record
+    
+    A pair can only score >= 80 in calculate_record_similarity() if it
+    shares an NHS number, or shares a DOB (40) and has at least one exact
+    name match plus a similar other name (30 + 15). So every such pair
+    shares one of these keys and no duplicate is lost:
+    - NHS number
+    - DOB + Soundex surname (exact surnames always share a code)
+    - DOB + first name
+    """
+    
+    keys = []
+    
+    nhs_number = record.get('nhs_number')
+    if nhs_number:
+        keys.append(('nhs', nhs_number))
+    
+    dob = record.get('date_of_birth')
+    if dob:
+        surname = record.get('surname')
+        if surname and isinstance(surname, str):
+            keys.append(('dob_surname', dob, soundex(surname)))
+        
+        first_name = record.get('first_name')
+        if first_name and isinstance(first_name, str):
+            keys.append(('dob_first_name', dob, first_name.lower()))
+    
+    return keys
+
+
+def detect_duplicate_records_blocked(records: List[Dict]) -> Dict:
     """
+    Duplicate detection with a blocking stage
+    
+    Records are grouped by blocking key and pairwise scoring only runs
+    inside each block, instead of across all n(n-1)/2 pairs.
+    
+    Returns:
+        {
+            'duplicates': same records as ai_detect_duplicate_records(),
+            'blocking_stats': {
+                'total_records', 'blocks', 'largest_block', 'naive_comparisons',
+                'comparisons_made', 'comparisons_avoided', 'reduction_percent'
+            }
+        }
+    """
+    
+    blocks = {}
+    for index, record in enumerate(records):
+        for key in duplicate_blocking_keys(record):
+            blocks.setdefault(key, []).append(index)
+    
+    # A pair may share several keys - score it once
+    candidate_pairs = set()
+    for members in blocks.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                candidate_pairs.add((members[a], members[b]))
     
     duplicates = []
     
-    for i, record1 in enumerate(records):
-        for j, record2 in enumerate(records[i+1:], i+1):
-            match_score = calculate_record_similarity(record1, record2)
-            
-            if match_score >= 80:
-                duplicates.append({
-                    'record1_id': record1.get('record_id'),
-                    'record2_id': record2.get('record_id'),
-                    'match_score': match_score,
-                    'match_type': determine_match_type(record1, record2),
-                    'confidence': 'HIGH' if match_score >= 95 else 'MEDIUM',
-                    'recommended_action': 'Merge records' if match_score >= 95 else 'Review for potential merge'
-                })
+    # Same order as comparing every pair in record order
+    for i, j in sorted(candidate_pairs):
+        record1, record2 = records[i], records[j]
+        match_score = calculate_record_similarity(record1, record2)
+        
+        if match_score >= 80:
+            duplicates.append({
+                'record1_id': record1.get('record_id'),
+                'record2_id': record2.get('record_id'),
+                'match_score': match_score,
+                'match_type': determine_match_type(record1, record2),
+                'confidence': 'HIGH' if match_score >= 95 else 'MEDIUM',
+                'recommended_action': 'Merge records' if match_score >= 95 else 'Review for potential merge'
+            })
+    
+    naive_comparisons = len(records) * (len(records) - 1) // 2
+    shared_blocks = [members for members in blocks.values() if len(members) > 1]
     
-    return duplicates
+    return {
+        'duplicates': duplicates,
+        'blocking_stats': {
+            'total_records': len(records),
+            'blocks': len(shared_blocks),
+            'largest_block': max((len(members) for members in shared_blocks), default=0),
+            'naive_comparisons': naive_comparisons,
+            'comparisons_made': len(candidate_pairs),
+            'comparisons_avoided': naive_comparisons - len(candidate_pairs),
+            'reduction_percent': (1 - len(candidate_pairs) / naive_comparisons) * 100 if naive_comparisons else 0
+        }
+    }
 
 
 def calculate_record_similarity(record1: Dict, record2: Dict) -> float:
@@ -398,11 +512,13 @@ def ai_data_quality_scan(dataset_name: str, records: List[Dict]) -> Dict:
     scan_results['quality_dimensions']['consistency'] = consistency
     
     # Duplicate detection
-    duplicates = ai_detect_duplicate_records(records)
+    detection = detect_duplicate_records_blocked(records)
+    duplicates = detection['duplicates']
     scan_results['quality_dimensions']['uniqueness'] = {
         'score': max(0, 100 - len(duplicates) * 5),
         'duplicates_found': len(duplicates),
-        'duplicate_rate': (len(duplicates) / len(records) * 100) if records else 0
+        'duplicate_rate': (len(duplicates) / len(records) * 100) if records else 0,
+        'blocking_stats': detection['blocking_stats']
     }
     
     # Overall score
@@ -18,6 +18,8 @@ from email.mime.application import MIMEApplication
 from datetime import datetime
 import os
 
+from bulk_email import BulkEmailDispatcher, get_bulk_email_transport
+
 class EmailAutomation:
     """
     Email automation system
@@ -442,23 +444,33 @@ class EmailAutomation:
     # MARKETING EMAILS
     # ============================================
     
+    def send_bulk(self, email_list, subject, html_content):
+        """
+        Send one message to a list
+        With a SendGrid key (SENDGRID_API_KEY): batched, concurrent and
+        resumable via bulk_email; otherwise logged per recipient
+        """
+        transport = get_bulk_email_transport()
+        if transport is None:
+            for email in email_list:
+                self.send_email(email, subject, html_content)
+            return len(email_list)
+        
+        dispatcher = BulkEmailDispatcher(transport, from_email=self.sender_email, from_name=self.sender_name)
+        report = dispatcher.send(email_list, subject, html_content)
+        return report['sent'] + report['resumed']
+    
     def send_marketing_campaign(self, email_list, campaign_name, content):
         """Send marketing campaign to list"""
         
-        for email in email_list:
-            self.send_email(email, f"🚀 {campaign_name}", content)
-        
-        return len(email_list)
+        return self.send_bulk(email_list, f"🚀 {campaign_name}", content)
     
     def send_newsletter(self, email_list, newsletter_content):
         """Send newsletter"""
         
         subject = "📰 T21 Cybersecurity Newsletter"
         
-        for email in email_list:
-            self.send_email(email, subject, newsletter_content)
-        
-        return len(email_list)
+        return self.send_bulk(email_list, subject, newsletter_content)
 
 # Email automation instance
 email_automation = EmailAutomation()
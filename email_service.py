@@ -7,13 +7,16 @@ Features:
 - Password reset
 - Trial expiry warnings
 - Upgrade confirmations
-- Admin bulk emails
+- Admin bulk emails (batched, concurrent, resumable - see bulk_email.py)
 """
 
 import streamlit as st
 from datetime import datetime
 import random
 import string
+import threading
+
+from bulk_email import BulkEmailDispatcher, get_bulk_email_transport
 
 # SendGrid integration
 try:
@@ -24,6 +27,32 @@ except ImportError:
     SENDGRID_AVAILABLE = False
 
 
+_sendgrid_settings = None
+_sendgrid_clients = {}
+_sendgrid_lock = threading.Lock()
+
+
+def get_sendgrid_settings():
+    """(API key, from email) from st.secrets - read once, then reused"""
+    global _sendgrid_settings
+    if _sendgrid_settings is not None:
+        return _sendgrid_settings
+    api_key = st.secrets.get("SENDGRID_API_KEY")
+    from_email = st.secrets.get("FROM_EMAIL", "admin@t21services.co.uk")
+    if api_key:
+        # Only cache a usable key, so adding it to secrets later still works
+        _sendgrid_settings = (api_key, from_email)
+    return api_key, from_email
+
+
+def get_sendgrid_client(api_key):
+    """One SendGridAPIClient per API key, shared by every send"""
+    with _sendgrid_lock:
+        if api_key not in _sendgrid_clients:
+            _sendgrid_clients[api_key] = SendGridAPIClient(api_key)
+        return _sendgrid_clients[api_key]
+
+
 def send_email(to_email, subject, html_content, from_name="T21 Services"):
     """Send email via SendGrid"""
     try:
@@ -32,8 +61,7 @@ def send_email(to_email, subject, html_content, from_name="T21 Services"):
             return False
         
         # Get API key and from email from secrets
-        api_key = st.secrets.get("SENDGRID_API_KEY")
-        from_email = st.secrets.get("FROM_EMAIL", "admin@t21services.co.uk")
+        api_key, from_email = get_sendgrid_settings()
         
         if not api_key:
             print("SendGrid API key not found")
@@ -48,7 +76,7 @@ def send_email(to_email, subject, html_content, from_name="T21 Services"):
         )
         
         # Send via SendGrid
-        sg = SendGridAPIClient(api_key)
+        sg = get_sendgrid_client(api_key)
         response = sg.send(message)
         
         return response.status_code in [200, 201, 202]
@@ -281,40 +309,62 @@ def send_trial_expired_email(user_email, user_name):
     return send_email(user_email, subject, html_content)
 
 
-def send_bulk_email(to_emails, subject, message):
-    """Send bulk email to multiple users"""
-    success_count = 0
-    failed_emails = []
-    
-    for email in to_emails:
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px;">
-                <div style="text-align: center; margin-bottom: 20px;">
-                    <h2 style="color: #0066cc;">T21 Services</h2>
-                </div>
-                
-                <div style="background-color: #f9f9f9; padding: 20px; border-radius: 5px;">
-                    {message}
-                </div>
-                
-                <hr style="border: none; border-top: 1px solid #e0e0e0; margin: 20px 0;">
-                <p style="font-size: 12px; color: #666;">
-                    © 2025 T21 Services. All rights reserved.<br>
-                    64 Upper Parliament Street, Liverpool, L8 7LF, United Kingdom
-                </p>
+def render_bulk_email(message):
+    """HTML for an admin bulk email - the same for every recipient, so rendered once"""
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 10px;">
+            <div style="text-align: center; margin-bottom: 20px;">
+                <h2 style="color: #0066cc;">T21 Services</h2>
             </div>
-        </body>
-        </html>
-        """
-        
-        if send_email(email, subject, html_content):
-            success_count += 1
-        else:
-            failed_emails.append(email)
-    
-    return success_count, failed_emails
+            
+            <div style="background-color: #f9f9f9; padding: 20px; border-radius: 5px;">
+                {message}
+            </div>
+            
+            <hr style="border: none; border-top: 1px solid #e0e0e0; margin: 20px 0;">
+            <p style="font-size: 12px; color: #666;">
+                © 2025 T21 Services. All rights reserved.<br>
+                64 Upper Parliament Street, Liverpool, L8 7LF, United Kingdom
+            </p>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def send_bulk_email(to_emails, subject, message, from_name="T21 Services", campaign_id=None):
+    """
+    Send bulk email to multiple users
+
+    Recipients go to SendGrid in batches over a reused connection, a few
+    requests at a time, with retry on rate limits. Progress is journalled,
+    so sending the same message to the same list again after a crash or
+    failed batches only emails the recipients that were not reached.
+
+    Returns:
+        (success_count, failed_emails)
+    """
+    try:
+        api_key, from_email = get_sendgrid_settings()
+    except Exception as e:
+        print(f"Email error: {e}")
+        api_key, from_email = None, "admin@t21services.co.uk"
+
+    transport = get_bulk_email_transport(api_key)
+    if transport is None:
+        print("SendGrid API key not found")
+        return 0, list(to_emails)
+
+    dispatcher = BulkEmailDispatcher(transport, from_email=from_email, from_name=from_name)
+    try:
+        report = dispatcher.send(to_emails, subject, render_bulk_email(message), campaign_id=campaign_id)
+    except Exception as e:
+        print(f"Email error: {e}")
+        return 0, list(to_emails)
+
+    return report['sent'] + report['resumed'], report['failed']
 
 
 def send_personal_message(user_email, user_name, subject, message, from_admin="T21 Admin"):
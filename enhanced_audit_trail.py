@@ -6,12 +6,276 @@ CQC & DCB0129 Compliant
 
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
 import hashlib
 
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
 
+
+# Legacy single-file trail (imported into the segment log on first use)
 AUDIT_FILE = "audit_trail_immutable.json"
 
+# Append-only segment log + index
+AUDIT_DIR = "audit_trail"
+SEGMENT_MAX_ENTRIES = 10000
+
+
+class AuditSegmentLog:
+    """
+    Append-only audit store
+    
+    Entries are written as one JSON line each to numbered segment files that
+    are never rewritten. A SQLite index maps every entry to its segment and
+    byte offset, keyed by user, action and timestamp, so queries read only
+    the lines they return. The log is the source of truth: the index is
+    caught up from the segment files if a writer stopped between the two.
+    A file lock serialises writers across processes (Streamlit sessions).
+    """
+    
+    def __init__(self, directory=AUDIT_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.RLock()
+        self._lock_path = os.path.join(directory, ".lock")
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._init_index()
+        
+        with self._write_lock():
+            self._catch_up_index()
+            self._import_legacy_file()
+    
+    def _init_index(self):
+        cursor = self._conn.cursor()
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_index (
+            seq INTEGER PRIMARY KEY,
+            segment INTEGER,
+            offset INTEGER,
+            length INTEGER,
+            timestamp TEXT,
+            user_email TEXT,
+            action TEXT,
+            hash TEXT
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_index(user_email, seq)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_action ON audit_index(action, seq)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_index(timestamp)")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_checkpoints (
+            seq INTEGER PRIMARY KEY,
+            hash TEXT,
+            verified_at TEXT
+        )
+        """)
+        self._conn.commit()
+    
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"segment_{segment:06d}.jsonl")
+    
+    def _write_lock(self):
+        return _FileLock(self._lock, self._lock_path)
+    
+    def _tail(self):
+        """(seq, segment, end offset, hash) of the last indexed entry"""
+        row = self._conn.execute(
+            "SELECT seq, segment, offset + length, hash FROM audit_index ORDER BY seq DESC LIMIT 1"
+        ).fetchone()
+        return row if row else (-1, 1, 0, "GENESIS")
+    
+    def _catch_up_index(self):
+        """Index any lines written to the log but not yet to the index"""
+        seq, segment, end, _ = self._tail()
+        rows = []
+        
+        while os.path.exists(self._segment_path(segment)):
+            with open(self._segment_path(segment), 'rb') as f:
+                f.seek(end)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn final write - ignored, later appends go after it
+                    entry = json.loads(line)
+                    seq += 1
+                    rows.append((seq, segment, end, len(line), entry["timestamp"],
+                                 entry["user_email"], entry["action"], entry["hash"]))
+                    end += len(line)
+            segment += 1
+            end = 0
+        
+        if rows:
+            self._conn.executemany("INSERT INTO audit_index VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+    
+    def _import_legacy_file(self):
+        """Carry entries from the old single JSON file over, hash chain intact"""
+        if self._tail()[0] >= 0 or not os.path.exists(AUDIT_FILE):
+            return
+        with open(AUDIT_FILE, 'r') as f:
+            entries = json.load(f).get("entries", [])
+        for entry in entries:
+            self._append(entry)
+    
+    def _append(self, entry):
+        """Write one finished entry to the log and the index (lock held)"""
+        seq, segment, end, _ = self._tail()
+        if seq >= 0 and (seq + 1) % SEGMENT_MAX_ENTRIES == 0:
+            segment, end = segment + 1, 0
+        
+        path = self._segment_path(segment)
+        if os.path.exists(path):
+            end = os.path.getsize(path)
+        
+        line = (json.dumps(entry) + "\n").encode()
+        with open(path, 'ab') as f:
+            f.write(line)
+            f.flush()
+        
+        self._conn.execute(
+            "INSERT INTO audit_index VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (seq + 1, segment, end, len(line), entry["timestamp"], entry["user_email"], entry["action"], entry["hash"])
+        )
+        self._conn.commit()
+    
+    def append(self, entry):
+        """Chain an entry to the current tail and append it"""
+        with self._write_lock():
+            self._catch_up_index()
+            previous_hash = self._tail()[3]
+            
+            entry_string = json.dumps(entry, sort_keys=True)
+            entry_hash = hashlib.sha256(f"{previous_hash}{entry_string}".encode()).hexdigest()
+            
+            entry["id"] = entry_hash[:16]  # First 16 chars of hash
+            entry["hash"] = entry_hash
+            entry["previous_hash"] = previous_hash
+            
+            self._append(entry)
+        
+        return entry
+    
+    def _read(self, rows):
+        """
+        Load the entries for (seq, segment, offset, length, ...) index rows
+        
+        An entry whose line no longer matches the index (edited in place)
+        comes back as None.
+        """
+        entries = []
+        handles = {}
+        try:
+            for row in rows:
+                segment, offset, length = row[1:4]
+                if segment not in handles:
+                    handles[segment] = open(self._segment_path(segment), 'rb')
+                f = handles[segment]
+                f.seek(offset)
+                line = f.readline()
+                try:
+                    entries.append(json.loads(line) if len(line) == length else None)
+                except ValueError:
+                    entries.append(None)
+        finally:
+            for f in handles.values():
+                f.close()
+        return entries
+    
+    def query(self, user_email=None, action=None, start_date=None, end_date=None, limit=100):
+        """Most recent matching entries first"""
+        clauses, params = [], []
+        if user_email:
+            clauses.append("user_email = ?")
+            params.append(user_email)
+        if action:
+            clauses.append("action = ?")
+            params.append(action)
+        if start_date:
+            clauses.append("timestamp >= ?")
+            params.append(start_date.isoformat())
+        if end_date:
+            clauses.append("timestamp <= ?")
+            params.append(end_date.isoformat())
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT seq, segment, offset, length FROM audit_index {where} ORDER BY seq DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [entry for entry in self._read(rows) if entry is not None]
+    
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM audit_index").fetchone()[0]
+    
+    def last_checkpoint(self):
+        """(seq, hash) of the last verified entry, or None"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, hash FROM audit_checkpoints ORDER BY seq DESC LIMIT 1"
+            ).fetchone()
+    
+    def save_checkpoint(self, seq, entry_hash):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audit_checkpoints VALUES (?, ?, ?)",
+                (seq, entry_hash, datetime.now().isoformat())
+            )
+            self._conn.commit()
+    
+    def iter_from(self, seq):
+        """Yield (seq, entry, indexed hash) for every entry from seq onwards, in order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, segment, offset, length, hash FROM audit_index WHERE seq >= ? ORDER BY seq", (seq,)
+            ).fetchall()
+        for i in range(0, len(rows), 1000):
+            batch = rows[i:i + 1000]
+            for row, entry in zip(batch, self._read(batch)):
+                yield row[0], entry, row[4]
+
+
+class _FileLock:
+    """Thread lock plus an exclusive lock on a file (where fcntl exists)"""
+    
+    def __init__(self, thread_lock, path):
+        self._thread_lock = thread_lock
+        self._path = path
+        self._file = None
+    
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if FCNTL_AVAILABLE:
+            self._file = open(self._path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_audit_store(directory=None):
+    """Shared AuditSegmentLog for a directory (default: AUDIT_DIR)"""
+    directory = directory or AUDIT_DIR
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = AuditSegmentLog(directory)
+        return _stores[directory]
+
 
 def log_audit_event(user_email, action, target=None, details=None, ip_address=None, location=None, reason=None):
     """
@@ -32,21 +296,6 @@ def log_audit_event(user_email, action, target=None, details=None, ip_address=No
         str: Audit entry ID (hash)
     """
     
-    # Load existing audit trail
-    if os.path.exists(AUDIT_FILE):
-        with open(AUDIT_FILE, 'r') as f:
-            audit_trail = json.load(f)
-    else:
-        audit_trail = {
-            "metadata": {
-                "created": datetime.now().isoformat(),
-                "version": "1.0",
-                "compliance": ["CQC", "DCB0129", "GDPR"],
-                "immutable": True
-            },
-            "entries": []
-        }
-    
     # Create audit entry
     entry = {
         "id": None,  # Will be set after hashing
@@ -64,23 +313,9 @@ def log_audit_event(user_email, action, target=None, details=None, ip_address=No
         }
     }
     
-    # Generate immutable hash (includes previous entry's hash for blockchain-style integrity)
-    previous_hash = audit_trail["entries"][-1]["hash"] if audit_trail["entries"] else "GENESIS"
-    entry_string = json.dumps(entry, sort_keys=True)
-    entry_hash = hashlib.sha256(f"{previous_hash}{entry_string}".encode()).hexdigest()
-    
-    entry["id"] = entry_hash[:16]  # First 16 chars of hash
-    entry["hash"] = entry_hash
-    entry["previous_hash"] = previous_hash
-    
-    # Add to trail
-    audit_trail["entries"].append(entry)
-    audit_trail["metadata"]["last_updated"] = datetime.now().isoformat()
-    audit_trail["metadata"]["total_entries"] = len(audit_trail["entries"])
-    
-    # Save (append-only)
-    with open(AUDIT_FILE, 'w') as f:
-        json.dump(audit_trail, f, indent=2)
+    # Hash includes previous entry's hash for blockchain-style integrity;
+    # the entry is appended to the log, never rewritten
+    entry = get_audit_store().append(entry)
     
     return entry["id"]
 
@@ -97,79 +332,88 @@ def get_audit_trail(user_email=None, action=None, start_date=None, end_date=None
         limit: Max entries to return
     
     Returns:
-        list: Filtered audit entries
+        list: Filtered audit entries (most recent first)
     """
     
-    if not os.path.exists(AUDIT_FILE):
-        return []
-    
-    with open(AUDIT_FILE, 'r') as f:
-        audit_trail = json.load(f)
-    
-    entries = audit_trail.get("entries", [])
-    
-    # Apply filters
-    filtered = entries
-    
-    if user_email:
-        filtered = [e for e in filtered if e["user_email"] == user_email]
-    
-    if action:
-        filtered = [e for e in filtered if e["action"] == action]
-    
-    if start_date:
-        filtered = [e for e in filtered if datetime.fromisoformat(e["timestamp"]) >= start_date]
-    
-    if end_date:
-        filtered = [e for e in filtered if datetime.fromisoformat(e["timestamp"]) <= end_date]
-    
-    # Return most recent first, limited
-    return filtered[-limit:][::-1]
+    # Filters run against the index; only the returned entries are read
+    return get_audit_store().query(user_email, action, start_date, end_date, limit)
 
 
-def verify_audit_integrity():
+def verify_audit_integrity(full=False):
     """
     Verify the integrity of the audit trail
     Checks that hash chain is intact (no tampering)
     
+    By default only entries added since the last successful verification are
+    rehashed, chained on from the checkpointed hash (which is re-checked
+    against the log). Use full=True for a complete re-verification.
+    
+    Args:
+        full: Rehash every entry instead of starting from the checkpoint
+    
     Returns:
         dict: {
             'valid': bool,
             'total_entries': int,
+            'entries_checked': int,
+            'verified_from': int (first entry index checked),
             'errors': list
         }
     """
     
-    if not os.path.exists(AUDIT_FILE):
-        return {'valid': True, 'total_entries': 0, 'errors': []}
-    
-    with open(AUDIT_FILE, 'r') as f:
-        audit_trail = json.load(f)
-    
-    entries = audit_trail.get("entries", [])
+    store = get_audit_store()
     errors = []
     
-    for i, entry in enumerate(entries):
-        # Verify hash
+    checkpoint = None if full else store.last_checkpoint()
+    start = checkpoint[0] if checkpoint else 0
+    expected_prev_hash = None if checkpoint else "GENESIS"
+    last_seq, last_hash = None, None
+    checked = 0
+    
+    for seq, entry, indexed_hash in store.iter_from(start):
+        if entry is None:
+            checked += 1
+            errors.append(f"Entry {seq}: Log line altered or unreadable - possible tampering!")
+            expected_prev_hash = indexed_hash
+            continue
+        
+        if checkpoint and seq == checkpoint[0]:
+            # Already verified - just confirm it hasn't changed since
+            if entry["hash"] != checkpoint[1]:
+                errors.append(f"Entry {seq} (ID: {entry['id']}): Changed since last verification - possible tampering!")
+            expected_prev_hash = checkpoint[1]
+            continue
+        
+        checked += 1
+        
+        # Verify hash (computed before the ID was filled in)
         entry_copy = entry.copy()
         stored_hash = entry_copy.pop("hash")
         stored_prev_hash = entry_copy.pop("previous_hash")
+        entry_copy["id"] = None
         
         # Recalculate hash
         entry_string = json.dumps(entry_copy, sort_keys=True)
         calculated_hash = hashlib.sha256(f"{stored_prev_hash}{entry_string}".encode()).hexdigest()
         
         if calculated_hash != stored_hash:
-            errors.append(f"Entry {i} (ID: {entry['id']}): Hash mismatch - possible tampering!")
+            errors.append(f"Entry {seq} (ID: {entry['id']}): Hash mismatch - possible tampering!")
         
         # Verify chain
-        if i > 0:
-            if stored_prev_hash != entries[i-1]["hash"]:
-                errors.append(f"Entry {i} (ID: {entry['id']}): Chain broken - previous hash doesn't match!")
+        if stored_prev_hash != expected_prev_hash:
+            errors.append(f"Entry {seq} (ID: {entry['id']}): Chain broken - previous hash doesn't match!")
+        
+        expected_prev_hash = stored_hash
+        last_seq, last_hash = seq, stored_hash
+    
+    if not errors and last_seq is not None:
+        store.save_checkpoint(last_seq, last_hash)
     
     return {
         'valid': len(errors) == 0,
-        'total_entries': len(entries),
+        'total_entries': store.count(),
+        'entries_checked': checked,
+        'verified_from': start,
         'errors': errors
     }
 
@@ -1,13 +1,26 @@
 """
 Excel Export Module for T21 RTT Validator
 Generates downloadable Excel files with validation results
+
+Batch results are written with write-only worksheets (bounded memory, any
+number of rows) and can also be written to CSV/Parquet for downstream BI.
 """
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from datetime import datetime
+import csv
 import io
+import math
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 def create_validation_excel(validation_result, excel_data):
     """
@@ -185,75 +198,267 @@ def create_validation_excel(validation_result, excel_data):
     return excel_file
 
 
-def create_batch_results_excel(batch_results):
+# Columns of the batch results sheet (matching Excel tracker)
+BATCH_RESULT_HEADERS = [
+    'Patient Name', 'NHS Number', 'Validator Name', 'Clock Status', 
+    'Outcome', 'Validation Date', 'RTT Code', 'Compliance Rate',
+    'Flag Color', 'Validation Comments'
+]
+
+# Widths used when results arrive as an iterator (can't be measured up front)
+BATCH_RESULT_COLUMN_WIDTHS = [30, 14, 22, 16, 30, 17, 10, 17, 12, 50]
+MAX_COLUMN_WIDTH = 50
+
+# Rows per Parquet row group
+PARQUET_BATCH_ROWS = 10000
+
+# Shared styles - one object each, however many cells use them
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_FONT = Font(color="FFFFFF", bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal='center')
+FLAG_FILLS = {
+    'GREEN': PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid"),
+    'AMBER': PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid"),
+    'RED': PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+}
+
+
+def _cell_value(value):
+    """Value as written to a cell (NaN from pandas becomes an empty cell)"""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def fit_column_widths(rows, headers):
     """
-    Create Excel file with batch validation results
-    Returns: BytesIO object ready for download
+    Auto-fit widths for rows that are already in memory
+    
+    Same rule as the old per-cell auto-fit: longest text value + 2, at most
+    MAX_COLUMN_WIDTH (non-text values don't count).
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Batch Validation Results"
-    
-    # Headers (matching Excel tracker)
-    headers = [
-        'Patient Name', 'NHS Number', 'Validator Name', 'Clock Status', 
-        'Outcome', 'Validation Date', 'RTT Code', 'Compliance Rate',
-        'Flag Color', 'Validation Comments'
-    ]
+    longest = [len(header) for header in headers]
+    for row in rows:
+        for i, value in enumerate(row):
+            if isinstance(value, str) and len(value) > longest[i]:
+                longest[i] = len(value)
+    return [min(length + 2, MAX_COLUMN_WIDTH) for length in longest]
+
+
+class _SideOutputs:
+    """
+    CSV / Parquet copies of the rows written to a sheet, for downstream BI
     
-    # Header styling
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Data rows
-    for row_num, result in enumerate(batch_results, 2):
-        excel_data = result.get('Excel_Report', {})
-        val_summary = result.get('Validation_Summary', {})
+    Parquet columns are all text (like the CSV): a column's values can change
+    type part way through (e.g. a rate that is sometimes ''), which a schema
+    taken from the first row group can't hold. A side output that fails is
+    dropped with a warning - it never stops the workbook being written.
+    """
+    
+    def __init__(self, headers, csv_output=None, parquet_output=None):
+        self.headers = headers
+        self.csv_file = None
+        self.csv_writer = None
+        self.parquet_output = parquet_output
+        self.parquet_writer = None
+        self.parquet_schema = pa.schema([pa.field(header, pa.string()) for header in headers]) if PYARROW_AVAILABLE else None
+        self.parquet_rows = []
         
-        ws.cell(row=row_num, column=1).value = result.get('patient_name', '')
-        ws.cell(row=row_num, column=2).value = result.get('nhs_number', '')
-        ws.cell(row=row_num, column=3).value = excel_data.get('Validator_Name', '')
-        ws.cell(row=row_num, column=4).value = excel_data.get('Clock_Status', '')
-        ws.cell(row=row_num, column=5).value = excel_data.get('Outcome', '')
-        ws.cell(row=row_num, column=6).value = excel_data.get('Validation_Date', '')
-        ws.cell(row=row_num, column=7).value = result.get('RTT_Code', '')
-        ws.cell(row=row_num, column=8).value = val_summary.get('Compliance_Rate', '')
-        ws.cell(row=row_num, column=9).value = val_summary.get('Excel_Flag_Color', '')
-        ws.cell(row=row_num, column=10).value = excel_data.get('Validation_Comments', '')
+        if csv_output is not None:
+            try:
+                if hasattr(csv_output, 'write'):
+                    self.csv_writer = csv.writer(csv_output)
+                else:
+                    self.csv_file = open(csv_output, 'w', newline='', encoding='utf-8')
+                    self.csv_writer = csv.writer(self.csv_file)
+                self.csv_writer.writerow(headers)
+            except Exception as e:
+                self._drop_csv(e)
         
-        # Color code flag column
-        flag_cell = ws.cell(row=row_num, column=9)
-        flag_color = val_summary.get('Excel_Flag_Color', '')
-        if flag_color == 'GREEN':
-            flag_cell.fill = PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
-        elif flag_color == 'AMBER':
-            flag_cell.fill = PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid")
-        elif flag_color == 'RED':
-            flag_cell.fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+        if parquet_output is not None and not PYARROW_AVAILABLE:
+            print("⚠️ pyarrow not installed - Parquet output skipped")
+            self.parquet_output = None
+    
+    def _drop_csv(self, error):
+        print(f"⚠️ CSV output failed, skipped: {error}")
+        self.csv_writer = None
+        if self.csv_file:
+            try:
+                self.csv_file.close()
+            except Exception:
+                pass
+            self.csv_file = None
     
-    # Auto-fit columns
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
+    def _drop_parquet(self, error):
+        print(f"⚠️ Parquet output failed, skipped: {error}")
+        self.parquet_output = None
+        self.parquet_rows = []
+        if self.parquet_writer is not None:
             try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
+                self.parquet_writer.close()
+            except Exception:
                 pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
+            self.parquet_writer = None
     
-    # Save to BytesIO
+    def add(self, row):
+        if self.csv_writer:
+            try:
+                self.csv_writer.writerow(['' if value is None else value for value in row])
+            except Exception as e:
+                self._drop_csv(e)
+        if self.parquet_output is not None:
+            self.parquet_rows.append(row)
+            if len(self.parquet_rows) >= PARQUET_BATCH_ROWS:
+                self._flush_parquet()
+    
+    def _flush_parquet(self):
+        try:
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.parquet_output, self.parquet_schema)
+            arrays = [pa.array([None if row[i] is None else str(row[i]) for row in self.parquet_rows], type=pa.string())
+                      for i in range(len(self.headers))]
+            self.parquet_writer.write_table(pa.Table.from_arrays(arrays, schema=self.parquet_schema))
+            self.parquet_rows = []
+        except Exception as e:
+            self._drop_parquet(e)
+    
+    def close(self):
+        if self.parquet_output is not None and (self.parquet_rows or self.parquet_writer is None):
+            self._flush_parquet()
+        if self.parquet_writer is not None:
+            try:
+                self.parquet_writer.close()
+            except Exception as e:
+                print(f"⚠️ Parquet output failed: {e}")
+        if self.csv_file:
+            try:
+                self.csv_file.close()
+            except Exception as e:
+                print(f"⚠️ CSV output failed: {e}")
+
+
+def write_rows_excel(rows, headers, output, sheet_title="Sheet1", column_widths=None,
+                     header_style=False, styler=None, csv_output=None, parquet_output=None):
+    """
+    Stream rows into a single-sheet workbook in bounded memory
+    
+    Uses a write-only worksheet: each row is serialised as it arrives and
+    never kept, so an iterator of 100k+ rows doesn't build a workbook in
+    memory first.
+    
+    Args:
+        rows: Iterable of value lists, one per row, in headers order
+        headers: Column headings
+        output: File path or binary file object (e.g. BytesIO)
+        sheet_title: Worksheet name
+        column_widths: Optional width per column (set before any row is written)
+        header_style: Blue header row (as in the batch results sheet)
+        styler: Optional styler(ws, values) returning the row to append, with
+            cells that need styling swapped for styled WriteOnlyCells
+        csv_output / parquet_output: Optional path (CSV also file object)
+            to write the same rows to
+    
+    Returns:
+        Number of data rows written
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    
+    if column_widths:
+        for col_num, width in enumerate(column_widths, 1):
+            ws.column_dimensions[get_column_letter(col_num)].width = width
+    
+    if header_style:
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+            cell.alignment = HEADER_ALIGNMENT
+            header_cells.append(cell)
+        ws.append(header_cells)
+    else:
+        ws.append(headers)
+    
+    side_outputs = _SideOutputs(headers, csv_output, parquet_output)
+    count = 0
+    try:
+        for row in rows:
+            values = [_cell_value(value) for value in row]
+            ws.append(styler(ws, values) if styler else values)
+            side_outputs.add(values)
+            count += 1
+    finally:
+        side_outputs.close()
+    
+    wb.save(output)
+    return count
+
+
+def batch_result_row(result):
+    """One batch results sheet row (BATCH_RESULT_HEADERS order)"""
+    excel_data = result.get('Excel_Report', {})
+    val_summary = result.get('Validation_Summary', {})
+    return [
+        result.get('patient_name', ''),
+        result.get('nhs_number', ''),
+        excel_data.get('Validator_Name', ''),
+        excel_data.get('Clock_Status', ''),
+        excel_data.get('Outcome', ''),
+        excel_data.get('Validation_Date', ''),
+        result.get('RTT_Code', ''),
+        val_summary.get('Compliance_Rate', ''),
+        val_summary.get('Excel_Flag_Color', ''),
+        excel_data.get('Validation_Comments', '')
+    ]
+
+
+def _style_flag(ws, values):
+    """Color code the flag column"""
+    fill = FLAG_FILLS.get(values[8])
+    if fill is None:
+        return values
+    flag_cell = WriteOnlyCell(ws, value=values[8])
+    flag_cell.fill = fill
+    return values[:8] + [flag_cell] + values[9:]
+
+
+def write_batch_results_excel(batch_results, output, csv_output=None, parquet_output=None):
+    """
+    Write batch validation results to an Excel file, streaming
+    
+    A list is measured first so columns are auto-fitted; an iterator
+    (e.g. a generator over a very large batch) is written in one pass
+    with BATCH_RESULT_COLUMN_WIDTHS.
+    
+    Args:
+        batch_results: List or iterator of batch result dicts
+        output: File path or binary file object
+        csv_output / parquet_output: Optional side outputs of the same rows
+    
+    Returns:
+        Number of results written
+    """
+    if isinstance(batch_results, (list, tuple)):
+        rows = [batch_result_row(result) for result in batch_results]
+        widths = fit_column_widths(rows, BATCH_RESULT_HEADERS)
+    else:
+        rows = (batch_result_row(result) for result in batch_results)
+        widths = BATCH_RESULT_COLUMN_WIDTHS
+    
+    return write_rows_excel(rows, BATCH_RESULT_HEADERS, output, sheet_title="Batch Validation Results",
+                            column_widths=widths, header_style=True, styler=_style_flag,
+                            csv_output=csv_output, parquet_output=parquet_output)
+
+
+def create_batch_results_excel(batch_results, csv_output=None, parquet_output=None):
+    """
+    Create Excel file with batch validation results
+    Accepts a list or an iterator of results (see write_batch_results_excel)
+    Returns: BytesIO object ready for download
+    """
     excel_file = io.BytesIO()
-    wb.save(excel_file)
+    write_batch_results_excel(batch_results, excel_file, csv_output=csv_output, parquet_output=parquet_output)
     excel_file.seek(0)
     
     return excel_file
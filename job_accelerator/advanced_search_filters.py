@@ -2,9 +2,15 @@
 ADVANCED SEARCH FILTERS
 Comprehensive filtering system for job searches
 Handles sponsorship, location, keywords, bands, work type, etc.
+
+Jobs are normalised once into a JobIndex (bitsets per band, city, keyword,
+sponsorship status...) and each student's filters compile to a predicate
+over it, so matching many students against one job list reuses the same
+string work instead of repeating it per student and per filter pass.
 """
 
-from typing import List, Dict, Optional
+from bisect import bisect_right
+from typing import List, Dict, Iterable, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -398,6 +404,265 @@ class KeywordFilter:
         return filtered
 
 
+# Phrases used by LocationFilter.filter_by_work_type and the experience filter
+REMOTE_KEYWORDS = ['remote', 'work from home', 'wfh']
+ONSITE_KEYWORDS = ['on-site', 'onsite', 'office-based', 'in-office']
+SENIOR_TITLE_KEYWORDS = ['senior', 'lead', 'manager', 'head of', 'director', 'principal']
+
+
+def _bitset(indices: Iterable[int]) -> int:
+    """Bitset (int) with the given bit positions set"""
+    indices = list(indices)
+    if not indices:
+        return 0
+    bitmap = bytearray(max(indices) // 8 + 1)
+    for i in indices:
+        bitmap[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bitmap, 'little')
+
+
+def _bit_positions(bits: int) -> List[int]:
+    """Set bit positions of a bitset, lowest first"""
+    binary = bin(bits)[:1:-1]  # least significant bit first
+    positions = []
+    i = binary.find('1')
+    while i != -1:
+        positions.append(i)
+        i = binary.find('1', i + 1)
+    return positions
+
+
+class _TextColumn:
+    """One lowercased text per job, searchable for substrings in a single scan"""
+
+    SEPARATOR = '\x00'
+
+    def __init__(self, texts: List[str]):
+        self.size = len(texts)
+        self.corpus = self.SEPARATOR.join(texts)
+        self.starts = []
+        offset = 0
+        for text in texts:
+            self.starts.append(offset)
+            offset += len(text) + 1
+        self._cache: Dict[str, int] = {}
+
+    def containing(self, phrase: str) -> int:
+        """Bitset of texts containing phrase (phrase already lowercased)"""
+        bits = self._cache.get(phrase)
+        if bits is None:
+            if not phrase:
+                bits = (1 << self.size) - 1
+            else:
+                found = []
+                position = self.corpus.find(phrase)
+                while position != -1:
+                    job = bisect_right(self.starts, position) - 1
+                    found.append(job)
+                    # Next job's text: one hit per job is enough
+                    if job + 1 >= self.size:
+                        break
+                    position = self.corpus.find(phrase, self.starts[job + 1])
+                bits = _bitset(found)
+            self._cache[phrase] = bits
+        return bits
+
+    def containing_any(self, phrases: Iterable[str]) -> int:
+        """Bitset of texts containing at least one of phrases"""
+        bits = 0
+        for phrase in phrases:
+            bits |= self.containing(phrase)
+        return bits
+
+
+class JobIndex:
+    """
+    A job list normalised once for matching against many students' filters
+
+    Holds each job's band and salary, plus lowercased text columns
+    (keywords, location/city, work pattern, title) with per-phrase bitsets
+    cached as students ask for them. Bit i is self.jobs[i].
+    """
+
+    def __init__(self, jobs: List[Dict]):
+        self.jobs = list(jobs)
+        size = len(self.jobs)
+        self.all_bits = (1 << size) - 1
+
+        def text(job, *fields):
+            return ' '.join(job.get(field) or '' for field in fields).lower()
+
+        self.keyword_text = _TextColumn([text(job, 'title', 'description') for job in self.jobs])
+        self.location_text = _TextColumn([(job.get('location') or '').lower() for job in self.jobs])
+        self.city_text = _TextColumn([(job.get('city') or '').lower() for job in self.jobs])
+        work_text = _TextColumn([text(job, 'description', 'title', 'working_pattern') for job in self.jobs])
+        title_text = _TextColumn([(job.get('title') or '').lower() for job in self.jobs])
+
+        # Sponsorship status: True offered, None unknown, False not offered
+        self.sponsorship = [
+            SponsorshipFilter.job_offers_sponsorship(text(job, 'description', 'requirements'))
+            for job in self.jobs
+        ]
+        self.sponsorship_confirmed = _bitset(i for i, status in enumerate(self.sponsorship) if status is True)
+        self.sponsorship_unknown = _bitset(i for i, status in enumerate(self.sponsorship) if status is None)
+
+        # Work type
+        mentions_remote = work_text.containing('remote')
+        mentions_hybrid = work_text.containing('hybrid')
+        self.remote_bits = work_text.containing_any(REMOTE_KEYWORDS)
+        self.hybrid_bits = mentions_hybrid
+        self.onsite_bits = (work_text.containing_any(ONSITE_KEYWORDS)
+                            | (self.all_bits & ~(mentions_remote | mentions_hybrid)))
+
+        # NHS band (None = not stated)
+        band_positions: Dict[Optional[str], List[int]] = {}
+        for i, job in enumerate(self.jobs):
+            band_positions.setdefault(NHSBandFilter.extract_band_from_job(job), []).append(i)
+        self.bands = {band: _bitset(positions) for band, positions in band_positions.items()}
+
+        self.senior_bits = title_text.containing_any(SENIOR_TITLE_KEYWORDS)
+        self._salary_cache: Dict[Tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def city_bits(self, cities: Tuple[str, ...]) -> int:
+        """Jobs whose location or city contains any of the (lowercase) cities"""
+        return self.location_text.containing_any(cities) | self.city_text.containing_any(cities)
+
+    def keyword_bits(self, keywords: Tuple[str, ...]) -> int:
+        """Jobs whose title or description contains any of the (lowercase) keywords"""
+        return self.keyword_text.containing_any(keywords)
+
+    def work_type_bits(self, work_types: List[WorkType]) -> int:
+        """Jobs matching any of the work types (same rules as filter_by_work_type)"""
+        if WorkType.ANY in work_types:
+            return self.all_bits
+        bits = 0
+        if WorkType.REMOTE in work_types:
+            bits |= self.remote_bits
+        if WorkType.HYBRID in work_types:
+            bits |= self.hybrid_bits
+        if WorkType.ONSITE in work_types:
+            bits |= self.onsite_bits
+        return bits
+
+    def band_bits(self, bands: Iterable[str]) -> int:
+        """Jobs in one of the bands, or with no band stated"""
+        bits = self.bands.get(None, 0)
+        for band in bands:
+            bits |= self.bands.get(band, 0)
+        return bits
+
+    def salary_bits(self, min_salary: Optional[int], max_salary: Optional[int]) -> int:
+        """Jobs whose salary range overlaps the target (or doesn't say)"""
+        key = (min_salary, max_salary)
+        bits = self._salary_cache.get(key)
+        if bits is None:
+            keep = []
+            for i, job in enumerate(self.jobs):
+                salary_min = job.get('salary_min')
+                salary_max = job.get('salary_max')
+                if salary_min is None and salary_max is None:
+                    keep.append(i)
+                    continue
+                if min_salary and salary_max and salary_max < min_salary:
+                    continue  # Too low
+                if max_salary and salary_min and salary_min > max_salary:
+                    continue  # Too high
+                keep.append(i)
+            bits = self._salary_cache[key] = _bitset(keep)
+        return bits
+
+    def select(self, bits: int) -> List[Dict]:
+        """Jobs in a bitset, in original order"""
+        return [self.jobs[i] for i in _bit_positions(bits)]
+
+
+class CompiledJobFilter:
+    """
+    JobSearchFilters compiled to a predicate over a JobIndex
+
+    Gives exactly the jobs AdvancedSearchEngine's filter passes used to,
+    in the same order, with the same sponsorship/keyword_match annotations
+    (on copies - see apply()).
+    """
+
+    def __init__(self, filters: JobSearchFilters):
+        lower = lambda values: tuple(value.lower() for value in values or [])
+
+        self.requires_sponsorship = bool(filters.requires_sponsorship)
+        self.cities = lower(filters.cities) if filters.cities else None
+        self.work_types = list(filters.work_types) if filters.work_types else None
+        self.bands = (tuple(filters.nhs_bands)
+                      if filters.nhs_bands and 'Any Band' not in filters.nhs_bands else None)
+        self.primary_keywords = lower(filters.primary_keywords) if filters.primary_keywords else None
+        self.alternative_keywords = lower(filters.alternative_keywords)
+        self.exclude_keywords = lower(filters.exclude_keywords)
+        self.salary = ((filters.min_salary, filters.max_salary)
+                       if filters.min_salary or filters.max_salary else None)
+        self.exclude_senior_roles = bool(filters.exclude_senior_roles)
+
+    def evaluate(self, index: JobIndex) -> Dict[str, int]:
+        """
+        Bitsets of the jobs this filter keeps
+
+        Returns:
+            'matched': jobs passing every filter
+            'sponsorship': jobs kept by the sponsorship filter (None if not applied)
+            'keyword': jobs that reached and passed the keyword filter (None if not applied)
+            'primary': jobs matching a primary keyword
+        """
+        bits = index.all_bits
+        result = {'sponsorship': None, 'keyword': None, 'primary': 0}
+
+        if self.requires_sponsorship:
+            result['sponsorship'] = index.sponsorship_confirmed | index.sponsorship_unknown
+            bits &= result['sponsorship']
+        if self.cities:
+            bits &= index.city_bits(self.cities)
+        if self.work_types:
+            bits &= index.work_type_bits(self.work_types)
+        if self.bands:
+            bits &= index.band_bits(self.bands)
+
+        if self.primary_keywords:
+            result['primary'] = index.keyword_bits(self.primary_keywords)
+            keyword_match = result['primary'] | index.keyword_bits(self.alternative_keywords)
+            bits &= keyword_match & ~index.keyword_bits(self.exclude_keywords)
+            result['keyword'] = bits
+
+        if self.salary:
+            bits &= index.salary_bits(*self.salary)
+        if self.exclude_senior_roles:
+            bits &= ~index.senior_bits
+
+        result['matched'] = bits
+        return result
+
+    def apply(self, index: JobIndex) -> List[Dict]:
+        """
+        Matching jobs, annotated like the filter passes annotate them
+
+        Each job is a copy carrying this filter's annotations; the index's
+        job dicts are shared by every student and are never modified.
+        """
+        result = self.evaluate(index)
+
+        matched = []
+        for i in _bit_positions(result['matched']):
+            job = dict(index.jobs[i])
+            if result['sponsorship'] is not None:
+                if index.sponsorship_confirmed >> i & 1:
+                    job['sponsorship_confirmed'] = True
+                if index.sponsorship_unknown >> i & 1:
+                    job['sponsorship_unknown'] = True
+            if result['keyword'] is not None:
+                job['keyword_match'] = 'primary' if result['primary'] >> i & 1 else 'alternative'
+            matched.append(job)
+        return matched
+
+
 class AdvancedSearchEngine:
     """
     Main search engine that applies all filters
@@ -405,13 +670,25 @@ class AdvancedSearchEngine:
     
     def __init__(self, filters: JobSearchFilters):
         self.filters = filters
+        self.predicate = CompiledJobFilter(filters)
     
-    def search(self, all_jobs: List[Dict]) -> List[Dict]:
+    def search(self, all_jobs: Union[List[Dict], JobIndex]) -> List[Dict]:
         """
         Apply all filters to job list
         
+        Pass a JobIndex instead of the list to reuse it across students.
+        
         Returns filtered and scored jobs
         """
+        index = all_jobs if isinstance(all_jobs, JobIndex) else JobIndex(all_jobs)
+        return self.predicate.apply(index)
+    
+    def search_sequential(self, all_jobs: List[Dict]) -> List[Dict]:
+        """
+        Apply the filters one pass at a time over the job dicts
+        
+        Reference implementation for search(); same results, no index.
+        """
         jobs = all_jobs.copy()
         
         # 1. Sponsorship filter (CRITICAL!)
@@ -497,6 +774,29 @@ class AdvancedSearchEngine:
 # USAGE EXAMPLES
 # ============================================
 
+def search_jobs_for_students(students_filters: Dict[str, JobSearchFilters],
+                             jobs: Union[List[Dict], JobIndex]) -> Dict[str, List[Dict]]:
+    """
+    Match many students against one job list
+    
+    The jobs are indexed once; each student's filters reuse the index's
+    cached keyword/city bitsets. Same results as calling
+    AdvancedSearchEngine(filters).search(jobs) for each student in turn.
+    
+    Args:
+        students_filters: {student id: JobSearchFilters}
+        jobs: Job dicts (or a JobIndex built from them)
+    
+    Returns:
+        {student id: matching jobs}
+    """
+    index = jobs if isinstance(jobs, JobIndex) else JobIndex(jobs)
+    return {
+        student_id: CompiledJobFilter(filters).apply(index)
+        for student_id, filters in students_filters.items()
+    }
+
+
 def create_student_search_filters(student: Dict) -> JobSearchFilters:
     """
     Create search filters based on student preferences
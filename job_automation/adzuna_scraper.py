@@ -2,11 +2,12 @@
 Adzuna API Job Scraper
 Adzuna aggregates jobs from multiple sources including NHS Jobs
 FREE API with 1000 calls/month
+Responses are cached (job_automation.http_cache) so repeat searches don't use up calls
 """
 
-import requests
 from datetime import datetime, timedelta
 from supabase_database import supabase, SUPABASE_AVAILABLE
+from job_automation.http_cache import cached_get
 
 # Adzuna API credentials - stored in Streamlit secrets for security
 import streamlit as st
@@ -76,7 +77,7 @@ def scrape_jobs_adzuna(keywords=None, location='London', max_results=20):
         try:
             print(f"🔍 Searching Adzuna for: {search_query} in {location}")
             
-            response = requests.get(url, params=params, timeout=30)
+            response = cached_get(url, params=params, timeout=30)
             
             if response.status_code != 200:
                 print(f"⚠️ Search '{search_query}' failed: {response.status_code}")
@@ -0,0 +1,353 @@
+"""
+HTTP RESPONSE CACHE FOR JOB SCRAPERS
+On-disk cache shared by the NHS Jobs, RSS and Adzuna scrapers
+
+Features:
+- Responses stored on disk with their ETag / Last-Modified validators
+- Per-URL TTLs: fresh entries are served without touching the network
+- Stale entries revalidated with a conditional GET (304 = reuse the body)
+- Stale copy served if the site is down or errors
+- Replay mode serves recorded pages only (offline parsing benchmarks/tests)
+- Credentials (Adzuna app_id/app_key) never stored or used in cache keys
+- Bounded: entries unused for HTTP_CACHE_MAX_AGE_SECONDS are dropped, then the
+  least recently stored ones until the cache fits HTTP_CACHE_MAX_BYTES
+
+Modes (T21_HTTP_CACHE_MODE):
+    live    - cache + revalidate (default)
+    replay  - serve recorded responses only; a miss raises ReplayMiss
+    off     - plain requests, nothing cached
+
+Usage:
+    response = cached_get(url, params=params, timeout=30)
+    response.from_cache                         # True if the body came from disk
+
+    T21_HTTP_CACHE_MODE=replay python -m job_automation.nhs_jobs_scraper
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+HTTP_CACHE_DIR = os.getenv('T21_HTTP_CACHE_DIR', '.http_cache')
+HTTP_CACHE_MODE = os.getenv('T21_HTTP_CACHE_MODE', 'live')
+
+# Size and age caps (checked every PRUNE_EVERY_STORES stores; never in replay mode)
+HTTP_CACHE_MAX_BYTES = int(os.getenv('T21_HTTP_CACHE_MAX_MB', '200')) * 1024 * 1024
+HTTP_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+PRUNE_EVERY_STORES = 100
+
+# First matching pattern sets how long a response is reused before revalidating
+CACHE_TTLS: List[Tuple[str, int]] = [
+    (r'jobs\.nhs\.uk/xi/search_vacancy', 30 * 60),       # search results
+    (r'jobs\.nhs\.uk/(feed|xi/vacancy_feed)', 30 * 60),  # RSS feeds
+    (r'jobs\.nhs\.uk/', 24 * 60 * 60),                   # vacancy pages
+    (r'api\.adzuna\.com/', 60 * 60),                     # Adzuna search API
+]
+DEFAULT_TTL_SECONDS = 15 * 60
+
+# Query parameters that are credentials, not part of the resource
+SECRET_PARAMS = {'app_id', 'app_key', 'api_key', 'apikey', 'key', 'token', 'access_token'}
+
+# Response headers kept with a cached body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Date')
+
+
+class ReplayMiss(Exception):
+    """Replay mode asked for a response that was never recorded"""
+
+
+def ttl_for(url: str) -> int:
+    """Reuse period in seconds for a URL (CACHE_TTLS, else DEFAULT_TTL_SECONDS)"""
+    for pattern, ttl in CACHE_TTLS:
+        if re.search(pattern, url):
+            return ttl
+    return DEFAULT_TTL_SECONDS
+
+
+def redact_url(url: str) -> str:
+    """URL without credential query parameters"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in SECRET_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _full_url(url: str, params: Dict = None) -> str:
+    """URL with params encoded the way requests sends them"""
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+class HttpCache:
+    """Disk cache of HTTP responses keyed by method, URL (minus credentials) and body"""
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR, mode: str = HTTP_CACHE_MODE,
+                 max_bytes: int = HTTP_CACHE_MAX_BYTES, max_age: float = HTTP_CACHE_MAX_AGE_SECONDS):
+        if mode not in ('live', 'replay', 'off'):
+            raise ValueError(f"Unknown HTTP cache mode: {mode}")
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._stores_since_prune = PRUNE_EVERY_STORES  # prune on the first store
+        self.stats = {'hits': 0, 'revalidated': 0, 'fetched': 0, 'stale': 0, 'replayed': 0, 'evicted': 0}
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _key(self, method: str, url: str, body: bytes = b'') -> str:
+        digest = hashlib.sha256(f"{method} {redact_url(url)}\n".encode() + (body or b''))
+        return digest.hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def load(self, key: str) -> Optional[Dict]:
+        """Cached entry (metadata plus 'content' bytes), or None"""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry['content'] = f.read()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, data: bytes):
+        """Write via a temp file so readers never see half an entry"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def store(self, key: str, method: str, url: str, response: requests.Response, ttl: int) -> Dict:
+        """Save a response body and its validators"""
+        entry = {
+            'method': method,
+            'url': redact_url(url),
+            'status_code': response.status_code,
+            'headers': {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+            'encoding': response.encoding,
+            'stored_at': time.time(),
+            'ttl': ttl
+        }
+        meta_path, body_path = self._paths(key)
+        self._write(body_path, response.content)
+        self._write(meta_path, json.dumps(entry, indent=2).encode('utf-8'))
+        entry['content'] = response.content
+
+        with self._lock:
+            self._stores_since_prune += 1
+            due = self._stores_since_prune >= PRUNE_EVERY_STORES
+            if due:
+                self._stores_since_prune = 0
+        if due:
+            self.prune()
+        return entry
+
+    def touch(self, key: str, entry: Dict, headers: Dict):
+        """Mark an entry fresh again after a 304, taking any updated validators"""
+        entry['stored_at'] = time.time()
+        for name in STORED_HEADERS:
+            if name in headers:
+                entry['headers'][name] = headers[name]
+        meta = {k: v for k, v in entry.items() if k != 'content'}
+        self._write(self._paths(key)[0], json.dumps(meta, indent=2).encode('utf-8'))
+
+    def prune(self) -> int:
+        """
+        Enforce the age and size caps
+
+        An entry's age is the time since it was stored or last revalidated
+        (its metadata file's mtime). Expired entries go first, then the
+        oldest until the rest fit in max_bytes. Leftover temp files from
+        interrupted writes are removed too.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        entries = []  # (mtime, size, meta_path, body_path)
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp'):
+                    if now - stat.st_mtime > 60 * 60:
+                        self._remove(path)
+                elif name.endswith('.json'):
+                    body_path = path[:-len('.json')] + '.body'
+                    try:
+                        size = stat.st_size + os.path.getsize(body_path)
+                    except OSError:
+                        size = stat.st_size
+                    entries.append((stat.st_mtime, size, path, body_path))
+
+        entries.sort()
+        total = sum(size for _, size, _, _ in entries)
+        removed = 0
+        for mtime, size, meta_path, body_path in entries:
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            self._remove(meta_path)
+            self._remove(body_path)
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self.stats['evicted'] += removed
+        return removed
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Delete every cached response"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(('.json', '.body')):
+                    os.remove(os.path.join(root, name))
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _response(self, entry: Dict, from_cache: bool) -> requests.Response:
+        """requests.Response built from a cached entry"""
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response._content = entry['content']
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.encoding = entry.get('encoding')
+        response.url = entry['url']
+        response.from_cache = from_cache
+        return response
+
+    def request(self, method: str, url: str, params: Dict = None, json_body: Dict = None,
+                headers: Dict = None, timeout: int = 30, ttl: int = None,
+                session: requests.Session = None,
+                before_request: Callable[[str], None] = None) -> requests.Response:
+        """
+        Send a request through the cache
+
+        Args:
+            method: 'GET' or 'POST' (POST is cached by body but never revalidated)
+            url, params, json_body, headers, timeout: as for requests
+            ttl: Seconds to reuse the response (default ttl_for(url))
+            session: Session to send with (default: requests module)
+            before_request: Called with the URL just before a network request
+                (e.g. a rate limiter); not called for cache hits
+
+        Returns:
+            requests.Response with a from_cache attribute
+        """
+        url = _full_url(url, params)
+        http = session or requests
+
+        if self.mode == 'off':
+            if before_request:
+                before_request(url)
+            response = http.request(method, url, json=json_body, headers=headers, timeout=timeout)
+            response.from_cache = False
+            return response
+
+        body = json.dumps(json_body, sort_keys=True).encode() if json_body is not None else b''
+        key = self._key(method, url, body)
+        entry = self.load(key)
+
+        if self.mode == 'replay':
+            if entry is None:
+                raise ReplayMiss(f"No recorded response for {method} {redact_url(url)}")
+            self._count('replayed')
+            return self._response(entry, from_cache=True)
+
+        ttl = ttl_for(url) if ttl is None else ttl
+        if entry and time.time() - entry['stored_at'] < ttl:
+            self._count('hits')
+            return self._response(entry, from_cache=True)
+
+        request_headers = dict(headers or {})
+        if entry and method == 'GET' and entry['status_code'] == 200:
+            validators = entry.get('headers', {})
+            if 'ETag' in validators:
+                request_headers['If-None-Match'] = validators['ETag']
+            if 'Last-Modified' in validators:
+                request_headers['If-Modified-Since'] = validators['Last-Modified']
+            elif 'ETag' not in validators:
+                request_headers['If-Modified-Since'] = formatdate(entry['stored_at'], usegmt=True)
+
+        try:
+            if before_request:
+                before_request(url)
+            response = http.request(method, url, json=json_body, headers=request_headers, timeout=timeout)
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print(f"⚠️ {redact_url(url)} unreachable ({e}) - using cached copy")
+            self._count('stale')
+            return self._response(entry, from_cache=True)
+
+        if response.status_code == 304 and entry:
+            self.touch(key, entry, response.headers)
+            self._count('revalidated')
+            return self._response(entry, from_cache=True)
+
+        if response.status_code >= 500 and entry:
+            print(f"⚠️ {redact_url(url)} returned {response.status_code} - using cached copy")
+            self._count('stale')
+            return self._response(entry, from_cache=True)
+
+        self._count('fetched')
+        if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+            self.store(key, method, url, response, ttl)
+        response.from_cache = False
+        return response
+
+
+_http_cache: Optional[HttpCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Shared HttpCache configured from T21_HTTP_CACHE_DIR / T21_HTTP_CACHE_MODE"""
+    global _http_cache
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                _http_cache = HttpCache()
+    return _http_cache
+
+
+def cached_get(url: str, params: Dict = None, **kwargs) -> requests.Response:
+    """GET through the shared cache (see HttpCache.request for kwargs)"""
+    return get_http_cache().request('GET', url, params=params, **kwargs)
+
+
+def cached_post(url: str, json_body: Dict = None, **kwargs) -> requests.Response:
+    """POST through the shared cache - reused within ttl (default 0: only replayed)"""
+    kwargs.setdefault('ttl', 0)
+    return get_http_cache().request('POST', url, json_body=json_body, **kwargs)
@@ -2,13 +2,336 @@
 NHS JOBS SCRAPER ENGINE
 Scrapes NHS Jobs website for matching positions based on student preferences
 Stores discovered jobs in Supabase database
+
+Discovery runs once for all students: identical location/keyword searches
+are fetched once and shared, pages are fetched concurrently under a
+per-host rate limit, and each page's jobs are checked and inserted in one
+round-trip. Pages go through the shared HTTP cache (job_automation.http_cache),
+so unchanged search and vacancy pages are not downloaded again.
 """
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import re
 from supabase_database import supabase, SUPABASE_AVAILABLE
+from job_automation.http_cache import cached_get
+
+NHS_JOBS_SEARCH_URL = "https://www.jobs.nhs.uk/xi/search_vacancy"
+
+DEFAULT_KEYWORDS = ['RTT', 'Validation', 'Administrator', 'Pathway']
+DEFAULT_LOCATION = 'London'
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-GB,en;q=0.9',
+    'Referer': 'https://www.jobs.nhs.uk/'
+}
+
+# Concurrent fetches, and the minimum gap between two requests to one host
+DISCOVERY_WORKERS = 4
+HOST_MIN_INTERVAL_SECONDS = 1.0
+
+SPONSORSHIP_KEYWORDS = ['visa sponsorship', 'tier 2 sponsorship', 'skilled worker visa',
+                        'certificate of sponsorship', 'sponsor license']
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least min_interval seconds apart"""
+
+    def __init__(self, min_interval: float = HOST_MIN_INTERVAL_SECONDS):
+        self.min_interval = min_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        """Block until url's host may be requested again"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_rate_limiter = HostRateLimiter()
+_local = threading.local()
+_sponsorship_cache: Dict[str, bool] = {}
+_sponsorship_lock = threading.Lock()
+
+
+def fetch_page(url: str, params: Dict = None, timeout: int = 30) -> requests.Response:
+    """Cached GET; network requests are rate-limited and use this thread's keep-alive session"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.headers.update(REQUEST_HEADERS)
+    return cached_get(url, params=params, timeout=timeout, session=session,
+                      before_request=_rate_limiter.wait)
+
+
+def search_key(location: str, keywords: List[str] = None) -> Tuple[str, str]:
+    """(location, keyword) identifying one NHS Jobs search"""
+    keyword = ' '.join(keywords if keywords else DEFAULT_KEYWORDS)
+    return (location or DEFAULT_LOCATION).strip(), keyword
+
+
+def plan_searches(students: List[Dict]) -> Dict[Tuple[str, str], List[Dict]]:
+    """
+    Unique searches needed to cover every student
+
+    Each student needs one search per preferred location; students sharing
+    a location and keywords share the search.
+
+    Returns:
+        {(location, keyword): [students the search is for]} in student order
+    """
+    plan: Dict[Tuple[str, str], List[Dict]] = {}
+    for student in students:
+        locations = student.get('preferred_locations') or [DEFAULT_LOCATION]
+        keys = []
+        for location in locations:
+            key = search_key(location, student.get('keywords'))
+            if key not in keys:
+                keys.append(key)
+        for key in keys:
+            plan.setdefault(key, []).append(student)
+    return plan
+
+
+def fetch_search_page(location: str, keyword: str) -> Optional[bytes]:
+    """HTML of one NHS Jobs search results page (None on failure)"""
+    params = {
+        'action': 'search',
+        'keyword': keyword,
+        'location': location,
+        'distanceFromLocation': '20'
+    }
+    response = fetch_page(NHS_JOBS_SEARCH_URL, params=params, timeout=30)
+    if response.status_code != 200:
+        print(f"❌ Failed to fetch NHS Jobs: {response.status_code}")
+        print(f"URL: {response.url}")
+        return None
+    return response.content
+
+
+def parse_job_listings(html: bytes) -> List[Dict]:
+    """Job details from a search results page (no sponsorship check)"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Try multiple possible selectors for job listings
+    job_listings = (
+        soup.find_all('article', class_='vacancy') or
+        soup.find_all('div', class_='vacancy-result') or
+        soup.find_all('li', class_='search-result') or
+        soup.find_all('div', {'data-test': 'vacancy-item'})
+    )
+
+    jobs = []
+    for listing in job_listings:
+        try:
+            # Extract job details from HTML - try multiple selectors
+            title_elem = (
+                listing.find('h2', class_='vacancy__header') or
+                listing.find('h3') or
+                listing.find('a', class_='vacancy__link')
+            )
+            title = title_elem.get_text(strip=True) if title_elem else 'Unknown'
+
+            # Get trust/employer
+            trust_elem = (
+                listing.find('span', class_='vacancy__employer') or
+                listing.find('p', class_='employer')
+            )
+            trust = trust_elem.get_text(strip=True) if trust_elem else 'Unknown'
+
+            # Get location
+            location_elem = (
+                listing.find('span', class_='vacancy__location') or
+                listing.find('p', class_='location')
+            )
+            location_text = location_elem.get_text(strip=True) if location_elem else 'Unknown'
+
+            # Get salary
+            salary_elem = listing.find('span', class_='vacancy__salary')
+            salary_text = salary_elem.get_text(strip=True) if salary_elem else ''
+            salary_min, salary_max = parse_salary(salary_text)
+
+            # Extract band
+            band = extract_band(title, salary_text)
+
+            # Get job URL
+            link_elem = listing.find('a', href=True)
+            job_url = 'https://www.jobs.nhs.uk' + link_elem['href'] if link_elem and link_elem['href'].startswith('/') else (link_elem['href'] if link_elem else '')
+
+            # Get job reference from URL or generate one
+            job_reference = job_url.split('/')[-1] if job_url else f'NHS-{datetime.now().timestamp()}'
+
+            # Get closing date
+            closing_elem = listing.find('span', class_='vacancy__closing')
+            closing_text = closing_elem.get_text(strip=True) if closing_elem else ''
+            closing_date = parse_closing_date(closing_text)
+
+            jobs.append({
+                'title': title,
+                'trust': trust,
+                'location': location_text,
+                'band': band,
+                'salary_min': salary_min,
+                'salary_max': salary_max,
+                'closing_date': closing_date,
+                'nhs_jobs_url': job_url,
+                'job_reference': job_reference
+            })
+
+        except Exception as e:
+            print(f"⚠️ Error parsing job listing: {str(e)}")
+            continue
+
+    return jobs
+
+
+def store_new_jobs(jobs: List[Dict]) -> Tuple[List[Dict], int]:
+    """
+    Insert the jobs not already in discovered_jobs
+
+    One query finds which job references exist and one insert adds the rest.
+
+    Returns:
+        (inserted rows, number skipped as already in the database)
+    """
+    if not jobs:
+        return [], 0
+
+    references = [job['job_reference'] for job in jobs]
+    existing = supabase.table('discovered_jobs').select('job_reference').in_('job_reference', references).execute()
+    known = {row['job_reference'] for row in (existing.data or [])}
+
+    new_jobs = [job for job in jobs if job['job_reference'] not in known]
+    for job in jobs:
+        if job['job_reference'] in known:
+            print(f"⏭️ Skip: {job['title']} (already in database)")
+
+    if not new_jobs:
+        return [], len(jobs)
+
+    result = supabase.table('discovered_jobs').insert(new_jobs).execute()
+    inserted = result.data or []
+    for job in inserted:
+        print(f"✅ Added: {job.get('title')} at {job.get('trust')}")
+    return inserted, len(jobs) - len(new_jobs)
+
+
+def _matching_students(job: Dict, students: List[Dict], sponsorship_available: bool = True) -> List[Dict]:
+    """Students whose location/band (and sponsorship) criteria the job meets"""
+    return [
+        student for student in students
+        if matches_criteria(job['title'], job['location'], job['band'],
+                            student.get('preferred_locations', []), student.get('preferred_bands', []),
+                            student.get('requires_sponsorship', False), sponsorship_available)
+    ]
+
+
+def _select_page_jobs(listings: List[Dict], students: List[Dict], seen: set,
+                      executor: ThreadPoolExecutor) -> List[Dict]:
+    """Listings on one page wanted by at least one of the search's students"""
+    candidates = []
+    for listing in listings:
+        if listing['job_reference'] in seen:
+            continue
+        matched = _matching_students(listing, students)
+        if matched:
+            candidates.append((listing, matched))
+
+    # Sponsorship means fetching the job page - only for jobs a student needs it for
+    needs_check = [listing['nhs_jobs_url'] for listing, matched in candidates
+                   if any(student.get('requires_sponsorship') for student in matched)]
+    sponsorship = dict(zip(needs_check, executor.map(check_sponsorship, needs_check)))
+
+    page_jobs = []
+    for listing, matched in candidates:
+        checked = listing['nhs_jobs_url'] in sponsorship
+        sponsorship_available = sponsorship[listing['nhs_jobs_url']] if checked else True
+        if checked:
+            matched = _matching_students(listing, matched, sponsorship_available)
+        if not matched or listing['job_reference'] in seen:
+            continue
+
+        seen.add(listing['job_reference'])
+        page_jobs.append({
+            **listing,
+            'requires_sponsorship': any(student.get('requires_sponsorship', False) for student in matched),
+            'sponsorship_available': sponsorship_available,
+            'discovered_at': datetime.now().isoformat()
+        })
+    return page_jobs
+
+
+def discover_jobs(students: List[Dict], max_workers: int = DISCOVERY_WORKERS) -> Dict:
+    """
+    Find and store new NHS Jobs vacancies for a group of students
+
+    Each unique (location, keywords) search is fetched once, concurrently and
+    rate-limited per host. A job is stored if any of the students the search
+    was for matches its location, band and sponsorship.
+
+    Args:
+        students: student_automation_settings rows
+        max_workers: Concurrent page fetches
+
+    Returns:
+        Dict with the new jobs and counts of searches, listings and skips
+    """
+    plan = plan_searches(students)
+    stats = {
+        'students': len(students),
+        'searches': len(plan),
+        'pages_fetched': 0,
+        'listings': 0,
+        'skipped_existing': 0,
+        'errors': 0,
+        'jobs': []
+    }
+    print(f"🔍 {len(plan)} unique searches for {len(students)} students")
+
+    seen = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pages = {executor.submit(fetch_search_page, location, keyword): (location, keyword)
+                 for location, keyword in plan}
+
+        for future in as_completed(pages):
+            location, keyword = pages[future]
+            try:
+                html = future.result()
+                if html is None:
+                    stats['errors'] += 1
+                    continue
+
+                listings = parse_job_listings(html)
+                stats['pages_fetched'] += 1
+                stats['listings'] += len(listings)
+                print(f"📊 {location} / {keyword}: {len(listings)} potential jobs")
+
+                page_jobs = _select_page_jobs(listings, plan[(location, keyword)], seen, executor)
+                inserted, skipped = store_new_jobs(page_jobs)
+                stats['jobs'].extend(inserted)
+                stats['skipped_existing'] += skipped
+
+            except Exception as e:
+                stats['errors'] += 1
+                print(f"❌ Scraping error ({location} / {keyword}): {str(e)}")
+
+    stats['new_jobs'] = len(stats['jobs'])
+    return stats
+
 
 def scrape_nhs_jobs(locations=None, bands=None, requires_sponsorship=False, keywords=None):
     """
@@ -28,146 +351,20 @@ def scrape_nhs_jobs(locations=None, bands=None, requires_sponsorship=False, keyw
         print("❌ Supabase not available")
         return []
     
-    discovered_jobs = []
-    
-    # NHS Jobs search URL - we'll scrape the actual website
-    base_url = "https://www.jobs.nhs.uk/xi/search_vacancy"
-    
-    # Build search parameters
-    search_keywords = keywords if keywords else ['RTT', 'Validation', 'Administrator', 'Pathway']
-    location = locations[0] if locations else 'London'
+    print(f"🔍 Searching NHS Jobs for: {search_key(DEFAULT_LOCATION, keywords)[1]}")
+    print(f"📍 Locations: {', '.join(locations) if locations else 'All'}")
+    print(f"🏥 Bands: {', '.join(bands) if bands else 'All'}")
     
-    params = {
-        'action': 'search',
-        'keyword': ' '.join(search_keywords),
-        'location': location,
-        'distanceFromLocation': '20'
+    student = {
+        'preferred_locations': locations or [],
+        'preferred_bands': bands or [],
+        'requires_sponsorship': requires_sponsorship,
+        'keywords': keywords
     }
+    result = discover_jobs([student])
     
-    try:
-        print(f"🔍 Searching NHS Jobs for: {params['keyword']}")
-        print(f"📍 Locations: {', '.join(locations) if locations else 'All'}")
-        print(f"🏥 Bands: {', '.join(bands) if bands else 'All'}")
-        
-        # Make request to NHS Jobs website
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-GB,en;q=0.9',
-            'Referer': 'https://www.jobs.nhs.uk/'
-        }
-        
-        response = requests.get(base_url, params=params, headers=headers, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"❌ Failed to fetch NHS Jobs: {response.status_code}")
-            print(f"URL: {response.url}")
-            return []
-        
-        print(f"✅ Got response from NHS Jobs")
-        
-        # Parse HTML response
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Try multiple possible selectors for job listings
-        job_listings = (
-            soup.find_all('article', class_='vacancy') or
-            soup.find_all('div', class_='vacancy-result') or
-            soup.find_all('li', class_='search-result') or
-            soup.find_all('div', {'data-test': 'vacancy-item'})
-        )
-        
-        print(f"📊 Found {len(job_listings)} potential jobs")
-        
-        for listing in job_listings:
-            try:
-                # Extract job details from HTML - try multiple selectors
-                title_elem = (
-                    listing.find('h2', class_='vacancy__header') or
-                    listing.find('h3') or
-                    listing.find('a', class_='vacancy__link')
-                )
-                title = title_elem.get_text(strip=True) if title_elem else 'Unknown'
-                
-                # Get trust/employer
-                trust_elem = (
-                    listing.find('span', class_='vacancy__employer') or
-                    listing.find('p', class_='employer')
-                )
-                trust = trust_elem.get_text(strip=True) if trust_elem else 'Unknown'
-                
-                # Get location
-                location_elem = (
-                    listing.find('span', class_='vacancy__location') or
-                    listing.find('p', class_='location')
-                )
-                location_text = location_elem.get_text(strip=True) if location_elem else 'Unknown'
-                
-                # Get salary
-                salary_elem = listing.find('span', class_='vacancy__salary')
-                salary_text = salary_elem.get_text(strip=True) if salary_elem else ''
-                salary_min, salary_max = parse_salary(salary_text)
-                
-                # Extract band
-                band = extract_band(title, salary_text)
-                
-                # Get job URL
-                link_elem = listing.find('a', href=True)
-                job_url = 'https://www.jobs.nhs.uk' + link_elem['href'] if link_elem and link_elem['href'].startswith('/') else (link_elem['href'] if link_elem else '')
-                
-                # Get job reference from URL or generate one
-                job_reference = job_url.split('/')[-1] if job_url else f'NHS-{datetime.now().timestamp()}'
-                
-                # Get closing date
-                closing_elem = listing.find('span', class_='vacancy__closing')
-                closing_text = closing_elem.get_text(strip=True) if closing_elem else ''
-                closing_date = parse_closing_date(closing_text)
-                
-                # Check if requires sponsorship (look in job description)
-                sponsorship_available = check_sponsorship(job_url) if requires_sponsorship else True
-                
-                # Filter by criteria
-                if not matches_criteria(title, location_text, band, locations, bands, requires_sponsorship, sponsorship_available):
-                    continue
-                
-                # Create job dictionary
-                job_data = {
-                    'title': title,
-                    'trust': trust,
-                    'location': location_text,
-                    'band': band,
-                    'salary_min': salary_min,
-                    'salary_max': salary_max,
-                    'requires_sponsorship': requires_sponsorship,
-                    'sponsorship_available': sponsorship_available,
-                    'closing_date': closing_date,
-                    'nhs_jobs_url': job_url,
-                    'job_reference': job_reference,
-                    'discovered_at': datetime.now().isoformat()
-                }
-                
-                # Check if job already exists in database
-                existing = supabase.table('discovered_jobs').select('id').eq('job_reference', job_reference).execute()
-                
-                if not existing.data:
-                    # Insert into database
-                    result = supabase.table('discovered_jobs').insert(job_data).execute()
-                    if result.data:
-                        discovered_jobs.append(result.data[0])
-                        print(f"✅ Added: {title} at {trust}")
-                else:
-                    print(f"⏭️ Skip: {title} (already in database)")
-            
-            except Exception as e:
-                print(f"⚠️ Error parsing job listing: {str(e)}")
-                continue
-        
-        print(f"✅ Scraping complete! Found {len(discovered_jobs)} new jobs")
-        return discovered_jobs
-    
-    except Exception as e:
-        print(f"❌ Scraping error: {str(e)}")
-        return []
+    print(f"✅ Scraping complete! Found {result['new_jobs']} new jobs")
+    return result['jobs']
 
 def parse_salary(salary_text):
     """Extract min and max salary from text"""
@@ -227,25 +424,26 @@ def parse_closing_date(closing_text):
     return (datetime.now() + timedelta(days=14)).isoformat()
 
 def check_sponsorship(job_url):
-    """Check if job offers visa sponsorship"""
+    """Check if job offers visa sponsorship (each job page fetched once per process)"""
+    with _sponsorship_lock:
+        if job_url in _sponsorship_cache:
+            return _sponsorship_cache[job_url]
+
     try:
-        response = requests.get(job_url, timeout=10)
+        response = fetch_page(job_url, timeout=10)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         content = soup.get_text().lower()
         
         # Look for sponsorship keywords
-        sponsorship_keywords = ['visa sponsorship', 'tier 2 sponsorship', 'skilled worker visa', 
-                               'certificate of sponsorship', 'sponsor license']
-        
-        for keyword in sponsorship_keywords:
-            if keyword in content:
-                return True
-        
-        return False
+        available = any(keyword in content for keyword in SPONSORSHIP_KEYWORDS)
     except:
         return False
 
+    with _sponsorship_lock:
+        _sponsorship_cache[job_url] = available
+    return available
+
 def matches_criteria(title, location, band, target_locations, target_bands, requires_sponsorship, sponsorship_available):
     """Check if job matches student criteria"""
     
@@ -268,7 +466,12 @@ def matches_criteria(title, location, band, target_locations, target_bands, requ
     return True
 
 def scrape_jobs_for_all_students():
-    """Scrape jobs for all active students"""
+    """
+    Scrape jobs for all active students
+
+    Returns:
+        discover_jobs() stats (None if there was nothing to scrape)
+    """
     
     if not SUPABASE_AVAILABLE or supabase is None:
         print("❌ Supabase not available")
@@ -284,26 +487,11 @@ def scrape_jobs_for_all_students():
         
         print(f"🔍 Scraping jobs for {len(students.data)} students")
         
-        total_jobs = 0
-        
-        for student in students.data:
-            print(f"\n👤 Processing: {student.get('users', {}).get('email', 'Unknown')}")
-            
-            # Extract preferences
-            locations = student.get('preferred_locations', [])
-            bands = student.get('preferred_bands', [])
-            requires_sponsorship = student.get('requires_sponsorship', False)
-            
-            # Scrape jobs
-            jobs = scrape_nhs_jobs(
-                locations=locations,
-                bands=bands,
-                requires_sponsorship=requires_sponsorship
-            )
-            
-            total_jobs += len(jobs)
+        result = discover_jobs(students.data)
         
-        print(f"\n✅ COMPLETE: Found {total_jobs} new jobs across all students")
+        print(f"\n✅ COMPLETE: Found {result['new_jobs']} new jobs across all students "
+              f"({result['searches']} searches, {result['skipped_existing']} already known)")
+        return result
     
     except Exception as e:
         print(f"❌ Error scraping for all students: {str(e)}")
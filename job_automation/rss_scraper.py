@@ -1,12 +1,13 @@
 """
 NHS Jobs RSS Feed Scraper
 NHS Jobs provides RSS feeds for job searches - this is the OFFICIAL way to get jobs!
+Feeds are fetched through the shared HTTP cache (job_automation.http_cache)
 """
 
 import feedparser
-import requests
 from datetime import datetime, timedelta
 from supabase_database import supabase, SUPABASE_AVAILABLE
+from job_automation.http_cache import cached_get, cached_post
 
 def scrape_nhs_jobs_rss(keywords=None, location='London'):
     """
@@ -40,8 +41,12 @@ def scrape_nhs_jobs_rss(keywords=None, location='London'):
         try:
             print(f"🔍 Trying RSS feed: {rss_url}")
             
-            # Parse RSS feed
-            feed = feedparser.parse(rss_url)
+            # Fetch (cached, revalidated with ETag/Last-Modified) then parse RSS feed
+            response = cached_get(rss_url, timeout=30)
+            if response.status_code != 200:
+                print(f"⚠️ RSS feed returned {response.status_code}")
+                continue
+            feed = feedparser.parse(response.content)
             
             if feed.entries and len(feed.entries) > 0:
                 print(f"✅ Found {len(feed.entries)} jobs in RSS feed!")
@@ -143,7 +148,7 @@ def scrape_nhs_jobs_rss(keywords=None, location='London'):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
-        response = requests.post(api_url, json=payload, headers=headers, timeout=30)
+        response = cached_post(api_url, json_body=payload, headers=headers, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -55,7 +55,10 @@ def run_full_automation_cycle():
         print("STEP 1: 🔍 SCRAPING NHS JOBS")
         print("-" * 70)
         
-        scrape_jobs_for_all_students()
+        scrape_result = scrape_jobs_for_all_students()
+        
+        if scrape_result:
+            print(f"🔎 {scrape_result['searches']} unique searches covered {scrape_result['students']} students")
         
         print()
         
@@ -0,0 +1,293 @@
+"""
+T21 Lazy Feature Registry
+Import feature modules when their page is first used, and time every import
+
+Features:
+- lazy_import(): stand-in for `from module import name` that imports on
+  first call/use, falling back like the old try/except import blocks
+- feature_available(): checks a module exists without importing it
+- Import profiler: per-module inclusive and self time of everything
+  imported while the app starts (like `python -X importtime`)
+- Startup report: slowest modules, lazy features loaded since, and one
+  JSON log line for tracking cold-start latency
+
+Usage:
+    start_import_profiler()                      # first thing in app.py
+    render_va_pathway = lazy_import('virtual_assistant_pathway_module', 'render_pathway',
+                                    fallback=lambda: st.error("VA Pathway unavailable"))
+    ...
+    finish_startup_profile(app_start)            # once the app is ready to render
+
+Set T21_STARTUP_PROFILE=1 to print the full report at startup.
+"""
+
+import builtins
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+# Modules shown in the printed report
+REPORT_TOP_MODULES = 25
+
+
+@dataclass
+class ImportRecord:
+    """Cost of the first import of one module"""
+    module: str
+    seconds: float  # including modules it imported
+    self_seconds: float  # excluding them
+    lazy: bool = False
+    direct: bool = True  # imported by the app itself, not by another module
+    error: Optional[str] = None
+
+
+_records: Dict[str, ImportRecord] = {}
+_records_lock = threading.Lock()
+_local = threading.local()
+_original_import = builtins.__import__
+_startup: Dict[str, Any] = {}
+
+
+def _record(record: ImportRecord):
+    with _records_lock:
+        _records.setdefault(record.module, record)
+
+
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """builtins.__import__ wrapper timing each module's first import"""
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+
+    frame = [0.0]  # time spent in nested first imports
+    stack.append(frame)
+    start = time.perf_counter()
+    error = None
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+        _record(ImportRecord(name, elapsed, elapsed - frame[0], direct=not stack, error=error))
+
+
+def start_import_profiler():
+    """Time imports until finish_startup_profile (only on the process's first run)"""
+    if not _startup and builtins.__import__ is _original_import:
+        builtins.__import__ = _profiled_import
+
+
+def stop_import_profiler():
+    """Restore the normal import function"""
+    if builtins.__import__ is _profiled_import:
+        builtins.__import__ = _original_import
+
+
+def feature_available(module: str) -> bool:
+    """True if module can be found (without importing it)"""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+_UNRESOLVED = object()
+
+
+class LazyFeature:
+    """
+    Proxy for one name in a module, imported on first use
+
+    Calls, attribute access, indexing, len(), iteration and truth tests all
+    go to the real object. If the import fails the fallback is used instead.
+    """
+
+    __slots__ = ('_module', '_attr', '_fallback', '_target', '_lock')
+
+    def __init__(self, module: str, attr: Optional[str] = None, fallback: Any = None):
+        self._module = module
+        self._attr = attr
+        self._fallback = fallback
+        self._target = _UNRESOLVED
+        self._lock = threading.Lock()
+
+    def _resolve(self) -> Any:
+        if self._target is _UNRESOLVED:
+            with self._lock:
+                if self._target is _UNRESOLVED:
+                    self._target = self._load()
+        return self._target
+
+    def _load(self) -> Any:
+        loaded_before = self._module in sys.modules
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(self._module)
+            target = getattr(module, self._attr) if self._attr else module
+            error = None
+        except Exception as e:
+            if self._fallback is None:
+                raise
+            print(f"⚠️ {self._module} unavailable: {e}")
+            target = self._fallback
+            error = f"{type(e).__name__}: {e}"
+
+        if not loaded_before:
+            elapsed = time.perf_counter() - start
+            _record(ImportRecord(self._module, elapsed, elapsed, lazy=True, error=error))
+            print(f"⏱️ Lazy-loaded {self._module} in {elapsed * 1000:.0f} ms")
+        return target
+
+    @property
+    def loaded(self) -> bool:
+        """True once the module has been imported (or fallen back)"""
+        return self._target is not _UNRESOLVED
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+    def __contains__(self, item) -> bool:
+        return item in self._resolve()
+
+    def __bool__(self) -> bool:
+        return bool(self._resolve())
+
+    def __repr__(self) -> str:
+        state = repr(self._target) if self.loaded else 'not loaded'
+        return f"<LazyFeature {self._module}.{self._attr or ''} ({state})>"
+
+
+def lazy_import(module: str, attr: Optional[str] = None, fallback: Any = None) -> LazyFeature:
+    """
+    Lazy `from module import attr`
+
+    Args:
+        module: Module to import on first use
+        attr: Name to take from it (None for the module itself)
+        fallback: Used instead if the import fails (None re-raises)
+    """
+    return LazyFeature(module, attr, fallback)
+
+
+def get_import_records(lazy: Optional[bool] = None) -> List[ImportRecord]:
+    """Recorded imports, slowest first (lazy=True/False to filter)"""
+    with _records_lock:
+        records = list(_records.values())
+    if lazy is not None:
+        records = [record for record in records if record.lazy == lazy]
+    return sorted(records, key=lambda record: record.self_seconds, reverse=True)
+
+
+def _package_costs(records: List[ImportRecord]) -> List[Dict]:
+    """Import cost per top-level module/package (submodules folded in), slowest first"""
+    packages: Dict[str, Dict] = {}
+    for record in records:
+        name = record.module.split('.')[0]
+        package = packages.setdefault(name, {'module': name, 'self_seconds': 0.0, 'seconds': 0.0,
+                                             'submodules': 0, 'error': None})
+        package['self_seconds'] += record.self_seconds
+        package['submodules'] += 1
+        if record.module == name:
+            package['seconds'] = record.seconds
+            package['error'] = record.error
+    return sorted(packages.values(), key=lambda package: package['self_seconds'], reverse=True)
+
+
+def get_startup_report() -> Dict:
+    """
+    Startup time plus import cost per module
+
+    'modules' gives each top-level module/package's own import time
+    (self_seconds, all its submodules included) and the time of its first
+    import including everything it pulled in (seconds).
+    """
+    eager = get_import_records(lazy=False)
+    lazy = get_import_records(lazy=True)
+    return {
+        'startup_seconds': _startup.get('seconds'),
+        'import_seconds': sum(record.self_seconds for record in eager),
+        'modules_imported': len(eager),
+        'failed_imports': [record.module for record in eager + lazy
+                           if record.error and (record.direct or record.lazy)],
+        'modules': _package_costs(eager),
+        'lazy_modules': [asdict(record) for record in lazy]
+    }
+
+
+def format_startup_report(top: int = REPORT_TOP_MODULES) -> str:
+    """Human-readable startup report"""
+    report = get_startup_report()
+    lines = [
+        f"Startup: {report['startup_seconds'] or 0:.2f}s "
+        f"({report['import_seconds']:.2f}s importing {report['modules_imported']} modules)",
+        f"{'self ms':>9} {'total ms':>9}  module"
+    ]
+    for package in report['modules'][:top]:
+        flag = '  FAILED' if package['error'] else ''
+        lines.append(f"{package['self_seconds'] * 1000:9.1f} {package['seconds'] * 1000:9.1f}  {package['module']}{flag}")
+
+    if report['lazy_modules']:
+        lines.append("Lazy-loaded since startup:")
+        for record in report['lazy_modules']:
+            flag = '  FAILED' if record['error'] else ''
+            lines.append(f"{'':9} {record['seconds'] * 1000:9.1f}  {record['module']}{flag}")
+    return '\n'.join(lines)
+
+
+def finish_startup_profile(app_start: float) -> Dict:
+    """
+    Stop the import profiler and log the startup cost (first run per process)
+
+    Args:
+        app_start: time.perf_counter() taken at the top of the app script
+
+    Returns:
+        get_startup_report() as of the end of startup
+    """
+    if not _startup:
+        stop_import_profiler()
+        _startup['seconds'] = time.perf_counter() - app_start
+        report = get_startup_report()
+
+        slowest = ', '.join(f"{record['module']} {record['self_seconds'] * 1000:.0f}ms"
+                            for record in report['modules'][:3])
+        print(f"⏱️ App startup {_startup['seconds']:.2f}s - {report['modules_imported']} modules imported "
+              f"(slowest: {slowest})")
+
+        if os.environ.get('T21_STARTUP_PROFILE'):
+            print(format_startup_report())
+            print("STARTUP_PROFILE " + json.dumps({
+                'startup_seconds': report['startup_seconds'],
+                'import_seconds': report['import_seconds'],
+                'modules_imported': report['modules_imported'],
+                'failed_imports': report['failed_imports'],
+                'top_modules': {record['module']: round(record['self_seconds'], 4)
+                                for record in report['modules'][:REPORT_TOP_MODULES]}
+            }))
+    return get_startup_report()
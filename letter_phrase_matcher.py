@@ -0,0 +1,128 @@
+"""
+T21 Letter Phrase Matcher
+Find every indicator phrase in a clinic letter in a single pass
+
+Features:
+- All phrase lists compiled once into one trie-shaped regex
+- One scan returns every hit with its character offset
+- Past/future context checks answered from the offsets (no re-slicing)
+- Same plain substring semantics as `phrase in text`
+
+Usage:
+    matcher = PhraseMatcher(['waiting list', 'please arrange', 'results'])
+    hits = matcher.scan(letter_text.lower())
+    hits.has('waiting list')                       # like 'waiting list' in text
+    hits.any(['please arrange', 'results'])        # like any(p in text for p in ...)
+    hits.any_within(['results'], start, end)       # like any(p in text[start:end] ...)
+"""
+
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """
+    Build a regex that matches the LONGEST phrase starting at a position
+
+    Common prefixes are factored into a trie so each position costs one walk
+    down the trie rather than one attempt per phrase. Optional tails are
+    greedy, so longer phrases win over their own prefixes.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class PhraseHits:
+    """Offsets of every registered phrase found in one text"""
+
+    def __init__(self, text: str, offsets: Dict[str, List[int]], phrases: frozenset):
+        self.text = text
+        self.offsets = offsets
+        self.found = frozenset(offsets)
+        self._phrases = phrases
+
+    def has(self, phrase: str) -> bool:
+        """phrase in text"""
+        if phrase in self._phrases:
+            return phrase in self.found
+        return phrase in self.text
+
+    def any(self, phrases: Iterable[str]) -> bool:
+        """any(phrase in text for phrase in phrases)"""
+        if not self.found.isdisjoint(phrases):
+            return True
+        return any(phrase in self.text for phrase in phrases if phrase not in self._phrases)
+
+    def first(self, phrase: str) -> int:
+        """text.find(phrase)"""
+        if phrase in self._phrases:
+            found = self.offsets.get(phrase)
+            return found[0] if found else -1
+        return self.text.find(phrase)
+
+    def within(self, phrase: str, start: int, end: int) -> bool:
+        """phrase in text[start:end]"""
+        if phrase not in self._phrases:
+            return self.text.find(phrase, start, end) != -1
+        found = self.offsets.get(phrase)
+        if not found:
+            return False
+        i = bisect_left(found, start)
+        return i < len(found) and found[i] + len(phrase) <= end
+
+    def any_within(self, phrases: Iterable[str], start: int, end: int) -> bool:
+        """any(phrase in text[start:end] for phrase in phrases)"""
+        return any(self.within(phrase, start, end) for phrase in phrases)
+
+
+class PhraseMatcher:
+    """Precompiled multi-phrase matcher (build once, scan many letters)"""
+
+    def __init__(self, phrases: Iterable[str]):
+        """
+        Compile the phrase set
+
+        Args:
+            phrases: Literal phrases to find (matched case-sensitively, so
+                pass lowercase phrases and lowercase text)
+        """
+        self.phrases = frozenset(phrase for phrase in phrases if phrase)
+        self._regex = re.compile(_trie_pattern(self.phrases)) if self.phrases else None
+
+        # Any phrase matching at the same position as a longer one is a
+        # prefix of it, so one match per position is enough
+        self._prefixes: Dict[str, List[str]] = {
+            phrase: [other for other in self.phrases if phrase.startswith(other)]
+            for phrase in self.phrases
+        }
+
+    def scan(self, text: str) -> PhraseHits:
+        """Find every occurrence of every phrase in text, in one pass"""
+        offsets: Dict[str, List[int]] = {}
+        if self._regex is not None:
+            search = self._regex.search
+            match = search(text)
+            while match is not None:
+                position = match.start()
+                for phrase in self._prefixes[match.group()]:
+                    offsets.setdefault(phrase, []).append(position)
+                # Phrases may overlap, so resume one character on rather
+                # than after the match
+                match = search(text, position + 1)
+        return PhraseHits(text, offsets, self.phrases)
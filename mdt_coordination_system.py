@@ -23,6 +23,7 @@ try:
     from supabase_database import (
         create_mdt_meeting as supabase_create_mdt_meeting,
         get_mdt_meetings_for_user,
+        get_mdt_meetings_by_ids as supabase_get_mdt_meetings_by_ids,
         update_mdt_meeting as supabase_update_mdt_meeting,
         delete_mdt_meeting as supabase_delete_mdt_meeting
     )
@@ -31,6 +32,11 @@ except ImportError:
     SUPABASE_ENABLED = False
     print("⚠️ Supabase not available for MDT Module - using fallback storage")
 
+# Cross-module patient index (kept current by the add/update functions; this
+# module has no delete. The hooks log and swallow index errors, so they never
+# fail a save)
+from patient_index import index_patient_record, update_patient_record
+
 
 def get_current_user_email():
     """Get current logged-in user's email"""
@@ -213,6 +219,8 @@ def add_patient_to_mdt(
 
     if SUPABASE_ENABLED:
         success, _ = supabase_update_mdt_meeting(user_email, meeting_id, updates)
+        if success:
+            index_patient_record('mdt', meeting_id, {**meeting, **updates})
         return success
     else:
         # Fallback logic
@@ -222,6 +230,7 @@ def add_patient_to_mdt(
                 m['patients_discussed'] = current_patients
                 m['updated_at'] = datetime.now().isoformat()
                 save_mdt_meetings(meetings)
+                index_patient_record('mdt', meeting_id, m)
                 return True
         return False
 
@@ -284,6 +293,8 @@ def record_mdt_outcome(
             print(f"❌ ERROR: Supabase update failed: {result}")
             import streamlit as st
             st.error(f"❌ Database error: {result}")
+        else:
+            index_patient_record('mdt', meeting_id, {**meeting, **updates})
         return success
     else:
         # Fallback logic
@@ -293,6 +304,7 @@ def record_mdt_outcome(
                 m['patients_discussed'] = patients
                 m['updated_at'] = datetime.now().isoformat()
                 save_mdt_meetings(meetings)
+                index_patient_record('mdt', meeting_id, m)
                 return True
         return False
 
@@ -319,6 +331,8 @@ def complete_mdt_meeting(meeting_id: str, summary: str = "") -> bool:
 
     if SUPABASE_ENABLED:
         success, _ = supabase_update_mdt_meeting(user_email, meeting_id, updates)
+        if success:
+            update_patient_record('mdt', meeting_id, updates)
         return success
     else:
         # Fallback logic
@@ -327,6 +341,7 @@ def complete_mdt_meeting(meeting_id: str, summary: str = "") -> bool:
             if m['meeting_id'] == meeting_id:
                 m.update(updates)
                 save_mdt_meetings(meetings)
+                update_patient_record('mdt', meeting_id, updates)
                 return True
         return False
 
@@ -380,13 +395,21 @@ def get_upcoming_mdt_meetings() -> List[Dict]:
     return upcoming
 
 
+def get_mdt_meetings_by_ids(meeting_ids: List[str]) -> List[Dict]:
+    """MDT meetings with these ids that the current user can see"""
+    if SUPABASE_ENABLED:
+        # By-id query instead of loading every meeting
+        owner = None if is_admin_or_supervisor() else get_current_user_email()
+        return supabase_get_mdt_meetings_by_ids(meeting_ids, owner)
+    
+    wanted = set(meeting_ids)
+    return [meeting for meeting in get_all_mdt_meetings() if meeting.get('meeting_id') in wanted]
+
+
 def get_mdt_meeting_by_id(meeting_id: str) -> Optional[Dict]:
     """Get specific MDT meeting"""
-    meetings = get_all_mdt_meetings()
-    for meeting in meetings:
-        if meeting['meeting_id'] == meeting_id:
-            return meeting
-    return None
+    meetings = get_mdt_meetings_by_ids([meeting_id])
+    return meetings[0] if meetings else None
 
 
 def search_mdt_meetings(
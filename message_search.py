@@ -0,0 +1,245 @@
+"""
+T21 Message Search
+Ranked full-text search over channel messages and DMs
+
+Features:
+- Tokenised full-text index (Postgres tsvector + GIN, see
+  ADD_MESSAGE_SEARCH_INDEX.sql) instead of ilike '%query%' scans
+- Results ranked by relevance, newest first within a rank
+- Highlighted snippet per result (<mark>...</mark>)
+- Pagination cursor (keyset on rank, time and id - stable while paging)
+- Access control: channel messages only from channels the user is a
+  member of, DMs only where the user is sender or recipient
+- Indexed as messages are sent (messaging_core send_channel_message /
+  send_direct_message)
+- SQLite FTS5 stand-in with the same interface for offline tests
+
+Usage:
+    index = get_message_search_index(supabase)
+    page = index.search('jo@nhs.net', 'discharge letter', limit=20)
+    page['results'], page['next_cursor']
+"""
+
+import base64
+import json
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+MESSAGE_SEARCH_DB = "message_search.db"
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+SOURCES = ('channel', 'dm')
+
+
+def encode_cursor(result: Dict) -> str:
+    """Opaque cursor pointing just after a result"""
+    key = [result['search_rank'], result['created_at'], result['source'], str(result['id'])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List:
+    """[rank, created_at, source, id] from encode_cursor()"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(key) != 4:
+            raise ValueError(key)
+        return key
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid search cursor: {cursor}") from e
+
+
+def _page(results: List[Dict], limit: int) -> Dict:
+    """{'results', 'next_cursor'} from up to limit + 1 rows"""
+    has_more = len(results) > limit
+    results = results[:limit]
+    return {
+        'results': results,
+        'next_cursor': encode_cursor(results[-1]) if has_more and results else None
+    }
+
+
+class MessageSearchIndex:
+    """Interface shared by the Supabase index and the SQLite stand-in"""
+
+    # True if search() enforces channel membership itself; otherwise the
+    # caller passes the user's channel ids as member_channel_ids
+    checks_membership = True
+
+    def index_message(self, source: str, message: Dict):
+        """Add a newly sent message ('channel' or 'dm')"""
+        raise NotImplementedError
+
+    def search(self, user_email: str, query: str, channel_id: str = None, include_dms: bool = True,
+               limit: int = DEFAULT_SEARCH_LIMIT, cursor: str = None,
+               member_channel_ids: List[str] = None) -> Dict:
+        """
+        Ranked, highlighted messages the user can see
+
+        Args:
+            user_email: Searching user (access control)
+            query: Search words (all must match)
+            channel_id: Only this channel (no DMs)
+            include_dms: Also search the user's DMs (when no channel_id)
+            limit: Results per page
+            cursor: next_cursor of the previous page
+            member_channel_ids: Channels the user belongs to (only used if
+                not checks_membership)
+
+        Returns:
+            {'results': [message + source, search_rank, highlight], 'next_cursor'}
+        """
+        raise NotImplementedError
+
+
+class SupabaseMessageSearchIndex(MessageSearchIndex):
+    """search_vector columns + search_messages_ranked() RPC"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def index_message(self, source: str, message: Dict):
+        # search_vector is a generated column - Postgres indexes on insert
+        pass
+
+    def search(self, user_email: str, query: str, channel_id: str = None, include_dms: bool = True,
+               limit: int = DEFAULT_SEARCH_LIMIT, cursor: str = None,
+               member_channel_ids: List[str] = None) -> Dict:
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+        after = decode_cursor(cursor) if cursor else [None, None, None, None]
+
+        response = self.client.rpc('search_messages_ranked', {
+            'p_user_email': user_email,
+            'p_query': query,
+            'p_channel_id': channel_id,
+            'p_include_dms': include_dms,
+            'p_limit': limit + 1,
+            'p_after_rank': after[0],
+            'p_after_created_at': after[1],
+            'p_after_source': after[2],
+            'p_after_id': after[3]
+        }).execute()
+
+        results = []
+        for row in response.data or []:
+            message = dict(row['message'])
+            message.update(source=row['source'], search_rank=row['search_rank'], highlight=row['highlight'])
+            results.append(message)
+        return _page(results, limit)
+
+
+def _fts_query(query: str) -> Optional[str]:
+    """User text as an FTS5 query: every word must match (None if no words)"""
+    words = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{word}"' for word in words) or None
+
+
+class SQLiteMessageSearchIndex(MessageSearchIndex):
+    """Same search over a local SQLite FTS5 table (offline tests, no Supabase)"""
+
+    checks_membership = False
+
+    def __init__(self, db_path: str = MESSAGE_SEARCH_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS message_search USING fts5(
+                content, source UNINDEXED, message_id UNINDEXED, channel_id UNINDEXED,
+                sender_email UNINDEXED, recipient_email UNINDEXED, created_at UNINDEXED,
+                message UNINDEXED, tokenize = 'porter unicode61'
+            )
+        ''')
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened once, reused)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def index_message(self, source: str, message: Dict):
+        if source not in SOURCES:
+            raise ValueError(f"Unknown message source: {source}")
+        if message.get('is_deleted'):
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                '''INSERT INTO message_search (content, source, message_id, channel_id, sender_email,
+                       recipient_email, created_at, message) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                (message.get('content') or '', source, str(message['id']),
+                 None if message.get('channel_id') is None else str(message['channel_id']),
+                 message.get('sender_email'), message.get('recipient_email'),
+                 message.get('created_at'), json.dumps(message, default=str))
+            )
+
+    def search(self, user_email: str, query: str, channel_id: str = None, include_dms: bool = True,
+               limit: int = DEFAULT_SEARCH_LIMIT, cursor: str = None,
+               member_channel_ids: List[str] = None) -> Dict:
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+        match = _fts_query(query)
+        if not match:
+            return {'results': [], 'next_cursor': None}
+
+        channels = {str(c) for c in member_channel_ids or []}
+        if channel_id is not None:
+            channels &= {str(channel_id)}
+            include_dms = False
+
+        # Access control
+        allowed = [f"(source = 'channel' AND channel_id IN ({','.join('?' * len(channels))}))"]
+        params = sorted(channels)
+        if include_dms:
+            allowed.append("(source = 'dm' AND (sender_email = ? OR recipient_email = ?))")
+            params += [user_email, user_email]
+
+        # bm25(): lower is better, so rank = -bm25 (higher is better, like ts_rank)
+        sql = f'''
+            SELECT * FROM (
+                SELECT -bm25(message_search) AS search_rank, created_at, source, message_id, message,
+                       snippet(message_search, 0, ?, ?, '…', 24) AS highlight
+                FROM message_search
+                WHERE message_search MATCH ? AND ({' OR '.join(allowed)})
+            )
+        '''
+        params = [HIGHLIGHT_START, HIGHLIGHT_STOP, match] + params
+        if cursor:
+            sql += ' WHERE (search_rank, created_at, source, message_id) < (?, ?, ?, ?)'
+            params += decode_cursor(cursor)
+        sql += ' ORDER BY search_rank DESC, created_at DESC, source DESC, message_id DESC LIMIT ?'
+        params.append(limit + 1)
+
+        results = []
+        for search_rank, _, source, _, body, highlight in self._connection().execute(sql, params):
+            message = json.loads(body)
+            message.update(source=source, search_rank=search_rank, highlight=highlight)
+            results.append(message)
+        return _page(results, limit)
+
+
+_message_search_index: Optional[MessageSearchIndex] = None
+
+
+def set_message_search_index(index: Optional[MessageSearchIndex]):
+    """Use this index instead of the Supabase one (None to go back)"""
+    global _message_search_index
+    _message_search_index = index
+
+
+def get_message_search_index(client=None) -> Optional[MessageSearchIndex]:
+    """The index set with set_message_search_index(), else the Supabase one for client"""
+    if _message_search_index is not None:
+        return _message_search_index
+    if client is None:
+        return None
+    return SupabaseMessageSearchIndex(client)
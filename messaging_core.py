@@ -5,6 +5,8 @@ Real-time messaging with Supabase backend
 Features:
 - Channels (group chats)
 - Direct messages (1-on-1)
+- Conversation index (inbox = one indexed query, see conversation_index.py)
+- Ranked full-text message search (see message_search.py)
 - Real-time updates
 - File attachments
 - Message reactions
@@ -18,6 +20,9 @@ from datetime import datetime
 from typing import List, Dict, Optional
 import uuid
 
+from conversation_index import get_conversation_index
+from message_search import get_message_search_index, DEFAULT_SEARCH_LIMIT
+
 # Import Supabase client
 try:
     from supabase_client import get_supabase_client
@@ -101,6 +106,9 @@ def send_channel_message(channel_id: str, sender_email: str, sender_name: str, c
         
         response = supabase.table('messages').insert(message_data).execute()
         
+        if response.data:
+            index_sent_message('channel', response.data[0])
+        
         # Create notifications for mentions
         if mentions and response.data:
             message_id = response.data[0]['id']
@@ -210,8 +218,15 @@ def send_direct_message(sender_email: str, sender_name: str, recipient_email: st
         
         response = supabase.table('direct_messages').insert(dm_data).execute()
         
+        # Update both users' conversation summaries
+        try:
+            get_conversation_index(supabase).record_message(dm_data)
+        except Exception as e:
+            print(f"⚠️ Conversation index update failed ({conversation_id}): {e}")
+        
         # Create notification for recipient
         if response.data:
+            index_sent_message('dm', response.data[0])
             dm_id = response.data[0]['id']
             create_dm_notification(dm_id, recipient_email)
         
@@ -222,7 +237,26 @@ def send_direct_message(sender_email: str, sender_name: str, recipient_email: st
 
 
 def get_conversations(user_email: str) -> List[Dict]:
-    """Get all conversations for a user"""
+    """
+    Get all conversations for a user, most recent first
+    
+    Each has other_email/other_name, last_message, last_message_time,
+    unread_count and unread (unread_count > 0).
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return []
+    
+    try:
+        return get_conversation_index(supabase).list_conversations(user_email)
+    except Exception as e:
+        # dm_conversations not set up yet (ADD_DM_CONVERSATION_INDEX.sql)
+        print(f"⚠️ Conversation index unavailable ({e}) - scanning recent messages")
+        return scan_conversations(user_email)
+
+
+def scan_conversations(user_email: str) -> List[Dict]:
+    """Conversations found in the latest 500 DMs (used until the index exists)"""
     supabase = get_supabase_client()
     if not supabase:
         return []
@@ -278,13 +312,21 @@ def mark_dm_as_read(dm_id: str) -> bool:
         return False
     
     try:
-        supabase.table('direct_messages')\
+        # Only an unread message is updated, so it leaves the unread count once
+        response = supabase.table('direct_messages')\
             .update({'read_at': datetime.now().isoformat()})\
             .eq('id', dm_id)\
+            .is_('read_at', 'null')\
             .execute()
-        return True
     except:
         return False
+    
+    for dm in response.data or []:
+        try:
+            get_conversation_index(supabase).mark_read(dm['recipient_email'], dm['conversation_id'])
+        except Exception as e:
+            print(f"⚠️ Conversation index update failed ({dm.get('conversation_id')}): {e}")
+    return True
 
 
 # ============================================
@@ -492,8 +534,56 @@ def generate_conversation_id(email1: str, email2: str) -> str:
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{emails[0]}_{emails[1]}"))
 
 
-def search_messages(user_email: str, query: str, channel_id: str = None) -> List[Dict]:
-    """Search messages"""
+def index_sent_message(source: str, message: Dict):
+    """Add a sent message to the search index ('channel' or 'dm')"""
+    try:
+        get_message_search_index(get_supabase_client()).index_message(source, message)
+    except Exception as e:
+        print(f"⚠️ Message search index update failed ({message.get('id')}): {e}")
+
+
+def search_messages_page(user_email: str, query: str, channel_id: str = None, include_dms: bool = True,
+                         limit: int = DEFAULT_SEARCH_LIMIT, cursor: str = None) -> Dict:
+    """
+    Ranked search of the messages a user can see
+    
+    Args:
+        user_email: Searching user - only their channels and DMs are searched
+        query: Search words
+        channel_id: Only this channel (no DMs)
+        include_dms: Also search the user's DMs
+        limit: Results per page
+        cursor: next_cursor from the previous page
+    
+    Returns:
+        {'results': [message + source, search_rank, highlight], 'next_cursor'}
+    """
+    supabase = get_supabase_client()
+    if not supabase or not query or not query.strip():
+        return {'results': [], 'next_cursor': None}
+    
+    index = get_message_search_index(supabase)
+    member_channel_ids = None
+    if not index.checks_membership:
+        member_channel_ids = [c['id'] for c in get_user_channels(user_email)]
+    
+    return index.search(user_email, query, channel_id=channel_id, include_dms=include_dms,
+                        limit=limit, cursor=cursor, member_channel_ids=member_channel_ids)
+
+
+def search_messages(user_email: str, query: str, channel_id: str = None,
+                    limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict]:
+    """Search messages (best matches first - see search_messages_page)"""
+    try:
+        return search_messages_page(user_email, query, channel_id=channel_id, limit=limit)['results']
+    except Exception as e:
+        # search_messages_ranked not set up yet (ADD_MESSAGE_SEARCH_INDEX.sql)
+        print(f"⚠️ Message search index unavailable ({e}) - scanning messages")
+        return scan_messages(user_email, query, channel_id)
+
+
+def scan_messages(user_email: str, query: str, channel_id: str = None) -> List[Dict]:
+    """Unranked ilike search of channel messages (used until the index exists)"""
     supabase = get_supabase_client()
     if not supabase:
         return []
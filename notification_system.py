@@ -10,6 +10,7 @@ FEATURES:
 - Priority levels (info, warning, urgent)
 - User preferences (email on/off)
 - Auto-clear old notifications
+- Indexed SQLite store with a per-user unread counter (O(1) badge)
 
 TYPES:
 - System alerts
@@ -24,6 +25,8 @@ TYPES:
 from datetime import datetime, timedelta
 import json
 import os
+import sqlite3
+import threading
 from typing import List, Dict, Optional
 
 # Notification types
@@ -137,29 +140,198 @@ def create_notification(user_email: str, title: str, message: str,
     return notification
 
 
-def save_notification(notification: Notification):
-    """Save notification to database"""
+# ============================================
+# NOTIFICATION STORE
+# ============================================
+
+NOTIFICATIONS_DIR = 'data/notifications'
+NOTIFICATIONS_DB = os.path.join(NOTIFICATIONS_DIR, 'notifications.db')
+LEGACY_NOTIFICATIONS_FILE = os.path.join(NOTIFICATIONS_DIR, 'all_notifications.json')
+
+
+def _created_ts(created_at) -> Optional[float]:
+    """Sortable timestamp of an ISO created_at (None if it can't be parsed)"""
     try:
-        # Load existing notifications
-        notifications = load_all_notifications()
+        return datetime.fromisoformat(created_at).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class NotificationStore:
+    """
+    Notifications in an indexed SQLite table
+    
+    Each user's unread count is kept in its own row, updated in the same
+    transaction as the notification, so the sidebar badge is one key lookup.
+    Mark-all-read and TTL cleanup are single indexed statements.
+    """
+    
+    def __init__(self, db_path: str = NOTIFICATIONS_DB, legacy_file: str = LEGACY_NOTIFICATIONS_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
         
-        # Add or update
-        existing_index = None
-        for i, notif in enumerate(notifications):
-            if notif['id'] == notification.id:
-                existing_index = i
-                break
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         
-        if existing_index is not None:
-            notifications[existing_index] = notification.to_dict()
-        else:
-            notifications.append(notification.to_dict())
+        conn = self._connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS notifications (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                user_email TEXT,
+                priority INTEGER,
+                created_at TEXT,
+                created_ts REAL,
+                read INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications(user_email, read);
+            CREATE INDEX IF NOT EXISTS idx_notifications_created ON notifications(created_ts);
+            CREATE TABLE IF NOT EXISTS unread_counts (
+                user_email TEXT PRIMARY KEY,
+                unread INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+        conn.commit()
+        self._import_legacy(legacy_file)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened once, reused)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            self._local.conn = conn
+        return conn
+    
+    def _import_legacy(self, legacy_file: str):
+        """Copy the old all_notifications.json in, once"""
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM store_meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        try:
+            with open(legacy_file, 'r') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            legacy = []
         
-        # Save to file
-        os.makedirs('data/notifications', exist_ok=True)
-        with open('data/notifications/all_notifications.json', 'w') as f:
-            json.dump(notifications, f, indent=2)
+        with conn:
+            for notif in legacy:
+                self._upsert(conn, notif)
+            conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('legacy_imported', ?)",
+                         (datetime.now().isoformat(),))
+        if legacy:
+            print(f"📥 Imported {len(legacy)} notifications from {legacy_file}")
+    
+    def _count(self, conn: sqlite3.Connection, user_email, delta: int):
+        if delta:
+            conn.execute('''INSERT INTO unread_counts (user_email, unread) VALUES (?, ?)
+                            ON CONFLICT(user_email) DO UPDATE SET unread = unread + excluded.unread''',
+                         (user_email, delta))
+    
+    def _upsert(self, conn: sqlite3.Connection, notif: Dict):
+        old = conn.execute('SELECT user_email, read FROM notifications WHERE id = ?', (notif['id'],)).fetchone()
+        if old:
+            old_user, old_read = old
+            self._count(conn, old_user, -1 if not old_read else 0)
+            conn.execute('''UPDATE notifications SET user_email = ?, priority = ?, created_at = ?, created_ts = ?,
+                                read = ?, data = ? WHERE id = ?''',
+                         (notif.get('user_email'), notif.get('priority'), notif.get('created_at'),
+                          _created_ts(notif.get('created_at')), bool(notif.get('read')), json.dumps(notif), notif['id']))
+        else:
+            conn.execute('''INSERT INTO notifications (id, user_email, priority, created_at, created_ts, read, data)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                         (notif['id'], notif.get('user_email'), notif.get('priority'), notif.get('created_at'),
+                          _created_ts(notif.get('created_at')), bool(notif.get('read')), json.dumps(notif)))
+        self._count(conn, notif.get('user_email'), 0 if notif.get('read') else 1)
+    
+    def save(self, notif: Dict):
+        """Add a notification, or replace the one with the same id"""
+        conn = self._connection()
+        with conn:
+            self._upsert(conn, notif)
+    
+    def all(self) -> List[Dict]:
+        """Every notification, oldest first"""
+        rows = self._connection().execute('SELECT data FROM notifications ORDER BY seq')
+        return [json.loads(data) for data, in rows]
+    
+    def for_user(self, user_email: str, unread_only: bool = False) -> List[Dict]:
+        """One user's notifications, oldest first"""
+        sql = 'SELECT data FROM notifications WHERE user_email = ?'
+        if unread_only:
+            sql += ' AND read = 0'
+        rows = self._connection().execute(sql + ' ORDER BY seq', (user_email,))
+        return [json.loads(data) for data, in rows]
+    
+    def unread_count(self, user_email: str) -> int:
+        row = self._connection().execute(
+            'SELECT unread FROM unread_counts WHERE user_email = ?', (user_email,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def _set_read(self, conn: sqlite3.Connection, where: str, params: tuple) -> int:
+        '''Mark matching unread notifications read; returns how many'''
+        rows = conn.execute(f'SELECT seq, user_email, data FROM notifications WHERE read = 0 AND {where}',
+                            params).fetchall()
+        for seq, user_email, data in rows:
+            notif = json.loads(data)
+            notif['read'] = True
+            conn.execute('UPDATE notifications SET read = 1, data = ? WHERE seq = ?', (json.dumps(notif), seq))
+            self._count(conn, user_email, -1)
+        return len(rows)
+    
+    def mark_read(self, notification_id: str):
+        conn = self._connection()
+        with conn:
+            self._set_read(conn, 'id = ?', (notification_id,))
     
+    def mark_all_read(self, user_email: str) -> int:
+        conn = self._connection()
+        with conn:
+            return self._set_read(conn, 'user_email = ?', (user_email,))
+    
+    def _delete(self, conn: sqlite3.Connection, where: str, params: tuple) -> int:
+        for user_email, unread in conn.execute(
+                f'SELECT user_email, COUNT(*) FROM notifications WHERE read = 0 AND {where} GROUP BY user_email',
+                params).fetchall():
+            self._count(conn, user_email, -unread)
+        return conn.execute(f'DELETE FROM notifications WHERE {where}', params).rowcount
+    
+    def delete(self, notification_id: str) -> int:
+        conn = self._connection()
+        with conn:
+            return self._delete(conn, 'id = ?', (notification_id,))
+    
+    def delete_older_than(self, cutoff: datetime) -> int:
+        """Delete notifications created at or before cutoff"""
+        conn = self._connection()
+        with conn:
+            return self._delete(conn, 'created_ts <= ?', (cutoff.timestamp(),))
+
+
+_notification_store: Optional[NotificationStore] = None
+_notification_store_lock = threading.Lock()
+
+
+def get_notification_store() -> NotificationStore:
+    """Shared NotificationStore (created on first use)"""
+    global _notification_store
+    if _notification_store is None:
+        with _notification_store_lock:
+            if _notification_store is None:
+                _notification_store = NotificationStore()
+    return _notification_store
+
+
+def save_notification(notification: Notification):
+    """Save notification to database"""
+    try:
+        get_notification_store().save(notification.to_dict())
     except Exception as e:
         print(f"Error saving notification: {e}")
 
@@ -167,26 +339,17 @@ def save_notification(notification: Notification):
 def load_all_notifications() -> List[dict]:
     """Load all notifications"""
     try:
-        with open('data/notifications/all_notifications.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+        return get_notification_store().all()
     except Exception:
         return []
 
 
 def get_user_notifications(user_email: str, unread_only: bool = False) -> List[Notification]:
     """Get notifications for a specific user"""
-    all_notifs = load_all_notifications()
-    
     user_notifs = [
-        Notification(n) for n in all_notifs 
-        if n['user_email'] == user_email
+        Notification(n) for n in get_notification_store().for_user(user_email, unread_only)
     ]
     
-    if unread_only:
-        user_notifs = [n for n in user_notifs if not n.read]
-    
     # Sort by priority (urgent first) then date (newest first)
     user_notifs.sort(key=lambda x: (-x.priority, x.created_at), reverse=True)
     
@@ -194,69 +357,30 @@ def get_user_notifications(user_email: str, unread_only: bool = False) -> List[N
 
 
 def get_unread_count(user_email: str) -> int:
-    """Get count of unread notifications"""
-    unread = get_user_notifications(user_email, unread_only=True)
-    return len(unread)
+    """Get count of unread notifications (maintained counter - no scan)"""
+    return get_notification_store().unread_count(user_email)
 
 
 def mark_as_read(notification_id: str):
     """Mark notification as read"""
-    all_notifs = load_all_notifications()
-    
-    for notif in all_notifs:
-        if notif['id'] == notification_id:
-            notif['read'] = True
-            break
-    
-    # Save
-    os.makedirs('data/notifications', exist_ok=True)
-    with open('data/notifications/all_notifications.json', 'w') as f:
-        json.dump(all_notifs, f, indent=2)
+    get_notification_store().mark_read(notification_id)
 
 
 def mark_all_as_read(user_email: str):
     """Mark all user's notifications as read"""
-    all_notifs = load_all_notifications()
-    
-    for notif in all_notifs:
-        if notif['user_email'] == user_email:
-            notif['read'] = True
-    
-    # Save
-    os.makedirs('data/notifications', exist_ok=True)
-    with open('data/notifications/all_notifications.json', 'w') as f:
-        json.dump(all_notifs, f, indent=2)
+    get_notification_store().mark_all_read(user_email)
 
 
 def delete_notification(notification_id: str):
     """Delete a notification"""
-    all_notifs = load_all_notifications()
-    
-    all_notifs = [n for n in all_notifs if n['id'] != notification_id]
-    
-    # Save
-    os.makedirs('data/notifications', exist_ok=True)
-    with open('data/notifications/all_notifications.json', 'w') as f:
-        json.dump(all_notifs, f, indent=2)
+    get_notification_store().delete(notification_id)
 
 
 def cleanup_old_notifications(days: int = 30):
     """Delete notifications older than X days"""
-    all_notifs = load_all_notifications()
-    
     cutoff_date = datetime.now() - timedelta(days=days)
     
-    cleaned_notifs = [
-        n for n in all_notifs
-        if datetime.fromisoformat(n['created_at']) > cutoff_date
-    ]
-    
-    # Save
-    os.makedirs('data/notifications', exist_ok=True)
-    with open('data/notifications/all_notifications.json', 'w') as f:
-        json.dump(cleaned_notifs, f, indent=2)
-    
-    return len(all_notifs) - len(cleaned_notifs)
+    return get_notification_store().delete_older_than(cutoff_date)
 
 
 # ============================================
@@ -20,6 +20,7 @@ from universal_crud import (
     create_record, read_all_records, read_record_by_id,
     update_record, delete_record, search_records, export_to_csv
 )
+from record_store import get_record_store
 
 
 
@@ -145,72 +146,48 @@ def load_all_students():
     
     return students
 
+def load_student_collection(module_name, student_email):
+    """A student's data for one module, from the shared record store
+    (where universal_crud and universal_data_persistence save it)"""
+    email_safe = student_email.replace('@', '_at_').replace('.', '_')
+    try:
+        return get_record_store().load(f"{module_name}_{email_safe}", [])
+    except Exception:
+        return []
+
 def load_student_patients(student_email):
     """Load a specific student's patient data"""
-    email_safe = student_email.replace('@', '_at_').replace('.', '_')
-    db_file = f"data/patients_{email_safe}.json"
-    
-    if os.path.exists(db_file):
-        try:
-            with open(db_file, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    return load_student_collection('patients', student_email)
 
 def load_student_validations(student_email):
     """Load a specific student's validation history"""
-    email_safe = student_email.replace('@', '_at_').replace('.', '_')
-    history_file = f"data/validation_history_{email_safe}.json"
-    
-    if os.path.exists(history_file):
-        try:
-            with open(history_file, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    return load_student_collection('validation_history', student_email)
 
 def load_student_module_activity(student_email):
     """Load ALL module usage by student"""
-    email_safe = student_email.replace('@', '_at_').replace('.', '_')
-    activity_file = f"data/module_activity_{email_safe}.json"
-    
-    if os.path.exists(activity_file):
-        try:
-            with open(activity_file, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    return load_student_collection('module_activity', student_email)
 
 def get_all_student_data_files(student_email):
-    """Find all data files for a student across ALL modules"""
-    email_safe = student_email.replace('@', '_at_').replace('.', '_')
+    """Find all data saved by a student across ALL modules"""
     student_files = {}
     
-    # Check for various data files
-    possible_files = {
-        'PTL Patients': f"data/patients_{email_safe}.json",
-        'Validations': f"data/validation_history_{email_safe}.json",
-        'DNA Cases': f"data/dna_cases_{email_safe}.json",
-        'Cancellations': f"data/cancellations_{email_safe}.json",
-        'Patient Choice': f"data/patient_choice_{email_safe}.json",
-        'Transfers': f"data/transfers_{email_safe}.json",
-        'Clinical Exceptions': f"data/exceptions_{email_safe}.json",
-        'Capacity Plans': f"data/capacity_{email_safe}.json",
-        'Module Activity': f"data/module_activity_{email_safe}.json"
+    # Check for various module collections
+    modules = {
+        'PTL Patients': 'patients',
+        'Validations': 'validation_history',
+        'DNA Cases': 'dna_cases',
+        'Cancellations': 'cancellations',
+        'Patient Choice': 'patient_choice',
+        'Transfers': 'transfers',
+        'Clinical Exceptions': 'exceptions',
+        'Capacity Plans': 'capacity',
+        'Module Activity': 'module_activity'
     }
     
-    for module_name, filepath in possible_files.items():
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                    if data:  # Only include if has data
-                        student_files[module_name] = data
-            except:
-                continue
+    for label, module_name in modules.items():
+        data = load_student_collection(module_name, student_email)
+        if data:  # Only include if has data
+            student_files[label] = data
     
     return student_files
 
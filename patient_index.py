@@ -0,0 +1,307 @@
+"""
+T21 Patient Index
+Cross-module master patient index keyed by NHS number
+
+Features:
+- One SQLite table mapping normalised NHS number -> record id in each module
+  (PTL patient, cancer pathway, MDT meeting, appointment)
+- Only ids, NHS numbers, owner and position are stored - no clinical data;
+  records are read from the modules themselves, and only from the modules
+  that hold the patient
+- Kept current by the modules' add/update functions and PTL removal (the
+  cancer, MDT and booking modules have no delete); writes made outside these
+  modules show up at the next per-user rescan
+- Per-user bootstrap from a full scan the first time a user looks up a
+  patient, refreshed after PATIENT_INDEX_MAX_AGE_SECONDS
+- Index failures are logged and never block the module's own write
+  (the hooks below catch everything, so modules import them directly)
+
+Usage:
+    index_patient_record('ptl', patient_id, patient)      # after a save
+    update_patient_record('ptl', patient_id, updates)     # after an update
+    remove_patient_record('ptl', patient_id)              # after a delete
+
+    get_patient_index().lookup('943 476 5919')            # {'ptl': [record ids], ...}
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+PATIENT_INDEX_DB = "patient_index.db"
+
+# Full rescan per user after this long, to pick up writes made elsewhere
+PATIENT_INDEX_MAX_AGE_SECONDS = 24 * 60 * 60
+
+INDEXED_MODULES = ('ptl', 'cancer', 'mdt', 'appointments')
+
+# Field holding each module's record id
+RECORD_ID_FIELDS = {
+    'ptl': ('patient_id',),
+    'cancer': ('pathway_id', 'patient_id'),
+    'mdt': ('meeting_id',),
+    'appointments': ('appointment_id',)
+}
+
+
+def get_current_user_email():
+    """Get current logged-in user's email"""
+    try:
+        import streamlit as st
+        return st.session_state.get('user_email', 'demo@t21services.co.uk')
+    except:
+        return 'demo@t21services.co.uk'
+
+
+def normalize_nhs_number(nhs_number: str) -> str:
+    """Normalize NHS number for comparison (remove spaces, hyphens)"""
+    if not nhs_number:
+        return ""
+    return ''.join(filter(str.isdigit, str(nhs_number)))
+
+
+def record_id_of(module: str, record: Dict) -> Optional[str]:
+    """Record id used as the index key for a module's record"""
+    for field in RECORD_ID_FIELDS[module]:
+        if record.get(field):
+            return str(record[field])
+    return None
+
+
+def record_nhs_numbers(module: str, record: Dict) -> List[str]:
+    """Normalised NHS numbers a record belongs to (an MDT meeting lists several)"""
+    if module == 'mdt':
+        patients = record.get('patients_discussed') or record.get('patients', [])
+        values = [patient.get('nhs_number', '') for patient in patients]
+    else:
+        values = [record.get('nhs_number', '')]
+
+    numbers = []
+    for value in values:
+        nhs = normalize_nhs_number(value)
+        if nhs and nhs not in numbers:
+            numbers.append(nhs)
+    return numbers
+
+
+class PatientIndex:
+    """NHS number -> module records, persisted in SQLite"""
+
+    def __init__(self, db_path: str = PATIENT_INDEX_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        conn = self._connection()
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(patient_refs)')]
+        if 'record' in columns:
+            # Earlier index files kept whole record snapshots - drop them
+            conn.execute('DROP TABLE patient_refs')
+            conn.execute('DROP TABLE IF EXISTS index_builds')
+            conn.commit()
+            conn.execute('VACUUM')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS patient_refs (
+                module TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                nhs_number TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                PRIMARY KEY (module, record_id, nhs_number)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_patient_refs_nhs ON patient_refs(nhs_number)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS index_builds (
+                owner TEXT PRIMARY KEY,
+                built_at REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened once, reused across lookups)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _write_record(self, conn: sqlite3.Connection, module: str, record_id: str,
+                      nhs_numbers: List[str], owner: str, seq: int):
+        """Replace every row of one record (its NHS numbers may have changed)"""
+        conn.execute('DELETE FROM patient_refs WHERE module = ? AND record_id = ?', (module, record_id))
+        conn.executemany(
+            'INSERT INTO patient_refs (module, record_id, nhs_number, owner, seq) VALUES (?, ?, ?, ?, ?)',
+            [(module, record_id, nhs, owner, seq) for nhs in nhs_numbers]
+        )
+
+    def upsert(self, module: str, record_id: str, record: Dict, owner: str = None):
+        """
+        Add or replace one record
+
+        New records go to the end of the module's order; replaced records
+        keep their position and owner.
+        """
+        conn = self._connection()
+        existing = conn.execute(
+            'SELECT owner, seq FROM patient_refs WHERE module = ? AND record_id = ? LIMIT 1',
+            (module, record_id)
+        ).fetchone()
+
+        if existing:
+            owner, seq = existing
+        else:
+            owner = record.get('user_email') or owner or get_current_user_email()
+            seq = conn.execute(
+                'SELECT COALESCE(MAX(seq), -1) + 1 FROM patient_refs WHERE module = ?', (module,)
+            ).fetchone()[0]
+
+        with conn:
+            self._write_record(conn, module, record_id, record_nhs_numbers(module, record), owner, seq)
+
+    def update(self, module: str, record_id: str, updates: Dict) -> bool:
+        """
+        Apply field updates to an indexed record (False if it isn't indexed)
+
+        Only updates that change the record's NHS numbers touch the index.
+        """
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT owner, seq FROM patient_refs WHERE module = ? AND record_id = ? LIMIT 1',
+            (module, record_id)
+        ).fetchone()
+        if not row:
+            return False
+
+        keys = ('patients_discussed', 'patients') if module == 'mdt' else ('nhs_number',)
+        if any(key in updates for key in keys):
+            owner, seq = row
+            with conn:
+                self._write_record(conn, module, record_id, record_nhs_numbers(module, updates), owner, seq)
+        return True
+
+    def remove(self, module: str, record_id: str):
+        """Drop a record from the index"""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM patient_refs WHERE module = ? AND record_id = ?', (module, record_id))
+
+    def rebuild(self, module: str, records: Iterable[Dict], owner: str, everyone: bool = False):
+        """
+        Replace a module's rows with a fresh scan
+
+        Args:
+            module: One of INDEXED_MODULES
+            records: Every record the scan returned, in module order
+            owner: User the scan ran as (owner of records without user_email)
+            everyone: The scan covered all users' records, not just owner's
+        """
+        conn = self._connection()
+        with conn:
+            if everyone:
+                conn.execute('DELETE FROM patient_refs WHERE module = ?', (module,))
+            else:
+                conn.execute('DELETE FROM patient_refs WHERE module = ? AND owner = ?', (module, owner))
+
+            start = conn.execute(
+                'SELECT COALESCE(MAX(seq), -1) + 1 FROM patient_refs WHERE module = ?', (module,)
+            ).fetchone()[0]
+
+            for position, record in enumerate(records):
+                record_id = record_id_of(module, record) or f"#{owner}:{position}"
+                self._write_record(conn, module, record_id, record_nhs_numbers(module, record),
+                                   record.get('user_email') or owner, start + position)
+
+    def is_fresh(self, owner: str) -> bool:
+        """True if owner's scan has been indexed recently enough"""
+        row = self._connection().execute(
+            'SELECT built_at FROM index_builds WHERE owner = ?', (owner,)
+        ).fetchone()
+        return bool(row) and time.time() - row[0] < PATIENT_INDEX_MAX_AGE_SECONDS
+
+    def mark_built(self, owner: str):
+        """Record that owner's scan is now in the index"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO index_builds (owner, built_at) VALUES (?, ?)',
+                (owner, time.time())
+            )
+
+    def invalidate(self, owner: str = None):
+        """Force a rescan on the next lookup (one user, or everyone)"""
+        conn = self._connection()
+        with conn:
+            if owner is None:
+                conn.execute('DELETE FROM index_builds')
+            else:
+                conn.execute('DELETE FROM index_builds WHERE owner = ?', (owner,))
+
+    def lookup(self, nhs_number: str, owners: Dict[str, Optional[str]] = None) -> Dict[str, List[str]]:
+        """
+        Ids of every indexed record for one patient, grouped by module
+
+        Args:
+            nhs_number: NHS number in any format
+            owners: Optional {module: owner} restricting a module to one
+                user's records (None or a missing module = all users)
+
+        Returns:
+            {module: [record ids in module order]} for every indexed module
+            (ids starting with '#' stand for records that have no id field)
+        """
+        found = {module: [] for module in INDEXED_MODULES}
+        nhs = normalize_nhs_number(nhs_number)
+        if not nhs:
+            return found
+
+        owners = owners or {}
+        rows = self._connection().execute(
+            'SELECT module, owner, record_id FROM patient_refs WHERE nhs_number = ? ORDER BY module, seq',
+            (nhs,)
+        ).fetchall()
+
+        for module, owner, record_id in rows:
+            wanted = owners.get(module)
+            if module in found and (wanted is None or wanted == owner):
+                found[module].append(record_id)
+        return found
+
+
+_patient_index: Optional[PatientIndex] = None
+_patient_index_lock = threading.Lock()
+
+
+def get_patient_index() -> PatientIndex:
+    """Shared PatientIndex (created on first use)"""
+    global _patient_index
+    if _patient_index is None:
+        with _patient_index_lock:
+            if _patient_index is None:
+                _patient_index = PatientIndex()
+    return _patient_index
+
+
+def index_patient_record(module: str, record_id: str, record: Dict):
+    """Add or replace a saved record in the patient index"""
+    try:
+        get_patient_index().upsert(module, record_id, record)
+    except Exception as e:
+        print(f"⚠️ Patient index update failed ({module} {record_id}): {e}")
+
+
+def update_patient_record(module: str, record_id: str, updates: Dict):
+    """Apply a saved field update to the patient index"""
+    try:
+        get_patient_index().update(module, record_id, updates)
+    except Exception as e:
+        print(f"⚠️ Patient index update failed ({module} {record_id}): {e}")
+
+
+def remove_patient_record(module: str, record_id: str):
+    """Remove a deleted record from the patient index"""
+    try:
+        get_patient_index().remove(module, record_id)
+    except Exception as e:
+        print(f"⚠️ Patient index update failed ({module} {record_id}): {e}")
@@ -13,17 +13,24 @@ Features:
 - Identity verification tracking
 - GP and next of kin management
 - Episode tracking (consultant, treatment, diagnostic)
+- Ranked, paginated patient search (trigram index online and offline)
 - Integration ready for external PAS systems
 
 For: All NHS staff dealing with patient administration
 """
 
+import heapq
+import itertools
 import json
 import os
+from array import array
+from bisect import bisect_left
 from datetime import datetime, date
 from typing import Optional, Dict, List
 import re
 
+import numpy as np
+
 # Import Supabase for permanent storage
 try:
     from supabase_database import supabase, SUPABASE_AVAILABLE
@@ -264,7 +271,9 @@ def register_patient(
 
 def save_patient_local(patient_data: Dict):
     """Save patient to local JSON file (fallback)"""
-    patients_file = 'patients_registered.json'
+    global _local_search_signature
+    patients_file = PATIENTS_FILE
+    index_current = _local_search_index is not None and _patients_file_signature() == _local_search_signature
     
     if os.path.exists(patients_file):
         with open(patients_file, 'r', encoding='utf-8') as f:
@@ -276,6 +285,11 @@ def save_patient_local(patient_data: Dict):
     
     with open(patients_file, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    
+    # Keep the search index current instead of rebuilding it on next search
+    if index_current:
+        _local_search_index.add(patient_data)
+        _local_search_signature = _patients_file_signature()
 
 
 def get_patient_by_id(patient_id: str) -> Optional[Dict]:
@@ -330,127 +344,296 @@ def get_patient_local(patient_id: str) -> Optional[Dict]:
     return None
 
 
-def search_patients(query: str) -> List[Dict]:
-    """Search patients by name, NHS number, or ID"""
+# ============================================
+# PATIENT SEARCH
+# ============================================
+
+SEARCH_PAGE_SIZE = 50
+
+# Above this many matches, rank with NumPy instead of one row at a time
+BROAD_QUERY_MATCHES = 2000
+RANKING_REBUILD_AFTER = 1000
+PATIENTS_FILE = 'patients_registered.json'
+
+
+def _digits(value) -> str:
+    """Digits of a value (NHS numbers are stored with and without spaces)"""
+    return ''.join(filter(str.isdigit, str(value or '')))
+
+
+def _search_fields(patient: Dict) -> tuple:
+    """Lowercase fields used for matching and ranking a patient"""
+    return (
+        (patient.get('patient_id') or '').lower(),
+        _digits(patient.get('nhs_number')),
+        (patient.get('first_name') or '').lower(),
+        (patient.get('surname') or '').lower(),
+        (patient.get('full_name') or '').lower()
+    )
+
+
+def _search_text(patient: Dict) -> str:
+    """Same combined text as the patients.search_text column"""
+    return '\n'.join([
+        (patient.get('full_name') or '').lower(),
+        (patient.get('first_name') or '').lower(),
+        (patient.get('surname') or '').lower(),
+        (patient.get('patient_id') or '').lower(),
+        (patient.get('nhs_number') or '').lower(),
+        _digits(patient.get('nhs_number'))
+    ])
+
+
+def search_rank(fields: tuple, term: str, digits: str) -> int:
+    """
+    Rank of a matching patient (lower is better), as in search_patients_ranked:
+    0 exact ID/NHS number, 1 first name or surname prefix, 2 in full name, 3 other
+    """
+    patient_id, nhs_digits, first_name, surname, full_name = fields
+    if patient_id == term or (digits and nhs_digits == digits):
+        return 0
+    if first_name.startswith(term) or surname.startswith(term):
+        return 1
+    if term in full_name:
+        return 2
+    return 3
+
+
+class PatientSearchIndex:
+    """Trigram index over local patients for offline type-ahead search"""
+
+    def __init__(self, patients: List[Dict] = None):
+        self.patients: List[Dict] = []
+        self.texts: List[str] = []
+        self.fields: List[tuple] = []
+        self.postings: Dict[str, array] = {}
+        self._tables: Optional[Dict] = None
+        for patient in patients or []:
+            self.add(patient)
+        self._ranking_tables()
+
+    def add(self, patient: Dict):
+        """Index one more patient"""
+        doc_id = len(self.patients)
+        text = _search_text(patient)
+        self.patients.append(patient)
+        self.texts.append(text)
+        self.fields.append(_search_fields(patient))
+        for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            posting = self.postings.get(trigram)
+            if posting is None:
+                posting = self.postings[trigram] = array('i')
+            posting.append(doc_id)
+
+    def _matches(self, term: str) -> List[int]:
+        """Ids of patients whose search text contains term"""
+        texts = self.texts
+        if len(term) < 3:
+            return [doc_id for doc_id, text in enumerate(texts) if term in text]
+
+        # Every match contains every trigram of the term, so the rarest
+        # trigram's posting list holds all matches
+        smallest = None
+        for i in range(len(term) - 2):
+            posting = self.postings.get(term[i:i + 3])
+            if posting is None:
+                return []
+            if smallest is None or len(posting) < len(smallest):
+                smallest = posting
+        return [doc_id for doc_id in smallest if term in texts[doc_id]]
+
+    def _ranking_tables(self) -> Dict:
+        """
+        Name order and name/ID lookups used to rank large result sets
+
+        Built for the patients indexed so far; patients added later are
+        ranked one at a time until there are RANKING_REBUILD_AFTER of them.
+        """
+        if self._tables is None or len(self.patients) - self._tables['count'] > RANKING_REBUILD_AFTER:
+            count = len(self.patients)
+            full_names = [fields[4] for fields in self.fields]
+            order = sorted(range(count), key=lambda doc_id: (full_names[doc_id], self.patients[doc_id].get('patient_id') or ''))
+            positions = np.empty(count, dtype=np.int64)
+            positions[order] = np.arange(count)
+
+            exact: Dict[str, List[int]] = {}
+            for doc_id, fields in enumerate(self.fields):
+                exact.setdefault(fields[0], []).append(doc_id)
+                if fields[1]:
+                    exact.setdefault('#' + fields[1], []).append(doc_id)
+
+            prefixes = []
+            for column in (2, 3):
+                pairs = sorted((fields[column], doc_id) for doc_id, fields in enumerate(self.fields))
+                prefixes.append(([name for name, _ in pairs], np.array([doc_id for _, doc_id in pairs], dtype=np.int64)))
+
+            self._tables = {'count': count, 'positions': positions, 'full_names': full_names, 'exact': exact, 'prefixes': prefixes}
+        return self._tables
+
+    def _sort_key(self, doc_id: int, term: str, digits: str) -> tuple:
+        """(rank, name, patient ID) ordering used for every result list"""
+        fields = self.fields[doc_id]
+        return (search_rank(fields, term, digits), fields[4], self.patients[doc_id].get('patient_id') or '')
+
+    def _top_ranked(self, matches: List[int], term: str, digits: str, count: int) -> List[int]:
+        """Best `count` matches, ranking all tabled patients at once with NumPy"""
+        tables = self._ranking_tables()
+        tabled = tables['count']
+        rank = np.full(tabled, 4, dtype=np.int64)  # 4 = not a match
+        head = [doc_id for doc_id in matches if doc_id < tabled]
+        rank[np.asarray(head, dtype=np.int64)] = 3
+        rank[[doc_id for doc_id, name in enumerate(tables['full_names']) if term in name]] = 2
+        for names, doc_ids in tables['prefixes']:
+            rank[doc_ids[bisect_left(names, term):bisect_left(names, term + '\U0010ffff')]] = 1
+        exact = tables['exact'].get(term, []) + (tables['exact'].get('#' + digits, []) if digits else [])
+        for doc_id in exact:
+            if rank[doc_id] < 4:
+                rank[doc_id] = 0
+
+        matched = np.flatnonzero(rank < 4)
+        keys = rank[matched] * tabled + tables['positions'][matched]
+        if len(keys) > count:
+            best = np.argpartition(keys, count - 1)[:count]
+            matched, keys = matched[best], keys[best]
+        top = matched[np.argsort(keys)].tolist()
+
+        # Patients added since the tables were built
+        tail = [doc_id for doc_id in matches if doc_id >= tabled]
+        if tail:
+            ranked = heapq.merge(((self._sort_key(doc_id, term, digits), doc_id) for doc_id in top),
+                                 sorted((self._sort_key(doc_id, term, digits), doc_id) for doc_id in tail))
+            top = [doc_id for _, doc_id in itertools.islice(ranked, count)]
+        return top
+
+    def search(self, query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0) -> Dict:
+        """One ranked page of matches plus the total number of matches"""
+        term = query.strip().lower()
+        digits = _digits(query)
+        matches = self._matches(term)
+
+        if len(matches) > BROAD_QUERY_MATCHES:
+            top = self._top_ranked(matches, term, digits, offset + limit)[offset:]
+        else:
+            keyed = [(self._sort_key(doc_id, term, digits), doc_id) for doc_id in matches]
+            top = [doc_id for _, doc_id in heapq.nsmallest(offset + limit, keyed)[offset:]]
+
+        return {
+            'patients': [self.patients[doc_id] for doc_id in top],
+            'total': len(matches),
+            'limit': limit,
+            'offset': offset,
+            'has_more': offset + len(top) < len(matches),
+            'source': 'local'
+        }
+
+
+_local_search_index: Optional[PatientSearchIndex] = None
+_local_search_signature = None
+
+
+def _patients_file_signature():
+    """(mtime, size) of the local patients file - changes whenever it is rewritten"""
+    try:
+        stat = os.stat(PATIENTS_FILE)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def get_local_search_index() -> PatientSearchIndex:
+    """Search index over the local patients file (rebuilt only when the file changes)"""
+    global _local_search_index, _local_search_signature
+    signature = _patients_file_signature()
+    if _local_search_index is None or signature != _local_search_signature:
+        _local_search_index = PatientSearchIndex(get_all_patients_local())
+        _local_search_signature = signature
+    return _local_search_index
+
+
+def _search_patients_supabase(query: str, limit: int, offset: int) -> Dict:
+    """Ranked page from search_patients_ranked (ADD_PATIENT_SEARCH_INDEX.sql)"""
     user_email = get_current_user_email()
+    try:
+        result = supabase.rpc('search_patients_ranked', {
+            'p_user_email': user_email,
+            'p_query': query,
+            'p_limit': limit,
+            'p_offset': offset
+        }).execute()
+        rows = result.data or []
+        total = rows[0]['total_count'] if rows else 0
+        if not rows and offset:
+            # Past the last page - total_count comes back with rows only
+            total = _search_patients_supabase(query, 1, 0)['total']
+        return {
+            'patients': [row['patient'] for row in rows],
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'has_more': offset + len(rows) < total,
+            'source': 'supabase'
+        }
+    except Exception as e:
+        print(f"⚠️ search_patients_ranked unavailable ({e}) - using single filtered query")
+
+    # Function not installed yet: one OR query over the same fields, ordered
+    # by name (ranking applied within the page only)
+    term = re.sub(r'[,()"*%]', ' ', query).strip()
+    fields = ['full_name', 'first_name', 'surname', 'patient_id', 'nhs_number']
+    result = supabase.table('patients')\
+        .select('*', count='exact')\
+        .eq('user_email', user_email)\
+        .or_(','.join(f'{field}.ilike.*{term}*' for field in fields))\
+        .order('full_name')\
+        .range(offset, offset + limit - 1)\
+        .execute()
+
+    rows = result.data or []
+    total = result.count if result.count is not None else len(rows)
+    term_lower, digits = query.strip().lower(), _digits(query)
+    rows.sort(key=lambda p: search_rank(_search_fields(p), term_lower, digits))
+    return {
+        'patients': rows,
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'has_more': offset + len(rows) < total,
+        'source': 'supabase'
+    }
+
+
+def search_patients_page(query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0) -> Dict:
+    """
+    Search patients by name, NHS number or patient ID - one ranked page
+    
+    Online this is a single call to the search_patients_ranked function;
+    offline it uses the local trigram index.
     
+    Returns:
+        {'patients': [...], 'total': int, 'limit', 'offset', 'has_more', 'source'}
+    """
     if SUPABASE_ENABLED:
         try:
-            # Try multiple search strategies
-            results = []
-            
-            # Strategy 1: Search by full_name
-            result = supabase.table('patients')\
-                .select('*')\
-                .eq('user_email', user_email)\
-                .ilike('full_name', f'%{query}%')\
-                .execute()
-            
-            if result.data:
-                results.extend(result.data)
-            
-            # Strategy 2: Search by first_name
-            result = supabase.table('patients')\
-                .select('*')\
-                .eq('user_email', user_email)\
-                .ilike('first_name', f'%{query}%')\
-                .execute()
-            
-            if result.data:
-                for patient in result.data:
-                    if patient not in results:
-                        results.append(patient)
-            
-            # Strategy 3: Search by surname
-            result = supabase.table('patients')\
-                .select('*')\
-                .eq('user_email', user_email)\
-                .ilike('surname', f'%{query}%')\
-                .execute()
-            
-            if result.data:
-                for patient in result.data:
-                    if patient not in results:
-                        results.append(patient)
-            
-            # Strategy 4: Search by patient_id
-            result = supabase.table('patients')\
-                .select('*')\
-                .eq('user_email', user_email)\
-                .ilike('patient_id', f'%{query}%')\
-                .execute()
-            
-            if result.data:
-                for patient in result.data:
-                    if patient not in results:
-                        results.append(patient)
-            
-            # Strategy 5: Search by NHS number (if not None)
-            if query:
-                result = supabase.table('patients')\
-                    .select('*')\
-                    .eq('user_email', user_email)\
-                    .ilike('nhs_number', f'%{query}%')\
-                    .execute()
-                
-                if result.data:
-                    for patient in result.data:
-                        if patient not in results:
-                            results.append(patient)
-            
-            print(f"🔍 Search for '{query}' found {len(results)} patients")
-            return results
-            
+            page = _search_patients_supabase(query, limit, offset)
+            print(f"🔍 Search for '{query}' found {page['total']} patients")
+            return page
         except Exception as e:
             print(f"❌ Error searching patients: {e}")
-            # Fallback: Get all patients and filter locally
-            try:
-                all_result = supabase.table('patients')\
-                    .select('*')\
-                    .eq('user_email', user_email)\
-                    .execute()
-                
-                if all_result.data:
-                    query_lower = query.lower()
-                    filtered = [
-                        p for p in all_result.data
-                        if query_lower in p.get('full_name', '').lower() or
-                           query_lower in p.get('first_name', '').lower() or
-                           query_lower in p.get('surname', '').lower() or
-                           query_lower in p.get('patient_id', '').lower() or
-                           query_lower in (p.get('nhs_number') or '').lower()
-                    ]
-                    print(f"🔍 Fallback search found {len(filtered)} patients")
-                    return filtered
-            except Exception as e2:
-                print(f"❌ Fallback search failed: {e2}")
-            
-            return []
+            return {'patients': [], 'total': 0, 'limit': limit, 'offset': offset,
+                    'has_more': False, 'source': 'supabase'}
     else:
         # Fallback to local storage
-        return search_patients_local(query)
+        return get_local_search_index().search(query, limit, offset)
+
+
+def search_patients(query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0) -> List[Dict]:
+    """Search patients by name, NHS number, or ID (best matches first)"""
+    return search_patients_page(query, limit, offset)['patients']
 
 
-def search_patients_local(query: str) -> List[Dict]:
+def search_patients_local(query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0) -> List[Dict]:
     """Search patients in local storage"""
-    patients_file = 'patients_registered.json'
-    
-    if not os.path.exists(patients_file):
-        return []
-    
-    with open(patients_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    query_lower = query.lower()
-    results = []
-    
-    for patient in data.get('patients', []):
-        if (query_lower in patient.get('full_name', '').lower() or
-            query_lower in patient.get('nhs_number', '').lower() or
-            query_lower in patient.get('patient_id', '').lower()):
-            results.append(patient)
-    
-    return results
+    return get_local_search_index().search(query, limit, offset)['patients']
 
 
 def get_all_patients() -> List[Dict]:
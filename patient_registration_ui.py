@@ -17,7 +17,7 @@ from patient_registration_system import (
     validate_nhs_number,
     generate_temporary_id,
     get_patient_by_id,
-    search_patients,
+    search_patients_page,
     get_all_patients,
     get_registration_stats,
     update_patient,
@@ -373,10 +373,14 @@ def render_search_patients():
     
     if search_query:
         with st.spinner("Searching..."):
-            results = search_patients(search_query)
+            page = search_patients_page(search_query)
+        results = page['patients']
         
         if results:
-            st.success(f"✅ Found {len(results)} patient(s)")
+            if page['has_more']:
+                st.success(f"✅ Found {page['total']} patient(s) - showing the best {len(results)} matches")
+            else:
+                st.success(f"✅ Found {page['total']} patient(s)")
             
             for patient in results:
                 with st.expander(f"👤 {patient.get('full_name', 'Unknown')} - {patient.get('patient_id', 'N/A')}"):
@@ -13,7 +13,29 @@ For: All modules that need patient selection
 """
 
 import streamlit as st
-from patient_registration_system import search_patients, get_all_patients
+from patient_registration_system import search_patients_page, get_all_patients, SEARCH_PAGE_SIZE
+
+
+def search_patients_paged(search_query: str, key_prefix: str) -> dict:
+    """
+    Best matches for a query, one more page each time 'Show more' is clicked
+    (see render_show_more); starts again at one page when the query changes
+    """
+    limit_key = f"{key_prefix}_search_limit"
+    if st.session_state.get(f"{key_prefix}_search_for") != search_query:
+        st.session_state[f"{key_prefix}_search_for"] = search_query
+        st.session_state[limit_key] = SEARCH_PAGE_SIZE
+    return search_patients_page(search_query, limit=st.session_state[limit_key])
+
+
+def render_show_more(page: dict, key_prefix: str):
+    """'Showing N of M' notice and a button for the next page, if there are more matches"""
+    if not page['has_more']:
+        return
+    st.caption(f"Showing the best {len(page['patients'])} of {page['total']} matches")
+    if st.button("⬇️ Show more", key=f"{key_prefix}_show_more"):
+        st.session_state[f"{key_prefix}_search_limit"] += SEARCH_PAGE_SIZE
+        st.rerun()
 
 
 def render_patient_selector(key_prefix: str = "patient_selector") -> dict:
@@ -53,8 +75,9 @@ def render_patient_selector(key_prefix: str = "patient_selector") -> dict:
         # Search patients
         st.write(f"🔍 Searching for: **{search_query}**")
         with st.spinner("Searching database..."):
-            results = search_patients(search_query)
-        st.write(f"📊 Database returned: **{len(results)}** results")
+            page = search_patients_paged(search_query, key_prefix)
+        results = page['patients']
+        st.write(f"📊 Database returned: **{page['total']}** results")
         
         # If no results from search, try getting ALL patients and filter locally
         if not results:
@@ -94,6 +117,9 @@ def render_patient_selector(key_prefix: str = "patient_selector") -> dict:
                     st.rerun()
             
             st.markdown("---")
+
+        if search_query and not show_all:
+            render_show_more(page, key_prefix)
     
     elif search_query and not show_all:
         st.warning("⚠️ No patients found. Try different search terms or click 'Show All'.")
@@ -4,7 +4,7 @@ Improves platform speed and responsiveness
 
 Features:
 - Data caching for faster page loads
-- Pagination for large datasets
+- Pagination for large datasets (in memory, or paged in the database)
 - Query optimization
 - Lazy loading
 - Session state management
@@ -103,6 +103,10 @@ class Paginator:
         end_idx = start_idx + self.items_per_page
         return self.data[start_idx:end_idx]
     
+    def _go_to(self, page: int, action: str):
+        """Move to a page (action: 'first', 'previous', 'next' or 'last')"""
+        st.session_state[f"page_{self.key}"] = page
+    
     def render_controls(self):
         """Render pagination controls"""
         current_page = st.session_state[f"page_{self.key}"]
@@ -111,12 +115,12 @@ class Paginator:
         
         with col1:
             if st.button("⏮️ First", key=f"first_{self.key}", disabled=(current_page == 1)):
-                st.session_state[f"page_{self.key}"] = 1
+                self._go_to(1, 'first')
                 st.rerun()
         
         with col2:
             if st.button("◀️ Previous", key=f"prev_{self.key}", disabled=(current_page == 1)):
-                st.session_state[f"page_{self.key}"] = max(1, current_page - 1)
+                self._go_to(max(1, current_page - 1), 'previous')
                 st.rerun()
         
         with col3:
@@ -124,15 +128,92 @@ class Paginator:
         
         with col4:
             if st.button("▶️ Next", key=f"next_{self.key}", disabled=(current_page >= self.total_pages)):
-                st.session_state[f"page_{self.key}"] = min(self.total_pages, current_page + 1)
+                self._go_to(min(self.total_pages, current_page + 1), 'next')
                 st.rerun()
         
         with col5:
             if st.button("⏭️ Last", key=f"last_{self.key}", disabled=(current_page >= self.total_pages)):
-                st.session_state[f"page_{self.key}"] = self.total_pages
+                self._go_to(self.total_pages, 'last')
                 st.rerun()
 
 
+class QueryPaginator(Paginator):
+    """
+    Paginate a Supabase table without downloading it
+    
+    Each render fetches only the current page (keyset cursors, selected
+    columns, filters applied in the database) plus one row count.
+    
+    Usage:
+        paginator = QueryPaginator('ptl_patients', filters={'user_email': email},
+                                   columns=['patient_id', 'patient_name', 'specialty'],
+                                   key="ptl")
+        current_page_data = paginator.get_current_page()
+        paginator.render_controls()
+    """
+    
+    def __init__(self, table: str, columns: Any = '*', filters: Any = None,
+                 order_by: str = 'created_at', descending: bool = False,
+                 items_per_page: int = 25, key: str = "default", key_column: str = 'id'):
+        from supabase_database import count_rows
+        
+        self.table = table
+        self.query = {
+            'columns': columns,
+            'filters': filters,
+            'order_by': order_by,
+            'descending': descending,
+            'key_column': key_column
+        }
+        super().__init__([], items_per_page=items_per_page, key=key)
+        
+        self.total_items = count_rows(table, filters, key_column=key_column)
+        self.total_pages = max(1, (self.total_items + items_per_page - 1) // items_per_page)
+        
+        if f"pagenav_{key}" not in st.session_state:
+            st.session_state[f"pagenav_{key}"] = {}
+        
+        # Rows may have been deleted since the page was chosen
+        if st.session_state[f"page_{key}"] > self.total_pages:
+            self._go_to(1, 'first')
+    
+    def _go_to(self, page: int, action: str):
+        """Remember how to fetch the new page (cursor from the page on screen)"""
+        bounds = st.session_state.get(f"pagebounds_{self.key}", {})
+        if action == 'next' and bounds.get('last'):
+            nav = {'after': bounds['last']}
+        elif action == 'previous' and bounds.get('first') and page > 1:
+            nav = {'before': bounds['first']}
+        elif action == 'last' and page > 1:
+            nav = {'last': True}
+        else:
+            nav, page = {}, 1
+        st.session_state[f"page_{self.key}"] = page
+        st.session_state[f"pagenav_{self.key}"] = nav
+    
+    def get_current_page(self) -> List[Any]:
+        """Fetch the current page from the database"""
+        from supabase_database import query_page
+        
+        nav = st.session_state[f"pagenav_{self.key}"]
+        if nav.get('last'):
+            # Last page = the first rows in reverse order, flipped back
+            remainder = self.total_items - (self.total_pages - 1) * self.items_per_page
+            page = query_page(self.table, page_size=remainder or self.items_per_page,
+                              **{**self.query, 'descending': not self.query['descending']})
+            page['rows'].reverse()
+            page['first_cursor'], page['last_cursor'] = page['last_cursor'], page['first_cursor']
+        else:
+            page = query_page(self.table, page_size=self.items_per_page,
+                              after=nav.get('after'), before=nav.get('before'), **self.query)
+        
+        st.session_state[f"pagebounds_{self.key}"] = {
+            'first': page['first_cursor'],
+            'last': page['last_cursor']
+        }
+        return page['rows']
+
+
 # ============================================
 # PERFORMANCE MONITORING
 # ============================================
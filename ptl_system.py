@@ -11,14 +11,20 @@ Features:
 - Export to Excel
 - Real-time updates
 - Color-coded alerts
+- Materialised PTL summary: specialty/priority counts and clock-start
+  buckets kept current by add/update/remove, so stats and breach lists
+  don't reload and re-score every patient on each render
 
 This is the CORE tool NHS RTT coordinators use daily!
 """
 
 import json
 import os
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 # Import Supabase functions for permanent storage
 try:
@@ -26,6 +32,7 @@ try:
         add_ptl_patient,
         get_ptl_patients_for_user,
         get_ptl_patient_by_id,
+        get_ptl_patients_by_ids,
         update_ptl_patient,
         delete_ptl_patient,
         get_ptl_stats_for_user
@@ -35,11 +42,18 @@ except:
     SUPABASE_ENABLED = False
     print("⚠️ Supabase not available - using fallback storage")
 
+# Cross-module patient index (kept current by the add/update/remove functions;
+# the hooks log and swallow index errors, so they never fail a save)
+from patient_index import index_patient_record, update_patient_record, remove_patient_record
+
 
 # Database files (fallback only)
 PTL_DATABASE = "ptl_patients.json"
 PTL_HISTORY = "ptl_history.json"
 
+# Reload the PTL summary after this long, to pick up writes made elsewhere
+PTL_SUMMARY_MAX_AGE_SECONDS = 5 * 60
+
 
 def get_current_user_email():
     """Get current logged-in user's email"""
@@ -206,6 +220,276 @@ def get_breach_status(days_waiting: int, pathway_type: str = "routine") -> Dict:
         }
 
 
+def breach_target_days(pathway_type: str = "routine") -> int:
+    """RTT target in days for a pathway type (as used by get_breach_status)"""
+    return {'routine': 126, '2ww': 14, '62day': 62}.get(pathway_type, 126)
+
+
+def parse_clock_start(clock_start_date: str) -> Optional[datetime]:
+    """Clock start as a datetime (None if it can't be parsed - counts as 0 days)"""
+    try:
+        return datetime.fromisoformat(clock_start_date)
+    except:
+        return None
+
+
+class PTLSummary:
+    """
+    Materialised view of one PTL (a user's, or everyone's for admins)
+
+    Keeps the patient records plus running specialty/priority counts and
+    buckets of patients sharing a pathway target and clock start. Waiting
+    times and breach status only depend on the bucket, so stats and breach
+    lists are worked out once per bucket at read time - they roll forward
+    with the date without touching individual patients.
+    """
+
+    def __init__(self, patients: List[Dict]):
+        self.records: Dict[int, Dict] = {}  # seq -> patient, in PTL order
+        self.seqs_by_id: Dict[str, List[int]] = {}
+        self.specialties: Counter = Counter()
+        self.priorities: Counter = Counter()
+        self.buckets: Dict[Tuple[int, Optional[datetime]], Dict[int, None]] = {}
+        self.built_at = time.time()
+        self._next_seq = 0
+        self._lock = threading.RLock()
+
+        for patient in patients:
+            self.add(patient)
+
+    @staticmethod
+    def _bucket_key(patient: Dict) -> Tuple[int, Optional[datetime]]:
+        return (breach_target_days(patient.get('pathway_type', 'routine')),
+                parse_clock_start(patient.get('clock_start_date')))
+
+    def _count(self, seq: int, patient: Dict, delta: int):
+        """Add (delta=1) or take away (delta=-1) a record from the aggregates"""
+        for counter, field in ((self.specialties, 'specialty'), (self.priorities, 'priority')):
+            counter[patient.get(field)] += delta
+            if counter[patient.get(field)] <= 0:
+                del counter[patient.get(field)]
+
+        key = self._bucket_key(patient)
+        if delta > 0:
+            self.buckets.setdefault(key, {})[seq] = None
+        else:
+            bucket = self.buckets.get(key, {})
+            bucket.pop(seq, None)
+            if not bucket:
+                self.buckets.pop(key, None)
+
+    def add(self, patient: Dict):
+        """Append a new patient"""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self.records[seq] = patient
+            self.seqs_by_id.setdefault(patient.get('patient_id'), []).append(seq)
+            self._count(seq, patient, 1)
+
+    def _owned_seqs(self, patient_id: str, owner: Optional[str]) -> List[int]:
+        """Seqs of a patient's record(s) - only owner's when given (ids are not unique across users)"""
+        seqs = self.seqs_by_id.get(patient_id, [])
+        if owner is None:
+            return list(seqs)
+        return [seq for seq in seqs if self.records[seq].get('user_email') == owner]
+
+    def update(self, patient_id: str, updates: Dict, owner: Optional[str] = None) -> bool:
+        """Merge field updates into a patient's record(s) (False if not on this PTL)"""
+        with self._lock:
+            seqs = self._owned_seqs(patient_id, owner)
+            if not seqs:
+                return False
+            for seq in seqs:
+                self._count(seq, self.records[seq], -1)
+                self.records[seq] = {**self.records[seq], **updates}
+                self._count(seq, self.records[seq], 1)
+            return True
+
+    def remove(self, patient_id: str, owner: Optional[str] = None) -> bool:
+        """Drop a patient's record(s) (False if not on this PTL)"""
+        with self._lock:
+            seqs = self._owned_seqs(patient_id, owner)
+            if not seqs:
+                return False
+            for seq in seqs:
+                self._count(seq, self.records.pop(seq), -1)
+            remaining = [seq for seq in self.seqs_by_id.pop(patient_id) if seq in self.records]
+            if remaining:
+                self.seqs_by_id[patient_id] = remaining
+            return True
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.built_at < PTL_SUMMARY_MAX_AGE_SECONDS
+
+    def _bucket_statuses(self) -> List[Tuple[int, Dict, Dict[int, None]]]:
+        """(days waiting, breach status, seqs) for every bucket, as of now"""
+        now = datetime.now()
+        statuses = []
+        for (target_days, clock_start), seqs in self.buckets.items():
+            try:
+                days = (now - clock_start).days if clock_start else 0
+            except TypeError:  # timezone-aware - calculate_days_waiting gives 0 too
+                days = 0
+            pathway = {126: 'routine', 14: '2ww', 62: '62day'}[target_days]
+            statuses.append((days, get_breach_status(days, pathway), seqs))
+        return statuses
+
+    def stats(self) -> Dict:
+        """Same figures as get_ptl_stats, plus a weeks-waiting histogram"""
+        with self._lock:
+            stats = {
+                'total_patients': len(self.records),
+                'specialties': {},
+                'priorities': {},
+                'breach_risks': {
+                    'CRITICAL': 0,
+                    'HIGH': 0,
+                    'MEDIUM': 0,
+                    'LOW': 0
+                },
+                'avg_weeks_waiting': 0,
+                'longest_wait_weeks': 0,
+                'breaches': 0,
+                'weeks_waiting': {}
+            }
+            if not self.records:
+                return stats
+
+            stats['specialties'] = dict(self.specialties)
+            stats['priorities'] = dict(self.priorities)
+
+            total_days = 0
+            max_days = 0
+            weeks = Counter()
+            for days, breach_status, seqs in self._bucket_statuses():
+                count = len(seqs)
+                total_days += days * count
+                max_days = max(max_days, days)
+                weeks[days // 7] += count
+                stats['breach_risks'][breach_status['alert_level']] += count
+                if breach_status['status'] == 'BREACH':
+                    stats['breaches'] += count
+
+            stats['avg_weeks_waiting'] = (total_days // len(self.records)) // 7
+            stats['longest_wait_weeks'] = max_days // 7
+            stats['weeks_waiting'] = dict(sorted(weeks.items()))
+            return stats
+
+    def breach_risk_patients(self, risk_level: str) -> List[Dict]:
+        """Patients at one alert level, most urgent first (copies with breach_info)"""
+        with self._lock:
+            at_risk = []
+            for days, breach_status, seqs in self._bucket_statuses():
+                if breach_status['alert_level'] == risk_level:
+                    for seq in seqs:
+                        at_risk.append((breach_status['days_to_breach'], seq, days, breach_status))
+            at_risk.sort(key=lambda item: item[:2])
+
+            return [{
+                **self.records[seq],
+                'breach_info': breach_status,
+                'days_waiting': days,
+                'weeks_waiting': days // 7
+            } for _, seq, days, breach_status in at_risk]
+
+    def search(self, query: str = "", specialty: str = None, priority: str = None,
+               breach_risk: str = None, status: str = None) -> List[Dict]:
+        """Filtered patients in PTL order (same rules as search_patients)"""
+        with self._lock:
+            seqs = None
+            if breach_risk:
+                seqs = set()
+                for _, breach_status, bucket in self._bucket_statuses():
+                    if breach_status['alert_level'] == breach_risk:
+                        seqs.update(bucket)
+                if not seqs:
+                    return []
+            if specialty and specialty not in self.specialties:
+                return []
+            if priority and priority not in self.priorities:
+                return []
+
+            query_lower = query.lower() if query else ""
+            results = []
+            for seq, patient in self.records.items():
+                if seqs is not None and seq not in seqs:
+                    continue
+                if query_lower and (query_lower not in patient['patient_name'].lower() and
+                                    query_lower not in patient['nhs_number'].lower()):
+                    continue
+                if specialty and patient['specialty'] != specialty:
+                    continue
+                if priority and patient['priority'] != priority:
+                    continue
+                if status and patient['current_status'] != status:
+                    continue
+                results.append(dict(patient))
+            return results
+
+
+_ptl_summaries: Dict[str, PTLSummary] = {}
+
+
+def _summary_store() -> Dict[str, PTLSummary]:
+    """Summaries by scope - per session when PTL data lives in the session"""
+    if not SUPABASE_ENABLED:
+        try:
+            import streamlit as st
+            if 'ptl_summaries' not in st.session_state:
+                st.session_state.ptl_summaries = {}
+            return st.session_state.ptl_summaries
+        except:
+            pass
+    return _ptl_summaries
+
+
+def get_ptl_summary() -> PTLSummary:
+    """Current user's PTL summary ('*' = all users for admins), built on first use"""
+    scope = '*' if is_admin_or_supervisor() else get_current_user_email()
+    store = _summary_store()
+    summary = store.get(scope)
+    if summary is None or not summary.is_fresh():
+        summary = store[scope] = PTLSummary(get_all_patients())
+    return summary
+
+
+def refresh_ptl_summary():
+    """Drop every cached summary (rebuilt on next use)"""
+    _summary_store().clear()
+
+
+def _summary_added(patient: Dict, owner: str):
+    """Add a saved patient to the summaries that can see it"""
+    try:
+        for scope, summary in _summary_store().items():
+            if scope in ('*', owner):
+                summary.add(patient)
+    except Exception as e:
+        print(f"⚠️ PTL summary update failed: {e}")
+
+
+def _summary_updated(patient_id: str, updates: Dict, owner: Optional[str] = None):
+    """Apply a saved update to the summaries that can see the owner's record
+    (owner=None: local storage, where every scope sees the same patients)"""
+    try:
+        for scope, summary in _summary_store().items():
+            if owner is None or scope in ('*', owner):
+                summary.update(patient_id, updates, owner)
+    except Exception as e:
+        print(f"⚠️ PTL summary update failed: {e}")
+
+
+def _summary_removed(patient_id: str, owner: Optional[str] = None):
+    """Remove a deleted patient from the summaries that can see the owner's record"""
+    try:
+        for scope, summary in _summary_store().items():
+            if owner is None or scope in ('*', owner):
+                summary.remove(patient_id, owner)
+    except Exception as e:
+        print(f"⚠️ PTL summary update failed: {e}")
+
+
 def add_patient_to_ptl(
     patient_name: str,
     nhs_number: str,
@@ -262,6 +546,8 @@ def add_patient_to_ptl(
         success, result = add_ptl_patient(user_email, patient)
         if success:
             print(f"✅ Patient saved to Supabase: {patient_id}")
+            index_patient_record('ptl', patient_id, patient)
+            _summary_added(result or patient, user_email)
             return patient_id
         else:
             print(f"⚠️ Supabase save failed: {result}")
@@ -275,6 +561,8 @@ def add_patient_to_ptl(
             st.session_state.ptl_patients = []
         st.session_state.ptl_patients.append(patient)
         print(f"✅ Patient saved to session storage: {patient_id}")
+        index_patient_record('ptl', patient_id, patient)
+        _summary_added(patient, user_email)
         return patient_id
     except:
         # Last resort: file storage
@@ -288,6 +576,8 @@ def add_patient_to_ptl(
             print(f"✅ Patient saved to file storage: {patient_id}")
         except:
             print(f"⚠️ File save failed")
+        index_patient_record('ptl', patient_id, patient)
+        _summary_added(patient, user_email)
         return patient_id
 
 
@@ -329,7 +619,12 @@ def update_patient_status(
             updates['events'] = current_events
         
         success, result = update_ptl_patient(patient_id, user_email, updates)
-        return success
+        # result is the updated row - None when no row of this user's matched
+        if success and result:
+            update_patient_record('ptl', patient_id, updates)
+            _summary_updated(patient_id, result, user_email)
+            return True
+        return False
     else:
         # Fallback to old method
         ptl = load_ptl()
@@ -352,6 +647,8 @@ def update_patient_status(
                 })
                 
                 save_ptl(ptl)
+                index_patient_record('ptl', patient_id, patient)
+                _summary_updated(patient_id, patient)
                 return True
         
         return False
@@ -382,6 +679,8 @@ def add_appointment(
             patient['last_updated'] = datetime.now().isoformat()
             
             save_ptl(ptl)
+            index_patient_record('ptl', patient_id, patient)
+            _summary_updated(patient_id, patient)
             return True
     
     return False
@@ -394,7 +693,11 @@ def remove_from_ptl(patient_id: str) -> bool:
     
     if SUPABASE_ENABLED:
         # Delete from Supabase
+        # False when no row of this user's matched
         success = delete_ptl_patient(patient_id, user_email)
+        if success:
+            remove_patient_record('ptl', patient_id)
+            _summary_removed(patient_id, user_email)
         return success
     else:
         # Fallback to old method
@@ -405,6 +708,8 @@ def remove_from_ptl(patient_id: str) -> bool:
                 # Remove from active PTL
                 ptl['patients'].pop(i)
                 save_ptl(ptl)
+                remove_patient_record('ptl', patient_id)
+                _summary_removed(patient_id)
                 return True
         
         return False
@@ -434,13 +739,20 @@ def get_all_patients() -> List[Dict]:
     return ptl['patients']
 
 
+def get_patients_by_ids(patient_ids: List[str]) -> List[Dict]:
+    """Patients with these ids that the current user can see (by-id query, not a PTL load, in Supabase)"""
+    if SUPABASE_ENABLED:
+        owner = None if is_admin_or_supervisor() else get_current_user_email()
+        return get_ptl_patients_by_ids(patient_ids, owner)
+    
+    wanted = set(patient_ids)
+    return [patient for patient in load_ptl()['patients'] if patient.get('patient_id') in wanted]
+
+
 def get_patient_by_id(patient_id: str) -> Optional[Dict]:
     """Get specific patient"""
-    ptl = load_ptl()
-    for patient in ptl['patients']:
-        if patient['patient_id'] == patient_id:
-            return patient
-    return None
+    patients = get_patients_by_ids([patient_id])
+    return patients[0] if patients else None
 
 
 def search_patients(
@@ -461,93 +773,13 @@ def search_patients(
         status: Filter by current status
     """
     
-    patients = get_all_patients()
-    results = []
-    
-    for patient in patients:
-        # Text search
-        if query:
-            query_lower = query.lower()
-            if (query_lower not in patient['patient_name'].lower() and
-                query_lower not in patient['nhs_number'].lower()):
-                continue
-        
-        # Specialty filter
-        if specialty and patient['specialty'] != specialty:
-            continue
-        
-        # Priority filter
-        if priority and patient['priority'] != priority:
-            continue
-        
-        # Status filter
-        if status and patient['current_status'] != status:
-            continue
-        
-        # Breach risk filter
-        if breach_risk:
-            days = calculate_days_waiting(patient['clock_start_date'])
-            breach_status = get_breach_status(days, patient.get('pathway_type', 'routine'))
-            if breach_status['alert_level'] != breach_risk:
-                continue
-        
-        results.append(patient)
-    
-    return results
+    return get_ptl_summary().search(query, specialty, priority, breach_risk, status)
 
 
 def get_ptl_stats() -> Dict:
-    """Get PTL statistics"""
-    
-    patients = get_all_patients()
-    
-    stats = {
-        'total_patients': len(patients),
-        'specialties': {},
-        'priorities': {},
-        'breach_risks': {
-            'CRITICAL': 0,
-            'HIGH': 0,
-            'MEDIUM': 0,
-            'LOW': 0
-        },
-        'avg_weeks_waiting': 0,
-        'longest_wait_weeks': 0,
-        'breaches': 0
-    }
+    """Get PTL statistics (from the materialised summary - no per-patient work)"""
     
-    if not patients:
-        return stats
-    
-    total_days = 0
-    max_days = 0
-    
-    for patient in patients:
-        # Specialty count
-        specialty = patient['specialty']
-        stats['specialties'][specialty] = stats['specialties'].get(specialty, 0) + 1
-        
-        # Priority count
-        priority = patient['priority']
-        stats['priorities'][priority] = stats['priorities'].get(priority, 0) + 1
-        
-        # Calculate waiting time
-        days = calculate_days_waiting(patient['clock_start_date'])
-        total_days += days
-        if days > max_days:
-            max_days = days
-        
-        # Breach status
-        breach_status = get_breach_status(days, patient.get('pathway_type', 'routine'))
-        stats['breach_risks'][breach_status['alert_level']] += 1
-        
-        if breach_status['status'] == 'BREACH':
-            stats['breaches'] += 1
-    
-    stats['avg_weeks_waiting'] = (total_days // len(patients)) // 7
-    stats['longest_wait_weeks'] = max_days // 7
-    
-    return stats
+    return get_ptl_summary().stats()
 
 
 def export_ptl_to_csv() -> str:
@@ -584,22 +816,6 @@ def export_ptl_to_csv() -> str:
 
 
 def get_breach_risk_patients(risk_level: str = "HIGH") -> List[Dict]:
-    """Get patients at specified breach risk level"""
-    
-    patients = get_all_patients()
-    at_risk = []
-    
-    for patient in patients:
-        days = calculate_days_waiting(patient['clock_start_date'])
-        breach_status = get_breach_status(days, patient.get('pathway_type', 'routine'))
-        
-        if breach_status['alert_level'] == risk_level:
-            patient['breach_info'] = breach_status
-            patient['days_waiting'] = days
-            patient['weeks_waiting'] = days // 7
-            at_risk.append(patient)
-    
-    # Sort by days to breach (most urgent first)
-    at_risk.sort(key=lambda x: x['breach_info']['days_to_breach'])
+    """Get patients at specified breach risk level (most urgent first)"""
     
-    return at_risk
+    return get_ptl_summary().breach_risk_patients(risk_level)
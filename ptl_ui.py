@@ -518,7 +518,8 @@ def render_add_patient():
         
         # Import patient search function
         try:
-            from patient_registration_system import search_patients, get_patient_by_id as get_patient
+            from patient_registration_system import get_patient_by_id as get_patient
+            from patient_selector_component import search_patients_paged, render_show_more
             
             # Search box
             search_term = st.text_input("🔍 Search by Name or NHS Number", placeholder="Enter patient name or NHS number...")
@@ -526,10 +527,11 @@ def render_add_patient():
             if search_term and len(search_term) >= 2:
                 try:
                     # Search for patients
-                    results = search_patients(search_term)
+                    page = search_patients_paged(search_term, "ptl_registered")
+                    results = page['patients']
                     
                     if results:
-                        st.success(f"✅ Found {len(results)} patient(s)")
+                        st.success(f"✅ Found {page['total']} patient(s)")
                         
                         # Display results
                         for patient in results:
@@ -608,6 +610,8 @@ def render_add_patient():
                                             }
                                             
                                             st.rerun()
+                        
+                        render_show_more(page, "ptl_registered")
                     else:
                         st.warning("⚠️ No patients found. Try a different search term or add a new patient.")
                 except Exception as e:
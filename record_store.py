@@ -0,0 +1,487 @@
+"""
+T21 Record Store
+Storage engine behind universal_crud and universal_data_persistence
+
+Features:
+- One collection per module and user (the old data/{module}_{user}.json)
+- SQLite engine (default): one row per record, so create/update/delete
+  touch one record instead of rewriting the whole file, in transactions
+  that are safe across sessions
+- Indexes on record id and on every top-level field value
+- Substring search through an FTS5 trigram index where SQLite has it,
+  verified with the same matching rules as the old scan
+- Legacy JSON files imported into SQLite the first time a collection is used
+- JSON file engine (the old behaviour) still available: T21_RECORD_STORE=json
+
+Usage:
+    store = get_record_store()
+    store.append('dna_cases_jo_at_nhs_net', record, meta={'module': 'dna_cases', 'user': email})
+    store.search('dna_cases_jo_at_nhs_net', 'smith', fields=['patient_name'])
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+RECORD_STORE_ENGINE = os.getenv('T21_RECORD_STORE', 'sqlite')
+DATA_DIR = "data"
+RECORD_STORE_DB = os.path.join(DATA_DIR, "records.db")
+
+# Shortest search term the trigram index can serve (shorter terms scan)
+FTS_MIN_TERM_LENGTH = 3
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def search_in_records(records: List[Dict], search_term: str, search_fields: List[str] = None) -> List[Dict]:
+    """Scan records for a term (the matching rules every engine follows)"""
+    if not search_term:
+        return records
+
+    search_term = search_term.lower()
+    results = []
+
+    for record in records:
+        if search_fields:
+            # Search only specified fields
+            for field in search_fields:
+                if field in record:
+                    if search_term in str(record[field]).lower():
+                        results.append(record)
+                        break
+        else:
+            # Search all fields
+            record_str = json.dumps(record).lower()
+            if search_term in record_str:
+                results.append(record)
+
+    return results
+
+
+class RecordStore:
+    """
+    Engine interface - collections of records, in insertion order
+
+    A collection normally holds a list of dict records with an 'id' field,
+    but save() accepts any JSON value (some modules store a single dict).
+    """
+
+    def load(self, collection: str, default: Any = None) -> Any:
+        """The collection's data, or default if it has never been saved"""
+        raise NotImplementedError
+
+    def save(self, collection: str, data: Any, meta: Dict = None):
+        """Replace the collection's data"""
+        raise NotImplementedError
+
+    def append(self, collection: str, record: Dict, meta: Dict = None):
+        """Add one record at the end"""
+        data = self.load(collection, default=[])
+        if not isinstance(data, list):
+            data = [data]
+        data.append(record)
+        self.save(collection, data, meta)
+
+    def get(self, collection: str, record_id: Any, id_field: str = 'id') -> Optional[Dict]:
+        """First record whose id_field equals record_id"""
+        for record in self.load(collection, default=[]):
+            if record.get(id_field) == record_id:
+                return record
+        return None
+
+    def replace(self, collection: str, record_id: Any, record: Dict, meta: Dict = None,
+                id_field: str = 'id') -> bool:
+        """Replace the first record with this id (False if there is none)"""
+        data = self.load(collection, default=[])
+        for i, existing in enumerate(data):
+            if existing.get(id_field) == record_id:
+                data[i] = record
+                self.save(collection, data, meta)
+                return True
+        return False
+
+    def delete(self, collection: str, record_id: Any, meta: Dict = None, id_field: str = 'id') -> int:
+        """Delete every record with this id; returns how many were deleted"""
+        data = self.load(collection)
+        if data is None:
+            return 0
+        kept = [record for record in data if record.get(id_field) != record_id]
+        self.save(collection, kept, meta)
+        return len(data) - len(kept)
+
+    def search(self, collection: str, search_term: str, search_fields: List[str] = None) -> List[Dict]:
+        """Records containing the term (see search_in_records)"""
+        return search_in_records(self.load(collection, default=[]), search_term, search_fields)
+
+    def collections(self) -> List[str]:
+        """Names of every stored collection"""
+        raise NotImplementedError
+
+
+class JsonFileRecordStore(RecordStore):
+    """The original engine: one JSON file per collection, rewritten on every change"""
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+
+    def _path(self, collection: str) -> str:
+        return os.path.join(self.data_dir, f"{collection}.json")
+
+    def load(self, collection: str, default: Any = None) -> Any:
+        path = self._path(collection)
+        if not os.path.exists(path):
+            return default
+        with open(path, 'r') as f:
+            return json.load(f).get('data', default)
+
+    def save(self, collection: str, data: Any, meta: Dict = None):
+        os.makedirs(self.data_dir, exist_ok=True)
+        meta = meta or {}
+        save_data = {
+            'module': meta.get('module', collection),
+            'user': meta.get('user', 'unknown'),
+            'last_updated': _timestamp(),
+            'data': data
+        }
+        if isinstance(data, list):
+            save_data['total_records'] = len(data)
+        with open(self._path(collection), 'w') as f:
+            json.dump(save_data, f, indent=2)
+
+    def collections(self) -> List[str]:
+        if not os.path.exists(self.data_dir):
+            return []
+        return [name[:-5] for name in os.listdir(self.data_dir) if name.endswith('.json')]
+
+
+class SQLiteRecordStore(RecordStore):
+    """
+    Records as SQLite rows with id and field indexes
+
+    Tables:
+        collections   - one row per collection (list, or a single JSON value)
+        records       - one row per record: JSON body, id, lowercased JSON for search
+        record_fields - str(value).lower() of each top-level field, for field search
+        *_fts         - trigram full-text indexes over the two search columns
+    """
+
+    def __init__(self, db_path: str = RECORD_STORE_DB, legacy_dir: str = DATA_DIR):
+        self.db_path = db_path
+        self.legacy = JsonFileRecordStore(legacy_dir)
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS collections (
+                name TEXT PRIMARY KEY,
+                module TEXT,
+                user TEXT,
+                kind TEXT NOT NULL,
+                value TEXT,
+                last_updated TEXT
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection TEXT NOT NULL,
+                record_id TEXT,
+                body TEXT NOT NULL,
+                search_text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_collection ON records(collection, id);
+            CREATE INDEX IF NOT EXISTS idx_records_record_id ON records(collection, record_id);
+            CREATE TABLE IF NOT EXISTS record_fields (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                record INTEGER NOT NULL,
+                collection TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_record_fields_field ON record_fields(collection, field);
+            CREATE INDEX IF NOT EXISTS idx_record_fields_record ON record_fields(record);
+        ''')
+
+        try:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(search_text, tokenize='trigram')")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS record_fields_fts USING fts5(value, tokenize='trigram')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite older than 3.34 - searches scan the collection in SQL
+            self.fts = False
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (WAL, so readers don't block the writer)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _begin(self) -> sqlite3.Connection:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        return conn
+
+    def _ensure(self, conn: sqlite3.Connection, collection: str) -> Optional[str]:
+        """Collection kind ('list'/'value'), importing a legacy JSON file first time"""
+        row = conn.execute('SELECT kind FROM collections WHERE name = ?', (collection,)).fetchone()
+        if row:
+            return row[0]
+
+        try:
+            data = self.legacy.load(collection)
+        except (OSError, ValueError):
+            data = None
+        if data is None:
+            return None
+        self._write_all(conn, collection, data, {'module': collection, 'user': 'imported'})
+        return 'list' if isinstance(data, list) else 'value'
+
+    def _touch(self, conn: sqlite3.Connection, collection: str, kind: str, meta: Dict = None, value: Any = None):
+        meta = meta or {}
+        conn.execute(
+            '''INSERT INTO collections (name, module, user, kind, value, last_updated)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(name) DO UPDATE SET kind = excluded.kind, value = excluded.value,
+                   last_updated = excluded.last_updated,
+                   module = COALESCE(excluded.module, module), user = COALESCE(excluded.user, user)''',
+            (collection, meta.get('module'), meta.get('user'), kind,
+             json.dumps(value) if kind == 'value' else None, _timestamp())
+        )
+
+    def _insert_record(self, conn: sqlite3.Connection, collection: str, record: Dict, row_id: int = None) -> int:
+        """Insert (or rewrite row_id) with its search columns"""
+        body = json.dumps(record)
+        stored = json.loads(body)  # what a reader gets back - search on that
+        search_text = body.lower()
+        record_id = json.dumps(stored.get('id')) if isinstance(stored, dict) else None
+
+        if row_id is None:
+            row_id = conn.execute(
+                'INSERT INTO records (collection, record_id, body, search_text) VALUES (?, ?, ?, ?)',
+                (collection, record_id, body, search_text)
+            ).lastrowid
+        else:
+            conn.execute('UPDATE records SET record_id = ?, body = ?, search_text = ? WHERE id = ?',
+                         (record_id, body, search_text, row_id))
+        if self.fts:
+            conn.execute('INSERT INTO records_fts (rowid, search_text) VALUES (?, ?)', (row_id, search_text))
+
+        if isinstance(stored, dict):
+            for field, value in stored.items():
+                value_text = str(value).lower()
+                field_row = conn.execute(
+                    'INSERT INTO record_fields (record, collection, field, value) VALUES (?, ?, ?, ?)',
+                    (row_id, collection, field, value_text)
+                ).lastrowid
+                if self.fts:
+                    conn.execute('INSERT INTO record_fields_fts (rowid, value) VALUES (?, ?)', (field_row, value_text))
+        return row_id
+
+    def _clear_search(self, conn: sqlite3.Connection, row_ids: List[int]):
+        """Drop the search rows of these records"""
+        for row_id in row_ids:
+            if self.fts:
+                conn.execute('DELETE FROM records_fts WHERE rowid = ?', (row_id,))
+                conn.execute('DELETE FROM record_fields_fts WHERE rowid IN '
+                             '(SELECT id FROM record_fields WHERE record = ?)', (row_id,))
+            conn.execute('DELETE FROM record_fields WHERE record = ?', (row_id,))
+
+    def _row_ids(self, conn: sqlite3.Connection, collection: str, record_id: Any = None) -> List[int]:
+        """Rows of a collection (or of one record id in it), in order"""
+        if record_id is None:
+            rows = conn.execute('SELECT id FROM records WHERE collection = ? ORDER BY id', (collection,))
+        else:
+            rows = conn.execute('SELECT id FROM records WHERE collection = ? AND record_id = ? ORDER BY id',
+                                (collection, json.dumps(record_id)))
+        return [row_id for row_id, in rows]
+
+    def _write_all(self, conn: sqlite3.Connection, collection: str, data: Any, meta: Dict = None):
+        self._clear_search(conn, self._row_ids(conn, collection))
+        conn.execute('DELETE FROM records WHERE collection = ?', (collection,))
+        if isinstance(data, list):
+            self._touch(conn, collection, 'list', meta)
+            for record in data:
+                self._insert_record(conn, collection, record)
+        else:
+            self._touch(conn, collection, 'value', meta, data)
+
+    def save(self, collection: str, data: Any, meta: Dict = None):
+        conn = self._begin()
+        try:
+            self._write_all(conn, collection, data, meta)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def append(self, collection: str, record: Dict, meta: Dict = None):
+        conn = self._begin()
+        try:
+            kind = self._ensure(conn, collection)
+            if kind == 'value':
+                # A single stored value becomes the first item of a list
+                value = json.loads(conn.execute('SELECT value FROM collections WHERE name = ?',
+                                                (collection,)).fetchone()[0])
+                self._write_all(conn, collection, [value], meta)
+            self._touch(conn, collection, 'list', meta)
+            self._insert_record(conn, collection, record)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def replace(self, collection: str, record_id: Any, record: Dict, meta: Dict = None,
+                id_field: str = 'id') -> bool:
+        if id_field != 'id':
+            return super().replace(collection, record_id, record, meta, id_field)
+        conn = self._begin()
+        try:
+            if self._ensure(conn, collection) != 'list':
+                conn.execute('ROLLBACK')
+                return False
+            row_ids = self._row_ids(conn, collection, record_id)
+            if not row_ids:
+                conn.execute('ROLLBACK')
+                return False
+            self._clear_search(conn, row_ids[:1])
+            self._insert_record(conn, collection, record, row_id=row_ids[0])
+            self._touch(conn, collection, 'list', meta)
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def delete(self, collection: str, record_id: Any, meta: Dict = None, id_field: str = 'id') -> int:
+        if id_field != 'id':
+            return super().delete(collection, record_id, meta, id_field)
+        conn = self._begin()
+        try:
+            kind = self._ensure(conn, collection)
+            if kind == 'value':
+                conn.execute('ROLLBACK')
+                return super().delete(collection, record_id, meta, id_field)
+            row_ids = self._row_ids(conn, collection, record_id)
+            self._clear_search(conn, row_ids)
+            conn.executemany('DELETE FROM records WHERE id = ?', [(row_id,) for row_id in row_ids])
+            deleted = len(row_ids)
+            if kind:
+                self._touch(conn, collection, 'list', meta)
+            conn.execute('COMMIT')
+            return deleted
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _kind(self, collection: str) -> Optional[str]:
+        conn = self._connection()
+        row = conn.execute('SELECT kind FROM collections WHERE name = ?', (collection,)).fetchone()
+        if row:
+            return row[0]
+        if not os.path.exists(self.legacy._path(collection)):
+            return None  # never saved - nothing to import, no write lock needed
+        # First use - import the legacy file (needs a write transaction)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            kind = self._ensure(conn, collection)
+            conn.execute('COMMIT')
+            return kind
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def load(self, collection: str, default: Any = None) -> Any:
+        kind = self._kind(collection)
+        if kind is None:
+            return default
+        conn = self._connection()
+        if kind == 'value':
+            return json.loads(conn.execute('SELECT value FROM collections WHERE name = ?', (collection,)).fetchone()[0])
+        rows = conn.execute('SELECT body FROM records WHERE collection = ? ORDER BY id', (collection,))
+        return [json.loads(body) for body, in rows]
+
+    def get(self, collection: str, record_id: Any, id_field: str = 'id') -> Optional[Dict]:
+        if id_field != 'id' or self._kind(collection) != 'list':
+            return super().get(collection, record_id, id_field)
+        row = self._connection().execute(
+            'SELECT body FROM records WHERE collection = ? AND record_id = ? ORDER BY id LIMIT 1',
+            (collection, json.dumps(record_id))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search(self, collection: str, search_term: str, search_fields: List[str] = None) -> List[Dict]:
+        if not search_term or self._kind(collection) != 'list':
+            return super().search(collection, search_term, search_fields)
+
+        term = search_term.lower()
+        use_fts = self.fts and len(term) >= FTS_MIN_TERM_LENGTH
+        phrase = '"' + term.replace('"', '""') + '"'
+
+        if search_fields:
+            placeholders = ','.join('?' * len(search_fields))
+            if use_fts:
+                matches = f'''SELECT f.record FROM record_fields_fts x JOIN record_fields f ON f.id = x.rowid
+                              WHERE record_fields_fts MATCH ? AND f.collection = ?
+                                AND f.field IN ({placeholders}) AND instr(f.value, ?) > 0'''
+                params = (phrase, collection, *search_fields, term)
+            else:
+                matches = f'''SELECT record FROM record_fields
+                              WHERE collection = ? AND field IN ({placeholders}) AND instr(value, ?) > 0'''
+                params = (collection, *search_fields, term)
+            sql = f'SELECT body FROM records WHERE id IN ({matches}) ORDER BY id'
+        elif use_fts:
+            sql = '''SELECT r.body FROM records_fts x JOIN records r ON r.id = x.rowid
+                     WHERE records_fts MATCH ? AND r.collection = ? AND instr(r.search_text, ?) > 0
+                     ORDER BY r.id'''
+            params = (phrase, collection, term)
+        else:
+            sql = 'SELECT body FROM records WHERE collection = ? AND instr(search_text, ?) > 0 ORDER BY id'
+            params = (collection, term)
+
+        return [json.loads(body) for body, in self._connection().execute(sql, params)]
+
+    def collections(self) -> List[str]:
+        names = {name for name, in self._connection().execute('SELECT name FROM collections')}
+        names.update(self.legacy.collections())  # not yet imported
+        return sorted(names)
+
+
+_record_store: Optional[RecordStore] = None
+_record_store_lock = threading.Lock()
+
+
+def get_record_store() -> RecordStore:
+    """Shared store for T21_RECORD_STORE ('sqlite' default, 'json' = legacy files)"""
+    global _record_store
+    if _record_store is None:
+        with _record_store_lock:
+            if _record_store is None:
+                if RECORD_STORE_ENGINE == 'json':
+                    _record_store = JsonFileRecordStore()
+                else:
+                    try:
+                        _record_store = SQLiteRecordStore()
+                    except sqlite3.Error as e:
+                        print(f"⚠️ SQLite record store unavailable ({e}) - using JSON files")
+                        _record_store = JsonFileRecordStore()
+    return _record_store
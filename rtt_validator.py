@@ -12,8 +12,13 @@ ENHANCED WITH AI CAPABILITIES:
 
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
+import importlib.util
 import json
 import re
+import threading
+
+from letter_phrase_matcher import PhraseMatcher
+from nhs_date_parser import parse_nhs_date
 
 # AI ENHANCEMENTS - Safe imports with fallbacks
 try:
@@ -40,36 +45,19 @@ try:
 except:
     AUTOFIX_AVAILABLE = False
 
-try:
-    from batch_validation_engine import BatchValidationEngine
-    BATCH_AVAILABLE = True
-except:
-    BATCH_AVAILABLE = False
+# Bulk letter validation - bulk_letter_engine imports this module, so it is
+# only located here and imported by validate_bulk_letters()
+BATCH_AVAILABLE = importlib.util.find_spec('bulk_letter_engine') is not None
 
 
 def parse_date(date_str: str) -> Optional[datetime]:
-    """Parse date string in various formats (DD/MM/YYYY, YYYY-MM-DD, etc.)"""
-    if not date_str or date_str.strip() == "":
-        return None
-    
-    date_str = date_str.strip()
-    
-    # Try DD/MM/YYYY format first
-    formats = [
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%Y-%m-%d",
-        "%Y/%m/%d",
-        "%d.%m.%Y"
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except:
-            continue
+    """
+    Parse date string in various formats (DD/MM/YYYY, YYYY-MM-DD, etc.)
     
-    return None
+    Format is sniffed from the string and results are cached per distinct
+    string - see nhs_date_parser (parse_date_column for whole columns).
+    """
+    return parse_nhs_date(date_str)
 
 
 def calculate_weeks(start_date: datetime, end_date: datetime, pause_weeks: int = 0) -> int:
@@ -199,6 +187,119 @@ def validate_pathway(data: Dict) -> Dict:
     }
 
 
+# ============================================
+# CLINIC LETTER PHRASES
+# Compiled once into a single matcher (see letter_phrase_matcher)
+# ============================================
+
+# PAST TENSE INDICATORS (things already done)
+LETTER_PAST_INDICATORS = [
+    'was performed', 'were performed', 'has been', 'have been',
+    'performed appropriately', 'results from', 'findings from',
+    'showed', 'demonstrated', 'revealed', 'indicated',
+    'underwent', 'received', 'completed', 'was done',
+    'have returned', 'came back', 'test showed'
+]
+
+# FUTURE/REQUEST INDICATORS (things to be done)
+LETTER_FUTURE_INDICATORS = [
+    'please arrange', 'please book', 'please order',
+    'i recommend', 'would recommend', 'advise',
+    'needs to', 'should', 'must', 'require',
+    'to be ordered', 'to be booked', 'to arrange',
+    'kindly arrange', 'arrange for', 'book for'
+]
+
+# CODE 10 - GP/Consultant referral patterns
+LETTER_REFERRAL_INDICATORS = [
+    'i am writing to refer',
+    'i would like to refer',
+    'please see this patient',
+    're: referral',
+    'referral for',
+    'referred to your service',
+    'referring this patient',
+    'request referral',
+    'kindly accept this referral'
+]
+
+# CODE 30 - First definitive treatment
+LETTER_TREATMENT_PHRASES = [
+    'surgery performed', 'procedure completed', 'treatment started',
+    'operation performed', 'underwent surgery', 'treatment commenced'
+]
+
+# CODE 34 - Discharge / no treatment needed
+LETTER_DISCHARGE_PHRASES = [
+    'discharge', 
+    'no further treatment', 
+    'back to gp', 
+    'treatment not required',
+    'no intervention is needed',
+    'no intervention needed',
+    'no medical intervention',
+    'intervention is needed',  # catches "no...intervention is needed"
+    'discharged to gp',
+    'no treatment needed',
+    'no treatment is required',
+    'do not believe that any',
+    'results...normal',  # Results normal often means discharge
+    'routine follow'  # If just routine follow-up, likely discharge
+]
+
+# CODE 35 - Patient declined
+LETTER_DECLINED_PHRASES = ['patient declined', 'refused treatment', 'patient refuses', 'declined the offer']
+
+# CODE 33 - DNA
+LETTER_DNA_PHRASES = ['did not attend', 'dna', 'patient did not attend', 'failed to attend']
+
+# CODE 31/32 - Active monitoring
+LETTER_MONITORING_PHRASES = ['active monitoring', 'watchful waiting', 'watch and wait', 'conservative management', 'observe for']
+
+# CODE 21 - Inter-provider transfer
+LETTER_TRANSFER_PHRASES = ['transfer to', 'transferring to', 'referred to another provider', 'transfer of care']
+
+# CODE 20 - Decision to treat / subsequent activity
+LETTER_DECISION_PHRASES = ['list for surgery', 'proceed to', 'book for', 'waiting list', 'decision to treat', 'plan:', 'management plan']
+
+# Every other keyword validate_clinic_letter looks for (context words, tests,
+# waiting list/TCI/GP/follow-up wording). Phrases missing from here still
+# work, they just fall back to a plain substring search.
+LETTER_KEYWORDS = [
+    'results', 'findings', 'report', 'showed', 'completed', 'done', 'sent', 'added', 'booked already',
+    'please book', 'please arrange', 'please order', 'please add', 'kindly', 'request',
+    'plan:', 'to be', 'will be', 'shall be', 'needs to be',
+    'intervention', 'not', 'needed', 'patient request', 'patient wishes', 'patient prefers',
+    'partial booking', 'pbl', 'waiting for appointment', 'await appointment',
+    'book appointment', 'first appointment', 'first outpatient', 'opa',
+    'urgent', '2ww', 'two week wait', 'cancer', 'suspected cancer',
+    'list for surgery', 'waiting list', 'surgical list', 'add to list', 'wl', 'list for',
+    'tci', 'to come in', 'date for surgery', 'theatre date',
+    'post-op', 'follow-up', 'follow up', 'follow', 'review', 'check wound', 'appointment',
+    'review appointment', 'clinic',
+    'gp', 'copy to gp', 'inform gp', 'gp letter', 'letter to gp',
+    'mri', 'ct', 'ct scan', 'scan', 'ultrasound', 'x-ray', 'xray', 'ecg', 'echo', 'echocardiogram',
+    'angiogram', 'coronary angiography', 'blood', 'blood test', 'biopsy',
+    'surgery', 'operation', 'procedure', 'treatment',
+    'was performed', 'has been done', 'underwent', 'results from',
+    'demonstrated', 'normal', 'abnormal'
+]
+
+# Letter date formats, most specific first
+_LETTER_DATE_PATTERNS = [
+    re.compile(r'Date[:\s]+(\d{1,2})[/\s-]+(\d{1,2})[/\s-]+(\d{4})', re.IGNORECASE),
+    re.compile(r'Dated[:\s]+(\d{1,2})[/\s-]+(\d{1,2})[/\s-]+(\d{4})', re.IGNORECASE),
+    re.compile(r'(\d{1,2})[/\s-]+(\d{1,2})[/\s-]+(\d{4})', re.IGNORECASE)
+]
+
+_LETTER_MATCHER = PhraseMatcher(
+    LETTER_PAST_INDICATORS + LETTER_FUTURE_INDICATORS + LETTER_REFERRAL_INDICATORS
+    + LETTER_TREATMENT_PHRASES + LETTER_DISCHARGE_PHRASES + LETTER_DECLINED_PHRASES
+    + LETTER_DNA_PHRASES + LETTER_MONITORING_PHRASES + LETTER_TRANSFER_PHRASES
+    + LETTER_DECISION_PHRASES + LETTER_KEYWORDS
+)
+
+
 def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     """
     Clinic Letter Interpreter (T21 v1.2)
@@ -214,70 +315,52 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     # PARSE LETTER INTO PAST vs FUTURE ACTIONS
     # ============================================
     
-    # PAST TENSE INDICATORS (things already done)
-    past_indicators = [
-        'was performed', 'were performed', 'has been', 'have been',
-        'performed appropriately', 'results from', 'findings from',
-        'showed', 'demonstrated', 'revealed', 'indicated',
-        'underwent', 'received', 'completed', 'was done',
-        'have returned', 'came back', 'test showed'
-    ]
+    # One pass over the letter finds every indicator phrase with its offset
+    hits = _LETTER_MATCHER.scan(letter_lower)
     
-    # FUTURE/REQUEST INDICATORS (things to be done)
-    future_indicators = [
-        'please arrange', 'please book', 'please order',
-        'i recommend', 'would recommend', 'advise',
-        'needs to', 'should', 'must', 'require',
-        'to be ordered', 'to be booked', 'to arrange',
-        'kindly arrange', 'arrange for', 'book for'
-    ]
-    
-    def is_past_action(text, keyword, window=150):
+    def is_past_action(keyword, window=150):
         """
         Check if a keyword appears in PAST context (already done) vs FUTURE (to be ordered)
         Returns: 'past', 'future', or 'unclear'
         
         Works for ANY action: appointments, tests, treatments, letters, waiting lists, etc.
         """
-        # Find all occurrences of the keyword
-        idx = text.find(keyword)
+        # Find the first occurrence of the keyword
+        idx = hits.first(keyword)
         if idx == -1:
             return 'unclear'
         
-        # Get surrounding context (before and after)
+        # Surrounding context (before and after), answered from the hit offsets
         start = max(0, idx - window)
-        end = min(len(text), idx + len(keyword) + window)
-        context = text[start:end].lower()
+        end = min(len(letter_lower), idx + len(keyword) + window)
         
         # Check for past indicators
-        for indicator in past_indicators:
-            if indicator in context:
-                return 'past'
+        if hits.any_within(LETTER_PAST_INDICATORS, start, end):
+            return 'past'
         
         # Check for future indicators
-        for indicator in future_indicators:
-            if indicator in context:
-                return 'future'
+        if hits.any_within(LETTER_FUTURE_INDICATORS, start, end):
+            return 'future'
         
         # Check for results/findings context (past)
-        if any(word in context for word in ['results', 'findings', 'report', 'showed']):
+        if hits.any_within(['results', 'findings', 'report', 'showed'], start, end):
             return 'past'
         
         # Check for completion context (past)
-        if any(word in context for word in ['completed', 'done', 'sent', 'added', 'booked already']):
+        if hits.any_within(['completed', 'done', 'sent', 'added', 'booked already'], start, end):
             return 'past'
         
         # Check for ordering/requesting context (future)
-        if any(word in context for word in ['please book', 'please arrange', 'please order', 'please add', 'kindly', 'request']):
+        if hits.any_within(['please book', 'please arrange', 'please order', 'please add', 'kindly', 'request'], start, end):
             return 'future'
         
         # Check for planning context (future)
-        if any(word in context for word in ['plan:', 'to be', 'will be', 'shall be', 'needs to be']):
+        if hits.any_within(['plan:', 'to be', 'will be', 'shall be', 'needs to be'], start, end):
             return 'future'
         
         return 'unclear'
     
-    def parse_actions_from_letter(text):
+    def parse_actions_from_letter():
         """
         Extract all actions from letter and categorize as PAST (done) or FUTURE (to do)
         Returns: {
@@ -297,13 +380,11 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
             'referrals': {'past': [], 'future': []}
         }
         
-        text_lower = text.lower()
-        
         # APPOINTMENTS
         appt_keywords = ['appointment', 'follow-up', 'follow up', 'review appointment', 'clinic']
         for keyword in appt_keywords:
-            if keyword in text_lower:
-                action_type = is_past_action(text_lower, keyword)
+            if hits.has(keyword):
+                action_type = is_past_action(keyword)
                 if action_type == 'past':
                     actions['appointments']['past'].append(keyword)
                 elif action_type == 'future':
@@ -312,8 +393,8 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         # WAITING LIST
         wl_keywords = ['waiting list', 'surgical list', 'list for surgery', 'add to list']
         for keyword in wl_keywords:
-            if keyword in text_lower:
-                action_type = is_past_action(text_lower, keyword)
+            if hits.has(keyword):
+                action_type = is_past_action(keyword)
                 if action_type == 'past':
                     actions['waiting_list']['past'].append(keyword)
                 elif action_type == 'future':
@@ -322,8 +403,8 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         # GP LETTERS
         gp_keywords = ['gp letter', 'copy to gp', 'inform gp', 'letter to gp']
         for keyword in gp_keywords:
-            if keyword in text_lower:
-                action_type = is_past_action(text_lower, keyword)
+            if hits.has(keyword):
+                action_type = is_past_action(keyword)
                 if action_type == 'past':
                     actions['gp_letters']['past'].append(keyword)
                 elif action_type == 'future':
@@ -332,8 +413,8 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         # TREATMENT
         treatment_keywords = ['surgery', 'operation', 'procedure', 'treatment']
         for keyword in treatment_keywords:
-            if keyword in text_lower:
-                action_type = is_past_action(text_lower, keyword)
+            if hits.has(keyword):
+                action_type = is_past_action(keyword)
                 if action_type == 'past':
                     actions['treatment']['past'].append(keyword)
                 elif action_type == 'future':
@@ -343,26 +424,14 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     
     # CODE 10 - REFERRAL LETTERS (PATHWAY START)
     # Check for GP/Consultant referral patterns FIRST
-    referral_indicators = [
-        'i am writing to refer',
-        'i would like to refer',
-        'please see this patient',
-        're: referral',
-        'referral for',
-        'referred to your service',
-        'referring this patient',
-        'request referral',
-        'kindly accept this referral'
-    ]
-    
-    if any(indicator in letter_lower for indicator in referral_indicators):
+    if hits.any(LETTER_REFERRAL_INDICATORS):
         rtt_code = "10"
         rtt_action = "Start"
         clock_status = "Active"
         explanation = "GP/Consultant referral letter detected. Code 10 starts new RTT clock. This is the FIRST activity in the pathway."
     
     # CODE 30 - FIRST DEFINITIVE TREATMENT
-    elif any(phrase in letter_lower for phrase in ['surgery performed', 'procedure completed', 'treatment started', 'operation performed', 'underwent surgery', 'treatment commenced']):
+    elif hits.any(LETTER_TREATMENT_PHRASES):
         rtt_code = "30"
         rtt_action = "Stop"
         clock_status = "Stopped"
@@ -370,44 +439,29 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     
     # CODE 34 - DISCHARGE / NO TREATMENT NEEDED
     # Check for discharge/no treatment patterns EARLY (before diagnostic detection)
-    elif any(phrase in letter_lower for phrase in [
-        'discharge', 
-        'no further treatment', 
-        'back to gp', 
-        'treatment not required',
-        'no intervention is needed',
-        'no intervention needed',
-        'no medical intervention',
-        'intervention is needed',  # catches "no...intervention is needed"
-        'discharged to gp',
-        'no treatment needed',
-        'no treatment is required',
-        'do not believe that any',
-        'results...normal',  # Results normal often means discharge
-        'routine follow'  # If just routine follow-up, likely discharge
-    ]) or ('intervention' in letter_lower and 'not' in letter_lower and 'needed' in letter_lower):
+    elif hits.any(LETTER_DISCHARGE_PHRASES) or (hits.has('intervention') and hits.has('not') and hits.has('needed')):
         rtt_code = "34"
         rtt_action = "Stop"
         clock_status = "Stopped"
         explanation = "Clinical decision not to treat / discharge documented. Code 34 stops RTT clock."
     
     # CODE 35 - PATIENT DECLINED
-    elif any(phrase in letter_lower for phrase in ['patient declined', 'refused treatment', 'patient refuses', 'declined the offer']):
+    elif hits.any(LETTER_DECLINED_PHRASES):
         rtt_code = "35"
         rtt_action = "Stop"
         clock_status = "Stopped"
         explanation = "Patient declined offered treatment. Code 35 stops RTT clock."
     
     # CODE 33 - DNA (Did Not Attend)
-    elif any(phrase in letter_lower for phrase in ['did not attend', 'dna', 'patient did not attend', 'failed to attend']):
+    elif hits.any(LETTER_DNA_PHRASES):
         rtt_code = "33"
         rtt_action = "Continue"
         clock_status = "Active"
         explanation = "Patient DNA (Did Not Attend) documented. Code 33 - rebook within trust policy."
     
     # CODE 31/32 - ACTIVE MONITORING
-    elif any(phrase in letter_lower for phrase in ['active monitoring', 'watchful waiting', 'watch and wait', 'conservative management', 'observe for']):
-        if any(phrase in letter_lower for phrase in ['patient request', 'patient wishes', 'patient prefers']):
+    elif hits.any(LETTER_MONITORING_PHRASES):
+        if hits.any(['patient request', 'patient wishes', 'patient prefers']):
             rtt_code = "31"
             explanation = "Active monitoring initiated by patient request. Code 31 pauses RTT clock."
         else:
@@ -417,14 +471,14 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         clock_status = "Paused"
     
     # CODE 21 - INTER-PROVIDER TRANSFER
-    elif any(phrase in letter_lower for phrase in ['transfer to', 'transferring to', 'referred to another provider', 'transfer of care']):
+    elif hits.any(LETTER_TRANSFER_PHRASES):
         rtt_code = "21"
         rtt_action = "Transfer"
         clock_status = "Transferred"
         explanation = "Inter-provider transfer documented. Code 21 - clock transfers to receiving provider."
     
     # CODE 20 - DECISION TO TREAT / SUBSEQUENT ACTIVITY
-    elif any(phrase in letter_lower for phrase in ['list for surgery', 'proceed to', 'book for', 'waiting list', 'decision to treat', 'plan:', 'management plan']):
+    elif hits.any(LETTER_DECISION_PHRASES):
         rtt_code = "20"
         rtt_action = "Continue"
         clock_status = "Active"
@@ -487,7 +541,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         # ============================================
         # SECTION 5: PARTIAL BOOKING LIST (PBL) CHECK
         # ============================================
-        if any(phrase in letter_lower for phrase in ['partial booking', 'pbl', 'waiting for appointment', 'await appointment']):
+        if hits.any(['partial booking', 'pbl', 'waiting for appointment', 'await appointment']):
             actions_required.append("CHECK: Patient added to Partial Booking List (PBL) (Y/N)")
             actions_required.append("CHECK: PBL entry date recorded (Y/N)")
             gaps.append("VERIFY: Patient on Partial Booking List - CHECK SYSTEM")
@@ -500,7 +554,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         # ============================================
         # SECTION 6: FIRST APPOINTMENT BOOKING CHECK
         # ============================================
-        if any(phrase in letter_lower for phrase in ['book appointment', 'first appointment', 'first outpatient', 'opa']):
+        if hits.any(['book appointment', 'first appointment', 'first outpatient', 'opa']):
             actions_required.append("CHECK: First appointment booked (Y/N)")
             actions_required.append("CHECK: Appointment date recorded (Y/N)")
             actions_required.append("CHECK: Appointment within target timeframe (Y/N)")
@@ -525,7 +579,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         
         tests_found = []
         for test_key, test_name in diagnostic_tests.items():
-            if test_key in letter_lower:
+            if hits.has(test_key):
                 tests_found.append(test_name)
                 actions_required.append(f"CHECK: {test_name} ordered in system (Y/N)")
                 actions_required.append(f"CHECK: {test_name} booking date recorded (Y/N)")
@@ -538,7 +592,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         # ============================================
         # SECTION 8: PRIORITY/URGENCY CHECK
         # ============================================
-        if any(word in letter_lower for word in ['urgent', '2ww', 'two week wait', 'cancer', 'suspected cancer']):
+        if hits.any(['urgent', '2ww', 'two week wait', 'cancer', 'suspected cancer']):
             actions_required.append("CHECK: Urgent/2WW flag set in system (Y/N)")
             actions_required.append("CHECK: Priority booking expedited (Y/N)")
             gaps.append("VERIFY: Urgent referral flag - CHECK PRIORITY STATUS")
@@ -562,9 +616,9 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     # ============================================
     elif rtt_code == "20":
         # WAITING LIST CHECKS (with past/future logic)
-        if any(phrase in letter_lower for phrase in ['list for surgery', 'waiting list', 'surgical list', 'add to list', 'wl']):
+        if hits.any(['list for surgery', 'waiting list', 'surgical list', 'add to list', 'wl']):
             # Check if patient ALREADY added or NEEDS TO BE added
-            wl_action = is_past_action(letter_lower, 'waiting list')
+            wl_action = is_past_action('waiting list')
             
             if wl_action == 'future' or wl_action == 'unclear':
                 # Patient NEEDS TO BE added to WL
@@ -586,7 +640,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
                 actions_required.append("VERIFY: WL entry date matches letter (Y/N)")
         
         # TCI DATE (To Come In Date) CHECKS
-        if any(phrase in letter_lower for phrase in ['tci', 'to come in', 'date for surgery', 'theatre date']):
+        if hits.any(['tci', 'to come in', 'date for surgery', 'theatre date']):
             actions_required.append("CHECK: TCI date set in system (Y/N)")
             actions_required.append("CHECK: TCI date within 18 weeks of clock start (Y/N)")
             gaps.append("VERIFY: TCI date recorded - CHECK waiting list")
@@ -608,9 +662,9 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
         
         # Check each diagnostic test in context
         for test_key, test_name in diagnostic_keywords.items():
-            if test_key in letter_lower:
+            if hits.has(test_key):
                 # Determine if this is PAST (already done) or FUTURE (to be ordered)
-                action_type = is_past_action(letter_lower, test_key)
+                action_type = is_past_action(test_key)
                 
                 if action_type == 'future':
                     # Test needs to be ORDERED
@@ -645,7 +699,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
             gaps.append("VERIFY: Check treatment records and update clock stop date")
         
         # Post-treatment follow-up
-        if any(phrase in letter_lower for phrase in ['post-op', 'follow-up', 'review', 'check wound']):
+        if hits.any(['post-op', 'follow-up', 'review', 'check wound']):
             actions_required.append("CHECK: Post-treatment follow-up booked (Y/N)")
             actions_required.append("CHECK: Follow-up appointment date recorded (Y/N)")
     
@@ -698,9 +752,9 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     # ============================================
     
     # FOLLOW-UP APPOINTMENT CHECKS (with past/future logic)
-    if 'follow' in letter_lower or 'review' in letter_lower or 'appointment' in letter_lower:
+    if hits.has('follow') or hits.has('review') or hits.has('appointment'):
         # Check if this is PAST (already booked) or FUTURE (needs to be booked)
-        appt_action = is_past_action(letter_lower, 'follow')
+        appt_action = is_past_action('follow')
         
         if appt_action == 'future':
             # Appointment needs to be BOOKED
@@ -719,9 +773,9 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     
     # GP LETTER CHECKS (for all codes except Code 10 which has it in Section 10)
     # With past/future logic
-    if rtt_code != "10" and any(phrase in letter_lower for phrase in ['gp', 'copy to gp', 'inform gp', 'gp letter']):
+    if rtt_code != "10" and hits.any(['gp', 'copy to gp', 'inform gp', 'gp letter']):
         # Check if GP letter already sent or needs to be sent
-        gp_action = is_past_action(letter_lower, 'gp')
+        gp_action = is_past_action('gp')
         
         if gp_action == 'future' or gp_action == 'unclear':
             # GP letter needs to be SENT
@@ -823,15 +877,17 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
     
     # Try to extract letter date from letter text
     letter_date = validation_date  # Default to today if not found
-    import re
-    date_patterns = [
-        r'Date[:\s]+(\d{1,2})[/\s-]+(\d{1,2})[/\s-]+(\d{4})',
-        r'Dated[:\s]+(\d{1,2})[/\s-]+(\d{1,2})[/\s-]+(\d{4})',
-        r'(\d{1,2})[/\s-]+(\d{1,2})[/\s-]+(\d{4})'
-    ]
+    
+    # Every labelled date also matches the bare pattern, and needs 'date' in the text
+    if not _LETTER_DATE_PATTERNS[-1].search(letter_text):
+        date_patterns = []
+    elif 'date' not in letter_lower:
+        date_patterns = _LETTER_DATE_PATTERNS[-1:]
+    else:
+        date_patterns = _LETTER_DATE_PATTERNS
     
     for pattern in date_patterns:
-        match = re.search(pattern, letter_text, re.IGNORECASE)
+        match = pattern.search(letter_text)
         if match:
             try:
                 day = match.group(1).zfill(2)
@@ -858,7 +914,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
             followup_status = f". F/U APPT BOOKED FOR {followup_date}"
         else:
             followup_status = ". F/U APPT REQUIRED BOOKING"
-    elif any(phrase in letter_lower for phrase in ['follow-up', 'follow up', 'review']):
+    elif hits.any(['follow-up', 'follow up', 'review']):
         if followup_booked == 'Y':
             followup_status = ". F/U APPT BOOKED"
         else:
@@ -920,32 +976,32 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
             # Check for diagnostics in letter
             diagnostic_mentioned = False
             diagnostic_type = ""
-            if any(test in letter_lower for test in ['mri', 'ct', 'scan', 'ultrasound', 'x-ray', 'ecg', 'echo']):
+            if hits.any(['mri', 'ct', 'scan', 'ultrasound', 'x-ray', 'ecg', 'echo']):
                 diagnostic_mentioned = True
-                if 'mri' in letter_lower:
+                if hits.has('mri'):
                     diagnostic_type = "MRI SCAN"
-                elif 'ct' in letter_lower or 'ct scan' in letter_lower:
+                elif hits.has('ct') or hits.has('ct scan'):
                     diagnostic_type = "CT SCAN"
-                elif 'ultrasound' in letter_lower:
+                elif hits.has('ultrasound'):
                     diagnostic_type = "ULTRASOUND"
-                elif 'x-ray' in letter_lower or 'xray' in letter_lower:
+                elif hits.has('x-ray') or hits.has('xray'):
                     diagnostic_type = "X-RAY"
-                elif 'ecg' in letter_lower:
+                elif hits.has('ecg'):
                     diagnostic_type = "ECG"
-                elif 'echo' in letter_lower:
+                elif hits.has('echo'):
                     diagnostic_type = "ECHOCARDIOGRAM"
             
             # Check for surgery/procedure in letter
-            surgery_mentioned = any(word in letter_lower for word in ['surgery', 'operation', 'procedure', 'list for', 'waiting list'])
+            surgery_mentioned = hits.any(['surgery', 'operation', 'procedure', 'list for', 'waiting list'])
             
             # Build T21 style comment based on what letter mentions
             if diagnostic_mentioned:
                 # Check if diagnostic is PAST (done) or FUTURE (to be done)
-                is_done = any(phrase in letter_lower for phrase in ['was performed', 'has been done', 'underwent', 'results from'])
+                is_done = hits.any(['was performed', 'has been done', 'underwent', 'results from'])
                 
                 if is_done:
                     # Diagnostic already done - check if results received
-                    results_received = any(phrase in letter_lower for phrase in ['results', 'showed', 'demonstrated', 'normal', 'abnormal'])
+                    results_received = hits.any(['results', 'showed', 'demonstrated', 'normal', 'abnormal'])
                     if results_received:
                         # Results in letter
                         comment_line = f"{validation_date} T21 - DXG [{diagnostic_type}] {letter_date}"
@@ -994,7 +1050,7 @@ def validate_clinic_letter(letter_text: str, pas_summary: Dict) -> Dict:
                     else:
                         fu_date = str(followup_date_raw)
                     comment_line = f"{validation_date} T21 - F/U APPT {fu_date}"
-                elif any(phrase in letter_lower for phrase in ['follow-up', 'follow up', 'review']):
+                elif hits.any(['follow-up', 'follow up', 'review']):
                     comment_line = f"{validation_date} T21 - AWAITING F/U APPT"
                 else:
                     comment_line = f"{validation_date} T21 - CLINIC OUTCOME REVIEWED"
@@ -1627,6 +1683,33 @@ def generate_comment_line(data: Dict) -> Dict:
 # AI-ENHANCED FUNCTIONS (NEW!)
 # ============================================================================
 
+def merge_ai_letter_result(traditional_result: Dict, ai_result: Dict) -> Dict:
+    """
+    Merge AI NLP insights into a keyword-based letter validation result
+    
+    Args:
+        traditional_result: Result from validate_clinic_letter() (updated in place)
+        ai_result: Output of the letter model's read_letter()
+    
+    Returns:
+        The updated traditional_result
+    """
+    traditional_result['ai_enhanced'] = True
+    traditional_result['ai_confidence'] = ai_result.get('confidence', 0)
+    traditional_result['ai_extracted_data'] = ai_result.get('extracted_data', {})
+    traditional_result['ai_suggestions'] = ai_result.get('suggestions', [])
+    
+    # If AI detects different code, flag for review
+    if ai_result.get('rtt_code') != traditional_result.get('rtt_code'):
+        traditional_result['code_conflict'] = {
+            'traditional': traditional_result.get('rtt_code'),
+            'ai_suggested': ai_result.get('rtt_code'),
+            'review_required': True
+        }
+    
+    return traditional_result
+
+
 def validate_clinic_letter_ai_enhanced(letter_text: str, pas_summary: Dict, use_ai: bool = False) -> Dict:
     """
     AI-Enhanced Clinic Letter Interpreter
@@ -1649,20 +1732,7 @@ def validate_clinic_letter_ai_enhanced(letter_text: str, pas_summary: Dict, use_
         try:
             nlp_reader = NLPLetterReader()
             ai_result = nlp_reader.read_letter(letter_text)
-            
-            # Merge AI insights with traditional results
-            traditional_result['ai_enhanced'] = True
-            traditional_result['ai_confidence'] = ai_result.get('confidence', 0)
-            traditional_result['ai_extracted_data'] = ai_result.get('extracted_data', {})
-            traditional_result['ai_suggestions'] = ai_result.get('suggestions', [])
-            
-            # If AI detects different code, flag for review
-            if ai_result.get('rtt_code') != traditional_result.get('rtt_code'):
-                traditional_result['code_conflict'] = {
-                    'traditional': traditional_result.get('rtt_code'),
-                    'ai_suggested': ai_result.get('rtt_code'),
-                    'review_required': True
-                }
+            merge_ai_letter_result(traditional_result, ai_result)
         except Exception as e:
             traditional_result['ai_error'] = str(e)
             traditional_result['ai_enhanced'] = False
@@ -1783,10 +1853,19 @@ def auto_fix_pas_errors(validation_result: Dict, pas_data: Dict) -> Dict:
         }
 
 
+# One engine (and process pool) shared by every validate_bulk_letters() call;
+# calls take turns, since the engine's stage latency is per batch
+_bulk_letter_engine = None
+_bulk_letter_lock = threading.Lock()
+
+
 def validate_bulk_letters(letters: List[Dict], use_ai: bool = False) -> Dict:
     """
     Validate multiple clinic letters at once (ULTRA-FAST!)
     
+    Rule-based interpretation runs across a process pool and AI calls run
+    concurrently (bounded, with retry) - see bulk_letter_engine.
+    
     Args:
         letters: List of {'text': str, 'pas_summary': Dict}
         use_ai: Use AI enhancement (slower but more accurate)
@@ -1797,11 +1876,18 @@ def validate_bulk_letters(letters: List[Dict], use_ai: bool = False) -> Dict:
             'validation_time': float,
             'results': List[Dict],
             'errors_found': int,
-            'auto_fixed': int,
-            'efficiency': str
+            'efficiency': str,
+            'stage_latency': Dict (per-stage latency)
         }
     """
-    if not BATCH_AVAILABLE:
+    # Imported here - bulk_letter_engine imports this module
+    try:
+        from bulk_letter_engine import BulkLetterEngine
+        BULK_AVAILABLE = True
+    except Exception:
+        BULK_AVAILABLE = False
+    
+    if not BULK_AVAILABLE:
         # Fallback to sequential processing
         import time
         start_time = time.time()
@@ -1825,15 +1911,21 @@ def validate_bulk_letters(letters: List[Dict], use_ai: bool = False) -> Dict:
             'efficiency': f"Processed {len(letters)} letters in {end_time - start_time:.2f}s"
         }
     
-    try:
-        engine = BatchValidationEngine()
-        result = engine.validate_batch(letters, use_ai=use_ai)
-        return result
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
-        }
+    global _bulk_letter_engine
+    with _bulk_letter_lock:
+        try:
+            if _bulk_letter_engine is None:
+                _bulk_letter_engine = BulkLetterEngine()
+            return _bulk_letter_engine.validate(letters, use_ai=use_ai)
+        except Exception as e:
+            # Start over with a fresh pool next time (e.g. a worker process died)
+            if _bulk_letter_engine is not None:
+                _bulk_letter_engine.close()
+                _bulk_letter_engine = None
+            return {
+                'success': False,
+                'error': str(e)
+            }
 
 
 # ============================================================================
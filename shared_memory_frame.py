@@ -0,0 +1,244 @@
+"""
+T21 Shared-Memory Frame
+Hand a parsed patient DataFrame to worker processes without copying it
+
+Features:
+- Every column packed once into a single multiprocessing shared-memory block
+- Numeric/date columns stored as raw NumPy buffers (zero-copy in workers)
+- Text columns stored Arrow-style (offsets + character data, or dictionary
+  codes + values for low-cardinality columns like gender and RTT dates)
+- Workers attach by name and rebuild only the rows of their own shard
+
+Usage:
+    with SharedFrame(df) as frame:
+        futures = [executor.submit(work, frame.spec, start, stop) for ...]
+
+    # In the worker
+    with attach_shard(spec, start, stop) as shard:
+        ...  # shard is a regular DataFrame
+"""
+
+import pickle
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Use dictionary encoding when a text column has at most this share of distinct values
+DICTIONARY_MAX_RATIO = 0.5
+
+
+@dataclass
+class SharedBuffer:
+    """Location of one array inside the shared-memory block"""
+    offset: int
+    length: int
+    dtype: str
+
+
+@dataclass
+class SharedColumn:
+    """How one DataFrame column is laid out in shared memory"""
+    name: str
+    layout: str  # numeric, text, dictionary, pickled
+    dtype: str  # original pandas dtype, restored in the worker
+    buffers: Dict[str, SharedBuffer] = field(default_factory=dict)
+    encoding: str = "ascii"  # text data: ascii (1 byte/char) or utf-32-le (4 bytes/char)
+
+
+@dataclass
+class SharedFrameSpec:
+    """Picklable description of a SharedFrame - this is all a worker receives"""
+    shm_name: str
+    num_rows: int
+    columns: List[SharedColumn]
+
+
+def _is_plain_text(series: pd.Series) -> bool:
+    """True if every cell is a str or NaN (what pd.read_csv produces for text)"""
+    if series.dtype != object:
+        return pd.api.types.is_string_dtype(series.dtype)
+    for value in series.to_numpy(dtype=object):
+        if not isinstance(value, str) and not (isinstance(value, float) and value != value):
+            return False
+    return True
+
+
+def _encode_text(values: np.ndarray) -> Tuple[Dict[str, np.ndarray], str]:
+    """Pack an object array of str/NaN into offsets, character data and validity"""
+    valid = np.array([isinstance(v, str) for v in values], dtype=bool)
+    filled = [v if ok else "" for v, ok in zip(values, valid)]
+    lengths = np.fromiter((len(v) for v in filled), dtype=np.int64, count=len(filled))
+    offsets = np.zeros(len(filled) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    text = "".join(filled)
+    data = text.encode("utf-8")
+    encoding = "ascii"
+    if len(data) != len(text):
+        # Non-ASCII present - fixed width keeps character offsets valid
+        data = text.encode("utf-32-le")
+        encoding = "utf-32-le"
+
+    return {
+        "offsets": offsets,
+        "data": np.frombuffer(data, dtype=np.uint8),
+        "valid": valid
+    }, encoding
+
+
+def _decode_text(arrays: Dict[str, np.ndarray], encoding: str, start: int, stop: int) -> np.ndarray:
+    """Rebuild rows [start, stop) of a text column as an object array"""
+    offsets = arrays["offsets"][start:stop + 1]
+    width = 1 if encoding == "ascii" else 4
+    base = int(offsets[0]) if len(offsets) else 0
+    end = int(offsets[-1]) if len(offsets) else 0
+    text = arrays["data"][base * width:end * width].tobytes().decode(encoding)
+
+    relative = (offsets - base).tolist()
+    valid = arrays["valid"][start:stop].tolist()
+    out = np.empty(stop - start, dtype=object)
+    for i in range(stop - start):
+        out[i] = text[relative[i]:relative[i + 1]] if valid[i] else np.nan
+    return out
+
+
+class SharedFrame:
+    """A DataFrame copied once into shared memory for the lifetime of a batch"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Pack a DataFrame into shared memory
+
+        Args:
+            df: DataFrame to share (its index is not preserved)
+        """
+        packed: List[Tuple[SharedColumn, Dict[str, np.ndarray]]] = []
+
+        for name in df.columns:
+            series = df[name]
+            dtype = str(series.dtype)
+
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iufbmM":
+                arrays = {"values": series.to_numpy()}
+                if series.dtype.kind in "mM":
+                    arrays = {"values": arrays["values"].view(np.int64)}
+                packed.append((SharedColumn(name, "numeric", dtype), arrays))
+
+            elif _is_plain_text(series):
+                codes, uniques = pd.factorize(series)
+                if len(uniques) <= DICTIONARY_MAX_RATIO * max(len(series), 1):
+                    arrays, encoding = _encode_text(np.asarray(uniques, dtype=object))
+                    arrays = {"codes": codes.astype(np.int32), **{f"dict_{k}": v for k, v in arrays.items()}}
+                    packed.append((SharedColumn(name, "dictionary", dtype, encoding=encoding), arrays))
+                else:
+                    arrays, encoding = _encode_text(series.to_numpy(dtype=object))
+                    packed.append((SharedColumn(name, "text", dtype, encoding=encoding), arrays))
+
+            else:
+                # Mixed Python objects - pickled once, each worker unpickles it
+                blob = pickle.dumps(series.to_numpy(dtype=object), protocol=pickle.HIGHEST_PROTOCOL)
+                packed.append((SharedColumn(name, "pickled", dtype), {"blob": np.frombuffer(blob, dtype=np.uint8)}))
+
+        # Lay every buffer out back to back (8-byte aligned) in one block
+        total = 0
+        for column, arrays in packed:
+            for key, array in arrays.items():
+                column.buffers[key] = SharedBuffer(total, len(array), array.dtype.str)
+                total += (array.nbytes + 7) // 8 * 8
+
+        self._shm = SharedMemory(create=True, size=max(total, 1))
+        for column, arrays in packed:
+            for key, array in arrays.items():
+                buffer = column.buffers[key]
+                target = np.ndarray(len(array), dtype=array.dtype, buffer=self._shm.buf, offset=buffer.offset)
+                target[:] = array
+                del target
+
+        self.spec = SharedFrameSpec(
+            shm_name=self._shm.name,
+            num_rows=len(df),
+            columns=[column for column, _ in packed]
+        )
+
+    def shard_bounds(self, num_shards: int) -> List[Tuple[int, int]]:
+        """Split the rows into contiguous [start, stop) ranges"""
+        num_shards = max(1, min(num_shards, self.spec.num_rows))
+        edges = np.linspace(0, self.spec.num_rows, num_shards + 1).astype(int)
+        return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+    def close(self):
+        """Release and unlink the shared-memory block"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _view(shm: SharedMemory, buffer: SharedBuffer) -> np.ndarray:
+    """Read-only NumPy view of one buffer"""
+    array = np.ndarray(buffer.length, dtype=np.dtype(buffer.dtype), buffer=shm.buf, offset=buffer.offset)
+    array.flags.writeable = False
+    return array
+
+
+@contextmanager
+def attach_shard(spec: SharedFrameSpec, start: int, stop: int) -> Iterator[pd.DataFrame]:
+    """
+    Rebuild rows [start, stop) of a SharedFrame inside a worker process
+
+    Numeric columns are views on the shared block; text columns are decoded
+    for the shard's rows only. The DataFrame must not be used after the
+    with-block exits.
+    """
+    # Pool workers share the parent's resource tracker, so attaching here
+    # does not hand ownership of the block to the worker
+    shm = SharedMemory(name=spec.shm_name)
+    shard = None
+
+    try:
+        data: Dict[str, Any] = {}
+        for column in spec.columns:
+            arrays = {key: _view(shm, buffer) for key, buffer in column.buffers.items()}
+
+            if column.layout == "numeric":
+                values = arrays["values"][start:stop]
+                if column.dtype.startswith(("datetime64", "timedelta64")):
+                    values = values.view(np.dtype(column.dtype))
+                data[column.name] = pd.Series(values, dtype=values.dtype, copy=False)
+
+            elif column.layout == "dictionary":
+                uniques = _decode_text(
+                    {key[len("dict_"):]: array for key, array in arrays.items() if key.startswith("dict_")},
+                    column.encoding, 0, len(arrays["dict_valid"])
+                )
+                codes = arrays["codes"][start:stop]
+                values = np.append(uniques, np.nan).astype(object)[codes]  # code -1 -> NaN
+                data[column.name] = pd.Series(values, dtype=column.dtype)
+
+            elif column.layout == "text":
+                data[column.name] = pd.Series(_decode_text(arrays, column.encoding, start, stop), dtype=column.dtype)
+
+            else:
+                values = pickle.loads(arrays["blob"].tobytes())[start:stop]
+                data[column.name] = pd.Series(values, dtype=column.dtype)
+
+        shard = pd.DataFrame(data, copy=False)
+        data = None
+        yield shard
+    finally:
+        shard = None
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still referenced; the mapping is released at process exit
+            pass
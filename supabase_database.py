@@ -86,6 +86,19 @@ def get_ptl_patient_by_id(patient_id, user_email):
         return None
 
 
+def get_ptl_patients_by_ids(patient_ids, user_email=None):
+    """Patients with these ids (only user_email's, if given) - one query, not a table scan"""
+    try:
+        query = supabase.table('ptl_patients').select('*').in_('patient_id', list(patient_ids))
+        if user_email is not None:
+            query = query.eq('user_email', user_email)
+        result = query.execute()
+        return result.data if result.data else []
+    except Exception as e:
+        print(f"Error getting patients: {e}")
+        return []
+
+
 def update_ptl_patient(patient_id, user_email, updates):
     """Update patient - ONLY if belongs to user"""
     try:
@@ -97,10 +110,10 @@ def update_ptl_patient(patient_id, user_email, updates):
 
 
 def delete_ptl_patient(patient_id, user_email):
-    """Delete patient - ONLY if belongs to user"""
+    """Delete patient - ONLY if belongs to user (False if no row matched)"""
     try:
         result = supabase.table('ptl_patients').delete().eq('patient_id', patient_id).eq('user_email', user_email).execute()
-        return True
+        return bool(result.data)
     except Exception as e:
         return False
 
@@ -316,6 +329,18 @@ def get_cancer_patients_for_user(user_email):
         print(f"Error getting cancer patients: {e}")
         return []
 
+def get_cancer_patients_by_ids(pathway_ids, user_email=None):
+    """Cancer patients with these pathway ids (only user_email's, if given)."""
+    try:
+        query = supabase.table('cancer_pathways').select('*').in_('pathway_id', list(pathway_ids))
+        if user_email is not None:
+            query = query.eq('user_email', user_email)
+        result = query.execute()
+        return result.data if result.data else []
+    except Exception as e:
+        print(f"Error getting cancer patients: {e}")
+        return []
+
 def update_cancer_patient(patient_id, user_email, updates):
     """Update a cancer patient's details."""
     try:
@@ -356,6 +381,18 @@ def get_mdt_meetings_for_user(user_email):
         print(f"Error getting MDT meetings: {e}")
         return []
 
+def get_mdt_meetings_by_ids(meeting_ids, user_email=None):
+    """MDT meetings with these ids (only user_email's, if given)."""
+    try:
+        query = supabase.table('mdt_meetings').select('*').in_('meeting_id', list(meeting_ids))
+        if user_email is not None:
+            query = query.eq('user_email', user_email)
+        result = query.execute()
+        return result.data if result.data else []
+    except Exception as e:
+        print(f"Error getting MDT meetings: {e}")
+        return []
+
 def update_mdt_meeting(user_email, meeting_id, updates):
     """Update an MDT meeting's details."""
     try:
@@ -418,6 +455,15 @@ def get_appointments_for_user(user_email):
         print(f"Error getting appointments: {e}")
         return []
 
+def get_appointments_by_ids(appointment_ids, user_email):
+    """A user's appointments with these ids."""
+    try:
+        result = supabase.table('appointments').select('*').in_('appointment_id', list(appointment_ids)).eq('user_email', user_email).execute()
+        return result.data if result.data else []
+    except Exception as e:
+        print(f"Error getting appointments: {e}")
+        return []
+
 def update_appointment(user_email, appointment_id, updates):
     """Update an appointment's details."""
     try:
@@ -714,6 +760,212 @@ supabase_delete_document = delete_document
 supabase_download_document = download_document
 
 
+# ============================================
+# PAGED QUERIES - PROJECTION, KEYSET CURSORS, FILTER PUSHDOWN
+# ============================================
+# Fetch one page at a time instead of select('*') on a whole table.
+# Pages are ordered by (order_by, key_column) and continue from a cursor
+# (the last row's values), so page 200 costs the same as page 1.
+#
+#   page = query_page('ptl_patients', columns=['patient_id', 'patient_name'],
+#                     filters={'user_email': email}, page_size=25)
+#   next_page = query_page('ptl_patients', ..., after=page['last_cursor'])
+#
+#   for row in iter_rows('audit_log', filters={'user_email': email},
+#                        order_by='timestamp'):   # exports
+#       ...
+#
+# Sort columns differ by table: created_at (ptl_patients, users), created_date
+# (appointments), timestamp (audit_log) - the get_*_page wrappers pick the
+# right one and ADD_KEYSET_PAGINATION_INDEXES.sql indexes it.
+
+DEFAULT_PAGE_SIZE = 25
+EXPORT_BATCH_SIZE = 1000
+
+# filters=[(column, op, value)] operators, mapped to the query builder method
+FILTER_OPERATORS = {
+    'eq': 'eq', 'neq': 'neq', 'gt': 'gt', 'gte': 'gte', 'lt': 'lt', 'lte': 'lte',
+    'like': 'like', 'ilike': 'ilike', 'in': 'in_', 'is': 'is_'
+}
+
+
+def _normalise_filters(filters):
+    """{column: value} / [(column, op, value)] -> [(column, op, value)]"""
+    if not filters:
+        return []
+    if isinstance(filters, dict):
+        return [(column, 'in' if isinstance(value, (list, tuple, set)) else 'eq', value)
+                for column, value in filters.items()]
+    return list(filters)
+
+
+def _apply_filters(query, filters):
+    """Push filters down into the query"""
+    for column, op, value in _normalise_filters(filters):
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if op == 'in':
+            value = list(value)
+        query = getattr(query, FILTER_OPERATORS[op])(column, value)
+    return query
+
+
+def _postgrest_value(value):
+    """Quote a value for use inside an or_() filter string"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_filter(query, order_by, key_column, cursor, forward):
+    """Rows strictly after (forward) or before the cursor in (order_by, key_column) order"""
+    op = 'gt' if forward else 'lt'
+    if order_by == key_column:
+        return getattr(query, op)(key_column, cursor[-1])
+    order_value, key_value = cursor
+    return query.or_(
+        f"{order_by}.{op}.{_postgrest_value(order_value)},"
+        f"and({order_by}.eq.{_postgrest_value(order_value)},{key_column}.{op}.{_postgrest_value(key_value)})"
+    )
+
+
+def _cursor(row, order_by, key_column):
+    """Cursor pointing at a row"""
+    if order_by == key_column:
+        return [row.get(key_column)]
+    return [row.get(order_by), row.get(key_column)]
+
+
+def _fetch_page(table, columns='*', filters=None, order_by='created_at', descending=False,
+                page_size=DEFAULT_PAGE_SIZE, after=None, before=None, key_column='id',
+                with_count=False):
+    """query_page without error handling (raises on database errors)"""
+    if isinstance(columns, str):
+        select = columns
+    else:
+        wanted = list(columns)
+        for column in (order_by, key_column):
+            if column not in wanted:
+                wanted.append(column)  # needed for the cursors
+        select = ','.join(wanted)
+
+    # Going backwards = reading the reversed order forwards, then flipping
+    backwards = before is not None and after is None
+    reverse = descending != backwards
+
+    query = supabase.table(table).select(select, count='exact' if with_count else None)
+    query = _apply_filters(query, filters)
+    cursor = before if backwards else after
+    if cursor is not None:
+        query = _keyset_filter(query, order_by, key_column, cursor, forward=not reverse)
+    if order_by != key_column:
+        query = query.order(order_by, desc=reverse)
+    query = query.order(key_column, desc=reverse).limit(page_size + 1)
+
+    result = query.execute()
+    rows = result.data or []
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    return {
+        'rows': rows,
+        'first_cursor': _cursor(rows[0], order_by, key_column) if rows else None,
+        'last_cursor': _cursor(rows[-1], order_by, key_column) if rows else None,
+        'has_more': has_more,
+        'total': result.count if with_count else None
+    }
+
+
+def query_page(table, columns='*', filters=None, order_by='created_at', descending=False,
+               page_size=DEFAULT_PAGE_SIZE, after=None, before=None, key_column='id',
+               with_count=False):
+    """
+    One page of a table, in (order_by, key_column) order
+
+    Args:
+        table: Table name
+        columns: '*', or the columns to fetch (cursor columns are added)
+        filters: {column: value} (a list value = IN), or [(column, op, value)]
+            with op one of FILTER_OPERATORS - applied in the database
+        order_by: Sort column (should be non-null, e.g. created_at)
+        descending: Newest first
+        page_size: Rows per page
+        after: last_cursor of the previous page (next page)
+        before: first_cursor of the following page (previous page)
+        key_column: Unique column breaking ties in order_by
+        with_count: Also return the total matching rows (one extra count)
+
+    Returns:
+        {'rows', 'first_cursor', 'last_cursor', 'has_more', 'total'}
+        has_more = more rows in the direction read
+    """
+    if not SUPABASE_AVAILABLE or supabase is None:
+        return {'rows': [], 'first_cursor': None, 'last_cursor': None, 'has_more': False, 'total': 0}
+    try:
+        return _fetch_page(table, columns, filters, order_by, descending, page_size,
+                           after, before, key_column, with_count)
+    except Exception as e:
+        print(f"Error paging {table}: {e}")
+        return {'rows': [], 'first_cursor': None, 'last_cursor': None, 'has_more': False, 'total': 0}
+
+
+def count_rows(table, filters=None, key_column='id'):
+    """Number of rows matching filters (counted in the database)"""
+    if not SUPABASE_AVAILABLE or supabase is None:
+        return 0
+    try:
+        query = _apply_filters(supabase.table(table).select(key_column, count='exact'), filters)
+        result = query.limit(1).execute()
+        return result.count or 0
+    except Exception as e:
+        print(f"Error counting {table}: {e}")
+        return 0
+
+
+def iter_rows(table, columns='*', filters=None, order_by='created_at', descending=False,
+              batch_size=EXPORT_BATCH_SIZE, key_column='id'):
+    """
+    Stream every matching row, fetched batch_size at a time (for exports)
+
+    Raises on database errors, so an export never silently stops early.
+    """
+    if not SUPABASE_AVAILABLE or supabase is None:
+        return
+    after = None
+    while True:
+        page = _fetch_page(table, columns, filters, order_by, descending, batch_size, after,
+                           None, key_column)
+        yield from page['rows']
+        if not page['has_more']:
+            return
+        after = page['last_cursor']
+
+
+def get_ptl_patients_page(user_email=None, **page_args):
+    """One page of a user's PTL patients (user_email=None: all users)"""
+    filters = {'user_email': user_email} if user_email else None
+    return query_page('ptl_patients', filters=filters, **page_args)
+
+
+def get_users_page(**page_args):
+    """One page of users"""
+    return query_page('users', **page_args)
+
+
+def get_appointments_page(user_email, **page_args):
+    """One page of a user's appointments, in booking order"""
+    page_args.setdefault('order_by', 'created_date')
+    return query_page('appointments', filters={'user_email': user_email}, **page_args)
+
+
+def get_audit_logs_page(user_email, **page_args):
+    """One page of a user's audit log, newest first by default"""
+    page_args.setdefault('order_by', 'timestamp')
+    page_args.setdefault('descending', True)
+    return query_page('audit_log', filters={'user_email': user_email}, **page_args)
+
+
 if __name__ == "__main__":
     # Test connection when run directly
     print("Testing Supabase connection...")
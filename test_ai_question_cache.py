@@ -0,0 +1,99 @@
+"""
+Regression test: similarity search through the trigram index finds the same
+cached answer as comparing the question with every cached question
+
+Run: python -m pytest -q test_ai_question_cache.py
+"""
+
+import importlib
+import random
+import sqlite3
+import threading
+
+import pytest
+
+WORDS = ['what', 'is', 'the', 'rtt', 'clock', 'start', 'rule', 'for', 'a', 'referral', 'when',
+         'does', 'stop', 'patient', 'dna', 'first', 'appointment', 'code', '30', 'breach', 'week',
+         'pathway', 'validation', 'how', 'do', 'i', 'record', 'cancelled', 'by', 'hospital']
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module('ai_question_cache')
+    monkeypatch.setattr(module, 'CACHE_DB', str(tmp_path / "cache.db"))
+    monkeypatch.setattr(module, '_local', threading.local())
+    module.init_cache_database()
+    return module
+
+
+def perturb(rng, question):
+    chars = list(question)
+    for _ in range(rng.randint(0, 4)):
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < .4:
+            chars[i] = rng.choice('abcdefghij ')
+        elif op < .7:
+            del chars[i]
+        else:
+            chars.insert(i, rng.choice('abcdefghij'))
+    return ''.join(chars) or 'x'
+
+
+def scanned(cache, question, threshold):
+    """Best match by comparing with every cached question (ids in order)"""
+    normalized = cache.normalize_question(question)
+    best, best_similarity = None, 0.0
+    for cached_q, cached_norm in sqlite3.connect(cache.CACHE_DB).execute(
+            'SELECT question_text, question_normalized FROM question_cache ORDER BY id'):
+        similarity = cache.calculate_similarity(normalized, cached_norm)
+        if similarity > best_similarity and similarity >= threshold:
+            best, best_similarity = cached_q, similarity
+    return best
+
+
+@pytest.mark.parametrize('threshold', [0.85, 0.7])
+def test_indexed_search_matches_full_scan(cache, threshold):
+    rng = random.Random(4)
+    questions = []
+    for i in range(300):
+        base = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 14)))
+        questions.append(base if rng.random() < .5 or not questions else perturb(rng, rng.choice(questions)))
+    for i, question in enumerate(questions):
+        cache.save_to_cache(question, f'answer {i}')
+
+    for _ in range(150):
+        question = perturb(rng, rng.choice(questions))
+        if cache.get_question_hash(question) in {cache.get_question_hash(q) for q in questions}:
+            continue
+        found = cache.search_cache(question, similarity_threshold=threshold)
+        assert (found and found['question']) == scanned(cache, question, threshold), question
+
+
+def test_match_beyond_closest_trigram_sets(cache):
+    # Reorderings share more trigrams with the question than a copy with a
+    # typo every few letters, but only the copy passes SequenceMatcher
+    rng = random.Random(9)
+    words = 'how do i record a patient cancelled by hospital on the rtt pathway'.split()
+    for i in range(60):
+        cache.save_to_cache(' '.join(rng.sample(words, len(words))), f'shuffled {i}')
+    cache.save_to_cache('how do i recxrd a patxent cancxlled by xospital xn the rtx pathway', 'match')
+
+    question = 'how do i record a patient cancelled by hospital on the rtt pathway'
+    assert cache.search_cache(question)['answer'] == 'match'
+
+
+def test_failed_save_leaves_connection_usable(cache, monkeypatch):
+    def broken_index(cursor, question_id, question_normalized):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    with monkeypatch.context() as m:
+        m.setattr(cache, 'index_question', broken_index)
+        assert not cache.save_to_cache('what is the rtt clock', 'answer')
+
+    conn = cache.get_connection()
+    assert not conn.in_transaction
+    assert conn.execute('SELECT COUNT(*) FROM question_cache').fetchone()[0] == 0
+    assert cache.save_to_cache('what is the rtt clock', 'answer')
+    assert cache.search_cache('what is the rtt clock')['answer'] == 'answer'
@@ -0,0 +1,82 @@
+"""
+Regression test: columnar, sharded and streaming validation match row-wise
+
+Run: python -m pytest -q test_batch_validation_columnar.py
+"""
+
+import random
+
+import pandas as pd
+import pytest
+
+from batch_validation_engine import BatchValidationEngine
+
+DATES = ['2024-01-05', '05/01/2024', '2030-02-01', 'garbage', '', None, '2024-13-01',
+         '2023-06-30', '2025-02-28T10:00:00+01:00', '20240105', '2022-01-01']
+
+
+def make_patients(seed: int, count: int) -> pd.DataFrame:
+    """Mixed clean and broken rows that exercise every rule phase"""
+    rng = random.Random(seed)
+    pick = rng.choice
+    rows = []
+    for i in range(count):
+        rows.append({
+            'pathway_number': pick([f'P{i}', None, '']),
+            'nhs_number': pick([str(rng.randint(10**9, 10**10 - 1)), str(rng.randint(10**8, 10**9 - 1)), None, 'abc']),
+            'patient_name': pick(['Jo Bloggs', None]),
+            'date_of_birth': pick(['1980-01-01', None]),
+            'gender': pick(['M', 'F', '1', 'X', None, 'Male']),
+            'referral_date': pick(['2024-01-01', None]),
+            'specialty_code': pick(['100', None]),
+            'clock_start_date': pick(DATES),
+            'clock_start_code': pick([10, 11, 12, 20, None]),
+            'appointments': pick([None, '[]', '[{"date": "x", "outcome": "y", "rtt_code": 20}]',
+                                  '[{"date": "x"}]', 'notjson', '{"a": 1}']),
+            'diagnostics': pick([None, '[]', '[{"rtt_code": 20}]', '[{"rtt_code": 30}]']),
+            'on_waiting_list': pick(['Yes', 'No', None]),
+            'tci_date': pick(['2024-05-01', None]),
+            'clock_stop_code': pick([30, 36, 40, None, 0]),
+            'clock_stop_date': pick(DATES),
+            'waiting_time_days': pick([0, 10, 200, None, 26]),
+            'breach_status': pick(['Breach', 'No', None]),
+            'priority': pick(['2WW', 'Routine', None]),
+            'first_appointment_date': pick(DATES),
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(params=[0, 1])
+def patients_csv(request, tmp_path):
+    path = tmp_path / "patients.csv"
+    make_patients(request.param, 1500).to_csv(path, index=False)
+    return str(path)
+
+
+def test_columnar_matches_rowwise(patients_csv):
+    engine = BatchValidationEngine()
+    rowwise = engine.validate_batch(patients_csv, mode='rowwise')
+    columnar = engine.validate_batch(patients_csv, mode='columnar')
+    failures_only = engine.validate_batch(patients_csv, mode='columnar', include_passing=False)
+
+    assert sorted(map(repr, columnar['results'])) == sorted(map(repr, rowwise['results']))
+    assert columnar['summary'] == rowwise['summary'] == failures_only['summary']
+    failing = lambda results: [repr(r) for r in results if r.status != 'PASS']
+    assert failing(failures_only['results']) == failing(columnar['results'])
+
+
+def test_sharded_matches_columnar(patients_csv):
+    engine = BatchValidationEngine()
+    columnar = engine.validate_batch(patients_csv, mode='columnar')
+    sharded = engine.validate_batch(patients_csv, mode='sharded', workers=2)
+
+    assert list(map(repr, sharded['results'])) == list(map(repr, columnar['results']))
+    assert sharded['summary'] == columnar['summary']
+
+
+def test_streaming_summary_matches_batch(patients_csv):
+    engine = BatchValidationEngine()
+    batch = engine.validate_batch(patients_csv, mode='rowwise')
+    streamed = engine.validate_streaming(patients_csv, chunk_size=1500)
+
+    assert streamed['summary'] == batch['summary']
@@ -0,0 +1,81 @@
+"""
+Regression test: bulk email only splits batches SendGrid rejected for a
+recipient, and a campaign with failed batches resumes with just those
+
+Run: python -m pytest -q test_bulk_email.py
+"""
+
+import pytest
+
+pytest.importorskip("requests")
+
+from bulk_email import BulkEmailDispatcher, EmailTransport, LocalSendGridSink, SendGridTransport
+
+
+class MessageRejected(EmailTransport):
+    """Answers every request like SendGrid does for an invalid from address"""
+
+    def __init__(self):
+        self.requests = 0
+
+    def send(self, payload):
+        self.requests += 1
+        return 400, None, ['from.email']
+
+
+class Flaky(EmailTransport):
+    """Fails (503) batches holding any address in down, accepts the rest"""
+
+    def __init__(self, down):
+        self.down = set(down)
+        self.delivered = []
+
+    def send(self, payload):
+        addresses = [to['email'] for p in payload['personalizations'] for to in p['to']]
+        if self.down & set(addresses):
+            return 503, None, []
+        self.delivered.extend(addresses)
+        return 202, None, []
+
+
+def emails(count):
+    return [f"student{i}@example.com" for i in range(count)]
+
+
+def test_bad_addresses_isolated(tmp_path):
+    bad = ['student17@example.com', 'student1234@example.com']
+    with LocalSendGridSink(reject_addresses=bad) as sink:
+        dispatcher = BulkEmailDispatcher(SendGridTransport('test-key', base_url=sink.url),
+                                         journal_dir=str(tmp_path))
+        report = dispatcher.send(emails(2000), "Subject", "<p>Hi</p>")
+
+    assert sorted(report['failed']) == sorted(bad)
+    assert report['sent'] == 1998 and len(sink.recipients) == 1998
+    assert report['requests'] < 60
+
+
+def test_message_level_400_does_not_split(tmp_path):
+    transport = MessageRejected()
+    dispatcher = BulkEmailDispatcher(transport, journal_dir=str(tmp_path))
+    report = dispatcher.send(emails(2000), "Subject", "<p>Hi</p>")
+
+    assert transport.requests == 4  # one per batch of 500
+    assert len(report['failed']) == 2000 and not report['complete']
+
+
+def test_failed_batches_resume(tmp_path):
+    transport = Flaky(down=['student3@example.com'])
+    dispatcher = BulkEmailDispatcher(transport, batch_size=10, max_retries=1, backoff_base=0,
+                                     journal_dir=str(tmp_path))
+    first = dispatcher.send(emails(50) + ['not-an-address'], "Subject", "<p>Hi</p>")
+    assert first['sent'] == 40 and len(first['failed']) == 11 and not first['complete']
+
+    transport.down.clear()
+    second = dispatcher.send(emails(50) + ['not-an-address'], "Subject", "<p>Hi</p>")
+    assert second['resumed'] == 40 and second['sent'] == 10
+    assert second['failed'] == ['not-an-address'] and second['complete']
+    assert sorted(transport.delivered) == sorted(emails(50))  # nobody emailed twice
+
+    # Finished campaign: sending again starts afresh
+    third = dispatcher.send(emails(50), "Subject", "<p>Hi</p>")
+    assert third['resumed'] == 0 and third['sent'] == 50
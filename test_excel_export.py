@@ -0,0 +1,61 @@
+"""
+Regression test: batch results export writes the workbook and its CSV /
+Parquet side outputs when column types change between row groups
+
+Run: python -m pytest -q test_excel_export.py
+"""
+
+import csv
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+import excel_export
+from excel_export import BATCH_RESULT_HEADERS, write_batch_results_excel
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def results(count):
+    """Compliance_Rate is a float in early rows and missing ('' default) later"""
+    for i in range(count):
+        summary = {'Excel_Flag_Color': 'GREEN'}
+        if i < count // 2:
+            summary['Compliance_Rate'] = 95.0
+        yield {'patient_name': f'Patient {i}', 'nhs_number': str(4000000000 + i),
+               'RTT_Code': 10 if i % 3 else '', 'Validation_Summary': summary,
+               'Excel_Report': {'Outcome': 'Valid', 'Validation_Comments': None if i % 2 else 'ok'}}
+
+
+def test_mixed_types_across_row_groups(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_export, 'PARQUET_BATCH_ROWS', 100)
+    output, csv_path, parquet_path = tmp_path / "out.xlsx", tmp_path / "out.csv", tmp_path / "out.parquet"
+
+    assert write_batch_results_excel(results(1000), str(output), csv_output=str(csv_path),
+                                     parquet_output=str(parquet_path)) == 1000
+
+    sheet = load_workbook(output).active
+    assert sheet.max_row == 1001
+
+    table = pq.read_table(parquet_path)
+    assert table.num_rows == 1000
+    assert table.column_names == BATCH_RESULT_HEADERS
+    rates = table.column(BATCH_RESULT_HEADERS[7]).to_pylist()
+    assert rates[0] == '95.0' and rates[-1] == ''
+
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == BATCH_RESULT_HEADERS and len(rows) == 1001
+
+
+def test_failed_side_output_keeps_workbook(tmp_path, capsys):
+    output = io.BytesIO()
+    missing_dir = tmp_path / "missing" / "out.parquet"
+
+    assert write_batch_results_excel(list(results(50)), output, parquet_output=str(missing_dir)) == 50
+
+    output.seek(0)
+    assert load_workbook(output).active.max_row == 51
+    assert "Parquet output failed" in capsys.readouterr().out
@@ -0,0 +1,80 @@
+"""
+Regression test: indexed multi-student job search matches searching each
+student on their own with the sequential filter passes
+
+Run: python -m pytest -q test_job_search_index.py
+"""
+
+import copy
+import random
+
+from job_accelerator.advanced_search_filters import (
+    AdvancedSearchEngine, JobIndex, JobSearchFilters, WorkType, search_jobs_for_students
+)
+
+TITLES = ['RTT Validator', 'Senior RTT Manager', 'Waiting List Coordinator', 'Medical Secretary',
+          'Booking Administrator', 'Lead Access Coordinator', 'Cost Analyst', 'Outpatient Administrator']
+DESCRIPTIONS = ['We offer Certificate of Sponsorship', 'Must have right to work in UK',
+                'Visa sponsorship available', 'hybrid working', 'work from home possible',
+                'on-site role', 'no sponsorship', 'costs team', 'Band 4 role', 'band 8a post', '']
+CITIES = ['London', 'Manchester', 'Birmingham', 'Leeds', 'Greater London']
+
+
+def make_jobs(rng: random.Random, count: int):
+    jobs = []
+    for _ in range(count):
+        job = {'title': rng.choice(TITLES) + rng.choice(['', ' - Band 3', ' - Band 4', ' Band 5', ' Band 7']),
+               'description': ' '.join(rng.sample(DESCRIPTIONS, 2)),
+               'location': rng.choice(CITIES)}
+        if rng.random() < .5:
+            job['salary_min'] = rng.choice([22000, 26530, 30000, 43000])
+        if rng.random() < .5:
+            job['salary_max'] = rng.choice([25000, 29114, 36000, 50000])
+        if rng.random() < .3:
+            job['working_pattern'] = rng.choice(['Remote', 'Hybrid', 'Full time'])
+        if rng.random() < .3:
+            job['requirements'] = rng.choice(DESCRIPTIONS)
+        jobs.append(job)
+    return jobs
+
+
+def make_filters(rng: random.Random) -> JobSearchFilters:
+    return JobSearchFilters(
+        requires_sponsorship=rng.random() < .5,
+        cities=rng.choice([None, [], ['London'], ['london', 'Leeds']]),
+        primary_keywords=rng.choice([None, ['RTT Validator'], ['rtt', 'administrator'], []]),
+        alternative_keywords=rng.choice([None, ['Coordinator'], []]),
+        exclude_keywords=rng.choice([None, [], ['cost']]),
+        nhs_bands=rng.choice([None, ['Band 4', 'Band 5'], ['Any Band'], ['Band 8A']]),
+        work_types=rng.choice([None, [WorkType.ANY], [WorkType.REMOTE], [WorkType.HYBRID, WorkType.ONSITE]]),
+        min_salary=rng.choice([None, 25000, 30000]),
+        max_salary=rng.choice([None, 35000]),
+        exclude_senior_roles=rng.random() < .7
+    )
+
+
+def test_students_match_individual_searches():
+    rng = random.Random(3)
+    jobs = make_jobs(rng, 2000)
+    students = {f's{i}': make_filters(rng) for i in range(40)}
+    original = copy.deepcopy(jobs)
+
+    results = search_jobs_for_students(students, jobs)
+
+    for student_id, filters in students.items():
+        # Each student alone, on an untouched copy of the jobs
+        expected = AdvancedSearchEngine(filters).search_sequential(copy.deepcopy(original))
+        assert results[student_id] == expected, student_id
+
+    # Shared job dicts are left as they were
+    assert jobs == original
+
+
+def test_single_search_matches_sequential():
+    rng = random.Random(5)
+    jobs = make_jobs(rng, 1000)
+    index = JobIndex(jobs)
+    for _ in range(20):
+        filters = make_filters(rng)
+        expected = AdvancedSearchEngine(filters).search_sequential(copy.deepcopy(jobs))
+        assert AdvancedSearchEngine(filters).search(index) == expected
@@ -0,0 +1,111 @@
+"""
+Regression test: NHS-number lookups through the patient index match a full
+scan of every module, before and after writes through the module hooks
+
+Run: python -m pytest -q test_patient_index.py
+"""
+
+import json
+import random
+import sqlite3
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+import patient_index
+import unified_patient_system
+
+
+@pytest.fixture
+def patients(tmp_path, monkeypatch):
+    """File-storage PTL, cancer, MDT and appointment data in a scratch directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(patient_index, '_patient_index', None)
+
+    import ptl_system
+    import cancer_pathway_system
+    import advanced_booking_system
+    for module in (ptl_system, cancer_pathway_system, advanced_booking_system):
+        monkeypatch.setattr(module, 'SUPABASE_ENABLED', False, raising=False)
+
+    rng = random.Random(7)
+    numbers = [str(rng.randint(10**9, 10**10 - 1)) for _ in range(600)]
+
+    def formatted(n):
+        return rng.choice([n, f"{n[:3]} {n[3:6]} {n[6:]}", f"{n[:3]}-{n[3:6]}-{n[6:]}"])
+
+    ptl = [{'patient_id': f'P{i}', 'nhs_number': formatted(rng.choice(numbers)), 'patient_name': f'Pat {i}',
+            'referral_date': f'2024-01-{i % 28 + 1:02d}', 'specialty': 'ENT', 'priority': 'Routine',
+            'appointments': [], 'events': [], 'rtt_code': '10'} for i in range(400)]
+    meetings = [{'meeting_id': f'M{i}', 'meeting_date': f'2024-04-{i % 28 + 1:02d}', 'specialty': 'Lung',
+                 'patients_discussed': [{'nhs_number': formatted(rng.choice(numbers)), 'patient_name': f'Mdt {i}{j}',
+                                         'diagnosis': 'd', 'discussed': j % 2 == 0} for j in range(3)]}
+                for i in range(60)]
+    appointments = [{'appointment_id': f'A{i}', 'nhs_number': formatted(rng.choice(numbers)), 'patient_name': f'Ap {i}',
+                     'appointment_date': f'2024-05-{i % 28 + 1:02d}', 'status': 'Booked',
+                     'clinic_location': 'C1', 'appointment_time': '09:00'} for i in range(400)]
+
+    with open('ptl_patients.json', 'w') as f:
+        json.dump({'patients': ptl}, f)
+    with open('mdt_meetings.json', 'w') as f:
+        json.dump({'meetings': meetings}, f)
+    with open('appointments.json', 'w') as f:
+        json.dump({'appointments': appointments}, f)
+    cancer_pathway_system.save_cancer_patients([
+        {'pathway_id': f'C{i}', 'nhs_number': formatted(rng.choice(numbers)), 'patient_name': f'Can {i}',
+         'referral_date': f'2024-02-{i % 28 + 1:02d}', 'clock_start_date': f'2024-02-{i % 28 + 1:02d}',
+         'milestones': []} for i in range(150)
+    ])
+    return numbers
+
+
+def scanned(monkeypatch, nhs_number):
+    with monkeypatch.context() as m:
+        m.setattr(unified_patient_system, 'PATIENT_INDEX_ENABLED', False)
+        return unified_patient_system.find_patient_by_nhs(nhs_number)
+
+
+def test_lookup_matches_full_scan(patients, monkeypatch):
+    for nhs_number in patients[:80] + ['0000000000']:
+        assert unified_patient_system.find_patient_by_nhs(nhs_number) == scanned(monkeypatch, nhs_number)
+
+
+def test_lookup_reads_only_the_patients_records(patients, monkeypatch):
+    expected = {nhs: scanned(monkeypatch, nhs) for nhs in patients[:40]}
+    unified_patient_system.find_patient_by_nhs(patients[0])  # build the index
+
+    def full_scan():
+        raise AssertionError("module loaded in full")
+
+    for loader in ('get_ptl_patients', 'get_all_cancer_patients', 'get_all_mdt_meetings', 'load_appointments'):
+        monkeypatch.setattr(unified_patient_system, loader, full_scan)
+    for nhs_number, record in expected.items():
+        assert unified_patient_system.find_patient_by_nhs(nhs_number) == record
+
+
+def test_lookup_follows_module_writes(patients, monkeypatch):
+    import cancer_pathway_system
+    unified_patient_system.find_patient_by_nhs(patients[0])  # build the index
+
+    pathway = cancer_pathway_system.add_cancer_patient(
+        patient_name='New Patient', nhs_number=patients[1], cancer_type='Lung',
+        pathway_type='2ww', referral_date='2024-06-01', referring_clinician='Dr A',
+        primary_site='Lung', suspected_diagnosis='Nodule'
+    )
+    cancer_pathway_system.add_cancer_milestone('C3', 'FIRST_SEEN', '2024-03-05', 'seen')
+    milestone_nhs = cancer_pathway_system.get_cancer_patient_by_id('C3')['nhs_number']
+
+    for nhs_number in (patients[1], milestone_nhs):
+        assert unified_patient_system.find_patient_by_nhs(nhs_number) == scanned(monkeypatch, nhs_number)
+    assert pathway
+
+
+def test_index_holds_no_patient_data(patients):
+    unified_patient_system.find_patient_by_nhs(patients[0])
+
+    conn = sqlite3.connect(patient_index.PATIENT_INDEX_DB)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(patient_refs)')}
+    assert columns == {'module', 'record_id', 'nhs_number', 'owner', 'seq'}
+    with open(patient_index.PATIENT_INDEX_DB, 'rb') as f:
+        assert b'Pat 1' not in f.read()
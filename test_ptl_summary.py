@@ -0,0 +1,79 @@
+"""
+Regression test: Supabase-mode PTL edits only touch the cached summaries
+when a row of the caller's actually changed, and only that owner's record
+
+Run: python -m pytest -q test_ptl_summary.py
+"""
+
+import pytest
+
+import ptl_system
+
+
+def patient(patient_id, owner, status='Awaiting First Appointment'):
+    return {'patient_id': patient_id, 'user_email': owner, 'patient_name': patient_id,
+            'nhs_number': '1234567890', 'specialty': 'ENT', 'priority': 'Routine',
+            'pathway_type': 'routine', 'clock_start_date': '2024-01-01', 'current_status': status}
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    """Admin ('*') and two students' summaries over rows that share a patient id"""
+    rows = [patient('PTL1', 'a@x'), patient('PTL1', 'b@x'), patient('PTL2', 'b@x')]
+    store = {'*': ptl_system.PTLSummary(rows),
+             'a@x': ptl_system.PTLSummary([r for r in rows if r['user_email'] == 'a@x']),
+             'b@x': ptl_system.PTLSummary([r for r in rows if r['user_email'] == 'b@x'])}
+
+    def update(patient_id, user_email, updates):
+        match = [r for r in rows if r['patient_id'] == patient_id and r['user_email'] == user_email]
+        for row in match:
+            row.update(updates)
+        return True, match[0] if match else None
+
+    def delete(patient_id, user_email):
+        match = [r for r in rows if r['patient_id'] == patient_id and r['user_email'] == user_email]
+        for row in match:
+            rows.remove(row)
+        return bool(match)
+
+    monkeypatch.setattr(ptl_system, 'SUPABASE_ENABLED', True)
+    monkeypatch.setattr(ptl_system, '_ptl_summaries', store)
+    monkeypatch.setattr(ptl_system, 'update_ptl_patient', update, raising=False)
+    monkeypatch.setattr(ptl_system, 'delete_ptl_patient', delete, raising=False)
+    monkeypatch.setattr(ptl_system, 'get_ptl_patient_by_id', lambda *a: None, raising=False)
+    for hook in ('update_patient_record', 'remove_patient_record'):
+        monkeypatch.setattr(ptl_system, hook, lambda *a: None)
+    return store
+
+
+def statuses(summary):
+    return sorted((r['user_email'], r['patient_id'], r['current_status']) for r in summary.records.values())
+
+
+def test_update_touches_only_the_owners_record(summaries, monkeypatch):
+    monkeypatch.setattr(ptl_system, 'get_current_user_email', lambda: 'a@x')
+    assert ptl_system.update_patient_status('PTL1', 'Seen')
+
+    assert ('a@x', 'PTL1', 'Seen') in statuses(summaries['*'])
+    assert ('b@x', 'PTL1', 'Awaiting First Appointment') in statuses(summaries['*'])
+    assert statuses(summaries['a@x']) == [('a@x', 'PTL1', 'Seen')]
+    assert all(status != 'Seen' for _, _, status in statuses(summaries['b@x']))
+
+
+def test_unmatched_edits_leave_summaries_alone(summaries, monkeypatch):
+    # Admin editing a student's patient: the user_email filter matches no row
+    monkeypatch.setattr(ptl_system, 'get_current_user_email', lambda: 'admin@x')
+    before = {scope: statuses(summary) for scope, summary in summaries.items()}
+
+    assert not ptl_system.update_patient_status('PTL2', 'Seen')
+    assert not ptl_system.remove_from_ptl('PTL2')
+    assert {scope: statuses(summary) for scope, summary in summaries.items()} == before
+
+
+def test_remove_drops_only_the_owners_record(summaries, monkeypatch):
+    monkeypatch.setattr(ptl_system, 'get_current_user_email', lambda: 'b@x')
+    assert ptl_system.remove_from_ptl('PTL1')
+
+    assert [r[:2] for r in statuses(summaries['*'])] == [('a@x', 'PTL1'), ('b@x', 'PTL2')]
+    assert [r[:2] for r in statuses(summaries['a@x'])] == [('a@x', 'PTL1')]
+    assert summaries['*'].stats()['total_patients'] == 2
@@ -0,0 +1,62 @@
+"""
+Regression test: the SQLite record store gives the same answers as the JSON
+file engine, imports legacy files, and reads without taking the write lock
+
+Run: python -m pytest -q test_record_store.py
+"""
+
+import random
+import sqlite3
+
+import pytest
+
+from record_store import JsonFileRecordStore, SQLiteRecordStore
+
+
+@pytest.fixture
+def stores(tmp_path):
+    json_store = JsonFileRecordStore(str(tmp_path / "json"))
+    sqlite_store = SQLiteRecordStore(str(tmp_path / "records.db"), legacy_dir=str(tmp_path / "legacy"))
+    return json_store, sqlite_store
+
+
+def test_sqlite_matches_json_engine(stores):
+    rng = random.Random(11)
+    names = ['Smith', 'Jones', 'O"Brien', 'Patel', 'smithson']
+    records = [{'id': i, 'patient_name': rng.choice(names) + f' {i}',
+                'reason': rng.choice(['no show', 'late', 'Unwell'])} for i in range(200)]
+    for store in stores:
+        for record in records:
+            store.append('dna_cases_jo', dict(record))
+        store.replace('dna_cases_jo', 5, {'id': 5, 'patient_name': 'Replaced', 'reason': 'late'})
+        store.delete('dna_cases_jo', 7)
+        store.save('settings_jo', {'theme': 'dark'})
+
+    json_store, sqlite_store = stores
+    assert sqlite_store.load('dna_cases_jo') == json_store.load('dna_cases_jo')
+    assert sqlite_store.load('settings_jo') == json_store.load('settings_jo') == {'theme': 'dark'}
+    assert sqlite_store.get('dna_cases_jo', 5) == json_store.get('dna_cases_jo', 5)
+    for term in ['smith', 'SMITH 1', 'o"b', 'un', 'x', '12']:
+        for fields in (None, ['patient_name'], ['reason']):
+            assert sqlite_store.search('dna_cases_jo', term, fields) == json_store.search('dna_cases_jo', term, fields)
+
+
+def test_legacy_file_imported_on_first_use(tmp_path):
+    legacy = JsonFileRecordStore(str(tmp_path / "legacy"))
+    legacy.save('transfers_jo', [{'id': 'T1', 'patient_name': 'Smith'}])
+
+    store = SQLiteRecordStore(str(tmp_path / "records.db"), legacy_dir=str(tmp_path / "legacy"))
+    assert store.load('transfers_jo') == [{'id': 'T1', 'patient_name': 'Smith'}]
+    assert store.search('transfers_jo', 'smi') == [{'id': 'T1', 'patient_name': 'Smith'}]
+
+
+def test_reading_unsaved_collection_takes_no_write_lock(stores, tmp_path):
+    _, store = stores
+    writer = sqlite3.connect(str(tmp_path / "records.db"), timeout=0, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        store._connection().execute('PRAGMA busy_timeout = 0')
+        assert store.load('patient_choice_jo', []) == []
+        assert store.search('patient_choice_jo', 'smith') == []
+    finally:
+        writer.execute('ROLLBACK')
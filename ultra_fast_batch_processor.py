@@ -19,6 +19,8 @@ import pandas as pd
 from dataclasses import dataclass
 import time
 
+from shared_memory_frame import SharedFrame, SharedFrameSpec, attach_shard
+
 @dataclass
 class UltraFastResult:
     """Ultra-fast validation result"""
@@ -57,21 +59,23 @@ class UltraFastBatchProcessor:
         
         print(f"⚡ Processing {len(patients_df):,} patients...")
         
-        # Chunk data for parallel processing
-        chunk_size = max(1000, len(patients_df) // self.num_workers)
-        chunks = [patients_df[i:i+chunk_size] for i in range(0, len(patients_df), chunk_size)]
-        
-        print(f"📦 Split into {len(chunks)} chunks of ~{chunk_size:,} patients each")
+        # Place the parsed columns in shared memory once - workers attach to
+        # their own row range instead of receiving a pickled copy of a chunk
+        patients_df = patients_df.reset_index(drop=True)
+        loop = asyncio.get_running_loop()
         
-        # Process chunks in parallel
-        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
-            # Submit all chunks
-            futures = [executor.submit(self._validate_chunk_vectorized, chunk) for chunk in chunks]
+        with SharedFrame(patients_df) as frame:
+            # Several shards per worker, but no smaller than ~1,000 patients
+            shards = frame.shard_bounds(min(self.num_workers * 4, max(1, len(patients_df) // 1000)))
+            
+            print(f"📦 Split into {len(shards)} shared-memory shards of ~{len(patients_df) // max(len(shards), 1):,} patients each")
             
-            # Collect results as they complete
-            results = []
-            for future in futures:
-                results.append(future.result())
+            # Process shards in parallel
+            with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+                results = await asyncio.gather(*[
+                    loop.run_in_executor(executor, _validate_shared_shard, frame.spec, start, stop)
+                    for start, stop in shards
+                ])
         
         # Aggregate results
         total_errors = sum(r['errors'] for r in results)
@@ -156,22 +160,31 @@ class UltraFastBatchProcessor:
         """
         print("🌊 Starting STREAMING validation...")
         
-        # Read and process in chunks
+        # Read and process in chunks - only running totals are kept
         chunk_size = 10000
-        total_processed = 0
+        totals = {'processed': 0, 'errors': 0, 'fixed': 0}
         
         for chunk in pd.read_csv(csv_file, chunksize=chunk_size):
             # Process chunk immediately
             result = self._validate_chunk_vectorized(chunk)
-            total_processed += result['processed']
+            for key in totals:
+                totals[key] += int(result[key])
             
             # Callback for real-time updates
             if callback:
-                callback(total_processed, result)
+                callback(totals['processed'], result)
             
-            print(f"✅ Processed {total_processed:,} patients...", end='\r')
+            print(f"✅ Processed {totals['processed']:,} patients...", end='\r')
         
-        print(f"\n🎉 Streaming complete! Total: {total_processed:,} patients")
+        print(f"\n🎉 Streaming complete! Total: {totals['processed']:,} patients")
+        
+        return totals
+
+
+def _validate_shared_shard(spec: SharedFrameSpec, start: int, stop: int) -> Dict[str, Any]:
+    """Process-pool entry point: validate rows [start, stop) of a SharedFrame"""
+    with attach_shard(spec, start, stop) as shard:
+        return UltraFastBatchProcessor._validate_chunk_vectorized(shard)
 
 
 class GPUAcceleratedValidator:
@@ -27,43 +27,161 @@ SUPABASE_ENABLED = False
 
 # Import from all modules - with fallbacks
 try:
-    from ptl_system import get_all_patients as get_ptl_patients
+    from ptl_system import get_all_patients as get_ptl_patients, get_patients_by_ids as get_ptl_patients_by_ids, is_admin_or_supervisor
 except:
     def get_ptl_patients(): return []
+    def get_ptl_patients_by_ids(ids): return []
+    def is_admin_or_supervisor(): return False
 
 try:
-    from cancer_pathway_system import get_all_cancer_patients
+    from cancer_pathway_system import get_all_cancer_patients, get_cancer_patients_by_ids
 except:
     def get_all_cancer_patients(): return []
+    def get_cancer_patients_by_ids(ids): return []
 
 try:
-    from mdt_coordination_system import get_all_mdt_meetings
+    from mdt_coordination_system import get_all_mdt_meetings, get_mdt_meetings_by_ids
 except:
     def get_all_mdt_meetings(): return []
+    def get_mdt_meetings_by_ids(ids): return []
 
 try:
-    from advanced_booking_system import load_appointments
+    from advanced_booking_system import load_appointments, get_appointments_by_ids
 except:
     def load_appointments(): return {'appointments': []}
+    def get_appointments_by_ids(ids): return []
+
+try:
+    from patient_index import get_patient_index, normalize_nhs_number, record_id_of
+    PATIENT_INDEX_ENABLED = True
+except:
+    PATIENT_INDEX_ENABLED = False
+
+    def normalize_nhs_number(nhs_number: str) -> str:
+        """Normalize NHS number for comparison (remove spaces, hyphens)"""
+        if not nhs_number:
+            return ""
+        return ''.join(filter(str.isdigit, str(nhs_number)))
+
+
+PATIENT_SOURCES = {
+    'ptl': ('PTL', lambda: get_ptl_patients()),
+    'cancer': ('Cancer', lambda: get_all_cancer_patients()),
+    'mdt': ('MDT', lambda: get_all_mdt_meetings()),
+    'appointments': ('Appointments', lambda: load_appointments().get('appointments', []))
+}
 
 
-def normalize_nhs_number(nhs_number: str) -> str:
-    """Normalize NHS number for comparison (remove spaces, hyphens)"""
-    if not nhs_number:
-        return ""
-    return ''.join(filter(str.isdigit, str(nhs_number)))
+# Fetch only the records with these ids (by-id queries in Supabase mode)
+PATIENT_RECORD_FETCHERS = {
+    'ptl': lambda ids: get_ptl_patients_by_ids(ids),
+    'cancer': lambda ids: get_cancer_patients_by_ids(ids),
+    'mdt': lambda ids: get_mdt_meetings_by_ids(ids),
+    'appointments': lambda ids: get_appointments_by_ids(ids)
+}
+
+
+def scan_patient_sources(modules: List[str] = None) -> Dict[str, List[Dict]]:
+    """Load every record the current user can see from these modules (default: all four)"""
+    sources = {module: [] for module in PATIENT_SOURCES}
+    
+    for module in modules if modules is not None else PATIENT_SOURCES:
+        label, load = PATIENT_SOURCES[module]
+        try:
+            sources[module] = load()
+        except Exception as e:
+            print(f"⚠️ Error searching {label}: {e}")
+    
+    return sources
+
+
+def ensure_patient_index():
+    """Index the current user's records from a full scan if not done recently"""
+    index = get_patient_index()
+    user_email = get_current_user_email()
+    
+    if index.is_fresh(user_email):
+        return index
+    
+    # PTL, cancer and MDT loaders return every user's records to supervisors;
+    # appointments are always the user's own
+    everyone = is_admin_or_supervisor()
+    sources = scan_patient_sources()
+    for module, records in sources.items():
+        index.rebuild(module, records, user_email, everyone=everyone and module != 'appointments')
+    index.mark_built(user_email)
+    print(f"✅ Patient index built for {user_email}")
+    return index
+
+
+def fetch_patient_records(module: str, record_ids: List[str]) -> List[Dict]:
+    """
+    A module's records with these ids, in index (module) order
+    
+    Ids the index made up for records without one ('#...') can only be
+    found by loading the module; ids of since-deleted records just return
+    nothing.
+    """
+    label, _ = PATIENT_SOURCES[module]
+    if any(record_id.startswith('#') for record_id in record_ids):
+        return scan_patient_sources([module])[module]
+    
+    try:
+        records = PATIENT_RECORD_FETCHERS[module](list(dict.fromkeys(record_ids)))
+    except Exception as e:
+        print(f"⚠️ Error searching {label}: {e}")
+        return []
+    
+    position = {record_id: i for i, record_id in enumerate(record_ids)}
+    return sorted(records, key=lambda record: position.get(record_id_of(module, record), len(position)))
+
+
+def indexed_patient_sources(nhs_number: str) -> Optional[Dict[str, List[Dict]]]:
+    """
+    This patient's records, fetched by the ids the patient index holds
+    (None if the index is unavailable)
+    
+    The index holds ids, not records, so the records come from the modules
+    themselves - by id, and only from the modules that have the patient.
+    """
+    if not PATIENT_INDEX_ENABLED:
+        return None
+    
+    try:
+        index = ensure_patient_index()
+        user_email = get_current_user_email()
+        shared = None if is_admin_or_supervisor() else user_email
+        record_ids = index.lookup(nhs_number, owners={
+            'ptl': shared,
+            'cancer': shared,
+            'mdt': shared,
+            'appointments': user_email
+        })
+    except Exception as e:
+        print(f"⚠️ Patient index unavailable, scanning modules: {e}")
+        return None
+    
+    return {module: fetch_patient_records(module, ids) if ids else []
+            for module, ids in record_ids.items()}
 
 
 def find_patient_by_nhs(nhs_number: str) -> Dict:
     """
     Find patient across ALL modules by NHS number
     Returns unified patient record with data from all sources
+    
+    Reads only this patient's records from the patient index; falls back
+    to scanning every module if the index can't be used.
     """
     nhs = normalize_nhs_number(nhs_number)
     
     if not nhs:
         return None
     
+    sources = indexed_patient_sources(nhs)
+    if sources is None:
+        sources = scan_patient_sources()
+    
     unified_record = {
         'nhs_number': nhs_number,
         'patient_name': '',
@@ -77,8 +195,7 @@ def find_patient_by_nhs(nhs_number: str) -> Dict:
     
     # Search PTL
     try:
-        ptl_patients = get_ptl_patients()
-        for patient in ptl_patients:
+        for patient in sources['ptl']:
             if normalize_nhs_number(patient.get('nhs_number', '')) == nhs:
                 unified_record['ptl_record'] = patient
                 unified_record['patient_name'] = patient.get('patient_name', '')
@@ -97,8 +214,7 @@ def find_patient_by_nhs(nhs_number: str) -> Dict:
     
     # Search Cancer Pathways
     try:
-        cancer_patients = get_all_cancer_patients()
-        for patient in cancer_patients:
+        for patient in sources['cancer']:
             if normalize_nhs_number(patient.get('nhs_number', '')) == nhs:
                 unified_record['cancer_record'] = patient
                 if not unified_record['patient_name']:
@@ -127,8 +243,7 @@ def find_patient_by_nhs(nhs_number: str) -> Dict:
     
     # Search MDT Meetings
     try:
-        all_meetings = get_all_mdt_meetings()
-        for meeting in all_meetings:
+        for meeting in sources['mdt']:
             patients = meeting.get('patients_discussed') or meeting.get('patients', [])
             for patient in patients:
                 if normalize_nhs_number(patient.get('nhs_number', '')) == nhs:
@@ -168,9 +283,7 @@ def find_patient_by_nhs(nhs_number: str) -> Dict:
     
     # Search Appointments
     try:
-        appointments_data = load_appointments()
-        appointments = appointments_data.get('appointments', [])
-        for appt in appointments:
+        for appt in sources['appointments']:
             if normalize_nhs_number(appt.get('nhs_number', '')) == nhs:
                 unified_record['appointments'].append(appt)
                 
@@ -36,6 +36,8 @@ def render_unified_patient_search():
             
             if results:
                 st.markdown(f"### Found {len(results)} patient(s)")
+                if len(results) > 20:
+                    st.caption(f"Showing the first 20 of {len(results)} - refine the search to narrow it down")
                 
                 for result in results[:20]:  # Limit to 20 results
                     with st.expander(f"👤 {result['patient_name']} (NHS: {result['nhs_number']})"):
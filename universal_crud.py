@@ -1,13 +1,13 @@
 """
 UNIVERSAL CRUD SYSTEM
 Provides Create, Read, Update, Delete functionality for all modules
+Records are kept in the shared record store (record_store.py)
 """
 
 import streamlit as st
-import json
-import os
 from datetime import datetime
 import pandas as pd
+from record_store import get_record_store
 
 def get_user_email_safe():
     """Get current user's email in file-safe format"""
@@ -15,6 +15,13 @@ def get_user_email_safe():
         return st.session_state.user_email.replace('@', '_at_').replace('.', '_')
     return 'anonymous'
 
+def _collection(module_name):
+    """Record store collection for a module's data for the current user"""
+    return f"{module_name}_{get_user_email_safe()}"
+
+def _meta(module_name):
+    return {'module': module_name, 'user': st.session_state.get('user_email', 'unknown')}
+
 def create_record(module_name, record_data):
     """
     Create a new record in a module's data store
@@ -26,15 +33,6 @@ def create_record(module_name, record_data):
     Returns:
         bool: Success status
     """
-    email_safe = get_user_email_safe()
-    filename = f"data/{module_name}_{email_safe}.json"
-    
-    # Ensure data directory exists
-    os.makedirs("data", exist_ok=True)
-    
-    # Load existing records
-    records = read_all_records(module_name)
-    
     # Add timestamp and ID if not present
     if 'id' not in record_data:
         record_data['id'] = f"{module_name}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
@@ -43,21 +41,9 @@ def create_record(module_name, record_data):
     if 'updated_at' not in record_data:
         record_data['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    # Append new record
-    records.append(record_data)
-    
-    # Save to file
-    save_data = {
-        'module': module_name,
-        'user': st.session_state.get('user_email', 'unknown'),
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'total_records': len(records),
-        'data': records
-    }
-    
+    # Append new record (one row, not a rewrite of the module's data)
     try:
-        with open(filename, 'w') as f:
-            json.dump(save_data, f, indent=2)
+        get_record_store().append(_collection(module_name), record_data, _meta(module_name))
         return True
     except Exception as e:
         st.error(f"Error saving: {e}")
@@ -74,22 +60,14 @@ def read_all_records(module_name, default=None):
     Returns:
         list: List of records
     """
-    email_safe = get_user_email_safe()
-    filename = f"data/{module_name}_{email_safe}.json"
-    
     if default is None:
         default = []
     
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r') as f:
-                loaded = json.load(f)
-                return loaded.get('data', default)
-        except Exception as e:
-            st.warning(f"Error loading data: {e}")
-            return default
-    
-    return default
+    try:
+        return get_record_store().load(_collection(module_name), default)
+    except Exception as e:
+        st.warning(f"Error loading data: {e}")
+        return default
 
 def read_record_by_id(module_name, record_id):
     """
@@ -102,13 +80,11 @@ def read_record_by_id(module_name, record_id):
     Returns:
         dict: Record data or None if not found
     """
-    records = read_all_records(module_name)
-    
-    for record in records:
-        if record.get('id') == record_id:
-            return record
-    
-    return None
+    try:
+        return get_record_store().get(_collection(module_name), record_id)
+    except Exception as e:
+        st.warning(f"Error loading data: {e}")
+        return None
 
 def update_record(module_name, record_id, updated_data):
     """
@@ -122,37 +98,19 @@ def update_record(module_name, record_id, updated_data):
     Returns:
         bool: Success status
     """
-    records = read_all_records(module_name)
+    record = read_record_by_id(module_name, record_id)
+    if record is None:
+        return False
     
-    for i, record in enumerate(records):
-        if record.get('id') == record_id:
-            # Update the record
-            updated_data['id'] = record_id  # Preserve ID
-            updated_data['created_at'] = record.get('created_at')  # Preserve creation time
-            updated_data['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            records[i] = updated_data
-            
-            # Save back
-            email_safe = get_user_email_safe()
-            filename = f"data/{module_name}_{email_safe}.json"
-            
-            save_data = {
-                'module': module_name,
-                'user': st.session_state.get('user_email', 'unknown'),
-                'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'total_records': len(records),
-                'data': records
-            }
-            
-            try:
-                with open(filename, 'w') as f:
-                    json.dump(save_data, f, indent=2)
-                return True
-            except Exception as e:
-                st.error(f"Error updating: {e}")
-                return False
+    updated_data['id'] = record_id  # Preserve ID
+    updated_data['created_at'] = record.get('created_at')  # Preserve creation time
+    updated_data['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    return False
+    try:
+        return get_record_store().replace(_collection(module_name), record_id, updated_data, _meta(module_name))
+    except Exception as e:
+        st.error(f"Error updating: {e}")
+        return False
 
 def delete_record(module_name, record_id):
     """
@@ -165,31 +123,9 @@ def delete_record(module_name, record_id):
     Returns:
         bool: Success status
     """
-    records = read_all_records(module_name)
-    
-    # Filter out the record to delete
-    new_records = [r for r in records if r.get('id') != record_id]
-    
-    if len(new_records) == len(records):
-        # Record not found
-        return False
-    
-    # Save updated list
-    email_safe = get_user_email_safe()
-    filename = f"data/{module_name}_{email_safe}.json"
-    
-    save_data = {
-        'module': module_name,
-        'user': st.session_state.get('user_email', 'unknown'),
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'total_records': len(new_records),
-        'data': new_records
-    }
-    
     try:
-        with open(filename, 'w') as f:
-            json.dump(save_data, f, indent=2)
-        return True
+        # False if the record was not found
+        return get_record_store().delete(_collection(module_name), record_id, _meta(module_name)) > 0
     except Exception as e:
         st.error(f"Error deleting: {e}")
         return False
@@ -206,29 +142,12 @@ def search_records(module_name, search_term, search_fields=None):
     Returns:
         list: Matching records
     """
-    records = read_all_records(module_name)
-    
-    if not search_term:
-        return records
-    
-    search_term = search_term.lower()
-    results = []
-    
-    for record in records:
-        if search_fields:
-            # Search only specified fields
-            for field in search_fields:
-                if field in record:
-                    if search_term in str(record[field]).lower():
-                        results.append(record)
-                        break
-        else:
-            # Search all fields
-            record_str = json.dumps(record).lower()
-            if search_term in record_str:
-                results.append(record)
-    
-    return results
+    try:
+        # Served from the store's search index where it has one
+        return get_record_store().search(_collection(module_name), search_term, search_fields)
+    except Exception as e:
+        st.warning(f"Error loading data: {e}")
+        return []
 
 def render_record_table(records, columns_to_show=None, show_actions=True):
     """
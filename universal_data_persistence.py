@@ -1,12 +1,11 @@
 """
 UNIVERSAL DATA PERSISTENCE SYSTEM
 Ensures ALL module data persists across sessions for each user
+Data is kept in the shared record store (record_store.py)
 """
 
-import json
-import os
-from datetime import datetime
 import streamlit as st
+from record_store import get_record_store
 
 def get_user_email_safe():
     """Get current user's email in file-safe format"""
@@ -14,6 +13,13 @@ def get_user_email_safe():
         return st.session_state.user_email.replace('@', '_at_').replace('.', '_')
     return 'anonymous'
 
+def _collection(module_name):
+    """Record store collection for a module's data for the current user"""
+    return f"{module_name}_{get_user_email_safe()}"
+
+def _meta(module_name):
+    return {'module': module_name, 'user': st.session_state.get('user_email', 'unknown')}
+
 def save_user_data(module_name, data):
     """
     Save data for a specific module and user
@@ -22,23 +28,8 @@ def save_user_data(module_name, data):
         module_name: Name of module (e.g., 'cancer_patients', 'dna_cases')
         data: Data to save (list or dict)
     """
-    email_safe = get_user_email_safe()
-    filename = f"data/{module_name}_{email_safe}.json"
-    
-    # Ensure data directory exists
-    os.makedirs("data", exist_ok=True)
-    
-    # Add metadata
-    save_data = {
-        'module': module_name,
-        'user': st.session_state.get('user_email', 'unknown'),
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'data': data
-    }
-    
     try:
-        with open(filename, 'w') as f:
-            json.dump(save_data, f, indent=2)
+        get_record_store().save(_collection(module_name), data, _meta(module_name))
         return True
     except Exception as e:
         st.error(f"Error saving data: {e}")
@@ -50,27 +41,19 @@ def load_user_data(module_name, default=None):
     
     Args:
         module_name: Name of module (e.g., 'cancer_patients', 'dna_cases')
-        default: Default value if file doesn't exist
+        default: Default value if nothing has been saved
     
     Returns:
         Loaded data or default value
     """
-    email_safe = get_user_email_safe()
-    filename = f"data/{module_name}_{email_safe}.json"
-    
     if default is None:
         default = []
     
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r') as f:
-                loaded = json.load(f)
-                return loaded.get('data', default)
-        except Exception as e:
-            st.warning(f"Error loading data: {e}")
-            return default
-    
-    return default
+    try:
+        return get_record_store().load(_collection(module_name), default)
+    except Exception as e:
+        st.warning(f"Error loading data: {e}")
+        return default
 
 def append_user_data(module_name, new_item):
     """
@@ -80,13 +63,12 @@ def append_user_data(module_name, new_item):
         module_name: Name of module
         new_item: New item to append (dict)
     """
-    current_data = load_user_data(module_name, default=[])
-    
-    if not isinstance(current_data, list):
-        current_data = [current_data]
-    
-    current_data.append(new_item)
-    return save_user_data(module_name, current_data)
+    try:
+        get_record_store().append(_collection(module_name), new_item, _meta(module_name))
+        return True
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+        return False
 
 def update_user_data_item(module_name, item_id, updated_item, id_field='id'):
     """
@@ -98,14 +80,12 @@ def update_user_data_item(module_name, item_id, updated_item, id_field='id'):
         updated_item: Updated item data
         id_field: Field name used as ID
     """
-    current_data = load_user_data(module_name, default=[])
-    
-    for i, item in enumerate(current_data):
-        if item.get(id_field) == item_id:
-            current_data[i] = updated_item
-            return save_user_data(module_name, current_data)
-    
-    return False
+    try:
+        return get_record_store().replace(_collection(module_name), item_id, updated_item,
+                                          _meta(module_name), id_field=id_field)
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+        return False
 
 def delete_user_data_item(module_name, item_id, id_field='id'):
     """
@@ -116,27 +96,22 @@ def delete_user_data_item(module_name, item_id, id_field='id'):
         item_id: ID of item to delete
         id_field: Field name used as ID
     """
-    current_data = load_user_data(module_name, default=[])
-    
-    current_data = [item for item in current_data if item.get(id_field) != item_id]
-    
-    return save_user_data(module_name, current_data)
+    try:
+        store = get_record_store()
+        collection = _collection(module_name)
+        if not store.delete(collection, item_id, _meta(module_name), id_field=id_field) \
+                and store.load(collection) is None:
+            store.save(collection, [], _meta(module_name))  # as before: an empty list is saved
+        return True
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+        return False
 
 def get_all_user_modules():
     """Get list of all modules user has data for"""
-    email_safe = get_user_email_safe()
-    data_dir = "data"
-    
-    if not os.path.exists(data_dir):
-        return []
-    
-    user_files = []
-    for filename in os.listdir(data_dir):
-        if filename.endswith(f"_{email_safe}.json"):
-            module_name = filename.replace(f"_{email_safe}.json", "")
-            user_files.append(module_name)
+    suffix = f"_{get_user_email_safe()}"
     
-    return user_files
+    return [name[:-len(suffix)] for name in get_record_store().collections() if name.endswith(suffix)]
 
 # Module-specific helpers
 def save_cancer_patients(patients):